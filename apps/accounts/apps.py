@@ -4,3 +4,5 @@ class AccountsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.accounts"
 
+    def ready(self):
+        from apps.accounts import signals  # noqa: F401
@@ -0,0 +1,28 @@
+from asgiref.sync import sync_to_async
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+
+async def aauthenticate(request):
+    """
+    Async counterpart of the REST_FRAMEWORK authentication classes for plain
+    async views: a JWT bearer token first, then the Django session.
+
+    Returns the user or None; raises rest_framework AuthenticationFailed /
+    InvalidToken for a bad token, as JWTAuthentication does.
+    """
+    jwt = JWTAuthentication()
+    header = jwt.get_header(request)
+    if header is not None:
+        raw_token = jwt.get_raw_token(header)
+        if raw_token is not None:
+            validated = jwt.get_validated_token(raw_token)  # signature + expiry only, no database
+            return await sync_to_async(jwt.get_user)(validated)
+
+    user = await request.auser()
+    if user is None or not user.is_active:
+        return None
+    return user
+
+
+def authenticate_header(request) -> str:
+    return JWTAuthentication().authenticate_header(request)
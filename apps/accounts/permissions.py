@@ -1,3 +1,5 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework.permissions import BasePermission, SAFE_METHODS
 from apps.accounts.models import UserRole
 
@@ -6,10 +8,46 @@ from apps.accounts.models import UserRole
 # Role helpers
 # ------------------------------------------------------------
 
+# Bumped by apps.accounts.signals whenever a UserRole / Role changes, so a
+# user object that outlives a role change does not keep stale codes.
+_role_version = 0
+
+
+def invalidate_role_codes() -> None:
+    global _role_version
+    _role_version += 1
+
+
 def user_role_codes(user):
+    """
+    Role codes of a user. Memoised on the user object (one query per request
+    instead of one per permission check / scope filter).
+    """
+    if not user or not user.is_authenticated:
+        return []
+    cached = getattr(user, "_role_codes_cache", None)
+    if cached is not None and cached[0] == _role_version:
+        return list(cached[1])
+    codes = list(UserRole.objects.filter(user=user).values_list("role__code", flat=True))
+    user._role_codes_cache = (_role_version, tuple(codes))
+    return codes
+
+
+async def auser_role_codes(user):
+    """
+    Async user_role_codes(), sharing the same memo: once awaited, the sync
+    permission classes below run without touching the database, so they are
+    safe to call from async views.
+    """
     if not user or not user.is_authenticated:
         return []
-    return list(UserRole.objects.filter(user=user).values_list("role__code", flat=True))
+    cached = getattr(user, "_role_codes_cache", None)
+    if cached is not None and cached[0] == _role_version:
+        return list(cached[1])
+    version = _role_version
+    codes = [code async for code in UserRole.objects.filter(user=user).values_list("role__code", flat=True)]
+    user._role_codes_cache = (version, tuple(codes))
+    return codes
 
 
 def has_role(user, *codes: str) -> bool:
@@ -89,24 +127,52 @@ class RegionScopedQueryMixin:
 
     Assumes:
     - ViewSet defines: region_field = "employee__employments__region"
+      (and optionally department_field for ?department= subtree filtering)
     - HO roles can see all regions:
       SYSTEM_ADMIN, CEO, HR_HO, DIRECTOR_HR
     - Otherwise:
       if user has an employee record + ACTIVE employment => limit to that region
+
+    Scope mode (settings.SUPERVISOR_SCOPE or a `supervisor_scope` attribute):
+    - "region" (default): as above
+    - "reporting_line": non-HO users only see their own reporting subtree
+      (themselves + everyone under them), via one join on the ReportingLine
+      closure table. Needs `reporting_field`, the Employee FK path
+      ("employee"; "" when the queryset is Employee itself).
     """
 
     HO_ROLES = {"SYSTEM_ADMIN", "CEO", "HR_HO", "DIRECTOR_HR"}
 
-    def scope_queryset(self, qs, request):
+    def is_ho_user(self, user) -> bool:
+        return bool(set(user_role_codes(user)).intersection(self.HO_ROLES))
+
+    def scope_mode(self) -> str:
+        return getattr(self, "supervisor_scope", None) or getattr(settings, "SUPERVISOR_SCOPE", "region")
+
+    def scope_queryset(self, qs, request, **fields):
+        """
+        `fields` may override region_field / reporting_field, to scope a
+        related model (e.g. sync tombstones) under the view's rules.
+        """
         user = request.user
         if not user or not user.is_authenticated:
             return qs.none()
 
-        roles = set(user_role_codes(user))
-        if roles.intersection(self.HO_ROLES):
+        if self.is_ho_user(user):
             return qs
 
-        region_field = getattr(self, "region_field", None)
+        scope = self.scope_mode()
+        reporting_field = fields.get("reporting_field", getattr(self, "reporting_field", None))
+        if scope == "reporting_line" and reporting_field is not None:
+            employee = getattr(user, "employee", None)
+            if not employee:
+                return qs.none()
+
+            from apps.employees.services import filter_by_reporting_line
+
+            return filter_by_reporting_line(qs, employee.id, field=reporting_field)
+
+        region_field = fields.get("region_field", getattr(self, "region_field", None))
         if not region_field:
             return qs.none()
 
@@ -125,6 +191,63 @@ class RegionScopedQueryMixin:
         # NOTE: region_field typically points to a FK field, so compare by id safely.
         return qs.filter(**{f"{region_field}__id": active.region_id})
 
+    async def ascope_queryset(self, qs, request):
+        """scope_queryset() for async views: same rules, async ORM lookups."""
+        user = request.user
+        if not user or not user.is_authenticated:
+            return qs.none()
+
+        roles = set(await auser_role_codes(user))
+        if roles.intersection(self.HO_ROLES):
+            return qs
+
+        from apps.employees.models import Employee, Employment
+
+        scope = self.scope_mode()
+        reporting_field = getattr(self, "reporting_field", None)
+        if scope == "reporting_line" and reporting_field is not None:
+            employee_id = await Employee.objects.filter(user=user).values_list("id", flat=True).afirst()
+            if not employee_id:
+                return qs.none()
+
+            from apps.employees.services import filter_by_reporting_line
+
+            return filter_by_reporting_line(qs, employee_id, field=reporting_field)
+
+        region_field = getattr(self, "region_field", None)
+        if not region_field:
+            return qs.none()
+
+        region_id = await (
+            Employment.objects.filter(employee__user=user, status="ACTIVE")
+            .order_by("-created_at")
+            .values_list("region_id", flat=True)
+            .afirst()
+        )
+        if not region_id:
+            return qs.none()
+
+        return qs.filter(**{f"{region_field}__id": region_id})
+
+    def filter_department_subtree(self, qs, request):
+        """
+        Optional ?department=<uuid> filter covering the department and all
+        of its sub-units (closure-table join). Needs `department_field`,
+        e.g. "employee__employments__department".
+        """
+        params = getattr(request, "query_params", None) or getattr(request, "GET", {})
+        department_id = params.get("department")
+        department_field = getattr(self, "department_field", None)
+        if not department_id or not department_field:
+            return qs
+
+        from apps.org.services import filter_by_department_subtree
+
+        try:
+            return filter_by_department_subtree(qs, department_id, field=department_field)
+        except (ValueError, DjangoValidationError):
+            return qs.none()
+
 
 # ------------------------------------------------------------
 # Backward compatibility (older modules still import this)
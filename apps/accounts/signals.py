@@ -0,0 +1,13 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.accounts.models import Role, UserRole
+from apps.accounts.permissions import invalidate_role_codes
+
+
+@receiver(post_save, sender=UserRole)
+@receiver(post_delete, sender=UserRole)
+@receiver(post_save, sender=Role)
+@receiver(post_delete, sender=Role)
+def role_codes_changed(sender, **kwargs):
+    invalidate_role_codes()
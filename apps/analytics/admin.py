@@ -0,0 +1,33 @@
+from django.contrib import admin
+
+from apps.analytics.models import DashboardCounter, HeadcountSnapshotRun, HeadcountSpan, StepDwell, StepDwellDaily
+
+
+@admin.register(StepDwell)
+class StepDwellAdmin(admin.ModelAdmin):
+    list_display = ("workflow", "step_order", "region", "leave_type", "outcome", "seconds", "exited_at")
+    list_filter = ("workflow", "outcome")
+
+
+@admin.register(StepDwellDaily)
+class StepDwellDailyAdmin(admin.ModelAdmin):
+    list_display = ("day", "workflow", "step_order", "region", "leave_type", "count", "total_seconds")
+    list_filter = ("workflow",)
+
+
+@admin.register(DashboardCounter)
+class DashboardCounterAdmin(admin.ModelAdmin):
+    list_display = ("metric", "region", "department", "day", "value")
+    list_filter = ("metric",)
+
+
+@admin.register(HeadcountSpan)
+class HeadcountSpanAdmin(admin.ModelAdmin):
+    list_display = ("region", "department", "grade", "staff_category", "headcount", "valid_from", "valid_to")
+    list_filter = ("staff_category", "region")
+
+
+@admin.register(HeadcountSnapshotRun)
+class HeadcountSnapshotRunAdmin(admin.ModelAdmin):
+    list_display = ("day", "kind", "changed_cells", "created_at")
+    list_filter = ("kind",)
@@ -0,0 +1,102 @@
+from django.utils import timezone
+from rest_framework import serializers, viewsets
+from rest_framework.response import Response
+
+from apps.accounts.permissions import IsHRorCEOReadOnly, IsSystemAdmin
+from apps.analytics.cycle_times import GROUP_BY, cycle_time_report
+from apps.analytics import headcount
+from apps.analytics.dashboard import dashboard
+from apps.common.profiling import ProfiledViewMixin
+
+
+class CycleTimeQuerySerializer(serializers.Serializer):
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    workflow = serializers.CharField(required=False)
+    region = serializers.UUIDField(required=False)
+    leave_type = serializers.CharField(required=False)
+    group_by = serializers.CharField(required=False, default=",".join(GROUP_BY))
+
+    def validate_group_by(self, value):
+        fields = [f.strip() for f in value.split(",") if f.strip()]
+        unknown = set(fields) - set(GROUP_BY)
+        if unknown or not fields:
+            raise serializers.ValidationError(f"Use a comma separated subset of: {', '.join(GROUP_BY)}")
+        return tuple(f for f in GROUP_BY if f in fields)
+
+
+class ApprovalCycleTimeViewSet(ProfiledViewMixin, viewsets.ViewSet):
+    """
+    Time spent at each approval step: count, avg / p90 / max hours grouped
+    by ?group_by= (month, workflow, step, region, leave_type by default).
+    Reads only the daily rollups (apps.analytics.cycle_times).
+    """
+
+    permission_classes = [IsSystemAdmin | IsHRorCEOReadOnly]
+
+    def list(self, request):
+        query = CycleTimeQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        filters = dict(query.validated_data)
+        group_by = filters.pop("group_by")
+        return Response({"group_by": list(group_by), "results": cycle_time_report(filters, group_by)})
+
+
+class DashboardViewSet(ProfiledViewMixin, viewsets.ViewSet):
+    """
+    HR / CEO dashboard tiles (pending approvals, staff on leave today, leave
+    by status this year), overall and per region and department, read from
+    the precomputed counters (apps.analytics.dashboard) in one query.
+    """
+
+    permission_classes = [IsSystemAdmin | IsHRorCEOReadOnly]
+
+    def list(self, request):
+        return Response(dashboard())
+
+
+class HeadcountQuerySerializer(serializers.Serializer):
+    date_from = serializers.DateField()
+    date_to = serializers.DateField(required=False)
+    interval = serializers.ChoiceField(choices=headcount.INTERVALS, default="month")
+    group_by = serializers.CharField(required=False, default="")
+    region = serializers.UUIDField(required=False)
+    department = serializers.UUIDField(required=False)
+    grade = serializers.UUIDField(required=False)
+    staff_category = serializers.CharField(required=False)
+
+    def validate_group_by(self, value):
+        fields = [f.strip() for f in value.split(",") if f.strip()]
+        if set(fields) - set(headcount.GROUP_BY):
+            raise serializers.ValidationError(f"Use a comma separated subset of: {', '.join(headcount.GROUP_BY)}")
+        return tuple(f for f in headcount.GROUP_BY if f in fields)
+
+    def validate(self, attrs):
+        attrs.setdefault("date_to", timezone.localdate())
+        if attrs["date_from"] > attrs["date_to"]:
+            raise serializers.ValidationError({"date_to": "Must not be before date_from."})
+        try:
+            headcount.points(attrs["date_from"], attrs["date_to"], attrs["interval"])
+        except ValueError as exc:
+            raise serializers.ValidationError({"interval": str(exc)})
+        return attrs
+
+
+class HeadcountViewSet(ProfiledViewMixin, viewsets.ViewSet):
+    """
+    Headcount time series: ?date_from=&date_to=&interval=day|month|year,
+    grouped by ?group_by= (region, department, grade, staff_category; totals
+    only by default) and filtered by the same fields. Reads only the
+    snapshot spans (apps.analytics.headcount), never Employment.
+    """
+
+    permission_classes = [IsSystemAdmin | IsHRorCEOReadOnly]
+
+    def list(self, request):
+        query = HeadcountQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = dict(query.validated_data)
+        date_from, date_to = params.pop("date_from"), params.pop("date_to")
+        interval, group_by = params.pop("interval"), params.pop("group_by")
+        series = headcount.headcount_series(date_from, date_to, interval, group_by, filters=params)
+        return Response({"interval": interval, "group_by": list(group_by), **series})
@@ -0,0 +1,289 @@
+"""
+Approval cycle times: how long requests wait at each workflow step.
+
+- Every APPROVE / REJECT / RETURN action queues "analytics.record_step_dwell"
+  (apps.analytics.signals). The job pairs the action with the APPROVE that
+  moved the request onto its step (or the request's creation for step 1),
+  stores a StepDwell fact and adds it to that day's StepDwellDaily rollup
+  row, in one transaction; a re-run finds the fact and does nothing.
+- Reports (apps.analytics.api) read only the rollups: count, total and max
+  add up across days, and p90 is estimated from the merged log-scale
+  histograms (DWELL_BUCKETS).
+- backfill() creates the facts of historical actions in chunks and then
+  rebuilds the rollups of the days it touched from the facts
+  (`manage.py backfill_cycle_times`).
+"""
+from bisect import bisect_left
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.analytics.models import StepDwell, StepDwellDaily
+from apps.leave.models import LeaveRequest
+from apps.workflows.models import ApprovalAction
+
+STEP_EXITS = ("APPROVE", "REJECT", "RETURN")
+
+# Upper bounds (hours) of the histogram buckets; one more bucket takes the rest.
+DWELL_BUCKETS = (0.25, 0.5, 1, 2, 4, 8, 12, 24, 36, 48, 72, 96, 120, 168, 240, 336, 504, 720, 1080, 1440)
+_BOUNDS = [int(hours * 3600) for hours in DWELL_BUCKETS]
+
+
+# ------------------------------------------------------------
+# Histograms
+# ------------------------------------------------------------
+
+def empty_histogram() -> list:
+    return [0] * (len(_BOUNDS) + 1)
+
+
+def bucket_of(seconds: int) -> int:
+    return bisect_left(_BOUNDS, seconds)
+
+
+def merge_histograms(into: list, other: list) -> list:
+    for i, n in enumerate(other):
+        into[i] += n
+    return into
+
+
+def percentile(histogram: list, q: float, max_seconds: int) -> float:
+    """Seconds below which a share q of the dwells fall, interpolated inside its bucket."""
+    count = sum(histogram)
+    if not count:
+        return 0.0
+    rank = q * count
+    seen = 0
+    for i, n in enumerate(histogram):
+        if n and seen + n >= rank:
+            low = _BOUNDS[i - 1] if i else 0
+            high = min(_BOUNDS[i] if i < len(_BOUNDS) else max_seconds, max_seconds)
+            low = min(low, high)
+            return low + (high - low) * (rank - seen) / n
+        seen += n
+    return float(max_seconds)
+
+
+# ------------------------------------------------------------
+# Facts
+# ------------------------------------------------------------
+
+def rollup_key(day, module, workflow, step_order, region_id, leave_type) -> str:
+    return f"{day.isoformat()}|{module}|{workflow}|{step_order}|{region_id or '-'}|{leave_type or '-'}"
+
+
+def _dims(dwell: StepDwell) -> dict:
+    return {
+        "day": timezone.localdate(dwell.exited_at),
+        "module": dwell.module,
+        "workflow": dwell.workflow,
+        "step_order": dwell.step_order,
+        "region_id": dwell.region_id,
+        "leave_type": dwell.leave_type,
+    }
+
+
+def _dwell(action: ApprovalAction, entered_at, leave_type: str) -> StepDwell:
+    approval = action.request
+    return StepDwell(
+        action=action,
+        approval=approval,
+        module=approval.module,
+        workflow=approval.request_type,
+        step_order=action.step_order,
+        region_id=approval.region_id,
+        leave_type=leave_type or "",
+        outcome=action.action,
+        entered_at=entered_at,
+        exited_at=action.created_at,
+        seconds=max(0, int((action.created_at - entered_at).total_seconds())),
+    )
+
+
+@transaction.atomic
+def record_action(action_id):
+    """Store the StepDwell ended by this action and add it to its daily rollup (idempotent)."""
+    action = ApprovalAction.objects.select_related("request").filter(id=action_id, action__in=STEP_EXITS).first()
+    if action is None or StepDwell.objects.filter(action_id=action_id).exists():
+        return None
+    approval = action.request
+
+    entered = (
+        ApprovalAction.objects
+        .filter(request_id=approval.id, action="APPROVE", step_order__lt=action.step_order)
+        .order_by("-step_order", "-created_at")
+        .values_list("created_at", flat=True)
+        .first()
+    )
+    leave_type = ""
+    if approval.module == "leave":
+        leave_type = LeaveRequest.objects.filter(id=approval.request_ref_id).values_list("leave_type", flat=True).first()
+
+    dwell = _dwell(action, entered or approval.created_at, leave_type)
+    dwell.save()
+    add_to_rollup(dwell)
+    return dwell
+
+
+def add_to_rollup(dwell: StepDwell) -> None:
+    dims = _dims(dwell)
+    row, _ = StepDwellDaily.objects.select_for_update().get_or_create(
+        key=rollup_key(**dims), defaults={**dims, "histogram": empty_histogram()},
+    )
+    row.count += 1
+    row.total_seconds += dwell.seconds
+    row.max_seconds = max(row.max_seconds, dwell.seconds)
+    row.histogram[bucket_of(dwell.seconds)] += 1
+    row.save(update_fields=["count", "total_seconds", "max_seconds", "histogram"])
+
+
+# ------------------------------------------------------------
+# Backfill
+# ------------------------------------------------------------
+
+def _day_range(day):
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, start + timedelta(days=1)
+
+
+@transaction.atomic
+def rebuild_rollups(day) -> int:
+    """Recompute one day's rollup rows from its facts; returns how many rows it has."""
+    start, end = _day_range(day)
+    groups = {}
+    rows = StepDwell.objects.filter(exited_at__gte=start, exited_at__lt=end).values_list(
+        "module", "workflow", "step_order", "region_id", "leave_type", "seconds",
+    )
+    for module, workflow, step_order, region_id, leave_type, seconds in rows.iterator(chunk_size=5000):
+        dims = {
+            "day": day, "module": module, "workflow": workflow, "step_order": step_order,
+            "region_id": region_id, "leave_type": leave_type,
+        }
+        key = rollup_key(**dims)
+        row = groups.get(key)
+        if row is None:
+            row = groups[key] = StepDwellDaily(key=key, histogram=empty_histogram(), **dims)
+        row.count += 1
+        row.total_seconds += seconds
+        row.max_seconds = max(row.max_seconds, seconds)
+        row.histogram[bucket_of(seconds)] += 1
+
+    StepDwellDaily.objects.filter(day=day).delete()
+    StepDwellDaily.objects.bulk_create(groups.values(), batch_size=500)
+    return len(groups)
+
+
+@dataclass
+class BackfillResult:
+    facts: int = 0
+    days: set = field(default_factory=set)
+
+
+def backfill(chunk_size: int = 1000, progress=None) -> BackfillResult:
+    """
+    Create the missing StepDwell facts of past actions, oldest first, in
+    chunks (four queries each, whatever the chunk size), then rebuild the
+    rollups of every day that gained facts.
+    """
+    result = BackfillResult()
+    missing = ApprovalAction.objects.filter(action__in=STEP_EXITS, dwell__isnull=True).select_related("request")
+    cursor = None
+    while True:
+        qs = missing
+        if cursor:
+            qs = qs.filter(Q(created_at__gt=cursor[0]) | Q(created_at=cursor[0], id__gt=cursor[1]))
+        chunk = list(qs.order_by("created_at", "id")[:chunk_size])
+        if not chunk:
+            break
+        cursor = (chunk[-1].created_at, chunk[-1].id)
+
+        request_ids = {action.request_id for action in chunk}
+        approvals = defaultdict(list)  # request id -> [(step order, approved at)]
+        for request_id, step_order, created_at in ApprovalAction.objects.filter(
+            request_id__in=request_ids, action="APPROVE",
+        ).values_list("request_id", "step_order", "created_at"):
+            approvals[request_id].append((step_order, created_at))
+        leave_types = dict(LeaveRequest.objects.filter(
+            id__in=[a.request.request_ref_id for a in chunk if a.request.module == "leave"],
+        ).values_list("id", "leave_type"))
+
+        facts = []
+        for action in chunk:
+            earlier = [(order, at) for order, at in approvals[action.request_id] if order < action.step_order]
+            entered = max(earlier)[1] if earlier else action.request.created_at
+            facts.append(_dwell(action, entered, leave_types.get(action.request.request_ref_id, "")))
+        StepDwell.objects.bulk_create(facts, batch_size=500, ignore_conflicts=True)
+
+        result.facts += len(facts)
+        result.days.update(timezone.localdate(f.exited_at) for f in facts)
+        if progress:
+            progress(result)
+
+    for day in sorted(result.days):
+        rebuild_rollups(day)
+    return result
+
+
+# ------------------------------------------------------------
+# Reporting
+# ------------------------------------------------------------
+
+GROUP_BY = ("month", "workflow", "step", "region", "leave_type")
+
+
+def cycle_time_report(filters: dict, group_by=GROUP_BY) -> list:
+    """
+    Count / average / p90 / max hours per group, from StepDwellDaily only
+    (one query). filters: date_from, date_to, workflow, region, leave_type.
+    """
+    qs = StepDwellDaily.objects.all()
+    if filters.get("date_from"):
+        qs = qs.filter(day__gte=filters["date_from"])
+    if filters.get("date_to"):
+        qs = qs.filter(day__lte=filters["date_to"])
+    for name in ("workflow", "leave_type"):
+        if filters.get(name):
+            qs = qs.filter(**{name: filters[name]})
+    if filters.get("region"):
+        qs = qs.filter(region_id=filters["region"])
+
+    groups = {}
+    rows = qs.values(
+        "day", "workflow", "step_order", "region_id", "region__name", "leave_type",
+        "count", "total_seconds", "max_seconds", "histogram",
+    )
+    for row in rows.iterator(chunk_size=2000):
+        values = {
+            "month": row["day"].strftime("%Y-%m"),
+            "workflow": row["workflow"],
+            "step": row["step_order"],
+            "region": row["region_id"],
+            "leave_type": row["leave_type"],
+        }
+        key = tuple(values[name] for name in group_by)
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = {
+                **{name: values[name] for name in group_by},
+                "count": 0, "total": 0, "max": 0, "histogram": empty_histogram(),
+            }
+            if "region" in group_by:
+                group["region_name"] = row["region__name"]
+        group["count"] += row["count"]
+        group["total"] += row["total_seconds"]
+        group["max"] = max(group["max"], row["max_seconds"])
+        merge_histograms(group["histogram"], row["histogram"])
+
+    report = []
+    for key in sorted(groups, key=lambda k: [(v is None, v) for v in k]):
+        group = groups[key]
+        total, top, histogram = group.pop("total"), group.pop("max"), group.pop("histogram")
+        group["avg_hours"] = round(total / group["count"] / 3600, 2)
+        group["p90_hours"] = round(percentile(histogram, 0.9, top) / 3600, 2)
+        group["max_hours"] = round(top / 3600, 2)
+        report.append(group)
+    return report
@@ -0,0 +1,337 @@
+"""
+HR dashboard counters (GET /api/analytics/dashboard/).
+
+Tiles are read from DashboardCounter rows (one small query) instead of
+aggregating LeaveRequest / ApprovalRequest / Employment per tile:
+
+- approvals_pending    PENDING approval requests, by request region
+- leave_<status>       SUBMITTED / APPROVED / REJECTED / RETURNED leave, by the
+                       employee's region and department and the leave year
+- on_leave             APPROVED leave covering a day (today onwards), by
+                       region and department
+
+apps.analytics.signals turns the difference between a row's counted state
+before and after each save / delete into a change, queued as an
+"analytics.count_dashboard_changes" job row in the same transaction. Write
+paths that touch several rows gather their changes with collect() and queue
+them as one job, or hand them to a job they queue anyway (the approval
+audit job). The worker looks up each employee's region and department once
+and applies the batch with one UPDATE of all affected counters (plus an
+insert the first time a counter is needed), so tiles trail the writes by
+the job queue's latency.
+
+The state before a save comes from remember(), which the write paths call
+before they change a row; an update of a counted field nobody remembered
+reads it back from the table first.
+
+Writes that bypass signals (queryset.update(), bulk loads, raw SQL) and
+employees changing region are corrected by reconcile(), which recomputes
+every counter with grouped queries. The "analytics.reconcile_dashboard" job
+reschedules itself every DASHBOARD_RECONCILE_SECONDS; start it once with
+`manage.py reconcile_dashboard_counters`.
+"""
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import BigIntegerField, Case, Count, F, OuterRef, Q, Subquery, UUIDField, Value, When
+from django.utils import timezone
+
+from apps.analytics.models import DashboardCounter
+from apps.common import jobs
+from apps.common.models import Job
+from apps.employees.models import Employment
+from apps.leave.models import LeaveRequest
+from apps.workflows.models import ApprovalRequest
+
+APPROVALS_PENDING = "approvals_pending"
+ON_LEAVE = "on_leave"
+LEAVE_STATUSES = ("SUBMITTED", "APPROVED", "REJECTED", "RETURNED")
+
+COUNT_DASHBOARD_CHANGES = "analytics.count_dashboard_changes"
+RECONCILE_DASHBOARD = "analytics.reconcile_dashboard"
+
+_collecting = threading.local()
+
+
+def counter_key(metric, region_id=None, department_id=None, day=None) -> str:
+    return f"{metric}|{region_id or '-'}|{department_id or '-'}|{day.isoformat() if day else '-'}"
+
+
+def _fields(key: str) -> dict:
+    metric, region_id, department_id, day = key.split("|")
+    return {
+        "metric": metric,
+        "region_id": None if region_id == "-" else region_id,
+        "department_id": None if department_id == "-" else department_id,
+        "day": None if day == "-" else date.fromisoformat(day),
+    }
+
+
+# ------------------------------------------------------------
+# What a row counts towards
+# ------------------------------------------------------------
+
+def approval_keys(state) -> list:
+    """state: (status, region_id) of an ApprovalRequest, or None."""
+    if not state or state[0] != ApprovalRequest.Status.PENDING:
+        return []
+    return [counter_key(APPROVALS_PENDING, state[1])]
+
+
+def leave_keys(state, region_id, department_id, today) -> list:
+    """state: (status, start_date, end_date) of a LeaveRequest, or None."""
+    if not state or state[0] not in LEAVE_STATUSES:
+        return []
+    status, start, end = state
+    keys = [counter_key(f"leave_{status.lower()}", region_id, department_id, date(start.year, 1, 1))]
+    if status == LeaveRequest.Status.APPROVED:
+        day = max(start, today)  # past days are never shown
+        while day <= end:
+            keys.append(counter_key(ON_LEAVE, region_id, department_id, day))
+            day += timedelta(days=1)
+    return keys
+
+
+def approval_state(approval: ApprovalRequest):
+    return (approval.status, approval.region_id)
+
+
+def leave_state(leave: LeaveRequest):
+    return (leave.status, leave.start_date, leave.end_date)
+
+
+COUNTED = {
+    ApprovalRequest: (("status", "region_id"), approval_state),
+    LeaveRequest: (("status", "start_date", "end_date"), leave_state),
+}
+
+
+def counted_state(instance):
+    """The instance's counted state, or None when one of its counted fields is deferred."""
+    fields, state = COUNTED[type(instance)]
+    if not all(f in instance.__dict__ for f in fields):
+        return None
+    return state(instance)
+
+
+def remember(instance) -> None:
+    """Note the counted state of an instance about to be changed, so its save needs no read-back."""
+    instance._dashboard_state = counted_state(instance)
+
+
+def employee_dims(employee_id):
+    """(region id, department id) of the employee's newest ACTIVE employment."""
+    return (
+        Employment.objects.filter(employee_id=employee_id, status=Employment.Status.ACTIVE)
+        .order_by("-created_at")
+        .values_list("region_id", "department_id")
+        .first()
+    ) or (None, None)
+
+
+# ------------------------------------------------------------
+# Incremental updates
+# ------------------------------------------------------------
+
+def diff(old_keys, new_keys) -> Counter:
+    deltas = Counter(new_keys)
+    deltas.subtract(Counter(old_keys))
+    return Counter({key: n for key, n in deltas.items() if n})
+
+
+def apply(deltas: Counter) -> None:
+    """
+    Add each delta to its counter in one UPDATE; counters that do not exist
+    yet are then inserted with their delta. Two transactions racing to
+    create the same counter lose one delta until the next reconcile.
+    """
+    if not deltas:
+        return
+    counters = DashboardCounter.objects.filter(key__in=list(deltas))
+    updated = counters.update(value=F("value") + Case(
+        *[When(key=key, then=Value(n)) for key, n in deltas.items()],
+        default=Value(0), output_field=BigIntegerField(),
+    ))
+    if updated < len(deltas):
+        # Rows the UPDATE already changed are skipped by the conflict clause.
+        DashboardCounter.objects.bulk_create(
+            [DashboardCounter(key=key, value=n, **_fields(key)) for key, n in deltas.items() if n > 0],
+            ignore_conflicts=True,
+        )
+
+
+@contextmanager
+def collect():
+    """Gather the changes of the saves inside the block in the yielded list instead of queuing them."""
+    changes, previous = [], getattr(_collecting, "changes", None)
+    _collecting.changes = changes
+    try:
+        yield changes
+    finally:
+        _collecting.changes = previous
+
+
+def queue(changes) -> None:
+    if changes:
+        jobs.enqueue(COUNT_DASHBOARD_CHANGES, {"changes": changes})
+
+
+def record(change: dict) -> None:
+    """Queue one change, or add it to the enclosing collect() block."""
+    changes = getattr(_collecting, "changes", None)
+    if changes is None:
+        queue([change])
+    else:
+        changes.append(change)
+
+
+def _leave_state(state):
+    if not state:
+        return None
+    status, start, end = state
+    return (status, date.fromisoformat(start), date.fromisoformat(end))
+
+
+def apply_changes(changes) -> None:
+    """
+    Apply queued changes: {"kind": "approval" | "leave", "old", "new"}, the
+    counted states as JSON (None: not counted), and for leave the employee_id
+    and the day of the write ("today").
+    """
+    deltas, dims = Counter(), {}
+    for change in changes:
+        old, new = change["old"], change["new"]
+        if change["kind"] == "approval":
+            deltas.update(diff(approval_keys(old), approval_keys(new)))
+            continue
+        employee_id = change["employee_id"]
+        if employee_id not in dims:
+            dims[employee_id] = employee_dims(employee_id)
+        today = date.fromisoformat(change["today"])
+        deltas.update(diff(
+            leave_keys(_leave_state(old), *dims[employee_id], today),
+            leave_keys(_leave_state(new), *dims[employee_id], today),
+        ))
+    apply(Counter({key: n for key, n in deltas.items() if n}))
+
+
+# ------------------------------------------------------------
+# Reconciliation
+# ------------------------------------------------------------
+
+def expected_counters(today=None) -> Counter:
+    """Every counter recomputed from the source tables."""
+    today = today or timezone.localdate()
+    expected = Counter()
+
+    pending = (
+        ApprovalRequest.objects.filter(status=ApprovalRequest.Status.PENDING)
+        .values("region_id").annotate(n=Count("id")).order_by()
+    )
+    for row in pending:
+        expected[counter_key(APPROVALS_PENDING, row["region_id"])] += row["n"]
+
+    active = Employment.objects.filter(
+        employee_id=OuterRef("employee_id"), status=Employment.Status.ACTIVE,
+    ).order_by("-created_at")
+    leave = LeaveRequest.objects.filter(status__in=LEAVE_STATUSES).annotate(
+        dim_region=Subquery(active.values("region_id")[:1], output_field=UUIDField()),
+        dim_department=Subquery(active.values("department_id")[:1], output_field=UUIDField()),
+    )
+    by_status = (
+        leave.values("status", "start_date__year", "dim_region", "dim_department").annotate(n=Count("id")).order_by()
+    )
+    for row in by_status:
+        key = counter_key(
+            f"leave_{row['status'].lower()}", row["dim_region"], row["dim_department"], date(row["start_date__year"], 1, 1),
+        )
+        expected[key] += row["n"]
+
+    current = leave.filter(status=LeaveRequest.Status.APPROVED, end_date__gte=today).values_list(
+        "start_date", "end_date", "dim_region", "dim_department",
+    )
+    for start, end, region_id, department_id in current.iterator(chunk_size=2000):
+        keys = leave_keys(("APPROVED", start, end), region_id, department_id, today)
+        for key in keys[1:]:  # the leave_approved key is already counted above
+            expected[key] += 1
+    return expected
+
+
+@transaction.atomic
+def reconcile(today=None) -> int:
+    """
+    Make every counter match the source tables and drop past on_leave days;
+    returns how many counters were wrong. Transitions committing while it
+    runs can be overwritten; the next run corrects them.
+    """
+    today = today or timezone.localdate()
+    expected = expected_counters(today)
+    existing = {
+        key: (pk, value)
+        for pk, key, value in DashboardCounter.objects.select_for_update().values_list("id", "key", "value")
+    }
+
+    changed = [
+        DashboardCounter(id=existing[key][0], value=n)
+        for key, n in expected.items()
+        if key in existing and existing[key][1] != n
+    ]
+    missing = [DashboardCounter(key=key, value=n, **_fields(key)) for key, n in expected.items() if key not in existing]
+    stale = [pk for key, (pk, value) in existing.items() if key not in expected and value]
+
+    DashboardCounter.objects.bulk_update(changed, ["value"], batch_size=500)
+    DashboardCounter.objects.bulk_create(missing, batch_size=500)
+    for i in range(0, len(stale), 500):
+        DashboardCounter.objects.filter(id__in=stale[i:i + 500]).delete()
+    DashboardCounter.objects.filter(metric=ON_LEAVE, day__lt=today).delete()  # no longer shown
+    return len(changed) + len(missing) + len(stale)
+
+
+def schedule_reconcile() -> None:
+    """Queue the next reconcile run unless one is already waiting."""
+    if not Job.objects.filter(task=RECONCILE_DASHBOARD, status=Job.Status.QUEUED).exists():
+        jobs.enqueue(RECONCILE_DASHBOARD, delay=getattr(settings, "DASHBOARD_RECONCILE_SECONDS", 3600))
+
+
+# ------------------------------------------------------------
+# Reading
+# ------------------------------------------------------------
+
+TILES = (APPROVALS_PENDING, "on_leave_today") + tuple(f"leave_{s.lower()}" for s in LEAVE_STATUSES)
+
+
+def dashboard(today=None) -> dict:
+    """All tiles, overall and per region / department, from one query."""
+    today = today or timezone.localdate()
+    rows = (
+        DashboardCounter.objects.filter(
+            Q(metric=APPROVALS_PENDING)
+            | Q(metric=ON_LEAVE, day=today)
+            | Q(metric__startswith="leave_", day=date(today.year, 1, 1))
+        )
+        .exclude(value=0)
+        .values_list("metric", "region_id", "region__name", "department_id", "department__name", "value")
+    )
+
+    totals = dict.fromkeys(TILES, 0)
+    regions, departments = {}, {}
+    for metric, region_id, region_name, department_id, department_name, value in rows:
+        metric = "on_leave_today" if metric == ON_LEAVE else metric
+        totals[metric] += value
+        if region_id:
+            tile = regions.setdefault(region_id, {"region": region_id, "name": region_name})
+            tile[metric] = tile.get(metric, 0) + value
+        if department_id:
+            tile = departments.setdefault(department_id, {"department": department_id, "name": department_name})
+            tile[metric] = tile.get(metric, 0) + value
+
+    return {
+        "as_of": today,
+        "totals": totals,
+        "regions": sorted(regions.values(), key=lambda t: t["name"]),
+        "departments": sorted(departments.values(), key=lambda t: t["name"]),
+    }
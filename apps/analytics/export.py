@@ -0,0 +1,331 @@
+"""
+Nightly extracts of leave / approval / HR data for BI (`manage.py export_bi`),
+so ad hoc analysis runs on files instead of the production database.
+
+Each dataset (DATASETS) is exported incrementally: rows whose updated_at is
+past the dataset's watermark, read in (updated_at, id) order from the
+(updated_at, id) index in keyset-paginated chunks of EXPORT_CHUNK_SIZE. Every
+chunk is a short query of its own (the job is registered with atomic=False),
+so the export never keeps a read transaction open that would hold back
+SQLite writers, and memory stays at one chunk whatever the table size. Each
+chunk also refreshes the job's lock (jobs.heartbeat()), so a long export is
+not handed to a second worker.
+
+A run holds an exclusive lock on EXPORT_ROOT/.lock (flock; POSIX only) for
+its whole length: a second run on the same root, from the job or
+`manage.py export_bi`, fails at once instead of writing the same
+partitions and manifest.
+Rows younger than EXPORT_SETTLE_SECONDS wait for the next run: updated_at is
+taken before a write commits, so a slow transaction could otherwise land
+behind the watermark.
+
+Files are Hive-style partitions under EXPORT_ROOT:
+
+    <dataset>/dt=<export day>/part-<run>-<n>.parquet     (pyarrow installed)
+    <dataset>/dt=<export day>/part-<run>-<n>.csv.gz      (otherwise)
+
+EXPORT_FORMAT picks "parquet", "csv" or "auto". A file is rolled over after
+about EXPORT_ROWS_PER_FILE rows and only renamed into place once complete.
+
+manifest.json lists every partition with the run number (`sequence`) that
+wrote it and holds each dataset's watermark. It is replaced atomically
+after each dataset, so a run that dies leaves the previous manifest and the
+next run exports the same rows again. Loaders remember the last sequence
+they loaded and read only partitions with a higher one; a row exported
+twice (updated again later) should be upserted by id, latest updated_at
+wins. Deleted rows are not exported.
+"""
+import csv
+import gzip
+from contextlib import contextmanager
+import json
+import os
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.audit.models import AuditLog
+from apps.common import jobs
+from apps.common.models import Job
+from apps.employees.models import Employment
+from apps.leave.models import LeaveRequest
+from apps.workflows.models import ApprovalAction, ApprovalRequest
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+EXPORT_BI = "analytics.export_bi"
+MANIFEST = "manifest.json"
+LOCK = ".lock"
+MANIFEST_VERSION = 1
+
+DATASETS = {
+    "leave_requests": LeaveRequest,
+    "approval_requests": ApprovalRequest,
+    "approval_actions": ApprovalAction,
+    "employments": Employment,
+    "audit_log": AuditLog,
+}
+
+
+def export_fields(model) -> list:
+    """Concrete fields of the model, foreign keys as their id column."""
+    return list(model._meta.concrete_fields)
+
+
+def _json(value) -> str:
+    return json.dumps(value, cls=DjangoJSONEncoder, separators=(",", ":"))
+
+
+# ------------------------------------------------------------
+# Writers
+# ------------------------------------------------------------
+
+class CsvWriter:
+    """gzip-compressed CSV with a header row; every value as text, NULL as empty."""
+
+    format = "csv.gz"
+
+    def __init__(self, path: Path, fields):
+        self.path, self.rows = path, 0
+        self._tmp = path.with_name(path.name + ".tmp")
+        self._fh = gzip.open(self._tmp, "wt", encoding="utf-8", newline="")
+        self._csv = csv.writer(self._fh)
+        self._csv.writerow([f.attname for f in fields])
+        self._json = [f.get_internal_type() == "JSONField" for f in fields]
+
+    def _text(self, value, is_json):
+        if value is None:
+            return ""
+        if is_json:
+            return _json(value)
+        if isinstance(value, datetime):
+            return value.isoformat()
+        return value
+
+    def write(self, rows) -> None:
+        self._csv.writerows([[self._text(v, j) for v, j in zip(row, self._json)] for row in rows])
+        self.rows += len(rows)
+
+    def close(self) -> None:
+        self._fh.close()
+        os.replace(self._tmp, self.path)
+
+
+class ParquetWriter:
+    """One Parquet file written a row group per chunk (zstd), typed from the model fields."""
+
+    format = "parquet"
+
+    INT_TYPES = {
+        "AutoField", "BigAutoField", "SmallAutoField", "IntegerField", "BigIntegerField", "SmallIntegerField",
+        "PositiveIntegerField", "PositiveBigIntegerField", "PositiveSmallIntegerField",
+    }
+
+    def __init__(self, path: Path, fields):
+        if pyarrow is None:
+            raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow).")
+        self.path, self.rows = path, 0
+        self._tmp = path.with_name(path.name + ".tmp")
+        self._kinds = [self._kind(f) for f in fields]
+        self.schema = pyarrow.schema([pyarrow.field(f.attname, self._type(k)) for f, k in zip(fields, self._kinds)])
+        self._writer = pyarrow.parquet.ParquetWriter(self._tmp, self.schema, compression="zstd")
+
+    def _kind(self, f) -> str:
+        internal = (f.target_field if f.is_relation else f).get_internal_type()
+        if internal in self.INT_TYPES:
+            return "int"
+        if internal in ("DateTimeField", "DateField", "BooleanField", "UUIDField", "JSONField"):
+            return internal
+        return "str"
+
+    def _type(self, kind):
+        return {
+            "int": pyarrow.int64(),
+            "DateTimeField": pyarrow.timestamp("us", tz="UTC"),
+            "DateField": pyarrow.date32(),
+            "BooleanField": pyarrow.bool_(),
+        }.get(kind, pyarrow.string())
+
+    def write(self, rows) -> None:
+        arrays = []
+        for i, (kind, column) in enumerate(zip(self._kinds, zip(*rows))):
+            if kind == "UUIDField":
+                column = [None if v is None else str(v) for v in column]
+            elif kind == "JSONField":
+                column = [None if v is None else _json(v) for v in column]
+            elif kind == "str":
+                column = [None if v is None else str(v) for v in column]
+            arrays.append(pyarrow.array(column, type=self.schema.field(i).type))
+        self._writer.write_table(pyarrow.Table.from_arrays(arrays, schema=self.schema))
+        self.rows += len(rows)
+
+    def close(self) -> None:
+        self._writer.close()
+        os.replace(self._tmp, self.path)
+
+
+def writer_class(fmt: str = None):
+    fmt = fmt or getattr(settings, "EXPORT_FORMAT", "auto")
+    if fmt == "auto":
+        return ParquetWriter if pyarrow is not None else CsvWriter
+    if fmt == "parquet":
+        return ParquetWriter
+    if fmt == "csv":
+        return CsvWriter
+    raise ValueError(f"Unknown export format {fmt!r} (parquet, csv or auto)")
+
+
+# ------------------------------------------------------------
+# Manifest
+# ------------------------------------------------------------
+
+def load_manifest(root: Path) -> dict:
+    path = root / MANIFEST
+    if not path.exists():
+        return {"version": MANIFEST_VERSION, "sequence": 0, "datasets": {}}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def save_manifest(root: Path, manifest: dict) -> None:
+    manifest["updated_at"] = timezone.now().isoformat()
+    tmp = root / (MANIFEST + ".tmp")
+    tmp.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    os.replace(tmp, root / MANIFEST)
+
+
+def new_partitions(manifest: dict, after_sequence: int = 0) -> dict:
+    """{dataset: [partition, ...]} written by runs after `after_sequence` (what a loader still needs)."""
+    return {
+        name: [p for p in entry["partitions"] if p["sequence"] > after_sequence]
+        for name, entry in manifest["datasets"].items()
+    }
+
+
+# ------------------------------------------------------------
+# Export
+# ------------------------------------------------------------
+
+@dataclass
+class ExportResult:
+    sequence: int = 0
+    rows: dict = field(default_factory=dict)  # dataset -> rows exported
+    files: list = field(default_factory=list)
+
+
+def _after(watermark) -> Q:
+    if not watermark:
+        return Q()
+    at, pk = datetime.fromisoformat(watermark["updated_at"]), uuid.UUID(watermark["id"])
+    return Q(updated_at__gt=at) | Q(updated_at=at, id__gt=pk)
+
+
+def export_dataset(name, entry, root: Path, sequence: int, until, writer_cls, chunk_size: int, rows_per_file: int) -> list:
+    """Write the rows of one dataset changed since entry["watermark"]; returns the new partitions."""
+    model = DATASETS[name]
+    fields = export_fields(model)
+    names = [f.attname for f in fields]
+    at_index, id_index = names.index("updated_at"), names.index("id")
+    rows = model.objects.filter(updated_at__lt=until).order_by("updated_at", "id").values_list(*names)
+
+    directory = root / name / f"dt={timezone.localdate(until).isoformat()}"
+    partitions, writer, first, watermark = [], None, None, entry.get("watermark")
+
+    def finish():
+        writer.close()
+        partitions.append({
+            "sequence": sequence,
+            "path": writer.path.relative_to(root).as_posix(),
+            "format": writer.format,
+            "rows": writer.rows,
+            "min_updated_at": first.isoformat(),
+            "max_updated_at": watermark["updated_at"],
+        })
+
+    while True:
+        chunk = list(rows.filter(_after(watermark))[:chunk_size])
+        if not chunk:
+            break
+        if writer is None:
+            directory.mkdir(parents=True, exist_ok=True)
+            path = directory / f"part-{sequence:06d}-{len(partitions) + 1:04d}.{writer_cls.format}"
+            writer, first = writer_cls(path, fields), chunk[0][at_index]
+        writer.write(chunk)
+        jobs.heartbeat()
+        watermark = {"updated_at": chunk[-1][at_index].isoformat(), "id": str(chunk[-1][id_index])}
+        if writer.rows >= rows_per_file:
+            finish()
+            writer = None
+        if len(chunk) < chunk_size:
+            break
+    if writer is not None:
+        finish()
+
+    if partitions:
+        entry["watermark"] = watermark
+        entry["columns"] = names
+    return partitions
+
+
+@contextmanager
+def root_lock(root: Path):
+    """Hold the export root exclusively; raises RuntimeError if another run has it."""
+    with open(root / LOCK, "a") as fh:
+        if fcntl is not None:
+            try:
+                fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise RuntimeError(f"Another export is running in {root}") from None
+        yield  # closing the file releases the lock
+
+
+def export(datasets=None, root=None, fmt=None, now=None, chunk_size=None, rows_per_file=None, progress=None) -> ExportResult:
+    """
+    Export every dataset (or the given names) changed since the last run and
+    record the new partitions in the manifest under a new run sequence.
+    """
+    root = Path(root or settings.EXPORT_ROOT)
+    root.mkdir(parents=True, exist_ok=True)
+    writer_cls = writer_class(fmt)
+    chunk_size = chunk_size or getattr(settings, "EXPORT_CHUNK_SIZE", 5000)
+    rows_per_file = rows_per_file or getattr(settings, "EXPORT_ROWS_PER_FILE", 500_000)
+    until = (now or timezone.now()) - timedelta(seconds=getattr(settings, "EXPORT_SETTLE_SECONDS", 60))
+
+    with root_lock(root):
+        manifest = load_manifest(root)
+        result = ExportResult(sequence=manifest["sequence"] + 1)
+        for name in datasets or DATASETS:
+            if name not in DATASETS:
+                raise ValueError(f"Unknown dataset {name!r} (one of: {', '.join(DATASETS)})")
+            entry = manifest["datasets"].setdefault(name, {"watermark": None, "partitions": []})
+            partitions = export_dataset(name, entry, root, result.sequence, until, writer_cls, chunk_size, rows_per_file)
+            result.rows[name] = sum(p["rows"] for p in partitions)
+            result.files += [p["path"] for p in partitions]
+            if partitions:
+                entry["partitions"] += partitions
+                manifest["sequence"] = result.sequence
+                save_manifest(root, manifest)
+            if progress:
+                progress(name, result.rows[name])
+    result.sequence = manifest["sequence"]  # unchanged when nothing was written
+    return result
+
+
+def schedule_export(now=None) -> None:
+    """Queue the next nightly run at EXPORT_HOUR unless one is already waiting."""
+    if not Job.objects.filter(task=EXPORT_BI, status=Job.Status.QUEUED).exists():
+        jobs.enqueue(EXPORT_BI, delay=jobs.delay_until_hour(getattr(settings, "EXPORT_HOUR", 2), now))
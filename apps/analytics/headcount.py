@@ -0,0 +1,257 @@
+"""
+Daily headcount snapshots: staff per (region, department, grade, staff
+category) as of any past day, without reading Employment.
+
+An employment counts on day d when start_date <= d and either end_date >= d
+or it is ACTIVE without an end_date (ENDED rows without an end_date cannot
+be placed in time and are left out).
+
+The cube is stored as HeadcountSpan rows: one per cell and run of days with
+the same headcount, so a day on which nothing changed costs nothing and
+ten years of history stay small.
+
+- snapshot(day) computes the day's cube with one grouped query, closes the
+  open spans whose count changed and opens new ones. The
+  "analytics.snapshot_headcount" job snapshots every day since the last run
+  at HEADCOUNT_SNAPSHOT_HOUR and reschedules itself; start it once with
+  `manage.py snapshot_headcount`.
+- backfill(until) rebuilds all spans in one pass over Employment: +1 at each
+  start_date, -1 the day after each end_date, swept in date order
+  (`manage.py backfill_headcount`). Employment edits dated before the last
+  snapshot only reach the history through a backfill.
+- headcount_series() answers time series (one point per day / month / year
+  end) from the spans alone, in one query.
+"""
+from bisect import bisect_left, bisect_right
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from apps.analytics.models import HeadcountSnapshotRun, HeadcountSpan
+from apps.common import jobs
+from apps.common.models import Job
+from apps.employees.models import Employment
+
+SNAPSHOT_HEADCOUNT = "analytics.snapshot_headcount"
+
+CELL = ("region_id", "department_id", "grade_id", "staff_category")
+
+
+def employed_on(day) -> Q:
+    return Q(start_date__lte=day) & (
+        Q(end_date__gte=day) | Q(end_date__isnull=True, status=Employment.Status.ACTIVE)
+    )
+
+
+def cube(day) -> Counter:
+    """{(region, department, grade, staff category): headcount} on `day`, from one grouped query."""
+    rows = Employment.objects.filter(employed_on(day)).values(*CELL).annotate(n=Count("id")).order_by()
+    return Counter({tuple(row[name] for name in CELL): row["n"] for row in rows})
+
+
+def _span(cell, headcount, valid_from, valid_to=None) -> HeadcountSpan:
+    return HeadcountSpan(**dict(zip(CELL, cell)), headcount=headcount, valid_from=valid_from, valid_to=valid_to)
+
+
+def last_snapshot_day():
+    return HeadcountSnapshotRun.objects.aggregate(day=Max("day"))["day"]
+
+
+# ------------------------------------------------------------
+# Daily snapshots
+# ------------------------------------------------------------
+
+@transaction.atomic
+def snapshot(day=None) -> int:
+    """
+    Bring the spans up to `day` (today by default); returns how many cells
+    changed. Re-running the latest day replaces it; earlier days need a
+    backfill.
+    """
+    day = day or timezone.localdate()
+    last = last_snapshot_day()
+    if last and day < last:
+        raise ValueError(f"Headcount is already snapshotted up to {last}; use backfill for earlier days")
+
+    counts = cube(day)
+    open_spans = {
+        tuple(getattr(span, name) for name in CELL): span
+        for span in HeadcountSpan.objects.select_for_update().filter(valid_to__isnull=True)
+    }
+
+    close, replaced, dropped, opened = [], [], [], []
+    for cell, span in open_spans.items():
+        n = counts.get(cell, 0)
+        if n == span.headcount:
+            continue
+        if span.valid_from >= day:  # opened by an earlier run for this same day
+            if n:
+                span.headcount = n
+                replaced.append(span)
+            else:
+                dropped.append(span.id)
+            continue
+        close.append(span.id)
+        if n:
+            opened.append(_span(cell, n, day))
+    new_cells = [_span(cell, n, day) for cell, n in counts.items() if cell not in open_spans]
+    opened += new_cells
+
+    HeadcountSpan.objects.filter(id__in=close).update(valid_to=day - timedelta(days=1))
+    HeadcountSpan.objects.filter(id__in=dropped).delete()
+    HeadcountSpan.objects.bulk_update(replaced, ["headcount"], batch_size=500)
+    HeadcountSpan.objects.bulk_create(opened, batch_size=500)
+
+    changed = len(close) + len(replaced) + len(dropped) + len(new_cells)
+    HeadcountSnapshotRun.objects.update_or_create(
+        day=day, defaults={"kind": HeadcountSnapshotRun.Kind.DAILY, "changed_cells": changed},
+    )
+    return changed
+
+
+def catch_up(today=None) -> int:
+    """Snapshot every day after the last run up to today (only today if it never ran)."""
+    today = today or timezone.localdate()
+    last = last_snapshot_day()
+    day = min(last + timedelta(days=1), today) if last else today  # a second run today refreshes it
+    changed = 0
+    while day <= today:
+        changed += snapshot(day)
+        day += timedelta(days=1)
+    return changed
+
+
+def schedule_snapshot(now=None) -> None:
+    """Queue the next daily run at HEADCOUNT_SNAPSHOT_HOUR unless one is already waiting."""
+    if Job.objects.filter(task=SNAPSHOT_HEADCOUNT, status=Job.Status.QUEUED).exists():
+        return
+    jobs.enqueue(SNAPSHOT_HEADCOUNT, delay=jobs.delay_until_hour(getattr(settings, "HEADCOUNT_SNAPSHOT_HOUR", 1), now))
+
+
+# ------------------------------------------------------------
+# Backfill
+# ------------------------------------------------------------
+
+@transaction.atomic
+def backfill(until=None) -> int:
+    """
+    Rebuild every span up to `until` (today by default) with one sweep over
+    the employment start / end dates; returns how many spans it wrote.
+    Later snapshot runs are discarded, so the daily job carries on from
+    `until`.
+    """
+    until = until or timezone.localdate()
+    events = defaultdict(Counter)  # day -> {cell: change}
+    rows = Employment.objects.filter(start_date__lte=until).exclude(
+        end_date__isnull=True, status=Employment.Status.ENDED,
+    ).values_list("start_date", "end_date", *CELL)
+    for start, end, *cell in rows.iterator(chunk_size=5000):
+        if end and end < start:
+            continue
+        cell = tuple(cell)
+        events[start][cell] += 1
+        if end and end < until:
+            events[end + timedelta(days=1)][cell] -= 1
+
+    spans, current = [], {}  # current: cell -> (headcount, since)
+    for day in sorted(events):
+        for cell, change in events[day].items():
+            if not change:
+                continue
+            n, since = current.pop(cell, (0, None))
+            if n:
+                spans.append(_span(cell, n, since, day - timedelta(days=1)))
+            if n + change > 0:
+                current[cell] = (n + change, day)
+    spans += [_span(cell, n, since) for cell, (n, since) in current.items()]
+
+    HeadcountSpan.objects.all().delete()
+    HeadcountSpan.objects.bulk_create(spans, batch_size=1000)
+    HeadcountSnapshotRun.objects.filter(day__gt=until).delete()
+    HeadcountSnapshotRun.objects.update_or_create(
+        day=until, defaults={"kind": HeadcountSnapshotRun.Kind.BACKFILL, "changed_cells": len(spans)},
+    )
+    return len(spans)
+
+
+# ------------------------------------------------------------
+# Time series
+# ------------------------------------------------------------
+
+GROUP_BY = ("region", "department", "grade", "staff_category")
+INTERVALS = ("day", "month", "year")
+MAX_POINTS = 1000
+
+
+def _period_end(day, interval):
+    if interval == "year":
+        return date(day.year, 12, 31)
+    if interval == "month":
+        first_of_next = date(day.year + day.month // 12, day.month % 12 + 1, 1)
+        return first_of_next - timedelta(days=1)
+    return day
+
+
+def points(date_from, date_to, interval="month") -> list:
+    """The last day of each period from date_from to date_to (date_to closes the last one)."""
+    result, day = [], date_from
+    while day <= date_to:
+        end = min(_period_end(day, interval), date_to)
+        result.append(end)
+        if len(result) > MAX_POINTS:
+            raise ValueError(f"More than {MAX_POINTS} points; use a longer interval or a shorter range")
+        day = end + timedelta(days=1)
+    return result
+
+
+def headcount_series(date_from, date_to, interval="month", group_by=(), filters=None) -> dict:
+    """
+    Headcount at the end of each interval, in total and per group, from
+    HeadcountSpan only (one query). filters: region, department, grade,
+    staff_category.
+    """
+    dates = points(date_from, min(date_to, timezone.localdate()), interval)
+    if not dates:
+        return {"points": [], "totals": [], "series": []}
+
+    qs = HeadcountSpan.objects.filter(
+        Q(valid_to__isnull=True) | Q(valid_to__gte=dates[0]), valid_from__lte=dates[-1],
+    )
+    for name, value in (filters or {}).items():
+        if value:
+            qs = qs.filter(**{name if name == "staff_category" else f"{name}_id": value})
+
+    totals = [0] * len(dates)
+    series = {}
+    rows = qs.values_list(
+        "region_id", "region__name", "department_id", "department__name", "grade_id", "grade__name",
+        "staff_category", "headcount", "valid_from", "valid_to",
+    )
+    for region, region_name, department, department_name, grade, grade_name, category, n, valid_from, valid_to in rows:
+        first = bisect_left(dates, valid_from)
+        last = bisect_right(dates, valid_to) if valid_to else len(dates)
+        if first >= last:
+            continue
+        values = {
+            "region": (region, region_name), "department": (department, department_name),
+            "grade": (grade, grade_name), "staff_category": (category, None),
+        }
+        key = tuple(values[name][0] for name in group_by)
+        group = series.get(key)
+        if group is None:
+            group = series[key] = {}
+            for name in group_by:
+                group[name], label = values[name]
+                if label is not None:
+                    group[f"{name}_name"] = label
+            group["headcount"] = [0] * len(dates)
+        for i in range(first, last):
+            group["headcount"][i] += n
+            totals[i] += n
+
+    ordered = sorted(series.values(), key=lambda g: [str(g.get(f"{name}_name", g[name])) for name in group_by])
+    return {"points": dates, "totals": totals, "series": ordered if group_by else []}
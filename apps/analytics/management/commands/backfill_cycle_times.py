@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from apps.analytics.cycle_times import backfill
+
+
+class Command(BaseCommand):
+    help = "Create step dwell facts for past approval actions in chunks and rebuild their daily rollups"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000, help="Approval actions per transaction")
+
+    def handle(self, *args, **options):
+        def progress(result):
+            self.stdout.write(f"  {result.facts} facts")
+
+        result = backfill(chunk_size=options["chunk_size"], progress=progress)
+        self.stdout.write(self.style.SUCCESS(f"✅ {result.facts} facts over {len(result.days)} days"))
@@ -0,0 +1,16 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from apps.analytics import headcount
+
+
+class Command(BaseCommand):
+    help = "Rebuild the headcount history from employment start / end dates in one date sweep"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--until", type=date.fromisoformat, help="Last day to rebuild (YYYY-MM-DD, default today)")
+
+    def handle(self, *args, **options):
+        spans = headcount.backfill(until=options["until"])
+        self.stdout.write(self.style.SUCCESS(f"✅ {spans} headcount spans rebuilt up to {headcount.last_snapshot_day()}"))
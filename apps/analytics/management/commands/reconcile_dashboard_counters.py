@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from apps.analytics import dashboard
+
+
+class Command(BaseCommand):
+    help = "Recompute the dashboard counters now and make sure the periodic reconcile job is queued"
+
+    def handle(self, *args, **options):
+        changed = dashboard.reconcile()
+        dashboard.schedule_reconcile()
+        self.stdout.write(self.style.SUCCESS(f"✅ {changed} dashboard counters corrected"))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from apps.analytics import headcount
+
+
+class Command(BaseCommand):
+    help = "Snapshot headcount for every day since the last run and make sure the daily snapshot job is queued"
+
+    def handle(self, *args, **options):
+        changed = headcount.catch_up()
+        headcount.schedule_snapshot()
+        self.stdout.write(self.style.SUCCESS(f"✅ Headcount snapshotted up to {headcount.last_snapshot_day()} ({changed} cells changed)"))
@@ -0,0 +1,57 @@
+# Generated by Django 6.0.2 on 2026-10-19 12:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('org', '0002_department_closure'),
+        ('workflows', '0005_approval_sla'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StepDwell',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('module', models.CharField(max_length=60)),
+                ('workflow', models.CharField(max_length=80)),
+                ('step_order', models.PositiveIntegerField()),
+                ('leave_type', models.CharField(blank=True, max_length=20)),
+                ('outcome', models.CharField(max_length=20)),
+                ('entered_at', models.DateTimeField()),
+                ('exited_at', models.DateTimeField()),
+                ('seconds', models.PositiveBigIntegerField()),
+                ('action', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='dwell', to='workflows.approvalaction')),
+                ('approval', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='workflows.approvalrequest')),
+                ('region', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='org.region')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['exited_at'], name='analytics_s_exited__c066a9_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StepDwellDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=200, unique=True)),
+                ('day', models.DateField()),
+                ('module', models.CharField(max_length=60)),
+                ('workflow', models.CharField(max_length=80)),
+                ('step_order', models.PositiveIntegerField()),
+                ('leave_type', models.CharField(blank=True, max_length=20)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('total_seconds', models.PositiveBigIntegerField(default=0)),
+                ('max_seconds', models.PositiveBigIntegerField(default=0)),
+                ('histogram', models.JSONField(default=list)),
+                ('region', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='org.region')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day', 'workflow'], name='analytics_s_day_79a7e7_idx')],
+            },
+        ),
+    ]
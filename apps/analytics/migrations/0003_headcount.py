@@ -0,0 +1,42 @@
+# Generated by Django 6.0.2 on 2026-10-19 12:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0002_dashboardcounter'),
+        ('org', '0002_department_closure'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HeadcountSnapshotRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+                ('kind', models.CharField(choices=[('DAILY', 'Daily snapshot'), ('BACKFILL', 'Backfill')], max_length=10)),
+                ('changed_cells', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='HeadcountSpan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('staff_category', models.CharField(max_length=20)),
+                ('headcount', models.PositiveIntegerField()),
+                ('valid_from', models.DateField()),
+                ('valid_to', models.DateField(blank=True, null=True)),
+                ('department', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='org.department')),
+                ('grade', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='org.grade')),
+                ('region', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='org.region')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['valid_from', 'valid_to'], name='analytics_h_valid_f_5ddd52_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('valid_to__isnull', True)), fields=('region', 'department', 'grade', 'staff_category'), name='analytics_headcount_one_open_span')],
+            },
+        ),
+    ]
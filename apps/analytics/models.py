@@ -0,0 +1,120 @@
+from django.db import models
+
+from apps.org.models import Department, Grade, Region
+from apps.workflows.models import ApprovalAction, ApprovalRequest
+
+
+class StepDwell(models.Model):
+    """
+    Fact: one workflow step of one approval request, from the moment the
+    request reached it until the action that ended it (APPROVE / REJECT /
+    RETURN). Written by apps.analytics.cycle_times.
+    """
+
+    action = models.OneToOneField(ApprovalAction, on_delete=models.CASCADE, related_name="dwell")
+    approval = models.ForeignKey(ApprovalRequest, on_delete=models.CASCADE, related_name="+")
+
+    module = models.CharField(max_length=60)
+    workflow = models.CharField(max_length=80)  # ApprovalRequest.request_type
+    step_order = models.PositiveIntegerField()
+    region = models.ForeignKey(Region, null=True, blank=True, on_delete=models.SET_NULL, related_name="+")
+    leave_type = models.CharField(max_length=20, blank=True)  # leave workflows only
+    outcome = models.CharField(max_length=20)
+
+    entered_at = models.DateTimeField()
+    exited_at = models.DateTimeField()
+    seconds = models.PositiveBigIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["exited_at"]),  # rollup rebuilds by day
+        ]
+
+
+class StepDwellDaily(models.Model):
+    """
+    Rollup of StepDwell per exit day and (workflow, step, region, leave type).
+    `histogram` counts dwells per cycle_times.DWELL_BUCKETS bucket, so
+    percentiles can be estimated for any range of days without the facts.
+    """
+
+    key = models.CharField(max_length=200, unique=True)  # cycle_times.rollup_key(): one row per group
+    day = models.DateField()
+
+    module = models.CharField(max_length=60)
+    workflow = models.CharField(max_length=80)
+    step_order = models.PositiveIntegerField()
+    region = models.ForeignKey(Region, null=True, blank=True, on_delete=models.SET_NULL, related_name="+")
+    leave_type = models.CharField(max_length=20, blank=True)
+
+    count = models.PositiveIntegerField(default=0)
+    total_seconds = models.PositiveBigIntegerField(default=0)
+    max_seconds = models.PositiveBigIntegerField(default=0)
+    histogram = models.JSONField(default=list)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["day", "workflow"]),
+        ]
+
+
+class DashboardCounter(models.Model):
+    """
+    Precomputed dashboard tile value for one (metric, region, department,
+    day), kept current by apps.analytics.dashboard.
+    """
+
+    key = models.CharField(max_length=200, unique=True)  # dashboard.counter_key()
+    metric = models.CharField(max_length=40)  # approvals_pending, on_leave, leave_<status>
+    region = models.ForeignKey(Region, null=True, blank=True, on_delete=models.SET_NULL, related_name="+")
+    department = models.ForeignKey(Department, null=True, blank=True, on_delete=models.SET_NULL, related_name="+")
+    day = models.DateField(null=True, blank=True)  # on_leave: that day; leave_*: Jan 1 of the leave year
+    value = models.BigIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["metric", "day"]),
+        ]
+
+
+class HeadcountSpan(models.Model):
+    """
+    Headcount of one (region, department, grade, staff category) cell of the
+    workforce cube over a run of days on which it did not change: days
+    valid_from..valid_to inclusive, valid_to NULL while still current.
+    Written by apps.analytics.headcount; cells with no staff have no row.
+    """
+
+    region = models.ForeignKey(Region, on_delete=models.CASCADE, related_name="+")
+    department = models.ForeignKey(Department, on_delete=models.CASCADE, related_name="+")
+    grade = models.ForeignKey(Grade, on_delete=models.CASCADE, related_name="+")
+    staff_category = models.CharField(max_length=20)
+    headcount = models.PositiveIntegerField()
+
+    valid_from = models.DateField()
+    valid_to = models.DateField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["valid_from", "valid_to"]),  # spans overlapping a date range
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["region", "department", "grade", "staff_category"],
+                condition=models.Q(valid_to__isnull=True),
+                name="analytics_headcount_one_open_span",
+            ),
+        ]
+
+
+class HeadcountSnapshotRun(models.Model):
+    """A day the headcount spans were brought up to (daily snapshot or backfill)."""
+
+    class Kind(models.TextChoices):
+        DAILY = "DAILY", "Daily snapshot"
+        BACKFILL = "BACKFILL", "Backfill"
+
+    day = models.DateField(unique=True)
+    kind = models.CharField(max_length=10, choices=Kind.choices)
+    changed_cells = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
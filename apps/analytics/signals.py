@@ -0,0 +1,68 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from apps.analytics import dashboard
+from apps.analytics.cycle_times import STEP_EXITS
+from apps.analytics.tasks import record_step_dwell
+from apps.leave.models import LeaveRequest
+from apps.workflows.models import ApprovalAction, ApprovalRequest
+
+
+# ------------------------------------------------------------
+# Cycle times
+# ------------------------------------------------------------
+
+@receiver(post_save, sender=ApprovalAction)
+def step_exited(sender, instance, created, **kwargs):
+    if created and instance.action in STEP_EXITS:
+        record_step_dwell.enqueue(action_id=instance.id)
+
+
+# ------------------------------------------------------------
+# Dashboard counters
+# ------------------------------------------------------------
+# A save compares the counted state noted by dashboard.remember() (or read
+# back here) with the new one and records the change with dashboard.record().
+# Saves that leave the counted fields out of update_fields, and instances
+# saved with them deferred, are left alone (the reconcile job covers the rest).
+
+def _record(instance, old, new):
+    if old == new:
+        return
+    if isinstance(instance, ApprovalRequest):
+        dashboard.record({"kind": "approval", "old": old, "new": new})
+    else:
+        dashboard.record({
+            "kind": "leave", "old": old, "new": new,
+            "employee_id": instance.employee_id, "today": timezone.localdate(),
+        })
+
+
+@receiver(pre_save, sender=ApprovalRequest)
+@receiver(pre_save, sender=LeaveRequest)
+def read_counted_state(sender, instance, raw, update_fields, **kwargs):
+    if raw or instance._state.adding or hasattr(instance, "_dashboard_state"):
+        return
+    fields = dashboard.COUNTED[sender][0]
+    if update_fields is not None and not {sender._meta.get_field(f).attname for f in update_fields} & set(fields):
+        return
+    row = sender._base_manager.filter(pk=instance.pk).values_list(*fields).first()
+    instance._dashboard_state = tuple(row) if row else None
+
+
+@receiver(post_save, sender=ApprovalRequest)
+@receiver(post_save, sender=LeaveRequest)
+def count_saved(sender, instance, created, **kwargs):
+    old = None if created else getattr(instance, "_dashboard_state", None)
+    new = dashboard.counted_state(instance)
+    if new is None or (old is None and not created):
+        return  # counted fields untouched or deferred: reconcile will catch up
+    _record(instance, old, new)
+    instance._dashboard_state = new
+
+
+@receiver(post_delete, sender=ApprovalRequest)
+@receiver(post_delete, sender=LeaveRequest)
+def count_deleted(sender, instance, **kwargs):
+    _record(instance, dashboard.counted_state(instance), None)
@@ -0,0 +1,33 @@
+from apps.analytics import cycle_times, dashboard, export, headcount
+from apps.common import jobs
+
+
+@jobs.task("analytics.record_step_dwell", priority=-5)
+def record_step_dwell(action_id):
+    cycle_times.record_action(action_id)
+
+
+@jobs.task(dashboard.COUNT_DASHBOARD_CHANGES, priority=-5)
+def count_dashboard_changes(changes):
+    dashboard.apply_changes(changes)
+
+
+@jobs.task(dashboard.RECONCILE_DASHBOARD, priority=-5)
+def reconcile_dashboard():
+    """Recompute the dashboard counters, then come back in DASHBOARD_RECONCILE_SECONDS."""
+    dashboard.reconcile()
+    dashboard.schedule_reconcile()
+
+
+@jobs.task(headcount.SNAPSHOT_HEADCOUNT, priority=-5)
+def snapshot_headcount():
+    """Snapshot headcount for every day since the last run, then come back tomorrow."""
+    headcount.catch_up()
+    headcount.schedule_snapshot()
+
+
+@jobs.task(export.EXPORT_BI, priority=-10, atomic=False)
+def export_bi():
+    """Write tonight's BI extracts (one short read per chunk, no long transaction), then come back tomorrow."""
+    export.export()
+    export.schedule_export()
@@ -0,0 +1,346 @@
+import csv
+import gzip
+import tempfile
+import unittest
+import uuid
+from pathlib import Path
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.accounts.models import Role, UserRole
+from apps.audit.models import AuditLog
+from apps.analytics import cycle_times, dashboard, export, headcount
+from apps.analytics.models import DashboardCounter, HeadcountSpan, StepDwell, StepDwellDaily
+from apps.common import jobs
+from apps.common.models import Job
+from apps.common.testing import SeededDataMixin
+from apps.employees.models import Employee, Employment
+from apps.leave.models import LeaveRequest
+from apps.org.models import Department, Grade, Position, Region
+from apps.workflows.models import ApprovalAction, ApprovalRequest, WorkflowDefinition, WorkflowStep
+from apps.workflows.services import act_on_approval, create_approval
+
+
+class CycleTimeAnalyticsTests(TestCase):
+    """Step dwell facts follow the actions; rollups answer the report and survive a backfill."""
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.approver = User.objects.create_user("cyc_approver")
+        cls.hr = User.objects.create_user("cyc_hr")
+        UserRole.objects.create(user=cls.approver, role=Role.objects.create(code="CYC_APPROVER", name="Approver"))
+        UserRole.objects.create(user=cls.hr, role=Role.objects.get_or_create(code="HR_HO", defaults={"name": "HR"})[0])
+
+        wf = WorkflowDefinition.objects.create(module="cyc", code="cyc_test", name="Cycle test")
+        for order in (1, 2):
+            WorkflowStep.objects.create(workflow=wf, step_order=order, approver_rule="ROLE", approver_role_code="CYC_APPROVER")
+
+    def approve_all(self, waited_hours):
+        approval = create_approval("cyc", "cyc_test", uuid.uuid4(), created_by=None)
+        ApprovalRequest.objects.filter(id=approval.id).update(created_at=approval.created_at - timedelta(hours=waited_hours))
+        approval.refresh_from_db()
+        for _ in range(2):
+            approval = act_on_approval(approval=approval, user=self.approver, action="APPROVE")
+        return approval
+
+    def rollups(self):
+        return sorted(StepDwellDaily.objects.values_list("key", "count", "total_seconds", "max_seconds", "histogram"))
+
+    def test_facts_and_rollups_follow_actions(self):
+        for hours in (2, 10, 30):
+            self.approve_all(hours)
+        jobs.run_pending()
+
+        first = StepDwell.objects.filter(step_order=1).order_by("seconds")
+        self.assertEqual([round(d.seconds / 3600) for d in first], [2, 10, 30])
+        self.assertTrue(all(d.seconds < 60 for d in StepDwell.objects.filter(step_order=2)))
+        row = StepDwellDaily.objects.get(step_order=1)
+        self.assertEqual((row.count, round(row.max_seconds / 3600)), (3, 30))
+
+        # A job that runs twice adds nothing
+        self.assertIsNone(cycle_times.record_action(first[0].action_id))
+        self.assertEqual(StepDwellDaily.objects.get(step_order=1).count, 3)
+
+    def test_backfill_rebuilds_the_same_rollups(self):
+        for hours in (1, 5, 50):
+            self.approve_all(hours)
+        jobs.run_pending()
+        expected = self.rollups()
+
+        StepDwell.objects.all().delete()
+        StepDwellDaily.objects.all().delete()
+        result = cycle_times.backfill(chunk_size=2)
+        self.assertEqual(result.facts, ApprovalAction.objects.count())
+        self.assertEqual(self.rollups(), expected)
+
+    def test_report_reads_rollups(self):
+        for hours in (4, 8, 100):
+            self.approve_all(hours)
+        jobs.run_pending()
+
+        client = APIClient()
+        client.force_authenticate(self.hr)
+        with self.assertNumQueries(2):  # roles + rollups
+            response = client.get("/api/analytics/approval-cycle-times/", {"group_by": "workflow,step"})
+        self.assertEqual(response.status_code, 200)
+        step1 = response.json()["results"][0]
+        self.assertEqual((step1["workflow"], step1["step"], step1["count"]), ("cyc_test", 1, 3))
+        self.assertAlmostEqual(step1["avg_hours"], 37.33, delta=0.1)
+        self.assertGreater(step1["p90_hours"], 72)
+        self.assertLessEqual(step1["p90_hours"], step1["max_hours"])
+
+        self.assertEqual(client.get("/api/analytics/approval-cycle-times/", {"group_by": "colour"}).status_code, 400)
+        client.force_authenticate(self.approver)
+        self.assertEqual(client.get("/api/analytics/approval-cycle-times/").status_code, 403)
+
+    def test_percentile_interpolates_within_bucket(self):
+        histogram = cycle_times.empty_histogram()
+        for hours in [1] * 9 + [30]:
+            histogram[cycle_times.bucket_of(hours * 3600)] += 1
+        self.assertLessEqual(cycle_times.percentile(histogram, 0.9, 30 * 3600), 3600)
+        self.assertEqual(cycle_times.percentile(histogram, 1.0, 30 * 3600), 30 * 3600)
+
+
+class DashboardCounterTests(SeededDataMixin, TestCase):
+    """Counters follow leave / approval transitions (through the job queue) and match a full recount."""
+
+    def counters(self):
+        return dict(DashboardCounter.objects.exclude(value=0).values_list("key", "value"))
+
+    def assertMatchesRecount(self):
+        self.assertEqual(self.counters(), dict(dashboard.expected_counters()))
+
+    def test_transitions_keep_counters_exact(self):
+        self.assertMatchesRecount()
+        today = timezone.localdate()
+        before = dashboard.dashboard()["totals"]
+
+        leave = LeaveRequest.objects.filter(status="SUBMITTED").first()
+        leave.start_date, leave.end_date = today - timedelta(days=1), today + timedelta(days=3)
+        leave.status = "APPROVED"
+        leave.save()
+        approval = ApprovalRequest.objects.filter(status="PENDING").first()
+        approval.status = "REJECTED"
+        approval.save(update_fields=["status", "updated_at"])
+        LeaveRequest.objects.filter(status="RETURNED").first().delete()
+
+        self.assertEqual(dashboard.dashboard()["totals"], before)  # queued, not applied yet
+        self.assertEqual(jobs.run_pending(), 3)
+        self.assertMatchesRecount()
+        after = dashboard.dashboard()["totals"]
+        self.assertEqual(after["on_leave_today"], before["on_leave_today"] + 1)
+        self.assertEqual(after["approvals_pending"], before["approvals_pending"] - 1)
+        self.assertEqual(dashboard.reconcile(), 0)
+
+    def test_write_paths_queue_one_job(self):
+        leave = LeaveRequest.objects.filter(status="SUBMITTED").first()
+        dashboard.remember(leave)
+        with self.assertNumQueries(3):  # the two updates and one job row: no read-back, no counter writes
+            with dashboard.collect() as counted:
+                leave.status = "REJECTED"
+                leave.save(update_fields=["status", "updated_at"])
+                leave.last_action_note = "Not counted"
+                leave.save(update_fields=["last_action_note", "updated_at"])
+            dashboard.queue(counted)
+        self.assertEqual(len(counted), 1)
+        self.assertEqual(Job.objects.get().task, dashboard.COUNT_DASHBOARD_CHANGES)
+
+        scenario = self.scenario("approval_act")
+        response = self.client_for(scenario.user).post(scenario.path, {"action": "REJECT"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Job.objects.filter(task=dashboard.COUNT_DASHBOARD_CHANGES).count(), 1)  # act folds into its audit job
+        jobs.run_pending()
+        self.assertMatchesRecount()
+
+    def test_reconcile_repairs_bulk_writes(self):
+        LeaveRequest.objects.filter(status="SUBMITTED").update(status="REJECTED")
+        self.assertNotEqual(self.counters(), dict(dashboard.expected_counters()))
+        self.assertGreater(dashboard.reconcile(), 0)
+        self.assertMatchesRecount()
+
+        dashboard.schedule_reconcile()
+        dashboard.schedule_reconcile()
+        self.assertEqual(Job.objects.filter(task=dashboard.RECONCILE_DASHBOARD).count(), 1)
+
+    def test_endpoint_is_one_query(self):
+        client = self.client_for("hr")
+        with self.assertNumQueries(2):  # roles + counters
+            response = client.get("/api/analytics/dashboard/")
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body["totals"]["approvals_pending"], ApprovalRequest.objects.filter(status="PENDING").count())
+        self.assertEqual(
+            sum(region.get("approvals_pending", 0) for region in body["regions"]),
+            ApprovalRequest.objects.filter(status="PENDING", region__isnull=False).count(),
+        )
+
+
+class HeadcountSnapshotTests(TestCase):
+    """Spans from the date sweep and from daily snapshots agree with a direct count on every day."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = timezone.localdate()
+        cls.north, cls.south = Region.objects.create(name="HC North"), Region.objects.create(name="HC South")
+        cls.dept = Department.objects.create(name="HC Finance")
+        cls.g1, cls.g2 = Grade.objects.create(name="HC G1", rank_order=901), Grade.objects.create(name="HC G2", rank_order=902)
+        cls.position = Position.objects.create(title="HC Officer")
+        hr = get_user_model().objects.create_user("hc_hr")
+        UserRole.objects.create(user=hr, role=Role.objects.get_or_create(code="HR_HO", defaults={"name": "HR"})[0])
+        cls.hr = hr
+
+        ago = lambda days: cls.today - timedelta(days=days)  # noqa: E731
+        for start, end, region, grade, status in [
+            (ago(900), None, cls.north, cls.g1, "ACTIVE"),
+            (ago(800), ago(400), cls.north, cls.g1, "ENDED"),
+            (ago(700), ago(30), cls.south, cls.g2, "ENDED"),
+            (ago(400), None, cls.north, cls.g1, "ACTIVE"),  # starts the day the other ends
+            (ago(60), ago(60), cls.south, cls.g1, "ENDED"),
+            (ago(20), None, cls.south, cls.g2, "ACTIVE"),
+            (ago(300), None, cls.south, cls.g2, "ENDED"),  # no end date: left out
+        ]:
+            cls.hire(start, end, region, grade, status)
+
+    @classmethod
+    def hire(cls, start, end=None, region=None, grade=None, status="ACTIVE"):
+        n = Employee.objects.count()
+        employee = Employee.objects.create(staff_no=f"HC{n}", first_name="Kofi", last_name="Boateng")
+        return Employment.objects.create(
+            employee=employee, employment_type="PERMANENT", start_date=start, end_date=end, status=status,
+            region=region or cls.north, department=cls.dept, grade=grade or cls.g1, position=cls.position,
+        )
+
+    def assertMatchesCubes(self, days):
+        series = headcount.headcount_series(min(days), max(days), "day", headcount.GROUP_BY)
+        for i, day in enumerate(series["points"]):
+            from_spans = {
+                (g["region"], g["department"], g["grade"], g["staff_category"]): g["headcount"][i]
+                for g in series["series"] if g["headcount"][i]
+            }
+            self.assertEqual(from_spans, dict(headcount.cube(day)), day)
+
+    def test_backfill_sweep_matches_daily_cubes(self):
+        headcount.backfill()
+        self.assertMatchesCubes([self.today - timedelta(days=905), self.today])
+        self.assertEqual(HeadcountSpan.objects.filter(valid_to__isnull=True).count(), 2)
+
+    def test_daily_snapshots_extend_the_history(self):
+        headcount.backfill(until=self.today - timedelta(days=3))
+        self.hire(self.today - timedelta(days=1), region=self.north)
+        self.hire(self.today, self.today, region=self.south, grade=self.g1)
+
+        self.assertGreater(headcount.catch_up(self.today), 0)
+        self.assertEqual(headcount.last_snapshot_day(), self.today)
+        self.assertEqual(headcount.snapshot(self.today), 0)  # re-running a day changes nothing
+        self.assertMatchesCubes([self.today - timedelta(days=10), self.today])
+        with self.assertRaises(ValueError):
+            headcount.snapshot(self.today - timedelta(days=1))
+
+        spans = sorted(HeadcountSpan.objects.values_list(*headcount.CELL, "headcount", "valid_from", "valid_to"))
+        headcount.backfill()
+        self.assertEqual(sorted(HeadcountSpan.objects.values_list(*headcount.CELL, "headcount", "valid_from", "valid_to")), spans)
+
+        headcount.schedule_snapshot()
+        headcount.schedule_snapshot()
+        self.assertEqual(Job.objects.filter(task=headcount.SNAPSHOT_HEADCOUNT).count(), 1)
+
+    def test_series_endpoint_reads_only_spans(self):
+        headcount.backfill()
+        client = APIClient()
+        client.force_authenticate(self.hr)
+        start = date(self.today.year - 2, 1, 1)
+        with self.assertNumQueries(2):  # roles + spans
+            response = client.get("/api/analytics/headcount/", {
+                "date_from": start.isoformat(), "interval": "year", "group_by": "region",
+            })
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body["points"][-1], self.today.isoformat())
+        self.assertEqual(len(body["points"]), 3)
+        self.assertEqual(body["totals"][-1], sum(headcount.cube(self.today).values()))
+        self.assertEqual([g["region_name"] for g in body["series"]], ["HC North", "HC South"])
+
+        filtered = client.get("/api/analytics/headcount/", {"date_from": start.isoformat(), "grade": str(self.g2.id)})
+        self.assertEqual(filtered.json()["totals"][-1], 1)
+        self.assertEqual(client.get("/api/analytics/headcount/", {"date_from": "2000-01-01", "interval": "day"}).status_code, 400)
+        self.assertEqual(client.get("/api/analytics/headcount/", {"date_from": "2020-01-01", "group_by": "colour"}).status_code, 400)
+        client.force_authenticate(get_user_model().objects.create_user("hc_nobody"))
+        self.assertEqual(client.get("/api/analytics/headcount/", {"date_from": "2020-01-01"}).status_code, 403)
+
+
+class BIExportTests(SeededDataMixin, TestCase):
+    """Extracts follow the updated_at watermark and the manifest lists only what each run wrote."""
+
+    def setUp(self):
+        self.root = Path(self.enterContext(tempfile.TemporaryDirectory()))
+        self.later = timezone.now() + timedelta(minutes=5)  # past the settle window
+
+    def read_csv(self, partitions):
+        rows = []
+        for partition in partitions:
+            with gzip.open(self.root / partition["path"], "rt", encoding="utf-8", newline="") as fh:
+                part = list(csv.DictReader(fh))
+            self.assertEqual(len(part), partition["rows"])
+            rows += part
+        return rows
+
+    def run_export(self, now=None, **kwargs):
+        return export.export(root=self.root, fmt="csv", now=now or self.later, chunk_size=7, rows_per_file=20, **kwargs)
+
+    def test_incremental_runs_export_only_changes(self):
+        self.assertEqual(sum(export.export(root=self.root, fmt="csv").rows.values()), 0)  # everything is too recent
+
+        first = self.run_export()
+        self.assertEqual(first.sequence, 1)
+        for name, model in export.DATASETS.items():
+            self.assertEqual(first.rows[name], model.objects.count(), name)
+        manifest = export.load_manifest(self.root)
+        leave_parts = manifest["datasets"]["leave_requests"]["partitions"]
+        self.assertGreater(len(leave_parts), 1)
+        self.assertTrue(all(p["path"].startswith("leave_requests/dt=") for p in leave_parts))
+        ids = [row["id"] for row in self.read_csv(leave_parts)]
+        self.assertEqual(len(set(ids)), LeaveRequest.objects.count())
+
+        leave = LeaveRequest.objects.first()
+        leave.reason = "Exported again"
+        leave.save()
+        AuditLog.objects.create(action="UPDATE", entity_type="LeaveRequest", entity_id=leave.id, after_json={"x": 1})
+        second = self.run_export(now=timezone.now() + timedelta(minutes=10))
+        self.assertEqual(second.sequence, 2)
+
+        fresh = export.new_partitions(export.load_manifest(self.root), after_sequence=1)
+        self.assertEqual([row["reason"] for row in self.read_csv(fresh["leave_requests"])], ["Exported again"])
+        self.assertEqual(self.read_csv(fresh["audit_log"])[0]["after_json"], '{"x":1}')
+        self.assertEqual(fresh["employments"], [])
+
+        third = self.run_export(now=timezone.now() + timedelta(minutes=10))
+        self.assertEqual((third.files, export.load_manifest(self.root)["sequence"]), ([], 2))
+
+    def test_chunks_are_separate_short_queries(self):
+        count = ApprovalRequest.objects.count()
+        with self.assertNumQueries(count // 7 + 1):  # one keyset query per chunk, nothing else
+            self.run_export(datasets=["approval_requests"])
+
+        export.schedule_export()
+        export.schedule_export()
+        self.assertEqual(Job.objects.filter(task=export.EXPORT_BI).count(), 1)
+        self.assertFalse(jobs._registry[export.EXPORT_BI].atomic)
+
+    @unittest.skipIf(export.fcntl is None, "flock is POSIX only")
+    def test_runs_do_not_overlap(self):
+        with export.root_lock(self.root):
+            with self.assertRaisesMessage(RuntimeError, "Another export is running"):
+                self.run_export()
+        self.assertEqual(self.run_export().sequence, 1)
+
+    @unittest.skipIf(export.pyarrow is None, "pyarrow is not installed")
+    def test_parquet_round_trip(self):
+        result = export.export(root=self.root, fmt="parquet", now=self.later, datasets=["employments"])
+        table = export.pyarrow.parquet.read_table(self.root / result.files[0])
+        self.assertEqual(table.num_rows, Employment.objects.count())
+        self.assertEqual(str(table.schema.field("start_date").type), "date32[day]")
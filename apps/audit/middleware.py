@@ -25,4 +25,7 @@ class AuditContextMiddleware:
         ip = request.META.get("HTTP_X_FORWARDED_FOR", "").split(",")[0].strip() or request.META.get("REMOTE_ADDR", "")
         ua = request.META.get("HTTP_USER_AGENT", "")
         set_audit_context(getattr(request, "user", None), ip, ua)
-        return self.get_response(request)
+        try:
+            return self.get_response(request)
+        finally:
+            set_audit_context()  # the thread serves other requests and jobs next
@@ -18,3 +18,8 @@ class AuditLog(UUIDModel, TimeStampedModel):
     after_json = models.JSONField(null=True, blank=True)
 
     note = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["updated_at", "id"]),  # BI export
+        ]
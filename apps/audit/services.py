@@ -1,16 +1,28 @@
 from apps.audit.models import AuditLog
 from apps.audit.middleware import get_audit_context
+from apps.common.metrics import Counter
 
-def write_audit(action: str, entity_type: str, entity_id, before=None, after=None, note: str = ""):
-    user, ip, ua = get_audit_context()
-    AuditLog.objects.create(
-        action=action,
-        entity_type=entity_type,
-        entity_id=entity_id,
-        actor=user if getattr(user, "is_authenticated", False) else None,
-        ip_address=ip or "",
-        user_agent=ua or "",
-        before_json=before,
-        after_json=after,
-        note=note or "",
-    )
+AUDIT_WRITES = Counter(
+    "geahr_audit_writes_total", "write_audit() calls by entity type and outcome (ok / error).",
+    ["entity_type", "outcome"],
+)
+
+def write_audit(action: str, entity_type: str, entity_id, before=None, after=None, note: str = "", context=None):
+    """`context` is an explicit (user, ip, user_agent), e.g. captured on the request for a background job."""
+    user, ip, ua = context or get_audit_context()
+    try:
+        AuditLog.objects.create(
+            action=action,
+            entity_type=entity_type,
+            entity_id=entity_id,
+            actor=user if getattr(user, "is_authenticated", False) else None,
+            ip_address=ip or "",
+            user_agent=ua or "",
+            before_json=before,
+            after_json=after,
+            note=note or "",
+        )
+    except Exception:
+        AUDIT_WRITES.inc(entity_type=entity_type, outcome="error")
+        raise
+    AUDIT_WRITES.inc(entity_type=entity_type, outcome="ok")
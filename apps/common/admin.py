@@ -1,3 +1,15 @@
 from django.contrib import admin
 
-# Register your models here.
+from apps.common import jobs
+from apps.common.models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("task", "status", "priority", "attempts", "max_attempts", "run_at", "locked_by", "created_at")
+    list_filter = ("status", "task")
+    actions = ["requeue"]
+
+    @admin.action(description="Queue selected dead jobs again")
+    def requeue(self, request, queryset):
+        self.message_user(request, f"{jobs.requeue_dead(queryset)} jobs queued")
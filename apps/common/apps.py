@@ -3,3 +3,10 @@ from django.apps import AppConfig
 class CommonConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.common"
+
+    def ready(self):
+        from apps.common import jobs, query_observers
+
+        query_observers.connect()
+        # Register every app's tasks, so enqueue() knows their defaults
+        jobs.autodiscover()
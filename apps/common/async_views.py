@@ -0,0 +1,119 @@
+"""
+Native async read endpoints (served by the ASGI stack, see geahr/asgi.py).
+
+DRF views are synchronous, so under ASGI every DRF request occupies a worker
+thread for its whole duration. AsyncReadView re-implements the small part of
+DRF a read endpoint needs -- authentication, permission classes, page-number
+pagination and JSON rendering -- on top of Django's async ORM, and produces
+the same responses as the DRF viewset it mirrors. Methods it does not handle
+are passed on to that viewset (`fallback`).
+
+Permission classes are the sync ones: the user's role codes are awaited
+first (auser_role_codes), after which role-based permissions make no
+queries and are safe on the event loop.
+"""
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from rest_framework import exceptions
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from apps.accounts.authentication import aauthenticate, authenticate_header
+from apps.accounts.permissions import auser_role_codes
+from apps.common import fastjson
+from apps.common.profiling import profile_section
+
+
+def json_response(data, status: int = 200, headers=None) -> HttpResponse:
+    """Same body as the DRF viewsets render (fastjson.FastJSONRenderer)."""
+    return HttpResponse(fastjson.dumps(data), status=status, headers=headers, content_type="application/json")
+
+
+def error_response(exc: exceptions.APIException, request=None) -> HttpResponse:
+    headers = None
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)) and request is not None:
+        headers = {"WWW-Authenticate": authenticate_header(request)}
+    data = exc.detail if isinstance(exc.detail, (list, dict)) else {"detail": exc.detail}
+    return json_response(data, status=exc.status_code, headers=headers)
+
+
+class AsyncReadView:
+    permission_classes = ()
+    fallback = None  # sync view for methods other than GET / HEAD
+    page_size = None  # defaults to REST_FRAMEWORK["PAGE_SIZE"]
+    page_query_param = "page"
+
+    @classmethod
+    def as_view(cls, fallback=None):
+        fallback = sync_to_async(fallback or cls.fallback)
+
+        async def view(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return await fallback(request, *args, **kwargs)
+            self = cls()
+            self.request, self.args, self.kwargs = request, args, kwargs
+            with profile_section("view"):
+                return await self.dispatch(request, *args, **kwargs)
+
+        view.view_class = cls
+        # As with DRF views: only the session path needs CSRF, and reads are safe methods.
+        view.csrf_exempt = True
+        return view
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            with profile_section("auth"):
+                await self.initial(request)
+            return await self.get(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            return error_response(exc, request)
+
+    async def initial(self, request):
+        user = await aauthenticate(request)
+        request.user = user or AnonymousUser()
+        await auser_role_codes(request.user)
+        for permission in self.permission_classes:
+            if not permission().has_permission(request, self):
+                if user is None:
+                    raise exceptions.NotAuthenticated()
+                raise exceptions.PermissionDenied(getattr(permission, "message", None))
+
+    async def get(self, request, *args, **kwargs):
+        raise exceptions.MethodNotAllowed(request.method)
+
+    # Pagination (PageNumberPagination) ------------------------------
+
+    async def paginate(self, request, queryset, serializer_class, count=None) -> HttpResponse:
+        """`count` may be passed when the caller already counted `queryset`."""
+        page_size = self.page_size or api_settings.PAGE_SIZE
+        if count is None:
+            count = await queryset.acount()
+        num_pages = max(1, -(-count // page_size))
+
+        raw = request.GET.get(self.page_query_param) or 1
+        try:
+            number = num_pages if raw == "last" else int(raw)
+        except (TypeError, ValueError):
+            number = 0
+        if number < 1 or number > num_pages:
+            raise exceptions.NotFound("Invalid page.")
+
+        offset = (number - 1) * page_size
+        rows = [obj async for obj in queryset[offset:offset + page_size]]
+
+        url = request.build_absolute_uri()
+        next_link = replace_query_param(url, self.page_query_param, number + 1) if number < num_pages else None
+        if number <= 1:
+            previous_link = None
+        elif number == 2:
+            previous_link = remove_query_param(url, self.page_query_param)
+        else:
+            previous_link = replace_query_param(url, self.page_query_param, number - 1)
+
+        return json_response({
+            "count": count,
+            "next": next_link,
+            "previous": previous_link,
+            "results": serializer_class(rows, many=True).data,
+        })
@@ -0,0 +1,51 @@
+"""
+In-process background execution for work that must stay off the request
+path (previews). Tasks run on a shared thread pool after the
+surrounding transaction commits and get their own DB connection.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, "BACKGROUND_WORKERS", 2),
+                thread_name_prefix="geahr-bg",
+            )
+        return _executor
+
+
+def _run(fn, args, kwargs):
+    close_old_connections()
+    try:
+        return fn(*args, **kwargs)
+    except Exception:
+        logger.exception("Background task %s failed", getattr(fn, "__name__", fn))
+    finally:
+        close_old_connections()
+
+
+def submit(fn, *args, **kwargs):
+    """
+    Run fn(*args, **kwargs) on the background pool.
+    With BACKGROUND_WORKERS = 0 it runs inline (scripts, tests).
+    """
+    if getattr(settings, "BACKGROUND_WORKERS", 2) == 0:
+        return _run(fn, args, kwargs)
+    return _get_executor().submit(_run, fn, args, kwargs)
+
+
+def submit_on_commit(fn, *args, **kwargs) -> None:
+    transaction.on_commit(lambda: submit(fn, *args, **kwargs))
@@ -0,0 +1,329 @@
+"""
+Latency / query-count measurement of the hot API endpoints.
+
+Each scenario is a (user, method, path) request issued through DRF's
+APIClient against the current database, typically one filled by
+`seed_scale`. Writes (submit, act) run inside a transaction that is rolled
+back, so every iteration sees the same data and the database is unchanged.
+"""
+import io
+import platform
+import statistics
+import subprocess
+import time
+import uuid
+from dataclasses import dataclass, field
+
+import django
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.documents.models import Document
+from apps.employees.models import Employee, Employment
+from apps.leave.models import LeaveRequest
+from apps.workflows.models import ApprovalRequest
+
+
+@dataclass
+class Scenario:
+    name: str
+    user: str          # key into the users mapping (admin / hr / ceo / regional_manager)
+    method: str
+    path: str
+    data: dict = field(default_factory=dict)
+    writes: bool = False
+
+
+def percentile(values, pct: float) -> float:
+    """Nearest-rank percentile (pct in 0..100)."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+class QueryRecorder:
+    """
+    connection.execute_wrapper() hook that records every statement with its
+    duration (transaction control excluded). Unlike CaptureQueriesContext it
+    does not depend on DEBUG or on the (capped) connection.queries_log.
+    """
+
+    # Savepoint / transaction bookkeeping is not a query anyone can optimise away.
+    TRANSACTION_CONTROL = ("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT", "BEGIN", "COMMIT", "ROLLBACK")
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        if sql.lstrip().upper().startswith(self.TRANSACTION_CONTROL):
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({"sql": sql, "params": params, "many": many, "ms": (time.perf_counter() - started) * 1000})
+
+    def __len__(self):
+        return len(self.queries)
+
+
+def git_revision() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5)
+        return out.stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+# ------------------------------------------------------------
+# Scenarios
+# ------------------------------------------------------------
+
+def default_scenarios(users: dict) -> list:
+    """
+    The hot paths: list / detail / inbox reads and one submit + one act, against rows
+    picked deterministically from the dataset. Scenarios whose fixture row
+    does not exist are left out.
+    """
+    User = get_user_model()
+    scenarios = [
+        Scenario("leave_list", "hr", "get", "/api/leave/requests/"),
+        Scenario("leave_list_regional", "regional_manager", "get", "/api/leave/requests/"),
+        Scenario("inbox_role", "ceo", "get", "/api/approvals/requests/inbox/"),
+        Scenario("inbox_regional", "regional_manager", "get", "/api/approvals/requests/inbox/"),
+        Scenario("approval_list", "hr", "get", "/api/approvals/requests/"),
+        Scenario("employee_list", "hr", "get", "/api/employees/"),
+        Scenario("employee_search", "hr", "get", "/api/employees/search/?q=mensah"),
+        Scenario("document_list", "hr", "get", "/api/documents/"),
+    ]
+
+    leave = LeaveRequest.objects.order_by("id").values_list("id", "approval_request_id", "employee_id").first()
+    if leave:
+        scenarios.append(Scenario("leave_detail", "hr", "get", f"/api/leave/requests/{leave[0]}/"))
+        scenarios.append(Scenario("employee_detail", "hr", "get", f"/api/employees/{leave[2]}/"))
+    approval = ApprovalRequest.objects.order_by("id").values_list("id", flat=True).first()
+    if approval:
+        scenarios.append(Scenario("approval_detail", "hr", "get", f"/api/approvals/requests/{approval}/"))
+
+    draft = (
+        LeaveRequest.objects
+        .filter(status="DRAFT", employee__employments__status="ACTIVE", employee__employments__staff_category="JUNIOR")
+        .order_by("id")
+        .values_list("id", flat=True)
+        .first()
+    )
+    if draft:
+        scenarios.append(Scenario("leave_submit", "admin", "post", f"/api/leave/requests/{draft}/submit/", writes=True))
+
+    manager = User.objects.filter(username=users.get("regional_manager")).first()
+    employee = Employee.objects.filter(user=manager).first() if manager else None
+    region_id = (
+        Employment.objects.filter(employee=employee, status="ACTIVE").values_list("region_id", flat=True).first()
+        if employee else None
+    )
+    pending = (
+        ApprovalRequest.objects
+        .filter(status="PENDING", request_type="leave_junior_regional", region_id=region_id)
+        .order_by("id")
+        .values_list("id", flat=True)
+        .first()
+    ) if region_id else None
+    if pending:
+        scenarios.append(Scenario(
+            "approval_act", "regional_manager", "post", f"/api/approvals/requests/{pending}/act/",
+            data={"action": "APPROVE", "comment": "benchmark"}, writes=True,
+        ))
+    return scenarios
+
+
+# ------------------------------------------------------------
+# Runner
+# ------------------------------------------------------------
+
+def request_once(client: APIClient, scenario: Scenario, user=None):
+    """
+    Issue one request; returns (response, seconds, recorded queries).
+    Passing `user` authenticates as a "fresh" user (no memoised role codes),
+    as a real request would be.
+    """
+    if user is not None:
+        user.__dict__.pop("_role_codes_cache", None)
+        client.force_authenticate(user)
+    call = getattr(client, scenario.method)
+    kwargs = {"format": "json"} if scenario.method != "get" else {}
+    recorder = QueryRecorder()
+    with connection.execute_wrapper(recorder):
+        if scenario.writes:
+            with transaction.atomic():
+                started = time.perf_counter()
+                response = call(scenario.path, scenario.data or None, **kwargs)
+                elapsed = time.perf_counter() - started
+                transaction.set_rollback(True)
+        else:
+            started = time.perf_counter()
+            response = call(scenario.path, scenario.data or None, **kwargs)
+            elapsed = time.perf_counter() - started
+    return response, elapsed, recorder.queries
+
+
+def measure(scenario: Scenario, user, iterations: int = 30, warmup: int = 3) -> dict:
+    client = APIClient()
+
+    for _ in range(warmup):
+        request_once(client, scenario, user)
+
+    timings, query_counts, status = [], [], None
+    for _ in range(iterations):
+        response, elapsed, queries = request_once(client, scenario, user)
+        status = response.status_code
+        timings.append(elapsed * 1000)
+        query_counts.append(len(queries))
+
+    return {
+        "method": scenario.method.upper(),
+        "path": scenario.path,
+        "user": scenario.user,
+        "status": status,
+        "iterations": iterations,
+        "p50_ms": round(percentile(timings, 50), 2),
+        "p95_ms": round(percentile(timings, 95), 2),
+        "mean_ms": round(statistics.fmean(timings), 2),
+        "min_ms": round(min(timings), 2),
+        "max_ms": round(max(timings), 2),
+        "queries": max(query_counts),
+    }
+
+
+def dataset_summary() -> dict:
+    return {
+        "employees": Employee.objects.count(),
+        "leave_requests": LeaveRequest.objects.count(),
+        "approval_requests": ApprovalRequest.objects.count(),
+        "pending_approvals": ApprovalRequest.objects.filter(status="PENDING").count(),
+        "documents": Document.objects.count(),
+    }
+
+
+def run_benchmarks(users: dict, iterations: int = 30, warmup: int = 3, only=None, progress=None) -> dict:
+    """
+    users maps scenario user keys to usernames. Returns a JSON-ready report.
+    """
+    User = get_user_model()
+    accounts = {key: User.objects.filter(username=name).first() for key, name in users.items() if name}
+
+    results = {}
+    for scenario in default_scenarios(users):
+        if only and scenario.name not in only:
+            continue
+        user = accounts.get(scenario.user)
+        if user is None:
+            continue
+        results[scenario.name] = measure(scenario, user, iterations=iterations, warmup=warmup)
+        if progress:
+            progress(scenario.name, results[scenario.name])
+
+    return {
+        "generated_at": timezone.now().isoformat(),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "database": connection.vendor,
+        "dataset": dataset_summary(),
+        "results": results,
+    }
+
+
+def compare_reports(baseline: dict, current: dict) -> list:
+    """Rows of (scenario, metric, before, after, change %) for p50/p95/queries."""
+    rows = []
+    for name, now in current.get("results", {}).items():
+        before = baseline.get("results", {}).get(name)
+        if not before:
+            continue
+        for metric in ("p50_ms", "p95_ms", "queries"):
+            old, new = before.get(metric), now.get(metric)
+            if old is None or new is None:
+                continue
+            change = ((new - old) / old * 100) if old else 0.0
+            rows.append((name, metric, old, new, round(change, 1)))
+    return rows
+
+
+# ------------------------------------------------------------
+# JSON microbenchmark
+# ------------------------------------------------------------
+
+def sample_leave_rows(rows: int = 1000) -> list:
+    """`rows` LeaveRequests: the newest from the database, topped up with unsaved synthetic rows."""
+    objs = list(LeaveRequest.objects.order_by("-created_at")[:rows])
+    now = timezone.now()
+    for i in range(rows - len(objs)):
+        objs.append(LeaveRequest(
+            id=uuid.UUID(int=i + 1), employee_id=uuid.UUID(int=10**9 + i), approval_request_id=uuid.UUID(int=10**10 + i),
+            leave_type="ANNUAL", status="SUBMITTED", days_requested=5, reason="Family visit",
+            start_date=now.date(), end_date=now.date(), created_at=now, updated_at=now,
+        ))
+    return objs
+
+
+def _best_ms(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def json_benchmark(rows: int = 1000, repeat: int = 20) -> dict:
+    """
+    Per-stage cost of one `rows`-row leave page: plain DRF vs
+    FastModelSerializerMixin serializer, stdlib vs fast renderer and parser,
+    gzip / brotli. Best of `repeat` runs.
+    """
+    from rest_framework import serializers
+    from rest_framework.parsers import JSONParser
+    from rest_framework.renderers import JSONRenderer
+
+    from apps.common import compression, fastjson
+    from apps.leave.api import LeaveRequestSerializer
+
+    class PlainLeaveRequestSerializer(serializers.ModelSerializer):
+        class Meta:
+            model = LeaveRequest
+            fields = "__all__"
+
+    objs = sample_leave_rows(rows)
+    page = {"count": rows, "next": None, "previous": None, "results": LeaveRequestSerializer(objs, many=True).data}
+    stdlib_body = JSONRenderer().render(page)
+    fast_body = fastjson.FastJSONRenderer().render(page)
+
+    stages = {
+        "serialize_drf": _best_ms(lambda: PlainLeaveRequestSerializer(objs, many=True).data, repeat),
+        "serialize_fast": _best_ms(lambda: LeaveRequestSerializer(objs, many=True).data, repeat),
+        "render_stdlib": _best_ms(lambda: JSONRenderer().render(page), repeat),
+        "render_fast": _best_ms(lambda: fastjson.FastJSONRenderer().render(page), repeat),
+        "parse_stdlib": _best_ms(lambda: JSONParser().parse(io.BytesIO(stdlib_body)), repeat),
+        "parse_fast": _best_ms(lambda: fastjson.FastJSONParser().parse(io.BytesIO(fast_body)), repeat),
+        "gzip": _best_ms(lambda: compression.compress(fast_body, "gzip"), repeat),
+    }
+    sizes = {"json": len(fast_body), "gzip": len(compression.compress(fast_body, "gzip"))}
+    if compression.brotli is not None:
+        stages["brotli"] = _best_ms(lambda: compression.compress(fast_body, "br"), repeat)
+        sizes["brotli"] = len(compression.compress(fast_body, "br"))
+
+    return {
+        "rows": rows,
+        "orjson": fastjson.orjson is not None,
+        "identical_output": stdlib_body == fast_body,
+        "stages_ms": {name: round(ms, 3) for name, ms in stages.items()},
+        "rows_per_second": {name: round(rows / (ms / 1000)) for name, ms in stages.items() if ms},
+        "serialize_speedup": round(stages["serialize_drf"] / stages["serialize_fast"], 1) if stages["serialize_fast"] else None,
+        "render_speedup": round(stages["render_stdlib"] / stages["render_fast"], 1) if stages["render_fast"] else None,
+        "parse_speedup": round(stages["parse_stdlib"] / stages["parse_fast"], 1) if stages["parse_fast"] else None,
+        "bytes": sizes,
+    }
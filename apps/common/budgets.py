@@ -0,0 +1,129 @@
+"""
+Performance budgets for API routes.
+
+A budget caps the number of SQL queries and the p95 latency of one request
+against a fixed synthetic dataset (apps.common.seeding). Requests go through
+DRF's APIClient exactly like apps.common.benchmarks, so a budget test and a
+benchmark run measure the same thing.
+
+When the query budget is exceeded the failure lists every captured
+statement; statements that repeat an earlier one (modulo literal values)
+are marked with "+", which is what an N+1 loop looks like.
+
+Latency budgets are for catching order-of-magnitude regressions, not
+micro-changes. PERF_BUDGET_LATENCY_FACTOR=<float> scales them for slow
+machines; PERF_BUDGET_LATENCY_FACTOR=0 disables the latency check.
+"""
+import gc
+import os
+import re
+from collections import Counter
+from dataclasses import dataclass
+
+from rest_framework.test import APIClient
+
+from apps.common.benchmarks import Scenario, percentile, request_once
+from apps.common.testing import SeededDataMixin
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)")
+
+
+@dataclass(frozen=True)
+class Budget:
+    queries: int
+    p95_ms: float
+
+
+def fingerprint(sql: str) -> str:
+    """SQL with literals and IN-lists collapsed, so repeats of one statement compare equal."""
+    sql = _STRING_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    return _IN_LIST_RE.sub("(...)", sql)
+
+
+def describe_queries(queries, limit: int = 60) -> str:
+    """
+    Numbered listing of captured queries. Repeats of an earlier statement are
+    prefixed "+" and summarised at the end.
+    """
+    seen = set()
+    lines = []
+    for i, q in enumerate(queries[:limit], start=1):
+        key = fingerprint(q["sql"])
+        marker = "+" if key in seen else " "
+        seen.add(key)
+        lines.append(f"{marker} {i:>3}. [{q['ms']:.1f} ms] {q['sql']}")
+    if len(queries) > limit:
+        lines.append(f"    … {len(queries) - limit} more")
+
+    repeated = [(sql, n) for sql, n in Counter(fingerprint(q["sql"]) for q in queries).most_common() if n > 1]
+    if repeated:
+        lines.append("")
+        lines.append("Repeated statements:")
+        lines += [f"  x{n:<4} {sql}" for sql, n in repeated[:10]]
+    return "\n".join(lines)
+
+
+def latency_factor() -> float:
+    return float(os.environ.get("PERF_BUDGET_LATENCY_FACTOR", "1"))
+
+
+class APIBudgetMixin(SeededDataMixin):
+    """
+    TestCase mixin over the seeded dataset (apps.common.testing). Subclasses declare
+    `budgets = {"scenario_name": Budget(queries=..., p95_ms=...)}` for the
+    scenarios of apps.common.benchmarks and/or call assertWithinBudget()
+    with their own Scenario.
+    """
+
+    iterations = 15
+    warmup = 2
+    budgets = {}
+
+    def assertWithinBudget(self, scenario: Scenario, budget: Budget, expected_status: int = 200):
+        client = APIClient()
+        user = self.user(scenario.user)
+
+        for _ in range(self.warmup):
+            request_once(client, scenario, user)
+
+        # One GC pass over the suite's accumulated objects inside a sample
+        # becomes the p95 of 15 samples: collect first and keep the
+        # collector out of the timed loop, as timeit does.
+        timings, worst = [], []
+        gc.collect()
+        gc.disable()
+        try:
+            for _ in range(self.iterations):
+                response, elapsed, queries = request_once(client, scenario, user)
+                self.assertEqual(
+                    response.status_code, expected_status,
+                    f"{scenario.name}: {scenario.method.upper()} {scenario.path} -> {response.status_code}",
+                )
+                timings.append(elapsed * 1000)
+                if len(queries) > len(worst):
+                    worst = queries
+        finally:
+            gc.enable()
+
+        label = f"{scenario.name} ({scenario.method.upper()} {scenario.path} as {scenario.user})"
+        if len(worst) > budget.queries:
+            self.fail(
+                f"{label}: {len(worst)} queries, budget {budget.queries} "
+                f"(+{len(worst) - budget.queries})\n\n{describe_queries(worst)}"
+            )
+
+        factor = latency_factor()
+        p95 = percentile(timings, 95)
+        if factor and p95 > budget.p95_ms * factor:
+            self.fail(
+                f"{label}: p95 {p95:.1f} ms over budget {budget.p95_ms * factor:.1f} ms "
+                f"(samples: {', '.join(f'{t:.1f}' for t in sorted(timings))})"
+            )
+
+    def test_declared_budgets(self):
+        for name, budget in self.budgets.items():
+            with self.subTest(scenario=name):
+                self.assertWithinBudget(self.scenario(name), budget)
@@ -0,0 +1,184 @@
+"""
+Closure-table maintenance shared by hierarchical models.
+
+A closure model stores one row per (ancestor, descendant) pair with the
+distance between them, including a depth-0 self row for every node:
+
+    ancestor  -> FK to the node model, related_name="descendant_links"
+    descendant-> FK to the node model, related_name="ancestor_links"
+    depth     -> PositiveIntegerField
+
+With that, "whole subtree of X" and "all ancestors of X" are single indexed
+lookups instead of one query per level.
+"""
+from collections import defaultdict, deque
+
+from django.core.exceptions import ValidationError
+from django.db import connections, router
+
+
+def _ancestors(closure, node_id):
+    """[(ancestor_id, depth)] of node_id including itself (depth 0)."""
+    return list(closure.objects.filter(descendant_id=node_id).values_list("ancestor_id", "depth"))
+
+
+def _subtree(closure, node_id):
+    """[(descendant_id, depth)] of node_id including itself (depth 0)."""
+    return list(closure.objects.filter(ancestor_id=node_id).values_list("descendant_id", "depth"))
+
+
+def current_parent_id(closure, node_id):
+    return (
+        closure.objects.filter(descendant_id=node_id, depth=1)
+        .values_list("ancestor_id", flat=True)
+        .first()
+    )
+
+
+def is_in_subtree(closure, node_id, candidate_id) -> bool:
+    """True when candidate_id is node_id or one of its descendants."""
+    return closure.objects.filter(ancestor_id=node_id, descendant_id=candidate_id).exists()
+
+
+def check_parent(closure, node_id, parent_id) -> None:
+    if parent_id and is_in_subtree(closure, node_id, parent_id):
+        raise ValidationError("A node cannot be placed under itself or one of its descendants.")
+
+
+def insert_node(closure, node_id, parent_id=None) -> None:
+    """Add a new leaf node under parent_id (or as a root)."""
+    rows = [closure(ancestor_id=node_id, descendant_id=node_id, depth=0)]
+    if parent_id:
+        rows += [
+            closure(ancestor_id=ancestor_id, descendant_id=node_id, depth=depth + 1)
+            for ancestor_id, depth in _ancestors(closure, parent_id)
+        ]
+    closure.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+def detach_subtree(closure, node_id) -> None:
+    """Cut node_id (with its subtree) loose from all of its ancestors."""
+    outside = [a for a, depth in _ancestors(closure, node_id) if depth > 0]
+    if not outside:
+        return
+    inside = [d for d, _ in _subtree(closure, node_id)]
+    closure.objects.filter(ancestor_id__in=outside, descendant_id__in=inside).delete()
+
+
+def move_subtree(closure, node_id, new_parent_id=None) -> None:
+    """Re-hang node_id (with its subtree) under new_parent_id."""
+    if not closure.objects.filter(ancestor_id=node_id, descendant_id=node_id).exists():
+        insert_node(closure, node_id, new_parent_id)
+        return
+
+    check_parent(closure, node_id, new_parent_id)
+    detach_subtree(closure, node_id)
+    if not new_parent_id:
+        return
+
+    subtree = _subtree(closure, node_id)
+    closure.objects.bulk_create(
+        [
+            closure(ancestor_id=ancestor_id, descendant_id=descendant_id, depth=up + down + 1)
+            for ancestor_id, up in _ancestors(closure, new_parent_id)
+            for descendant_id, down in subtree
+        ],
+        batch_size=1000,
+    )
+
+
+def detach_children(closure, node_id) -> None:
+    """
+    Before deleting node_id: its children become roots (on_delete=SET_NULL),
+    so drop every path that runs through node_id into its subtree.
+    """
+    above = [a for a, _ in _ancestors(closure, node_id)]
+    below = [d for d, depth in _subtree(closure, node_id) if depth > 0]
+    if below:
+        closure.objects.filter(ancestor_id__in=above, descendant_id__in=below).delete()
+
+
+def sync_parent(closure, node_id, parent_id, created: bool) -> None:
+    """post_save helper: insert new nodes, move nodes whose parent changed."""
+    if created:
+        insert_node(closure, node_id, parent_id)
+    elif current_parent_id(closure, node_id) != parent_id:
+        move_subtree(closure, node_id, parent_id)
+
+
+def find_cycles(parents: dict) -> list:
+    """The cycles of a {node_id: parent_id} mapping, each as a list of node ids."""
+    cycles, done = [], set()
+    for start in parents:
+        path, position = [], {}
+        node_id = start
+        while node_id in parents and node_id not in done and node_id not in position:
+            position[node_id] = len(path)
+            path.append(node_id)
+            node_id = parents[node_id]
+        if node_id in position:
+            cycles.append(path[position[node_id]:])
+        done.update(path)
+    return cycles
+
+
+def rebuild(closure, parents: dict, batch_size: int = 5000) -> int:
+    """
+    Rebuild the whole closure table from a {node_id: parent_id} mapping
+    (every node must appear as a key). Walks the forest breadth-first in
+    memory so each node's ancestor list is computed once; cycles are broken
+    by treating the offending node as a root. Returns the number of rows.
+    """
+    children = defaultdict(list)
+    for node_id, parent_id in parents.items():
+        if parent_id and parent_id in parents:
+            children[parent_id].append(node_id)
+
+    ancestors_of = {}
+
+    def walk(roots):
+        queue = deque(roots)
+        while queue:
+            node_id = queue.popleft()
+            chain = (node_id,) + ancestors_of[node_id]
+            for child_id in children[node_id]:
+                if child_id not in ancestors_of:
+                    ancestors_of[child_id] = chain
+                    queue.append(child_id)
+
+    roots = [n for n, p in parents.items() if not p or p not in parents]
+    for node_id in roots:
+        ancestors_of[node_id] = ()
+    walk(roots)
+
+    # Anything not reached hangs off a cycle: break it at that node.
+    for node_id in parents:
+        if node_id not in ancestors_of:
+            ancestors_of[node_id] = ()
+            walk([node_id])
+
+    closure.objects.all().delete()
+
+    # Raw executemany: ORM bulk_create costs more than the walk itself at
+    # hundreds of thousands of rows.
+    connection = connections[router.db_for_write(closure)]
+    prep = closure._meta.get_field("ancestor").target_field.get_db_prep_value
+    db_id = {node_id: prep(node_id, connection) for node_id in ancestors_of}
+    table = connection.ops.quote_name(closure._meta.db_table)
+    sql = f"INSERT INTO {table} (ancestor_id, descendant_id, depth) VALUES (%s, %s, %s)"
+
+    total, batch = 0, []
+    with connection.cursor() as cursor:
+        for node_id, chain in ancestors_of.items():
+            node = db_id[node_id]
+            batch.append((node, node, 0))
+            for depth, ancestor_id in enumerate(chain, start=1):
+                batch.append((db_id[ancestor_id], node, depth))
+            if len(batch) >= batch_size:
+                cursor.executemany(sql, batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            cursor.executemany(sql, batch)
+            total += len(batch)
+    return total
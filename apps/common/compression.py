@@ -0,0 +1,103 @@
+"""
+Response compression for API payloads.
+
+Like django.middleware.gzip.GZipMiddleware, but:
+- only responses of at least RESPONSE_COMPRESSION_MIN_BYTES are compressed
+  (small JSON bodies cost more CPU than they save on the wire);
+- only textual content types (JSON, CSV, text/*); streamed responses
+  (document downloads, ZIP / CSV exports) are left alone;
+- brotli ("br") is preferred when the client accepts it and the optional
+  `brotli` package is installed, otherwise gzip.
+
+gzip output carries Django's random filename padding (BREACH mitigation).
+The brotli format has no equivalent, so requests that carry credentials
+(an Authorization header or the session cookie) never get brotli: only
+responses without per-user secrets may be compressed without padding.
+"""
+import re
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "text/")
+_token = re.compile(r"\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([\d.]+))?\s*")
+
+
+def accepted_encodings(header: str) -> set:
+    """Codings in an Accept-Encoding header that are not refused with q=0."""
+    accepted = set()
+    for part in header.split(","):
+        match = _token.fullmatch(part)
+        if not match:
+            continue
+        coding, q = match.group(1).lower(), match.group(2)
+        try:
+            if q is not None and float(q) == 0:
+                continue
+        except ValueError:
+            continue
+        accepted.add(coding)
+    return accepted
+
+
+def choose_encoding(header: str, allow_brotli: bool = True):
+    accepted = accepted_encodings(header)
+    if allow_brotli and brotli is not None and ("br" in accepted or "*" in accepted):
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+def has_credentials(request) -> bool:
+    return "HTTP_AUTHORIZATION" in request.META or settings.SESSION_COOKIE_NAME in request.COOKIES
+
+
+def compress(content: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(content, quality=getattr(settings, "RESPONSE_COMPRESSION_BROTLI_QUALITY", 4))
+    return compress_string(content, max_random_bytes=100)
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    def __init__(self, get_response):
+        self.min_bytes = getattr(settings, "RESPONSE_COMPRESSION_MIN_BYTES", 1024)
+        if not self.min_bytes:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def process_response(self, request, response):
+        if response.streaming or response.has_header("Content-Encoding"):
+            return response
+        if not response.get("Content-Type", "").startswith(COMPRESSIBLE_TYPES):
+            return response
+        if len(response.content) < self.min_bytes:
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = choose_encoding(
+            request.META.get("HTTP_ACCEPT_ENCODING", ""), allow_brotli=not has_credentials(request),
+        )
+        if encoding is None:
+            return response
+
+        compressed = compress(response.content, encoding)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response.headers["Content-Length"] = str(len(compressed))
+
+        # The body changed: a strong ETag becomes weak (RFC 9110 8.8.1).
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = encoding
+        return response
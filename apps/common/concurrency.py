@@ -0,0 +1,211 @@
+"""
+WSGI vs ASGI throughput of the async read endpoints under concurrent load.
+
+Both stacks are driven in-process, without a network server, so the
+comparison isolates the Django side:
+
+- WSGI: django's WSGIHandler called from `concurrency` client threads (what
+  a threaded WSGI server such as gunicorn --threads does)
+- ASGI: geahr.asgi's handler called from `concurrency` asyncio tasks on one
+  event loop (what uvicorn / daphne do)
+
+Every client sends its requests back to back until `requests` responses have
+been collected in total. Clients authenticate with a JWT bearer token, as
+the dashboards do.
+"""
+import asyncio
+import io
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+from django.core.handlers.wsgi import WSGIHandler
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.common.benchmarks import percentile
+
+
+@dataclass
+class Target:
+    name: str
+    path: str
+    token: str
+
+
+def targets_for(scenarios, accounts: dict) -> list:
+    """Read scenarios (benchmarks.Scenario) whose user exists, with a bearer token each."""
+    targets = []
+    for scenario in scenarios:
+        user = accounts.get(scenario.user)
+        if user is None or scenario.method != "get" or scenario.writes:
+            continue
+        targets.append(Target(scenario.name, scenario.path, str(AccessToken.for_user(user))))
+    return targets
+
+
+def _summary(latencies, statuses, elapsed: float) -> dict:
+    ms = [s * 1000 for s in latencies]
+    return {
+        "requests": len(ms),
+        "errors": sum(1 for s in statuses if s != 200),
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(ms) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(ms, 50), 2),
+        "p95_ms": round(percentile(ms, 95), 2),
+        "p99_ms": round(percentile(ms, 99), 2),
+        "mean_ms": round(statistics.fmean(ms), 2) if ms else 0.0,
+    }
+
+
+# ------------------------------------------------------------
+# WSGI
+# ------------------------------------------------------------
+
+def wsgi_environ(target: Target) -> dict:
+    url = urlsplit(target.path)
+    return {
+        "REQUEST_METHOD": "GET",
+        "PATH_INFO": url.path,
+        "QUERY_STRING": url.query,
+        "SCRIPT_NAME": "",
+        "SERVER_NAME": "testserver",
+        "SERVER_PORT": "80",
+        "SERVER_PROTOCOL": "HTTP/1.1",
+        "REMOTE_ADDR": "127.0.0.1",
+        "HTTP_HOST": "testserver",
+        "HTTP_AUTHORIZATION": f"Bearer {target.token}",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": "http",
+        "wsgi.input": io.BytesIO(b""),
+        "wsgi.errors": io.StringIO(),
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+
+
+def run_wsgi(target: Target, concurrency: int, requests: int) -> dict:
+    handler = WSGIHandler()
+    latencies, statuses = [], []
+    lock = threading.Lock()
+    remaining = [requests]
+
+    def client():
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+            status = []
+            started = time.perf_counter()
+            body = handler(wsgi_environ(target), lambda s, headers, exc_info=None: status.append(int(s[:3])))
+            for _ in body:
+                pass
+            if hasattr(body, "close"):
+                body.close()
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                statuses.append(status[0])
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(client) for _ in range(concurrency)]:
+            future.result()
+    return _summary(latencies, statuses, time.perf_counter() - started)
+
+
+# ------------------------------------------------------------
+# ASGI
+# ------------------------------------------------------------
+
+def asgi_scope(target: Target) -> dict:
+    url = urlsplit(target.path)
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": url.path,
+        "raw_path": url.path.encode(),
+        "query_string": url.query.encode(),
+        "root_path": "",
+        "headers": [
+            (b"host", b"testserver"),
+            (b"authorization", f"Bearer {target.token}".encode()),
+        ],
+        "client": ("127.0.0.1", 0),
+        "server": ("testserver", 80),
+    }
+
+
+async def asgi_request(application, target: Target):
+    """One request through an ASGI application; returns (status, body bytes)."""
+    sent_request = False
+    status, chunks = None, []
+    disconnected = asyncio.Event()
+
+    async def receive():
+        nonlocal sent_request
+        if not sent_request:
+            sent_request = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                disconnected.set()
+
+    await application(asgi_scope(target), receive, send)
+    return status, b"".join(chunks)
+
+
+def run_asgi(target: Target, concurrency: int, requests: int) -> dict:
+    from geahr.asgi import GeahrASGIHandler
+
+    handler = GeahrASGIHandler()
+    latencies, statuses = [], []
+
+    async def main():
+        remaining = requests
+
+        async def client():
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                started = time.perf_counter()
+                status, _ = await asgi_request(handler, target)
+                latencies.append(time.perf_counter() - started)
+                statuses.append(status)
+
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+
+    started = time.perf_counter()
+    asyncio.run(main())
+    return _summary(latencies, statuses, time.perf_counter() - started)
+
+
+def run_comparison(targets, concurrency: int = 200, requests: int = 2000, progress=None) -> dict:
+    results = {}
+    for target in targets:
+        row = {
+            "path": target.path,
+            "wsgi": run_wsgi(target, concurrency, requests),
+            "asgi": run_asgi(target, concurrency, requests),
+        }
+        wsgi_rps, asgi_rps = row["wsgi"]["throughput_rps"], row["asgi"]["throughput_rps"]
+        row["asgi_vs_wsgi"] = round(asgi_rps / wsgi_rps, 2) if wsgi_rps else None
+        results[target.name] = row
+        if progress:
+            progress(target.name, row)
+    return results
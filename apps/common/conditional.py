@@ -0,0 +1,133 @@
+"""
+Conditional GET for API reads (If-None-Match / If-Modified-Since -> 304).
+
+- Detail: strong ETag from (id, updated_at) plus Last-Modified, taken from
+  the object get_object() loads anyway.
+- List: weak ETag from the scoped, filtered queryset's Max(updated_at) and
+  row count (one aggregate query), mixed with the caller and the query
+  string -- scoping, filters and the page all change the body. The count
+  is handed on to the paginator, so a full response costs no extra query.
+  Lists carry no Last-Modified: deleting a row lowers the count but not
+  the max, so a date alone cannot tell.
+
+A match is answered with 304 before anything is serialized. Only JSON
+responses take part; the browsable API is always rendered.
+
+Writes through queryset.update() skip auto_now and leave the validators
+unchanged. A viewset whose serializer shows such a column adds it to
+`etag_fields` (detail) and `list_etag_aggregates` (list).
+"""
+import functools
+import hashlib
+import uuid
+from datetime import datetime
+
+from django.core.paginator import Paginator
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+DEFAULT_ETAG_FIELDS = ("id", "updated_at")
+
+
+def _token(value) -> str:
+    if isinstance(value, datetime):
+        return f"{int(value.timestamp() * 1_000_000):x}"
+    if isinstance(value, uuid.UUID):
+        return value.hex
+    if value is None:
+        return ""
+    return str(value)
+
+
+def detail_etag(obj, fields=DEFAULT_ETAG_FIELDS) -> str:
+    """'"<id>-<updated_at µs>"', with a digest of any extra fields appended."""
+    tag = f"{_token(obj.pk)}-{_token(obj.updated_at)}"
+    extra = [name for name in fields if name not in DEFAULT_ETAG_FIELDS]
+    if extra:
+        digest = hashlib.blake2b("\x1f".join(_token(getattr(obj, name)) for name in extra).encode(), digest_size=8)
+        tag += f"-{digest.hexdigest()}"
+    return f'"{tag}"'
+
+
+def list_aggregates(extra=None) -> dict:
+    return {"latest": Max("updated_at"), "count": Count("pk"), **(extra or {})}
+
+
+def list_etag(request, values: dict) -> str:
+    """Weak ETag for one page of a list, from list_aggregates() values."""
+    user_id = getattr(request.user, "pk", None)
+    parts = [_token(user_id), request.META.get("QUERY_STRING", "")]
+    parts += [f"{key}={_token(values[key])}" for key in sorted(values)]
+    return f'W/"{hashlib.blake2b("|".join(parts).encode(), digest_size=12).hexdigest()}"'
+
+
+def with_validators(response, etag: str, last_modified=None):
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+    # Clients may keep the body but must revalidate; shared caches must not.
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def not_modified(request, etag: str, last_modified=None):
+    """The 304 / 412 response for a matching conditional request, else None."""
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        return None
+    return with_validators(response, etag, last_modified)
+
+
+class KnownCountPaginator(Paginator):
+    """Paginator whose row count was already aggregated by the caller."""
+
+    def __init__(self, object_list, per_page, *args, count, **kwargs):
+        super().__init__(object_list, per_page, *args, **kwargs)
+        self.__dict__["count"] = count  # pre-fills the cached_property
+
+
+class ConditionalGetMixin:
+    """For DRF viewsets: conditional list() and retrieve()."""
+
+    etag_fields = DEFAULT_ETAG_FIELDS
+    list_etag_aggregates = {}
+
+    def conditional_enabled(self, request) -> bool:
+        renderer = getattr(request, "accepted_renderer", None)
+        return renderer is not None and renderer.format == "json"
+
+    def retrieve(self, request, *args, **kwargs):
+        if not self.conditional_enabled(request):
+            return super().retrieve(request, *args, **kwargs)
+
+        instance = self.get_object()
+        etag = detail_etag(instance, self.etag_fields)
+        last_modified = int(instance.updated_at.timestamp())
+
+        response = not_modified(request, etag, last_modified)
+        if response is None:
+            response = with_validators(Response(self.get_serializer(instance).data), etag, last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        if not self.conditional_enabled(request):
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        values = queryset.order_by().aggregate(**list_aggregates(self.list_etag_aggregates))
+        etag = list_etag(request, values)
+
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+
+        if hasattr(self.paginator, "django_paginator_class"):
+            self.paginator.django_paginator_class = functools.partial(KnownCountPaginator, count=values["count"])
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            response = self.get_paginated_response(self.get_serializer(page, many=True).data)
+        else:
+            response = Response(self.get_serializer(queryset, many=True).data)
+        return with_validators(response, etag)
@@ -0,0 +1,98 @@
+"""
+orjson-backed JSON for DRF (REST_FRAMEWORK renderer / parser classes).
+
+orjson encodes UUID, datetime, date and time natively in C, which is most of
+the per-row cost for UUIDModel / TimeStampedModel rows (primary keys and
+foreign keys reach the renderer as UUID objects). Output matches DRF's
+JSONRenderer with the default settings: compact separators, UTF-8, "Z" for
+UTC datetimes and U+2028 / U+2029 escaped. Differences are handled by
+falling back to DRF's renderer: indented output (?format=json with
+"indent=", the browsable API) and anything orjson refuses (ints over 64
+bits, timezone-aware times). Float NaN / Infinity encode as null.
+
+orjson is optional: without it these classes behave exactly like DRF's.
+
+FastModelSerializerMixin trims the serializer side: DRF's DateTimeField looks
+up the active timezone (an asgiref Local) for every value it formats;
+CachedTimezoneDateTimeField does that once per serializer.
+"""
+from django.conf import settings
+from django.db import models
+from rest_framework import serializers
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_encoder = JSONEncoder()
+_LINE_SEPARATORS = (b"\xe2\x80\xa8", b"\xe2\x80\xa9")
+
+
+def _default(obj):
+    # Decimal, lazy strings, timedelta, querysets, ... as DRF encodes them.
+    return _encoder.default(obj)
+
+
+def dumps(data) -> bytes:
+    """Compact JSON bytes, as FastJSONRenderer would render `data`."""
+    if orjson is not None:
+        try:
+            ret = orjson.dumps(data, default=_default, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+        except orjson.JSONEncodeError:
+            pass
+        else:
+            if _LINE_SEPARATORS[0] in ret or _LINE_SEPARATORS[1] in ret:
+                ret = ret.replace(_LINE_SEPARATORS[0], b"\\u2028").replace(_LINE_SEPARATORS[1], b"\\u2029")
+            return ret
+    return JSONRenderer().render(data)
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if (
+            orjson is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
+
+
+class FastJSONParser(JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get("encoding", settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace("_", "-") not in ("utf-8", "utf8"):
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
+
+
+# ------------------------------------------------------------
+# Serializer fields
+# ------------------------------------------------------------
+
+class CachedTimezoneDateTimeField(serializers.DateTimeField):
+    def to_representation(self, value):
+        # DRF prefers an explicit `timezone` attribute over default_timezone().
+        if not hasattr(self, "timezone"):
+            self.timezone = self.default_timezone()
+        return super().to_representation(value)
+
+
+class FastModelSerializerMixin:
+    serializer_field_mapping = {
+        **serializers.ModelSerializer.serializer_field_mapping,
+        models.DateTimeField: CachedTimezoneDateTimeField,
+    }
@@ -0,0 +1,284 @@
+"""
+Durable background jobs stored in the database (no external broker).
+
+    @jobs.task("leave.generate_approval_letter", max_attempts=5)
+    def generate_approval_letter(leave_id): ...
+
+    generate_approval_letter.enqueue(leave_id=lr.id)   # inside the business transaction
+
+enqueue() only inserts a Job row, so it commits or rolls back with the
+change that needed it (a transactional outbox): no job for a rolled-back
+transition, no lost job for a committed one. `manage.py run_workers` runs
+them on a thread or process pool.
+
+- Claiming: one SELECT of ready ids (partial index on QUEUED jobs, best
+  priority first) and one conditional UPDATE that marks them RUNNING for
+  this worker; rows another worker got first are simply not updated.
+- A job runs in its own transaction (tasks registered with atomic=False,
+  such as long exports that must not hold one open, manage their own).
+  Success deletes it. A failure is
+  retried after an exponential backoff (JOBS_RETRY_BASE_SECONDS doubling,
+  capped at JOBS_RETRY_MAX_SECONDS, with jitter); after max_attempts it is
+  left as DEAD with the traceback (requeue_dead() / the admin puts it back).
+- Jobs RUNNING for longer than JOBS_LOCK_TIMEOUT_SECONDS belong to a
+  worker that died and are queued again. Long atomic=False tasks call
+  heartbeat() between units of work to keep their lock fresh.
+
+Handlers must be idempotent: a worker dying after the handler committed but
+before the job row was deleted runs it again.
+
+Tasks are registered on import; workers import every installed app's
+`tasks` module (and whatever those import).
+"""
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import traceback
+from contextlib import nullcontext
+from datetime import datetime, time as dt_time, timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from apps.common.metrics import CallbackGauge, Counter
+from apps.common.models import Job
+
+logger = logging.getLogger(__name__)
+
+JOBS_PROCESSED = Counter(
+    "geahr_jobs_processed_total", "Background jobs run, by task and outcome (done / retry / dead).",
+    ["task", "outcome"],
+)
+
+_registry = {}
+_running = threading.local()
+
+
+# ------------------------------------------------------------
+# Tasks
+# ------------------------------------------------------------
+
+class Task:
+    def __init__(self, fn, name: str, priority: int = 0, max_attempts: int = 5, atomic: bool = True):
+        self.fn = fn
+        self.name = name
+        self.priority = priority
+        self.max_attempts = max_attempts
+        self.atomic = atomic
+        self.__name__ = getattr(fn, "__name__", name)
+        self.__doc__ = fn.__doc__
+
+    def __call__(self, *args, **kwargs):
+        return self.fn(*args, **kwargs)
+
+    def enqueue(self, *, priority=None, delay: float = 0, **payload) -> Job:
+        return enqueue(self.name, payload, priority=priority, delay=delay)
+
+
+def task(name: str, priority: int = 0, max_attempts: int = 5, atomic: bool = True):
+    """Register fn as the handler of jobs named `name`; fn(**payload) runs the job."""
+    def register(fn):
+        registered = Task(fn, name, priority=priority, max_attempts=max_attempts, atomic=atomic)
+        _registry[name] = registered
+        return registered
+
+    return register
+
+
+def autodiscover() -> None:
+    autodiscover_modules("tasks")
+
+
+def enqueue(name: str, payload=None, *, priority=None, delay: float = 0) -> Job:
+    """Insert a job; it becomes visible to workers when the caller's transaction commits."""
+    registered = _registry.get(name)
+    return Job.objects.create(
+        task=name,
+        payload=payload or {},
+        priority=priority if priority is not None else getattr(registered, "priority", 0),
+        max_attempts=getattr(registered, "max_attempts", 5),
+        run_at=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def delay_until_hour(hour: int, now=None) -> float:
+    """Seconds from now until the next time the local clock reads hour:00 (for daily jobs)."""
+    now = timezone.localtime(now)
+    run_at = timezone.make_aware(datetime.combine(now.date(), dt_time(hour)))
+    if run_at <= now:
+        run_at += timedelta(days=1)
+    return (run_at - now).total_seconds()
+
+
+# ------------------------------------------------------------
+# Running jobs
+# ------------------------------------------------------------
+
+def retry_delay(attempts: int) -> float:
+    base = getattr(settings, "JOBS_RETRY_BASE_SECONDS", 5)
+    cap = getattr(settings, "JOBS_RETRY_MAX_SECONDS", 3600)
+    delay = min(cap, base * 2 ** max(attempts - 1, 0))
+    return delay * random.uniform(0.8, 1.2)
+
+
+def claim(worker_id: str, limit: int = 10) -> list:
+    """Mark up to `limit` ready jobs RUNNING for this worker and return them."""
+    now = timezone.now()
+    ids = list(
+        Job.objects.filter(status=Job.Status.QUEUED, run_at__lte=now)
+        .order_by("-priority", "run_at", "id")
+        .values_list("id", flat=True)[:limit]
+    )
+    if not ids:
+        return []
+    Job.objects.filter(id__in=ids, status=Job.Status.QUEUED).update(
+        status=Job.Status.RUNNING, locked_by=worker_id, locked_at=now, attempts=F("attempts") + 1,
+    )
+    claimed = Job.objects.filter(id__in=ids, status=Job.Status.RUNNING, locked_by=worker_id, locked_at=now)
+    return list(claimed.order_by("-priority", "run_at", "id"))
+
+
+def run_job(job: Job) -> str:
+    """Run one claimed job; returns the outcome (done / retry / dead)."""
+    registered = _registry.get(job.task)
+    _running.job = job
+    try:
+        if registered is None:
+            raise LookupError(f"No task registered as {job.task!r}")
+        with transaction.atomic() if registered.atomic else nullcontext():
+            registered.fn(**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        if registered is None or job.attempts >= job.max_attempts:
+            outcome = "dead"
+            logger.error("Job %s (%s) is dead after %s attempts:\n%s", job.pk, job.task, job.attempts, error)
+            Job.objects.filter(pk=job.pk).update(status=Job.Status.DEAD, locked_by="", locked_at=None, last_error=error)
+        else:
+            outcome = "retry"
+            logger.warning("Job %s (%s) failed, attempt %s/%s", job.pk, job.task, job.attempts, job.max_attempts)
+            Job.objects.filter(pk=job.pk).update(
+                status=Job.Status.QUEUED, locked_by="", locked_at=None, last_error=error,
+                run_at=timezone.now() + timedelta(seconds=retry_delay(job.attempts)),
+            )
+    else:
+        outcome = "done"
+        Job.objects.filter(pk=job.pk).delete()
+    finally:
+        _running.job = None
+    JOBS_PROCESSED.inc(task=job.task, outcome=outcome)
+    return outcome
+
+
+def heartbeat() -> None:
+    """
+    Refresh the lock of the job this thread is running so reap_stale() leaves
+    it alone (a no-op outside a job). Only atomic=False tasks can make it
+    visible before they finish. Raises RuntimeError once the job has been
+    reaped, as another worker may be running it by now.
+    """
+    job = getattr(_running, "job", None)
+    if job is None:
+        return
+    refreshed = Job.objects.filter(pk=job.pk, status=Job.Status.RUNNING, locked_by=job.locked_by).update(
+        locked_at=timezone.now(),
+    )
+    if not refreshed:
+        raise RuntimeError(f"Job {job.pk} ({job.task}) lost its lock to reap_stale()")
+
+
+def reap_stale(timeout: float = None) -> int:
+    """Queue RUNNING jobs whose worker has not finished them within the lock timeout."""
+    timeout = timeout if timeout is not None else getattr(settings, "JOBS_LOCK_TIMEOUT_SECONDS", 600)
+    return Job.objects.filter(
+        status=Job.Status.RUNNING, locked_at__lt=timezone.now() - timedelta(seconds=timeout),
+    ).update(status=Job.Status.QUEUED, locked_by="", locked_at=None)
+
+
+def requeue_dead(queryset=None) -> int:
+    """Give DEAD jobs a fresh set of attempts."""
+    qs = queryset if queryset is not None else Job.objects.all()
+    return qs.filter(status=Job.Status.DEAD).update(
+        status=Job.Status.QUEUED, attempts=0, run_at=timezone.now(),
+    )
+
+
+def run_pending(worker_id: str = "inline", limit: int = None) -> int:
+    """Run ready jobs in this thread until none are left (tests, scripts). Returns jobs run."""
+    done = 0
+    while limit is None or done < limit:
+        batch = claim(worker_id, limit=10 if limit is None else min(10, limit - done))
+        if not batch:
+            break
+        for job in batch:
+            run_job(job)
+            done += 1
+    return done
+
+
+def worker_name(index=0) -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{index}"
+
+
+class Worker:
+    """Poll-claim-run loop; stop() ends it after the current job."""
+
+    def __init__(self, name: str, batch_size: int = 10, poll_interval: float = 1.0, drain: bool = False):
+        self.name = name
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.drain = drain  # exit once no job is ready
+        self.stopping = threading.Event()
+
+    def stop(self) -> None:
+        self.stopping.set()
+
+    def run(self) -> int:
+        done, last_reap = 0, 0.0
+        try:
+            while not self.stopping.is_set():
+                close_old_connections()
+                if time.monotonic() - last_reap > 60:
+                    reap_stale()
+                    last_reap = time.monotonic()
+
+                batch = claim(self.name, self.batch_size)
+                if not batch:
+                    if self.drain:
+                        break
+                    self.stopping.wait(self.poll_interval)
+                    continue
+                for job in batch:
+                    if self.stopping.is_set():
+                        # Not started: hand it back without burning an attempt
+                        Job.objects.filter(pk=job.pk).update(
+                            status=Job.Status.QUEUED, locked_by="", locked_at=None, attempts=F("attempts") - 1,
+                        )
+                        continue
+                    run_job(job)
+                    done += 1
+        finally:
+            close_old_connections()
+        return done
+
+
+# ------------------------------------------------------------
+# Metrics
+# ------------------------------------------------------------
+
+def job_counts():
+    rows = Job.objects.values("task", "status").annotate(n=Count("id")).order_by("task", "status")
+    for row in rows:
+        yield {"task": row["task"], "status": row["status"]}, row["n"]
+
+
+JOBS_WAITING = CallbackGauge(
+    "geahr_jobs", "Background jobs in the table by task and status (computed at scrape).",
+    ["task", "status"],
+    callback=job_counts,
+)
@@ -0,0 +1,70 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from apps.common.benchmarks import compare_reports, run_benchmarks
+from apps.common.seeding import ScaleSpec
+
+
+class Command(BaseCommand):
+    help = "Time the hot API endpoints (leave list, inbox, submit, act, documents) and write a JSON report"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--prefix", default=ScaleSpec.prefix, help="Prefix used by seed_scale (selects the users)")
+        parser.add_argument("--iterations", type=int, default=30)
+        parser.add_argument("--warmup", type=int, default=3)
+        parser.add_argument("--only", nargs="*", help="Scenario names to run (default: all)")
+        parser.add_argument("--output", help="Write the JSON report to this file (default: stdout)")
+        parser.add_argument("--compare", help="Baseline JSON report to diff against")
+
+    def handle(self, *args, **options):
+        from apps.accounts.models import UserRole
+
+        prefix = options["prefix"].lower()
+        users = {
+            "admin": f"{prefix}_admin",
+            "hr": f"{prefix}_hr",
+            "ceo": f"{prefix}_ceo",
+            "regional_manager": (
+                UserRole.objects
+                .filter(role__code="REGIONAL_MANAGER", user__username__startswith=prefix)
+                .order_by("user__username")
+                .values_list("user__username", flat=True)
+                .first()
+            ),
+        }
+
+        def progress(name, row):
+            self.stderr.write(
+                f"  {name:<22} {row['status']}  p50 {row['p50_ms']:>8.1f} ms  p95 {row['p95_ms']:>8.1f} ms  "
+                f"{row['queries']:>4} queries"
+            )
+
+        # testserver host, locmem email: requests go through the in-process test client.
+        setup_test_environment()
+        try:
+            report = run_benchmarks(
+                users, iterations=options["iterations"], warmup=options["warmup"],
+                only=options["only"], progress=progress,
+            )
+        finally:
+            teardown_test_environment()
+
+        if not report["results"]:
+            raise CommandError(f"No scenario could run; seed data first (seed_scale --prefix {options['prefix']}).")
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as fh:
+                fh.write(output + "\n")
+        else:
+            self.stdout.write(output)
+
+        if options["compare"]:
+            with open(options["compare"], encoding="utf-8") as fh:
+                baseline = json.load(fh)
+            for name, metric, before, after, change in compare_reports(baseline, report):
+                self.stderr.write(f"  {name:<22} {metric:<8} {before:>10} -> {after:>10}  ({change:+.1f}%)")
+
+        self.stderr.write(self.style.SUCCESS(f"✅ {len(report['results'])} scenarios measured"))
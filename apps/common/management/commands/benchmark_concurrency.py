@@ -0,0 +1,76 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from apps.common.benchmarks import dataset_summary, default_scenarios, git_revision
+from apps.common.concurrency import run_comparison, targets_for
+from apps.common.seeding import ScaleSpec
+
+ASYNC_SCENARIOS = ["leave_list", "leave_list_regional", "inbox_role", "inbox_regional", "approval_detail"]
+
+
+class Command(BaseCommand):
+    help = "Compare WSGI and ASGI throughput of the async read endpoints under concurrent clients"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--prefix", default=ScaleSpec.prefix, help="Prefix used by seed_scale (selects the users)")
+        parser.add_argument("--concurrency", type=int, default=200, help="Concurrent clients per stack")
+        parser.add_argument("--requests", type=int, default=2000, help="Requests per scenario and stack")
+        parser.add_argument("--only", nargs="*", default=ASYNC_SCENARIOS, help="Scenario names to run")
+        parser.add_argument("--output", help="Write the JSON report to this file")
+
+    def handle(self, *args, **options):
+        from apps.accounts.models import UserRole
+
+        prefix = options["prefix"].lower()
+        usernames = {
+            "hr": f"{prefix}_hr",
+            "ceo": f"{prefix}_ceo",
+            "regional_manager": (
+                UserRole.objects
+                .filter(role__code="REGIONAL_MANAGER", user__username__startswith=prefix)
+                .order_by("user__username")
+                .values_list("user__username", flat=True)
+                .first()
+            ),
+        }
+        User = get_user_model()
+        accounts = {key: User.objects.filter(username=name).first() for key, name in usernames.items() if name}
+        scenarios = [s for s in default_scenarios(usernames) if s.name in options["only"]]
+        targets = targets_for(scenarios, accounts)
+        if not targets:
+            raise CommandError(f"No scenario could run; seed data first (seed_scale --prefix {options['prefix']}).")
+
+        def progress(name, row):
+            for stack in ("wsgi", "asgi"):
+                r = row[stack]
+                self.stderr.write(
+                    f"  {name:<20} {stack}  {r['throughput_rps']:>8.1f} req/s  p50 {r['p50_ms']:>8.1f} ms  "
+                    f"p95 {r['p95_ms']:>8.1f} ms  {r['errors']} errors"
+                )
+
+        # Accept the "testserver" host used by the in-process requests.
+        setup_test_environment()
+        try:
+            results = run_comparison(
+                targets, concurrency=options["concurrency"], requests=options["requests"], progress=progress,
+            )
+        finally:
+            teardown_test_environment()
+
+        report = {
+            "git_revision": git_revision(),
+            "concurrency": options["concurrency"],
+            "requests": options["requests"],
+            "dataset": dataset_summary(),
+            "results": results,
+        }
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as fh:
+                fh.write(output + "\n")
+        else:
+            self.stdout.write(output)
+        self.stderr.write(self.style.SUCCESS(f"✅ {len(results)} scenarios compared at {options['concurrency']} clients"))
@@ -0,0 +1,33 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from apps.common.benchmarks import json_benchmark
+
+
+class Command(BaseCommand):
+    help = "Microbenchmark JSON rendering / parsing / compression of a leave list page"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--output", help="Write the JSON report to this file")
+
+    def handle(self, *args, **options):
+        report = json_benchmark(rows=options["rows"], repeat=options["repeat"])
+
+        for stage, ms in report["stages_ms"].items():
+            rate = report["rows_per_second"].get(stage, 0)
+            self.stderr.write(f"  {stage:<14} {ms:>9.2f} ms  {rate:>12,} rows/s")
+        self.stderr.write(
+            f"  {report['bytes']['json']:,} bytes JSON, "
+            + ", ".join(f"{k} {v:,}" for k, v in report["bytes"].items() if k != "json")
+        )
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as fh:
+                fh.write(json.dumps(report, indent=2) + "\n")
+        self.stderr.write(self.style.SUCCESS(
+            f"✅ serialize {report['serialize_speedup']}x, render {report['render_speedup']}x, parse {report['parse_speedup']}x faster "
+            f"(identical output: {report['identical_output']})"
+        ))
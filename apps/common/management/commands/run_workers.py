@@ -0,0 +1,95 @@
+import multiprocessing
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from apps.common import jobs
+
+
+def _process_main(index, batch_size, poll_interval, drain):
+    import django
+
+    django.setup()
+    jobs.autodiscover()
+    worker = jobs.Worker(jobs.worker_name(index), batch_size=batch_size, poll_interval=poll_interval, drain=drain)
+    signal.signal(signal.SIGTERM, lambda *_: worker.stop())
+    signal.signal(signal.SIGINT, lambda *_: worker.stop())
+    worker.run()
+
+
+class Command(BaseCommand):
+    help = "Run background jobs from the database queue on a thread or process pool"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=None, help="Worker threads (default: JOBS_WORKERS)")
+        parser.add_argument("--processes", type=int, default=0, help="Worker processes instead of threads")
+        parser.add_argument("--batch-size", type=int, default=10, help="Jobs claimed per query")
+        parser.add_argument("--poll-interval", type=float, default=None, help="Seconds to sleep when idle")
+        parser.add_argument("--drain", action="store_true", help="Exit once no job is ready")
+        parser.add_argument("--requeue-dead", action="store_true", help="Queue DEAD jobs again before starting")
+
+    def handle(self, *args, **options):
+        jobs.autodiscover()
+        if options["requeue_dead"]:
+            self.stdout.write(f"Requeued {jobs.requeue_dead()} dead jobs")
+
+        poll = options["poll_interval"] if options["poll_interval"] is not None else getattr(
+            settings, "JOBS_POLL_SECONDS", 1.0
+        )
+        if options["processes"]:
+            self._run_processes(options["processes"], options["batch_size"], poll, options["drain"])
+        else:
+            threads = options["threads"] or getattr(settings, "JOBS_WORKERS", 2)
+            self._run_threads(threads, options["batch_size"], poll, options["drain"])
+
+    def _run_threads(self, count, batch_size, poll, drain):
+        workers = [
+            jobs.Worker(jobs.worker_name(i), batch_size=batch_size, poll_interval=poll, drain=drain)
+            for i in range(count)
+        ]
+        done = [0] * count
+
+        def run(i):
+            done[i] = workers[i].run()
+
+        threads = [threading.Thread(target=run, args=(i,), name=f"geahr-job-{i}") for i in range(count)]
+        for thread in threads:
+            thread.start()
+        self.stdout.write(f"{count} worker threads running")
+        try:
+            while any(thread.is_alive() for thread in threads):
+                for thread in threads:
+                    thread.join(timeout=0.5)
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping after the current jobs…")
+            for worker in workers:
+                worker.stop()
+            for thread in threads:
+                thread.join()
+        self.stdout.write(self.style.SUCCESS(f"✅ {sum(done)} jobs run"))
+
+    def _run_processes(self, count, batch_size, poll, drain):
+        # Children must not inherit open DB handles.
+        connections.close_all()
+        ctx = multiprocessing.get_context("fork") if "fork" in multiprocessing.get_all_start_methods() else None
+        ctx = ctx or multiprocessing
+        procs = [
+            ctx.Process(target=_process_main, args=(i, batch_size, poll, drain), name=f"geahr-job-{i}")
+            for i in range(count)
+        ]
+        for proc in procs:
+            proc.start()
+        self.stdout.write(f"{count} worker processes running")
+        try:
+            for proc in procs:
+                proc.join()
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping after the current jobs…")
+            for proc in procs:
+                proc.terminate()
+            for proc in procs:
+                proc.join()
+        self.stdout.write(self.style.SUCCESS("✅ Workers stopped"))
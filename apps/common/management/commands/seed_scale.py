@@ -0,0 +1,51 @@
+import io
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.common.seeding import ScaleSpec, seed_scale
+
+
+class Command(BaseCommand):
+    help = "Generate a deterministic, large synthetic dataset (bulk inserts) for load and benchmark runs"
+
+    def add_arguments(self, parser):
+        defaults = ScaleSpec()
+        parser.add_argument("--employees", type=int, default=defaults.employees)
+        parser.add_argument("--regions", type=int, default=defaults.regions)
+        parser.add_argument("--departments", type=int, default=defaults.departments)
+        parser.add_argument("--leaves-per-employee", type=float, default=defaults.leaves_per_employee)
+        parser.add_argument("--seed", type=int, default=defaults.seed)
+        parser.add_argument("--prefix", default=defaults.prefix, help="Staff number / username / name prefix")
+        parser.add_argument("--password", default=defaults.password, help="Password of every generated user")
+        parser.add_argument("--batch-size", type=int, default=defaults.batch_size)
+
+    def handle(self, *args, **options):
+        # Roles and leave workflows come from the baseline seed (idempotent).
+        call_command("seed_gea", stdout=io.StringIO())
+
+        spec = ScaleSpec(
+            regions=options["regions"],
+            departments=options["departments"],
+            employees=options["employees"],
+            leaves_per_employee=options["leaves_per_employee"],
+            seed=options["seed"],
+            prefix=options["prefix"],
+            password=options["password"],
+            batch_size=options["batch_size"],
+        )
+
+        started = time.perf_counter()
+        try:
+            result = seed_scale(spec, progress=lambda message: self.stdout.write(f"  {message}"))
+        except ValueError as e:
+            raise CommandError(str(e))
+        elapsed = time.perf_counter() - started
+
+        for model, count in sorted(result.counts.items()):
+            self.stdout.write(f"  {model}: {count}")
+        users = ", ".join(f"{role}={name}" for role, name in result.users.items() if name)
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Seeded in {elapsed:.1f}s. Users: {users} (password: {spec.password})"
+        ))
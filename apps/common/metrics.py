@@ -0,0 +1,382 @@
+"""
+In-process metrics with a Prometheus text exposition (GET /metrics).
+
+Metric kinds:
+- Counter: monotonically increasing value per label set
+- Histogram: fixed buckets + _sum / _count per label set
+- CallbackGauge: computed at scrape time (e.g. from a database query)
+
+Values live in a backend:
+- MemoryBackend (default): one dict per process. Fine for runserver or a
+  single worker.
+- MmapBackend (settings.METRICS_DIR set): every process writes its own
+  memory-mapped file <dir>/<pid>.db and a scrape sums all files, so the
+  numbers add up across gunicorn workers. Files of exited workers are kept
+  (their counts stay in the totals); clear the directory when the service
+  (re)starts.
+
+An update is a dict lookup plus an 8-byte write under a per-process lock that
+is practically never contended; nothing is shared between processes except
+the files, which only their owner writes.
+"""
+import bisect
+import json
+import logging
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from apps.common.query_observers import observe_queries
+
+logger = logging.getLogger(__name__)
+
+
+# ------------------------------------------------------------
+# Backends
+# ------------------------------------------------------------
+
+class MemoryBackend:
+    def __init__(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def add(self, key: str, amount: float) -> None:
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def collect(self) -> dict:
+        with self._lock:
+            return dict(self._values)
+
+
+class MmapFile:
+    """
+    Append-only key -> float64 file:
+    [used: uint32][pad: 4] then entries of
+    [key length: uint32][key utf-8, padded to 8 bytes][value: float64]
+    """
+
+    INITIAL_SIZE = 1 << 16
+
+    def __init__(self, path):
+        self.path = path
+        self._fh = open(path, "a+b")
+        if os.fstat(self._fh.fileno()).st_size == 0:
+            self._fh.truncate(self.INITIAL_SIZE)
+        self._size = os.fstat(self._fh.fileno()).st_size
+        self._map = mmap.mmap(self._fh.fileno(), self._size)
+        self._used = struct.unpack_from("I", self._map, 0)[0] or 8
+        self._positions = {key: pos for key, _, pos in self._entries(self._map, self._used)}
+
+    @staticmethod
+    def _entries(data, used):
+        pos = 8
+        while pos < used:
+            length = struct.unpack_from("I", data, pos)[0]
+            pos += 4
+            key = bytes(data[pos:pos + length]).decode("utf-8")
+            pos += length + (-(length + 4) % 8)
+            yield key, struct.unpack_from("d", data, pos)[0], pos
+            pos += 8
+
+    def _allocate(self, key: str) -> int:
+        encoded = key.encode("utf-8")
+        padded = encoded + b" " * (-(len(encoded) + 4) % 8)
+        needed = 4 + len(padded) + 8
+        while self._used + needed > self._size:
+            self._size *= 2
+            self._map.close()
+            self._fh.truncate(self._size)
+            self._map = mmap.mmap(self._fh.fileno(), self._size)
+        start = self._used
+        struct.pack_into(f"I{len(padded)}sd", self._map, start, len(encoded), padded, 0.0)
+        self._used += needed
+        # Publish the entry only once it is fully written.
+        struct.pack_into("I", self._map, 0, self._used)
+        self._positions[key] = start + 4 + len(padded)
+        return self._positions[key]
+
+    def add(self, key: str, amount: float) -> None:
+        pos = self._positions.get(key)
+        if pos is None:
+            pos = self._allocate(key)
+        struct.pack_into("d", self._map, pos, struct.unpack_from("d", self._map, pos)[0] + amount)
+
+    @classmethod
+    def read(cls, path) -> dict:
+        with open(path, "rb") as fh:
+            data = fh.read()
+        if len(data) < 8:
+            return {}
+        used = struct.unpack_from("I", data, 0)[0]
+        return {key: value for key, value, _ in cls._entries(data, used)}
+
+
+class MmapBackend:
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self._lock = threading.Lock()
+        self._file = None
+        self._pid = None
+
+    def _own_file(self) -> MmapFile:
+        # Re-open after fork: a worker must never write into its parent's file.
+        if self._pid != os.getpid():
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._pid = os.getpid()
+            self._file = MmapFile(self.directory / f"{self._pid}.db")
+        return self._file
+
+    def add(self, key: str, amount: float) -> None:
+        with self._lock:
+            self._own_file().add(key, amount)
+
+    def collect(self) -> dict:
+        totals = {}
+        for path in sorted(self.directory.glob("*.db")):
+            try:
+                values = MmapFile.read(path)
+            except (OSError, struct.error, UnicodeDecodeError):
+                logger.warning("Skipping unreadable metrics file %s", path)
+                continue
+            for key, value in values.items():
+                totals[key] = totals.get(key, 0.0) + value
+        return totals
+
+
+# ------------------------------------------------------------
+# Metrics
+# ------------------------------------------------------------
+
+class Registry:
+    def __init__(self, backend=None):
+        self._backend = backend
+        self.metrics = {}
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            directory = getattr(settings, "METRICS_DIR", None)
+            self._backend = MmapBackend(directory) if directory else MemoryBackend()
+        return self._backend
+
+    def register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self.metrics[metric.name] = metric
+        return metric
+
+
+REGISTRY = Registry()
+
+
+class Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.registry = registry or REGISTRY
+        self._keys = {}
+        self.registry.register(self)
+
+    def _label_values(self, labels: dict) -> tuple:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def _key(self, suffix: str, values: tuple) -> str:
+        key = self._keys.get((suffix, values))
+        if key is None:
+            key = self._keys[(suffix, values)] = json.dumps([self.name + suffix, values])
+        return key
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        self.registry.backend.add(self._key("", self._label_values(labels)), amount)
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=None):
+        if "le" in labelnames:
+            raise ValueError("'le' is reserved for histogram buckets")
+        self.buckets = tuple(sorted(float(b) for b in buckets if b != math.inf)) + (math.inf,)
+        self._bucket_labels = tuple(_format_value(b) for b in self.buckets)
+        super().__init__(name, documentation, labelnames, registry)
+
+    def observe(self, value: float, **labels) -> None:
+        values = self._label_values(labels)
+        bucket = self._bucket_labels[bisect.bisect_left(self.buckets, value)]
+        backend = self.registry.backend
+        backend.add(self._key("_bucket", values + (bucket,)), 1)
+        backend.add(self._key("_sum", values), value)
+        backend.add(self._key("_count", values), 1)
+
+
+class CallbackGauge(Metric):
+    """`callback()` yields (labels dict, value) pairs; it runs on every scrape."""
+
+    type = "gauge"
+
+    def __init__(self, name, documentation, labelnames=(), callback=None, registry=None):
+        self.callback = callback
+        super().__init__(name, documentation, labelnames, registry)
+
+
+# ------------------------------------------------------------
+# Exposition
+# ------------------------------------------------------------
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return f"{value:.1f}"
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+def render(registry: Registry = None) -> str:
+    """Prometheus text format (version 0.0.4) of every registered metric."""
+    registry = registry or REGISTRY
+    samples = {}
+    for key, value in registry.backend.collect().items():
+        name, values = json.loads(key)
+        samples.setdefault(name, {})[tuple(values)] = value
+
+    lines = []
+    for metric in sorted(registry.metrics.values(), key=lambda m: m.name):
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+
+        if isinstance(metric, CallbackGauge):
+            try:
+                for labels, value in metric.callback():
+                    values = metric._label_values(labels)
+                    lines.append(f"{metric.name}{_labels(metric.labelnames, values)} {_format_value(value)}")
+            except Exception:
+                logger.exception("Metrics callback %s failed", metric.name)
+            continue
+
+        if isinstance(metric, Histogram):
+            buckets = samples.get(metric.name + "_bucket", {})
+            sums = samples.get(metric.name + "_sum", {})
+            counts = samples.get(metric.name + "_count", {})
+            for values in sorted(counts):
+                cumulative = 0.0
+                for le in metric._bucket_labels:
+                    cumulative += buckets.get(values + (le,), 0.0)
+                    lines.append(
+                        f"{metric.name}_bucket{_labels(metric.labelnames + ('le',), values + (le,))} "
+                        f"{_format_value(cumulative)}"
+                    )
+                labels = _labels(metric.labelnames, values)
+                lines.append(f"{metric.name}_sum{labels} {_format_value(sums.get(values, 0.0))}")
+                lines.append(f"{metric.name}_count{labels} {_format_value(counts[values])}")
+            continue
+
+        for values, value in sorted(samples.get(metric.name, {}).items()):
+            lines.append(f"{metric.name}{_labels(metric.labelnames, values)} {_format_value(value)}")
+
+    return "\n".join(lines) + "\n"
+
+
+# ------------------------------------------------------------
+# HTTP metrics
+# ------------------------------------------------------------
+
+REQUEST_LATENCY = Histogram(
+    "geahr_http_request_duration_seconds", "Time spent handling a request, by route.",
+    ["method", "route"],
+)
+REQUESTS = Counter(
+    "geahr_http_requests_total", "Requests handled, by route and status code.",
+    ["method", "route", "status"],
+)
+DB_QUERIES = Histogram(
+    "geahr_db_queries_per_request", "SQL statements executed per request, by route.",
+    ["route"], buckets=(1, 2, 3, 5, 10, 20, 50, 100, 200, 500),
+)
+
+
+def route_label(request) -> str:
+    """Low-cardinality route name: the URL pattern's view name, never the raw path."""
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unmatched"
+    return match.view_name or match.route or "unmatched"
+
+
+class StatementCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, alias, sql, params, many, ms):
+        self.count += 1
+
+
+class MetricsMiddleware:
+    """Request latency, status and SQL statement count per route (METRICS_ENABLED)."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, "METRICS_ENABLED", True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        statements = StatementCounter()
+        started = time.perf_counter()
+        with observe_queries(statements):
+            response = self.get_response(request)
+        self.record(request, response, time.perf_counter() - started, statements.count)
+        return response
+
+    async def __acall__(self, request):
+        statements = StatementCounter()
+        started = time.perf_counter()
+        with observe_queries(statements):
+            response = await self.get_response(request)
+        self.record(request, response, time.perf_counter() - started, statements.count)
+        return response
+
+    @staticmethod
+    def record(request, response, elapsed: float, statements: int) -> None:
+        route = route_label(request)
+        REQUEST_LATENCY.observe(elapsed, method=request.method, route=route)
+        REQUESTS.inc(method=request.method, route=route, status=response.status_code)
+        DB_QUERIES.observe(statements, route=route)
@@ -4,6 +4,8 @@ from django.db import models
 import uuid
 from django.db import models
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
 
 class UUIDModel(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -23,3 +25,69 @@ class CreatedByModel(models.Model):
     )
     class Meta:
         abstract = True
+
+
+class Tombstone(models.Model):
+    """
+    A deleted row, kept for incremental sync clients (apps.common.sync).
+    region / employee are the deleted row's scope keys, so a tombstone is
+    visible to the same users the row was; they are plain references
+    (no DB constraint, nothing cascades).
+    """
+    entity_type = models.CharField(max_length=60)  # LeaveRequest, ApprovalRequest, Document
+    entity_id = models.UUIDField()
+    region = models.ForeignKey(
+        "org.Region", null=True, blank=True, on_delete=models.DO_NOTHING, db_constraint=False, related_name="+"
+    )
+    employee = models.ForeignKey(
+        "employees.Employee", null=True, blank=True, on_delete=models.DO_NOTHING, db_constraint=False, related_name="+"
+    )
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["entity_type", "deleted_at", "id"]),
+        ]
+
+
+class Job(models.Model):
+    """
+    A unit of background work (apps.common.jobs). Enqueued in the same
+    transaction as the change that needs it; finished jobs are deleted,
+    jobs out of attempts stay behind as DEAD (the dead-letter queue).
+    """
+
+    class Status(models.TextChoices):
+        QUEUED = "QUEUED", "Queued"
+        RUNNING = "RUNNING", "Running"
+        DEAD = "DEAD", "Dead"
+
+    task = models.CharField(max_length=120)
+    payload = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    priority = models.SmallIntegerField(default=0)  # higher runs first
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.QUEUED)
+
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+
+    locked_by = models.CharField(max_length=120, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # The claim query: ready jobs, best priority first
+            models.Index(
+                fields=["-priority", "run_at", "id"],
+                condition=models.Q(status="QUEUED"),
+                name="common_job_ready_idx",
+            ),
+            # Reaping jobs of crashed workers
+            models.Index(fields=["locked_at"], condition=models.Q(status="RUNNING"), name="common_job_running_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.status})"
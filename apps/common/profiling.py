@@ -0,0 +1,231 @@
+"""
+Opt-in request profiling.
+
+ProfilingMiddleware samples a fraction of requests (REQUEST_PROFILING_SAMPLE_RATE;
+0 disables it entirely) and, for those, records:
+
+- SQL: statement count and time on every connection (query_observers, an
+  execute_wrapper that also sees async ORM queries)
+- auth: authentication + permission + throttle checks (ProfiledViewMixin)
+- view: time inside the DRF view (ProfiledViewMixin)
+- serialize: serializer to_representation time (ProfiledSerializerMixin)
+- total: the whole request as seen by the middleware
+
+The breakdown is returned in a Server-Timing header (visible in browser dev
+tools). Sampled requests slower than REQUEST_PROFILING_SLOW_MS are logged to
+the "apps.profiling" logger with their slowest statements and, for SELECTs,
+the database's EXPLAIN output.
+"""
+import contextlib
+import contextvars
+import heapq
+import itertools
+import logging
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from apps.common.query_observers import observe_queries
+
+logger = logging.getLogger("apps.profiling")
+
+_current = contextvars.ContextVar("request_profile", default=None)
+_tiebreak = itertools.count()
+
+
+class RequestProfile:
+    def __init__(self, keep_slowest: int = 5):
+        self.started = time.perf_counter()
+        self.sections = {}
+        self.query_count = 0
+        self.query_ms = 0.0
+        self.keep_slowest = keep_slowest
+        self._slowest = []  # min-heap of (ms, tiebreak, alias, sql, params)
+        self._depth = {}
+
+    # SQL ----------------------------------------------------------
+
+    def record_query(self, alias, sql, params, many, ms):
+        self.query_count += 1
+        self.query_ms += ms
+        entry = (ms, next(_tiebreak), alias, sql, None if many else params)
+        if len(self._slowest) < self.keep_slowest:
+            heapq.heappush(self._slowest, entry)
+        elif ms > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, entry)
+
+    def slowest_queries(self):
+        return [
+            {"ms": round(ms, 2), "alias": alias, "sql": sql, "params": params}
+            for ms, _, alias, sql, params in sorted(self._slowest, reverse=True)
+        ]
+
+    # Sections -----------------------------------------------------
+
+    @contextlib.contextmanager
+    def section(self, name: str):
+        """Time a named block; re-entrant blocks of the same name count once."""
+        depth = self._depth.get(name, 0)
+        self._depth[name] = depth + 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._depth[name] = depth
+            if depth == 0:
+                self.sections[name] = self.sections.get(name, 0.0) + (time.perf_counter() - started) * 1000
+
+    def total_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def server_timing(self, total_ms: float) -> str:
+        parts = [f'db;dur={self.query_ms:.1f};desc="{self.query_count} queries"']
+        parts += [f"{name};dur={ms:.1f}" for name, ms in self.sections.items()]
+        parts.append(f"total;dur={total_ms:.1f}")
+        return ", ".join(parts)
+
+
+def current_profile():
+    return _current.get()
+
+
+@contextlib.contextmanager
+def profile_section(name: str):
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    with profile.section(name):
+        yield
+
+
+# ------------------------------------------------------------
+# DRF hooks
+# ------------------------------------------------------------
+
+class ProfiledViewMixin:
+    """Adds "auth" (authentication/permissions/throttling) and "view" sections."""
+
+    def initial(self, request, *args, **kwargs):
+        with profile_section("auth"):
+            super().initial(request, *args, **kwargs)
+
+    def dispatch(self, request, *args, **kwargs):
+        with profile_section("view"):
+            return super().dispatch(request, *args, **kwargs)
+
+
+class ProfiledSerializerMixin:
+    """Adds the "serialize" section (nested / per-item calls are counted once)."""
+
+    def to_representation(self, instance):
+        with profile_section("serialize"):
+            return super().to_representation(instance)
+
+
+# ------------------------------------------------------------
+# Slow request log
+# ------------------------------------------------------------
+
+def explain(alias: str, sql: str, params):
+    """EXPLAIN output for a SELECT, or None when unsupported / not a SELECT."""
+    if not sql.lstrip().upper().startswith("SELECT"):
+        return None
+    connection = connections[alias]
+    try:
+        prefix = connection.ops.explain_query_prefix()
+        with connection.cursor() as cursor:
+            cursor.execute(f"{prefix} {sql}", params)
+            return "\n".join(" ".join(str(col) for col in row) for row in cursor.fetchall())
+    except Exception as e:  # explain is best-effort diagnostics
+        return f"(explain failed: {e})"
+
+
+def log_slow_request(request, response, profile: RequestProfile, total_ms: float) -> None:
+    lines = [
+        f"Slow request {request.method} {request.path} -> {response.status_code}: "
+        f"{total_ms:.0f} ms total, {profile.query_count} queries in {profile.query_ms:.0f} ms, "
+        + ", ".join(f"{name} {ms:.0f} ms" for name, ms in profile.sections.items())
+    ]
+    with_explain = getattr(settings, "REQUEST_PROFILING_EXPLAIN", True)
+    for i, q in enumerate(profile.slowest_queries(), start=1):
+        lines.append(f"  #{i} [{q['ms']:.1f} ms] {q['sql']}")
+        if with_explain:
+            plan = explain(q["alias"], q["sql"], q["params"])
+            if plan:
+                lines += [f"      {line}" for line in plan.splitlines()]
+    logger.warning("\n".join(lines))
+
+
+# ------------------------------------------------------------
+# Middleware
+# ------------------------------------------------------------
+
+class ProfilingMiddleware:
+    """
+    Settings:
+    - REQUEST_PROFILING_SAMPLE_RATE: 0..1 share of requests profiled (0 = off)
+    - REQUEST_PROFILING_SLOW_MS: log sampled requests slower than this
+    - REQUEST_PROFILING_EXPLAIN: include EXPLAIN output in the slow log
+    - REQUEST_PROFILING_SERVER_TIMING: add the Server-Timing header
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.sample_rate = float(getattr(settings, "REQUEST_PROFILING_SAMPLE_RATE", 0) or 0)
+        if self.sample_rate <= 0:
+            raise MiddlewareNotUsed
+        self.slow_ms = float(getattr(settings, "REQUEST_PROFILING_SLOW_MS", 500))
+        self.server_timing = getattr(settings, "REQUEST_PROFILING_SERVER_TIMING", True)
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def sampled(self) -> bool:
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+
+        profile = RequestProfile()
+        token = _current.set(profile)
+        try:
+            with observe_queries(profile.record_query):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, profile)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+
+        profile = RequestProfile()
+        token = _current.set(profile)
+        try:
+            with observe_queries(profile.record_query):
+                response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        if profile.total_ms() >= self.slow_ms:
+            # EXPLAIN runs queries: keep them off the event loop.
+            return await sync_to_async(self.finish)(request, response, profile)
+        return self.finish(request, response, profile)
+
+    def finish(self, request, response, profile: RequestProfile):
+        total_ms = profile.total_ms()
+        if self.server_timing:
+            response["Server-Timing"] = profile.server_timing(total_ms)
+        if total_ms >= self.slow_ms:
+            log_slow_request(request, response, profile, total_ms)
+        return response
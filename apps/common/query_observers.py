@@ -0,0 +1,51 @@
+"""
+Per-request SQL observation that works for sync and async code alike.
+
+connection.execute_wrapper() only sees statements run on the connection of
+the current thread, but the async ORM runs its queries in a worker thread.
+Instead, every connection gets one permanent wrapper (installed on
+connection_created) that reports to the observers registered in a
+ContextVar; context variables follow a request into sync_to_async threads.
+
+    with observe_queries(callback):   # callback(alias, sql, params, many, ms)
+        ...
+"""
+import contextlib
+import contextvars
+import time
+
+from django.db.backends.signals import connection_created
+
+_observers = contextvars.ContextVar("query_observers", default=())
+
+
+def _dispatch(execute, sql, params, many, context):
+    observers = _observers.get()
+    if not observers:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        ms = (time.perf_counter() - started) * 1000
+        alias = context["connection"].alias
+        for observer in observers:
+            observer(alias, sql, params, many, ms)
+
+
+def install(sender=None, connection=None, **kwargs) -> None:
+    if _dispatch not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _dispatch)
+
+
+def connect() -> None:
+    connection_created.connect(install, dispatch_uid="apps.common.query_observers")
+
+
+@contextlib.contextmanager
+def observe_queries(callback):
+    token = _observers.set(_observers.get() + (callback,))
+    try:
+        yield
+    finally:
+        _observers.reset(token)
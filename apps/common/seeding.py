@@ -0,0 +1,339 @@
+"""
+Deterministic synthetic data at realistic scale.
+
+Everything is derived from one random.Random seeded with (seed, prefix): the same seed and sizes
+give the same regions, departments, people, leave histories and UUIDs on any
+database, so benchmark runs from different commits are comparable.
+
+All rows go in through bulk_create in batches. Users share one precomputed
+password hash, so there is no per-user PBKDF2 cost. Bulk writes skip model
+signals, so the department closure, reporting-line closure and directory
+search index are rebuilt once at the end.
+
+created_at/updated_at are insertion times (auto_now_add cannot be overridden
+through bulk_create).
+"""
+import random
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from apps.accounts.models import Role, UserRole
+from apps.analytics import dashboard, headcount
+from apps.audit.models import AuditLog
+from apps.common import closure
+from apps.employees import search
+from apps.employees.models import Employee, Employment
+from apps.employees.services import rebuild_reporting_lines
+from apps.leave.models import LeaveRequest
+from apps.org.models import Department, DepartmentClosure, Grade, Position, Region
+from apps.workflows import approvers
+from apps.workflows.models import ApprovalAction, ApprovalRequest, WorkflowStep
+
+FIRST_NAMES = [
+    "Kwame", "Ama", "Kofi", "Akosua", "Yaw", "Abena", "Kojo", "Efua", "Kwesi", "Adwoa",
+    "Kwabena", "Akua", "Kwaku", "Yaa", "Fiifi", "Esi", "Nana", "Afua", "Selorm", "Dzifa",
+]
+LAST_NAMES = [
+    "Mensah", "Owusu", "Boateng", "Asante", "Osei", "Addo", "Agyeman", "Darko", "Appiah", "Ofori",
+    "Amoah", "Quaye", "Tetteh", "Ansah", "Badu", "Nkrumah", "Sarpong", "Frimpong", "Acheampong", "Danso",
+]
+
+# (status, weight) of generated leave requests
+LEAVE_STATUS_MIX = [
+    ("DRAFT", 20), ("SUBMITTED", 35), ("APPROVED", 30), ("REJECTED", 10), ("RETURNED", 5),
+]
+STAFF_CATEGORY_MIX = [("JUNIOR", 30), ("SENIOR", 60), ("SUPERVISOR", 10)]
+
+APPROVAL_STATUS = {
+    "SUBMITTED": ApprovalRequest.Status.PENDING,
+    "APPROVED": ApprovalRequest.Status.APPROVED,
+    "REJECTED": ApprovalRequest.Status.REJECTED,
+    "RETURNED": ApprovalRequest.Status.RETURNED,
+}
+LEAVE_WORKFLOWS = {"JUNIOR": "leave_junior_regional", "SENIOR": "leave_senior", "SUPERVISOR": "leave_supervisor"}
+
+
+@dataclass
+class ScaleSpec:
+    regions: int = 16
+    departments: int = 120
+    employees: int = 10000
+    leaves_per_employee: float = 3.0
+    seed: int = 42
+    prefix: str = "SC"
+    password: str = "Pass@12345"
+    batch_size: int = 2000
+
+
+@dataclass
+class SeedResult:
+    counts: dict = field(default_factory=dict)
+    users: dict = field(default_factory=dict)  # well-known usernames: admin / hr / ceo / regional_manager
+
+
+class ScaleSeeder:
+    def __init__(self, spec: ScaleSpec, progress=None):
+        self.spec = spec
+        # Prefix in the seed: two datasets with different prefixes never share UUIDs.
+        self.rnd = random.Random(f"{spec.seed}:{spec.prefix}")
+        self.progress = progress or (lambda message: None)
+        self.password_hash = make_password(spec.password)
+        self.counts = {}
+
+    # ------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------
+
+    def _uuid(self) -> uuid.UUID:
+        return uuid.UUID(int=self.rnd.getrandbits(128), version=4)
+
+    def _weighted(self, mix):
+        return self.rnd.choices([v for v, _ in mix], weights=[w for _, w in mix])[0]
+
+    def _bulk(self, model, rows, **kwargs):
+        model.objects.bulk_create(rows, batch_size=self.spec.batch_size, **kwargs)
+        self.counts[model.__name__] = self.counts.get(model.__name__, 0) + len(rows)
+        return rows
+
+    def _user(self, username: str, first_name: str = "", last_name: str = ""):
+        User = get_user_model()
+        return User(
+            username=username,
+            password=self.password_hash,
+            first_name=first_name,
+            last_name=last_name,
+            email=f"{username}@example.org",
+        )
+
+    # ------------------------------------------------------------
+    # Phases
+    # ------------------------------------------------------------
+
+    def _roles(self):
+        codes = {
+            "SYSTEM_ADMIN": "System Administrator", "HR_HO": "HR Directorate (Head Office)",
+            "CEO": "Chief Executive Officer", "REGIONAL_MANAGER": "Regional Manager",
+            "SUPERVISOR": "Supervisor / Unit Head",
+        }
+        existing = set(Role.objects.filter(code__in=codes).values_list("code", flat=True))
+        Role.objects.bulk_create([Role(code=c, name=n) for c, n in codes.items() if c not in existing])
+        return dict(Role.objects.filter(code__in=codes).values_list("code", "id"))
+
+    def _org(self):
+        p = self.spec.prefix
+        self.regions = self._bulk(Region, [
+            Region(id=self._uuid(), name=f"{p} Region {i:03d}") for i in range(self.spec.regions)
+        ])
+
+        # A few directorates at the top, every other unit under an earlier one.
+        top = max(1, self.spec.departments // 10)
+        departments = []
+        for i in range(self.spec.departments):
+            parent = self.rnd.choice(departments) if i >= top else None
+            departments.append(Department(id=self._uuid(), name=f"{p} Unit {i:04d}", parent=parent))
+        self.departments = self._bulk(Department, departments)
+        closure.rebuild(DepartmentClosure, dict(Department.objects.values_list("id", "parent_id")))
+
+        self.positions = self._bulk(Position, [
+            Position(id=self._uuid(), title=f"{p} Position {i:02d}") for i in range(40)
+        ])
+        self.grades = self._bulk(Grade, [
+            Grade(id=self._uuid(), name=f"{p} Grade {i:02d}", rank_order=i) for i in range(12)
+        ])
+
+    def _people(self, role_ids):
+        p, n = self.spec.prefix, self.spec.employees
+        User = get_user_model()
+
+        users, employees = [], []
+        for i in range(n):
+            first, last = self.rnd.choice(FIRST_NAMES), self.rnd.choice(LAST_NAMES)
+            users.append(self._user(f"{p.lower()}{i:06d}", first, last))
+            employees.append(Employee(
+                id=self._uuid(), staff_no=f"{p}{i:06d}", first_name=first, last_name=last,
+                email=f"{p.lower()}{i:06d}@example.org",
+            ))
+        service = [self._user(f"{p.lower()}_{name}") for name in ("admin", "hr", "ceo")]
+        self._bulk(User, users + service)
+
+        ids = dict(User.objects.filter(username__startswith=p.lower()).values_list("username", "id"))
+        for i, e in enumerate(employees):
+            e.user_id = ids[f"{p.lower()}{i:06d}"]
+        self.employees = self._bulk(Employee, employees)
+        self.progress(f"{n} employees")
+
+        # One ACTIVE employment each; supervisors come from the same region.
+        categories = [self._weighted(STAFF_CATEGORY_MIX) for _ in range(n)]
+        categories[: len(self.regions)] = ["SUPERVISOR"] * min(n, len(self.regions))
+        region_of = [self.regions[i % len(self.regions)] for i in range(n)]
+        supervisors_by_region = {}
+        for e, cat, region in zip(employees, categories, region_of):
+            if cat == "SUPERVISOR":
+                supervisors_by_region.setdefault(region.id, []).append(e)
+
+        # Staff report to a supervisor of their region, supervisors to the
+        # regional manager (first supervisor), who reports to no one: no cycles.
+        employments = []
+        for e, cat, region in zip(employees, categories, region_of):
+            sups = supervisors_by_region.get(region.id, [])
+            if cat == "SUPERVISOR":
+                supervisor = sups[0] if sups and sups[0] is not e else None
+            else:
+                supervisor = self.rnd.choice(sups) if sups else None
+            employments.append(Employment(
+                id=self._uuid(), employee=e, employment_type="PERMANENT", staff_category=cat,
+                start_date=date(2005, 1, 1) + timedelta(days=self.rnd.randrange(7000)),
+                grade=self.rnd.choice(self.grades), position=self.rnd.choice(self.positions),
+                region=region, department=self.rnd.choice(self.departments),
+                supervisor=supervisor,
+            ))
+        self.employments = self._bulk(Employment, employments)
+
+        # Roles: every supervisor is a SUPERVISOR, the first one per region its regional manager.
+        self.regional_manager = {}
+        user_roles = []
+        for region_id, sups in supervisors_by_region.items():
+            self.regional_manager[region_id] = sups[0].user_id
+            user_roles.append(UserRole(user_id=sups[0].user_id, role_id=role_ids["REGIONAL_MANAGER"]))
+            user_roles += [UserRole(user_id=s.user_id, role_id=role_ids["SUPERVISOR"]) for s in sups]
+        self.service_users = {name: ids[f"{p.lower()}_{name}"] for name in ("admin", "hr", "ceo")}
+        user_roles += [
+            UserRole(user_id=self.service_users["admin"], role_id=role_ids["SYSTEM_ADMIN"]),
+            UserRole(user_id=self.service_users["hr"], role_id=role_ids["HR_HO"]),
+            UserRole(user_id=self.service_users["ceo"], role_id=role_ids["CEO"]),
+        ]
+        self._bulk(UserRole, user_roles)
+
+    def _actor_for(self, role_code, employment):
+        if role_code == "SUPERVISOR":
+            return employment.supervisor.user_id if employment.supervisor_id else None
+        if role_code == "REGIONAL_MANAGER":
+            return self.regional_manager.get(employment.region_id)
+        if role_code == "CEO":
+            return self.service_users["ceo"]
+        return self.service_users["hr"]
+
+    def _leave(self):
+        steps = {}
+        for code, order, role_code in (
+            WorkflowStep.objects.filter(workflow__module="leave", workflow__region__isnull=True, workflow__is_active=True)
+            .order_by("step_order")
+            .values_list("workflow__code", "step_order", "approver_role_code")
+        ):
+            steps.setdefault(code, []).append((order, role_code))
+        if not steps:
+            raise ValueError("No leave workflows found; run seed_gea first.")
+
+        avg = self.spec.leaves_per_employee
+        chunk = max(1, self.spec.batch_size // max(1, int(avg) or 1))
+        for start in range(0, len(self.employments), chunk):
+            leaves, approvals, actions, audits = [], [], [], []
+            for job in self.employments[start:start + chunk]:
+                for _ in range(self.rnd.randint(0, int(round(2 * avg)))):
+                    self._one_leave(job, steps, leaves, approvals, actions, audits)
+            with transaction.atomic():
+                self._bulk(ApprovalRequest, approvals)
+                self._bulk(LeaveRequest, leaves)
+                self._bulk(ApprovalAction, actions)
+                self._bulk(AuditLog, audits)
+            self.progress(f"leave for {min(start + chunk, len(self.employments))} employees")
+
+    def _one_leave(self, job, steps, leaves, approvals, actions, audits):
+        status = self._weighted(LEAVE_STATUS_MIX)
+        begin = date(2023, 1, 1) + timedelta(days=self.rnd.randrange(1200))
+        days = self.rnd.randint(1, 20)
+        lr = LeaveRequest(
+            id=self._uuid(), employee_id=job.employee_id,
+            leave_type=self.rnd.choice(LeaveRequest.LeaveType.values),
+            start_date=begin, end_date=begin + timedelta(days=days - 1), days_requested=days,
+            status=status, reason="Synthetic leave request",
+        )
+        leaves.append(lr)
+
+        code = LEAVE_WORKFLOWS[job.staff_category]
+        chain = steps.get(code)
+        if status == "DRAFT" or not chain:
+            lr.status = "DRAFT"
+            return
+
+        employee_user = job.employee.user_id
+        if status == "APPROVED":
+            stop = len(chain) - 1
+        else:
+            stop = self.rnd.randrange(len(chain))
+        current_order, current_role = chain[stop]
+
+        ar = ApprovalRequest(
+            id=self._uuid(), module="leave", request_type=code, request_ref_id=lr.id,
+            region_id=job.region_id, created_by_id=employee_user,
+            status=APPROVAL_STATUS[status], current_step_order=current_order,
+        )
+        if status == "SUBMITTED" and code == "leave_senior" and stop == 0 and job.supervisor_id:
+            ar.assigned_to_user_id = job.supervisor.user_id
+        approvals.append(ar)
+        lr.approval_request_id = ar.id
+
+        audits.append(AuditLog(
+            id=self._uuid(), action="SUBMIT_LEAVE", entity_type="LeaveRequest", entity_id=lr.id,
+            actor_id=employee_user, before_json={"status": "DRAFT", "approval_request": None},
+            after_json={"status": "SUBMITTED", "workflow": code},
+        ))
+
+        taken = chain[:stop] if status == "SUBMITTED" else chain[: stop + 1]
+        for i, (order, role_code) in enumerate(taken):
+            last = i == len(taken) - 1
+            verb = {"REJECTED": "REJECT", "RETURNED": "RETURN"}.get(status, "APPROVE") if last else "APPROVE"
+            actor = self._actor_for(role_code, job)
+            actions.append(ApprovalAction(
+                id=self._uuid(), request_id=ar.id, step_order=order, actor_id=actor, action=verb,
+            ))
+            audits.append(AuditLog(
+                id=self._uuid(), action="APPROVAL_ACTION", entity_type="ApprovalRequest", entity_id=ar.id,
+                actor_id=actor, before_json={"status": "PENDING", "step": order},
+                after_json={"status": str(ar.status) if last else "PENDING", "step": order},
+            ))
+
+    # ------------------------------------------------------------
+    # Entry point
+    # ------------------------------------------------------------
+
+    def run(self) -> SeedResult:
+        p = self.spec.prefix
+        if Employee.objects.filter(staff_no__startswith=p).exists():
+            raise ValueError(f"Data with prefix '{p}' already exists; use another prefix or an empty database.")
+
+        with transaction.atomic():
+            role_ids = self._roles()
+            self._org()
+            self._people(role_ids)
+        self._leave()
+
+        with transaction.atomic():
+            self.counts["ReportingLine"] = rebuild_reporting_lines()
+        self.counts["search_index"] = search.rebuild_index()
+        approvers.invalidate()  # roles and employments were bulk-inserted
+        dashboard.reconcile()
+        self.counts["HeadcountSpan"] = headcount.backfill()
+        self.progress("indexes rebuilt")
+
+        some_region = self.regions[0].id if self.regions else None
+        rm_user = self.regional_manager.get(some_region)
+        User = get_user_model()
+        return SeedResult(
+            counts=self.counts,
+            users={
+                "admin": f"{p.lower()}_admin",
+                "hr": f"{p.lower()}_hr",
+                "ceo": f"{p.lower()}_ceo",
+                "regional_manager": User.objects.get(id=rm_user).username if rm_user else None,
+            },
+        )
+
+
+def seed_scale(spec: ScaleSpec = None, progress=None) -> SeedResult:
+    return ScaleSeeder(spec or ScaleSpec(), progress=progress).run()
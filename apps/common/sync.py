@@ -0,0 +1,194 @@
+"""
+Incremental change sync for offline / mobile clients:
+
+    GET <list>/changes/?since=<token>[&limit=200]
+    -> {"results": [rows changed since], "deleted": [ids deleted since],
+        "next": <token>, "has_more": bool}
+
+Changed rows are read in (updated_at, id) order from the model's
+(updated_at, id) index; deletions come from the Tombstone table, written by
+a pre_delete handler registered with track_deletes() (so a tombstone commits
+or rolls back with its delete). Both streams are keyset-paginated and the
+token is an opaque cursor into each. A client starts without `since` (full
+snapshot), follows `next` while has_more, and keeps the last token.
+
+Rows are only served once they are SYNC_SETTLE_SECONDS old: updated_at is
+taken before the write commits, so a slow transaction could otherwise land
+behind a cursor a client already holds.
+
+Tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS are pruned
+(prune_sync_tombstones); a token from before that horizon gets 410 and the
+client resyncs from scratch.
+
+Columns written through queryset.update() (Document.is_latest,
+content_hash) do not move updated_at and are not reported; clients derive
+is_latest from the version chain.
+"""
+import base64
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Q
+from django.db.models.signals import pre_delete
+from django.utils import timezone
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from apps.common.models import Tombstone
+
+TOKEN_VERSION = "1"
+
+
+# ------------------------------------------------------------
+# Tombstones
+# ------------------------------------------------------------
+
+def track_deletes(model, entity_type: str, scope_keys) -> None:
+    """
+    Record a Tombstone whenever a `model` row is deleted. scope_keys(instance)
+    returns (employee_id, region_ids) of the row; one tombstone is written
+    per region (or one without a region).
+    """
+    def record_tombstone(sender, instance, **kwargs):
+        employee_id, region_ids = scope_keys(instance)
+        Tombstone.objects.bulk_create([
+            Tombstone(entity_type=entity_type, entity_id=instance.pk, employee_id=employee_id, region_id=region_id)
+            for region_id in (sorted(set(region_ids), key=str) or [None])
+        ])
+
+    pre_delete.connect(record_tombstone, sender=model, weak=False, dispatch_uid=f"sync-tombstone-{entity_type}")
+
+
+def retention_horizon(now=None):
+    return (now or timezone.now()) - timedelta(days=getattr(settings, "SYNC_TOMBSTONE_RETENTION_DAYS", 90))
+
+
+def prune_tombstones(now=None) -> int:
+    deleted, _ = Tombstone.objects.filter(deleted_at__lt=retention_horizon(now)).delete()
+    return deleted
+
+
+# ------------------------------------------------------------
+# Tokens
+# ------------------------------------------------------------
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def _micros(value) -> int:
+    # Integer arithmetic: float timestamps can be off by a microsecond
+    return (value - EPOCH) // timedelta(microseconds=1)
+
+
+def _datetime(micros: int):
+    return EPOCH + timedelta(microseconds=micros)
+
+
+def encode_token(changed_at: int, changed_id: str, deleted_at: int, deleted_id: int) -> str:
+    raw = "|".join([TOKEN_VERSION, str(changed_at), changed_id, str(deleted_at), str(deleted_id)])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_token(token: str):
+    """(changed_at µs, changed_id hex, deleted_at µs, tombstone id); ValueError if malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+        version, changed_at, changed_id, deleted_at, deleted_id = raw.split("|")
+        if version != TOKEN_VERSION:
+            raise ValueError(version)
+        if changed_id:
+            changed_id = uuid.UUID(changed_id).hex
+        return int(changed_at), changed_id, int(deleted_at), int(deleted_id)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError("Malformed sync token") from exc
+
+
+class ChangesQuerySerializer(serializers.Serializer):
+    since = serializers.CharField(required=False)
+    limit = serializers.IntegerField(required=False, min_value=1)
+
+    def validate_since(self, value):
+        try:
+            return decode_token(value)
+        except ValueError:
+            raise serializers.ValidationError("Invalid sync token; restart without `since`.")
+
+    def validate_limit(self, value):
+        return min(value, getattr(settings, "SYNC_MAX_PAGE_SIZE", 1000))
+
+
+# ------------------------------------------------------------
+# View mixin
+# ------------------------------------------------------------
+
+class ChangesFeedMixin:
+    """
+    For DRF viewsets: a `changes` list action. Set `sync_entity` to the
+    entity_type passed to track_deletes(); the model needs an
+    (updated_at, id) index.
+
+    Live rows come from get_changes_queryset() (the viewset's scoped
+    queryset by default). Tombstones are scoped with the viewset's
+    RegionScopedQueryMixin rules on their region / employee columns.
+    """
+
+    sync_entity = None
+
+    def get_changes_queryset(self):
+        return self.get_queryset()
+
+    def get_tombstone_queryset(self):
+        qs = Tombstone.objects.filter(entity_type=self.sync_entity)
+        reporting_field = "employee" if getattr(self, "reporting_field", None) is not None else None
+        return self.scope_queryset(qs, self.request, region_field="region", reporting_field=reporting_field)
+
+    @action(detail=False, methods=["get"])
+    def changes(self, request):
+        params = ChangesQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        changed_at, changed_id, deleted_at, deleted_id = params.validated_data.get("since", (0, "", 0, 0))
+        limit = params.validated_data.get("limit", getattr(settings, "SYNC_PAGE_SIZE", 200))
+
+        now = timezone.now()
+        if deleted_at and _datetime(deleted_at) < retention_horizon(now):
+            return Response(
+                {"detail": "Sync token predates the deletion history; restart without `since`.",
+                 "code": "resync_required"},
+                status=status.HTTP_410_GONE,
+            )
+        settled = now - timedelta(seconds=getattr(settings, "SYNC_SETTLE_SECONDS", 2))
+
+        rows = self.get_changes_queryset().filter(updated_at__lte=settled)
+        if changed_at:
+            after = _datetime(changed_at)
+            rows = rows.filter(Q(updated_at__gt=after) | Q(updated_at=after, id__gt=changed_id))
+        rows = list(rows.order_by("updated_at", "id")[: limit + 1])
+
+        tombstones = self.get_tombstone_queryset().filter(deleted_at__lte=settled)
+        if deleted_at:
+            after = _datetime(deleted_at)
+            tombstones = tombstones.filter(Q(deleted_at__gt=after) | Q(deleted_at=after, id__gt=deleted_id))
+        tombstones = list(
+            tombstones.order_by("deleted_at", "id").values_list("id", "entity_id", "deleted_at")[: limit + 1]
+        )
+
+        rows_more, tombstones_more = len(rows) > limit, len(tombstones) > limit
+        rows, tombstones = rows[:limit], tombstones[:limit]
+        if rows:
+            changed_at, changed_id = _micros(rows[-1].updated_at), rows[-1].id.hex
+        if tombstones:
+            deleted_id, _, last_deleted = tombstones[-1]
+            deleted_at = _micros(last_deleted)
+        if not tombstones_more and deleted_at < _micros(settled):
+            # Every deletion up to `settled` was seen: move the cursor there, so
+            # the token ages with the client's last sync (see the 410 above).
+            deleted_at, deleted_id = _micros(settled), 0
+
+        return Response({
+            "results": self.get_serializer(rows, many=True).data,
+            "deleted": list(dict.fromkeys(str(entity_id) for _, entity_id, _ in tombstones)),
+            "next": encode_token(changed_at, changed_id, deleted_at, deleted_id),
+            "has_more": rows_more or tombstones_more,
+        })
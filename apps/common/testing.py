@@ -0,0 +1,59 @@
+"""
+Shared test fixtures.
+
+SeededDataMixin seeds the GEA workflows plus a small synthetic dataset
+(apps.common.seeding) once per TestCase class and gives tests its
+well-known users ("admin", "hr", "ceo", "regional_manager") as API
+clients. apps.common.budgets.APIBudgetMixin builds on it.
+"""
+import io
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.common.benchmarks import Scenario, default_scenarios
+from apps.common.seeding import ScaleSpec, seed_scale
+
+SEEDED_DATASET = ScaleSpec(regions=4, departments=24, employees=240, leaves_per_employee=2.0, seed=7, prefix="PB")
+
+
+class SeededDataMixin:
+    """
+    TestCase mixin (kept out of the TestCase hierarchy so importing it into a
+    tests module does not collect it as a test class).
+    """
+
+    dataset = SEEDED_DATASET
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command("seed_gea", stdout=io.StringIO())
+        cls.seeded = seed_scale(cls.dataset)
+        cls.usernames = cls.seeded.users
+
+    def user(self, key: str):
+        return get_user_model().objects.get(username=self.usernames[key])
+
+    def client_for(self, key: str) -> APIClient:
+        client = APIClient()
+        client.force_authenticate(self.user(key))
+        return client
+
+    def auth_headers(self, key: str) -> dict:
+        """Bearer token headers, for clients that go through real authentication (ASGI views)."""
+        return {"Authorization": f"Bearer {AccessToken.for_user(self.user(key))}"}
+
+    def drf_get(self, key: str, path: str):
+        """GET through the DRF (WSGI) routes, to compare an async view against."""
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=self.auth_headers(key)["Authorization"])
+        with self.settings(ROOT_URLCONF="geahr.urls"):
+            return client.get(path)
+
+    def scenario(self, name: str) -> Scenario:
+        for scenario in default_scenarios(self.usernames):
+            if scenario.name == name:
+                return scenario
+        self.fail(f"Scenario {name!r} has no fixture row in the seeded dataset")
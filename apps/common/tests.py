@@ -1,3 +1,351 @@
-from django.test import TestCase
+import dataclasses
+import gzip
+import io
+import os
+import tempfile
+import uuid
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.db import transaction
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework import serializers
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from apps.accounts.models import Role, UserRole
+from apps.audit.models import AuditLog
+from apps.common import jobs, metrics
+from apps.common.compression import CompressionMiddleware, accepted_encodings, choose_encoding
+from apps.common.fastjson import CachedTimezoneDateTimeField, FastJSONParser, FastJSONRenderer
+from apps.common.models import Job
+from apps.common.seeding import ScaleSpec, seed_scale
+from apps.employees.models import Employee, Employment
+from apps.leave.models import LeaveRequest
+from apps.org.models import Department, Grade, Position, Region
+from apps.workflows.models import ApprovalAction, ApprovalRequest
+
+
+class ProfilingMiddlewareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username="prof_admin", password="x")
+        UserRole.objects.create(user=cls.user, role=Role.objects.create(code="SYSTEM_ADMIN", name="Admin"))
+        for i in range(3):
+            Employee.objects.create(staff_no=f"PRF{i}", first_name="Ama", last_name="Mensah")
+
+    def get(self, path):
+        client = APIClient()  # middleware is loaded per client, after the override
+        client.force_authenticate(self.user)
+        return client.get(path)
+
+    def test_disabled_by_default(self):
+        response = self.get("/api/employees/")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Server-Timing", response)
+
+    @override_settings(REQUEST_PROFILING_SAMPLE_RATE=1.0, REQUEST_PROFILING_SLOW_MS=60_000)
+    def test_server_timing_breakdown(self):
+        response = self.get("/api/employees/")
+        self.assertEqual(response.status_code, 200)
+        timing = response["Server-Timing"]
+        for metric in ("db;dur=", "auth;dur=", "view;dur=", "serialize;dur=", "total;dur="):
+            self.assertIn(metric, timing)
+        self.assertRegex(timing, r'desc="[1-9]\d* queries"')
+
+    @override_settings(REQUEST_PROFILING_SAMPLE_RATE=1.0, REQUEST_PROFILING_SLOW_MS=0)
+    def test_slow_request_log_has_queries_and_plan(self):
+        with self.assertLogs("apps.profiling", level="WARNING") as logs:
+            self.get("/api/employees/")
+        message = logs.output[0]
+        self.assertIn("Slow request GET /api/employees/ -> 200", message)
+        self.assertIn("#1 [", message)
+        self.assertRegex(message, r"\n      \S")  # indented EXPLAIN output
+        self.assertNotIn("explain failed", message)
+
+
+class MetricsTests(TestCase):
+    def test_histogram_exposition_is_cumulative(self):
+        registry = metrics.Registry(metrics.MemoryBackend())
+        latency = metrics.Histogram("t_latency_seconds", "Latency.", ["route"], buckets=(0.1, 1), registry=registry)
+        for value in (0.05, 0.5, 0.5, 3):
+            latency.observe(value, route="a")
+
+        text = metrics.render(registry)
+        self.assertIn("# TYPE t_latency_seconds histogram", text)
+        self.assertIn('t_latency_seconds_bucket{route="a",le="0.1"} 1.0', text)
+        self.assertIn('t_latency_seconds_bucket{route="a",le="1.0"} 3.0', text)
+        self.assertIn('t_latency_seconds_bucket{route="a",le="+Inf"} 4.0', text)
+        self.assertIn('t_latency_seconds_count{route="a"} 4.0', text)
+        self.assertIn('t_latency_seconds_sum{route="a"} 4.05', text)
+
+    def test_mmap_backend_sums_worker_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            # Two "workers": each owns one file in the shared directory.
+            first = metrics.MmapFile(os.path.join(directory, "1.db"))
+            second = metrics.MmapFile(os.path.join(directory, "2.db"))
+            registry = metrics.Registry(metrics.MmapBackend(directory))
+            counter = metrics.Counter("t_events_total", "Events.", ["kind"], registry=registry)
+            for i in range(3000):  # grows the file past its initial size
+                first.add(counter._key("", (f"k{i}",)), 1)
+            first.add(counter._key("", ("shared",)), 2)
+            second.add(counter._key("", ("shared",)), 5)
+
+            text = metrics.render(registry)
+        self.assertIn('t_events_total{kind="shared"} 7.0', text)
+        self.assertIn('t_events_total{kind="k2999"} 1.0', text)
+
+    def test_endpoint_access_and_request_metrics(self):
+        client = APIClient()
+        client.get("/api/employees/")
+        self.assertEqual(client.get("/metrics").status_code, 403)  # closed by default, loopback included
+
+        with self.settings(METRICS_ALLOWED_IPS=["127.0.0.1"]):
+            self.assertEqual(client.get("/metrics", REMOTE_ADDR="10.1.2.3").status_code, 403)
+            response = client.get("/metrics")  # the test client is 127.0.0.1
+        self.assertEqual(response.status_code, 200)
+        text = response.content.decode()
+        self.assertIn('geahr_http_requests_total{method="GET",route="employees-list",status="401"}', text)
+        self.assertIn('geahr_db_queries_per_request_count{route="employees-list"}', text)
+        self.assertIn("# TYPE geahr_pending_approvals gauge", text)
+
+    @override_settings(METRICS_TOKEN="s3cret")
+    def test_endpoint_token(self):
+        client = APIClient()
+        self.assertEqual(client.get("/metrics").status_code, 403)
+        self.assertEqual(client.get("/metrics", HTTP_AUTHORIZATION="Bearer s3cret").status_code, 200)
+
+
+class FastJSONTests(TestCase):
+    payload = {
+        "id": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+        "created_at": datetime(2025, 3, 1, 8, 30, 15, 123456, tzinfo=dt_timezone.utc),
+        "naive": datetime(2025, 3, 1, 8, 30),
+        "day": date(2025, 3, 1),
+        "amount": Decimal("12.50"),
+        "label": gettext_lazy("Pending"),
+        "note": "line\u2028break ✓",
+        "nested": [{"n": 1, "ok": True, "none": None}],
+    }
+
+    def test_renders_like_drf(self):
+        self.assertEqual(FastJSONRenderer().render(self.payload), JSONRenderer().render(self.payload))
+
+    def test_indent_falls_back_to_drf(self):
+        body = FastJSONRenderer().render({"a": 1}, "application/json; indent=2")
+        self.assertEqual(body, b'{\n  "a": 1\n}')
+
+    def test_parser(self):
+        self.assertEqual(FastJSONParser().parse(io.BytesIO(b'{"a": [1, "x"]}')), {"a": [1, "x"]})
+        with self.assertRaises(ParseError):
+            FastJSONParser().parse(io.BytesIO(b'{"a": '))
+
+    def test_serializer_datetimes_match_drf(self):
+        class Plain(serializers.Serializer):
+            at = serializers.DateTimeField()
+
+        class Fast(serializers.Serializer):
+            at = CachedTimezoneDateTimeField()
+
+        rows = [{"at": datetime(2025, 3, 1, 8, 30, tzinfo=dt_timezone.utc)} for _ in range(3)]
+        with timezone.override("Africa/Accra"), self.settings(TIME_ZONE="Africa/Accra"):
+            self.assertEqual(Fast(rows, many=True).data, Plain(rows, many=True).data)
+        with timezone.override("Asia/Kolkata"):
+            self.assertEqual(Fast(rows, many=True).data, Plain(rows, many=True).data)
+
+
+@override_settings(RESPONSE_COMPRESSION_MIN_BYTES=100)
+class CompressionMiddlewareTests(TestCase):
+    def run_middleware(self, body: bytes, accept: str, content_type="application/json", etag=None, **headers):
+        def view(request):
+            response = HttpResponse(body, content_type=content_type)
+            if etag:
+                response["ETag"] = etag
+            return response
+
+        request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING=accept, **headers)
+        return CompressionMiddleware(view)(request)
+
+    def test_gzip_above_threshold(self):
+        body = b'{"rows": "' + b"x" * 500 + b'"}'
+        response = self.run_middleware(body, "gzip, deflate", etag='"abc"')
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.content), body)
+        self.assertEqual(response["ETag"], 'W/"abc"')
+        self.assertIn("Accept-Encoding", response["Vary"])
+
+    def test_left_alone(self):
+        big = b"x" * 500
+        for body, accept, content_type in [
+            (b"x" * 50, "gzip", "application/json"),      # below the threshold
+            (big, "gzip;q=0, identity", "application/json"),  # gzip refused
+            (big, "gzip", "application/pdf"),             # not a textual type
+        ]:
+            with self.subTest(accept=accept, content_type=content_type, size=len(body)):
+                response = self.run_middleware(body, accept, content_type)
+                self.assertFalse(response.has_header("Content-Encoding"))
+                self.assertEqual(response.content, body)
+
+    def test_accept_encoding_parsing(self):
+        self.assertEqual(accepted_encodings("gzip;q=0.5, br;q=0, *"), {"gzip", "*"})
+        self.assertEqual(choose_encoding("identity"), None)
+
+    def test_brotli_only_without_credentials(self):
+        # brotli output has no BREACH padding: credentialed requests get padded gzip instead.
+        fake_brotli = mock.Mock(compress=lambda content, quality: b"br:" + content[:10])
+        body = b'{"rows": "' + b"x" * 500 + b'"}'
+        with mock.patch("apps.common.compression.brotli", fake_brotli):
+            self.assertEqual(self.run_middleware(body, "br, gzip")["Content-Encoding"], "br")
+            for headers in ({"HTTP_AUTHORIZATION": "Bearer token"}, {"HTTP_COOKIE": "sessionid=abc"}):
+                with self.subTest(headers=headers):
+                    response = self.run_middleware(body, "br, gzip", **headers)
+                    self.assertEqual(response["Content-Encoding"], "gzip")
+                    self.assertEqual(gzip.decompress(response.content), body)
+
+
+calls = []
+
+
+@jobs.task("tests.record", max_attempts=2)
+def record_call(value, fail=False):
+    calls.append(value)
+    if fail:
+        raise RuntimeError("boom")
+
+
+@jobs.task("tests.long", max_attempts=2, atomic=False)
+def long_call(reap_first=False):
+    """Stands in for a long export: its lock has aged past the timeout by the time it heartbeats."""
+    Job.objects.filter(task="tests.long").update(locked_at=timezone.now() - timedelta(hours=1))
+    if reap_first:
+        jobs.reap_stale(timeout=60)
+    jobs.heartbeat()
+    calls.append(jobs.reap_stale(timeout=60))
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueue_is_part_of_the_transaction(self):
+        with transaction.atomic():
+            record_call.enqueue(value="kept")
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            record_call.enqueue(value="rolled back")
+            raise RuntimeError
+        self.assertEqual(jobs.run_pending(), 1)
+        self.assertEqual(calls, ["kept"])
+        self.assertFalse(Job.objects.exists())
+
+    def test_priority_then_age(self):
+        record_call.enqueue(value="old")
+        record_call.enqueue(value="urgent", priority=9)
+        record_call.enqueue(value="young")
+        record_call.enqueue(value="later", delay=3600)
+        jobs.run_pending()
+        self.assertEqual(calls, ["urgent", "old", "young"])
+
+    def test_retry_with_backoff_then_dead_letter(self):
+        job = record_call.enqueue(value="x", fail=True)
+        with self.assertLogs("apps.common.jobs", "WARNING"):
+            self.assertEqual(jobs.run_pending(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.Status.QUEUED, 1))
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn("RuntimeError: boom", job.last_error)
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        with self.assertLogs("apps.common.jobs", "ERROR"):
+            jobs.run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.Status.DEAD, 2))
+        self.assertEqual(jobs.run_pending(), 0)
+
+        self.assertEqual(jobs.requeue_dead(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.Status.QUEUED, 0))
+
+    def test_unknown_task_is_dead_at_once(self):
+        job = jobs.enqueue("tests.missing", {})
+        with self.assertLogs("apps.common.jobs", "ERROR"):
+            jobs.run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.DEAD)
+
+    def test_claimed_once_and_stale_locks_reaped(self):
+        record_call.enqueue(value="x")
+        self.assertEqual(len(jobs.claim("a")), 1)
+        self.assertEqual(jobs.claim("b"), [])
+
+        self.assertEqual(jobs.reap_stale(timeout=3600), 0)
+        self.assertEqual(jobs.reap_stale(timeout=0), 1)
+        self.assertEqual([job.locked_by for job in jobs.claim("b")], ["b"])
+
+    def test_heartbeat_keeps_a_long_job_locked(self):
+        jobs.heartbeat()  # outside a job: nothing to refresh
+        long_call.enqueue()
+        self.assertEqual(jobs.run_pending(), 1)
+        self.assertEqual(calls, [0])  # refreshed, so not reaped
+        self.assertFalse(Job.objects.exists())
+
+        job = long_call.enqueue(reap_first=True)
+        with self.assertLogs("apps.common.jobs", "WARNING"):
+            jobs.run_pending()
+        job.refresh_from_db()
+        self.assertEqual(calls, [0])  # stopped at the heartbeat
+        self.assertIn("lost its lock", job.last_error)
+
+    def test_worker_drains_the_queue(self):
+        for i in range(5):
+            record_call.enqueue(value=i)
+        self.assertEqual(jobs.Worker("t", batch_size=2, drain=True).run(), 5)
+        self.assertEqual(sorted(calls), [0, 1, 2, 3, 4])
+
+
+class ScaleSeederTests(TestCase):
+    """seed_scale() is deterministic: the same spec gives the same rows and UUIDs."""
+
+    spec = ScaleSpec(regions=3, departments=12, employees=60, leaves_per_employee=2.0, prefix="DT", batch_size=50)
+    models = (Region, Department, Position, Grade, Employee, Employment, LeaveRequest, ApprovalRequest, ApprovalAction, AuditLog)
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command("seed_gea", stdout=io.StringIO())
+
+    def seed(self, **changes):
+        """(result, {model: sorted ids}) of one seeding run, rolled back afterwards."""
+        with transaction.atomic():
+            result = seed_scale(dataclasses.replace(self.spec, **changes))
+            rows = {model.__name__: sorted(model.objects.values_list("id", flat=True)) for model in self.models}
+            rows["supervisors"] = sorted(
+                Employment.objects.filter(employee__staff_no__startswith="DT").values_list("employee_id", "supervisor_id"),
+                key=str,
+            )
+            rows["usernames"] = sorted(
+                get_user_model().objects.filter(username__startswith="dt").values_list("username", flat=True)
+            )
+            transaction.set_rollback(True)
+        return result, rows
+
+    def test_same_seed_gives_identical_data(self):
+        first, first_rows = self.seed()
+        second, second_rows = self.seed()
+
+        self.assertEqual(first.counts, second.counts)
+        self.assertEqual(first.users, second.users)
+        self.assertEqual(first_rows, second_rows)
+        self.assertEqual(first.counts["Employee"], 60)
+        self.assertGreater(first.counts["LeaveRequest"], 0)
+
+    def test_other_seed_gives_other_ids(self):
+        _, first_rows = self.seed()
+        _, other_rows = self.seed(seed=7)
+        self.assertEqual(len(first_rows["Employee"]), len(other_rows["Employee"]))
+        self.assertFalse(set(first_rows["Employee"]) & set(other_rows["Employee"]))
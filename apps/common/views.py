@@ -1,3 +1,24 @@
-from django.shortcuts import render
+import hmac
 
-# Create your views here.
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views.decorators.http import require_GET
+
+from apps.common import metrics
+
+
+def _metrics_allowed(request) -> bool:
+    token = getattr(settings, "METRICS_TOKEN", None)
+    if token:
+        supplied = request.META.get("HTTP_AUTHORIZATION", "")
+        if hmac.compare_digest(supplied.encode(), f"Bearer {token}".encode()):
+            return True
+    return request.META.get("REMOTE_ADDR", "") in getattr(settings, "METRICS_ALLOWED_IPS", ())
+
+
+@require_GET
+def metrics_view(request):
+    """Prometheus scrape endpoint (bearer METRICS_TOKEN or a METRICS_ALLOWED_IPS address)."""
+    if not _metrics_allowed(request):
+        return HttpResponseForbidden("Forbidden")
+    return HttpResponse(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -2,9 +2,28 @@ from django.contrib import admin
 
 # Register your models here.
 from django.contrib import admin
+from django.db import transaction
+
 from apps.documents.models import Document
+from apps.documents.services import supersede_latest
 
 @admin.register(Document)
 class DocumentAdmin(admin.ModelAdmin):
-    list_display = ("owner_type", "doc_type", "title", "uploaded_by", "created_at")
+    list_display = ("owner_type", "doc_type", "title", "version", "is_latest", "uploaded_by", "created_at")
     list_filter = ("owner_type", "doc_type", "access_scope")
+    readonly_fields = ("version", "is_latest", "content_hash")
+
+    def get_readonly_fields(self, request, obj=None):
+        # Moving a document to another chain would corrupt both chains
+        chain = ("owner_type", "owner_id", "doc_type") if obj else ()
+        return self.readonly_fields + chain
+
+    def save_model(self, request, obj, form, change):
+        if change:
+            return super().save_model(request, obj, form, change)
+        # New uploads join their chain as the latest version, as through the API
+        with transaction.atomic():
+            obj.version = supersede_latest(obj.owner_type, obj.owner_id, obj.doc_type)
+            obj.is_latest = True
+            obj.uploaded_by = obj.uploaded_by or request.user
+            obj.save()
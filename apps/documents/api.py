@@ -1,19 +1,94 @@
+import uuid
+
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Count, Q
+from django.http import FileResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils import timezone
+
 from rest_framework import serializers, viewsets
+from rest_framework.decorators import action
 from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework import status as drf_status
 
 from apps.documents.models import Document
-from apps.accounts.permissions import IsHROrManagement
+from apps.accounts.permissions import IsHROrManagement, RegionScopedQueryMixin
 from apps.audit.services import write_audit
+from apps.common.conditional import ConditionalGetMixin
+from apps.common.fastjson import FastModelSerializerMixin
+from apps.common.profiling import ProfiledSerializerMixin, ProfiledViewMixin
+from apps.common.sync import ChangesFeedMixin
+from apps.documents.services import (
+    can_access_document,
+    latest_documents,
+    serve_document,
+    supersede_latest,
+)
+from apps.documents import previews
+from apps.documents.archive import stream_documents_zip
 
 
-class DocumentSerializer(serializers.ModelSerializer):
+class DocumentSerializer(ProfiledSerializerMixin, FastModelSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Document
         fields = "__all__"
-        read_only_fields = ("uploaded_by", "created_at", "updated_at")
+        read_only_fields = ("uploaded_by", "version", "is_latest", "content_hash", "created_at", "updated_at")
+        # version / is_latest are assigned by supersede_latest(); the DB
+        # constraints still guard the chain.
+        validators = []
+
+    def validate(self, attrs):
+        # The version chain is keyed by (owner_type, owner_id, doc_type):
+        # moving an existing document between chains would corrupt it.
+        if self.instance is not None:
+            for field in ("owner_type", "owner_id", "doc_type"):
+                if field in attrs and attrs[field] != getattr(self.instance, field):
+                    raise serializers.ValidationError(
+                        {field: "Cannot be changed; upload a new document instead."}
+                    )
+        return attrs
+
+
+class LatestDocumentsQuerySerializer(serializers.Serializer):
+    owner_type = serializers.ChoiceField(choices=Document.OwnerType.choices)
+    owner_ids = serializers.CharField()
+    doc_type = serializers.CharField(required=False)
+
+    def validate_owner_ids(self, value):
+        try:
+            ids = [uuid.UUID(v.strip()) for v in value.split(",") if v.strip()]
+        except ValueError:
+            raise serializers.ValidationError("Comma-separated UUIDs expected.")
+        if len(ids) > 500:
+            raise serializers.ValidationError("At most 500 owner ids per call.")
+        return ids
+
 
+class DocumentExportQuerySerializer(serializers.Serializer):
+    owner_type = serializers.ChoiceField(choices=Document.OwnerType.choices, required=False)
+    owner_id = serializers.UUIDField(required=False)
+    doc_type = serializers.CharField(required=False)
+    created_from = serializers.DateField(required=False)
+    created_to = serializers.DateField(required=False)
+    latest_only = serializers.BooleanField(required=False, default=False)
+    # For an EMPLOYEE owner: also include documents of their leave requests
+    include_related = serializers.BooleanField(required=False, default=False)
 
-class DocumentViewSet(viewsets.ModelViewSet):
+    def validate(self, attrs):
+        if "owner_id" in attrs and "owner_type" not in attrs:
+            raise serializers.ValidationError({"owner_type": "Required when owner_id is given."})
+        if not any(k in attrs for k in ("owner_id", "doc_type", "created_from", "created_to")):
+            raise serializers.ValidationError(
+                "Give an owner, a doc_type or a created_from/created_to range."
+            )
+        return attrs
+
+
+class DocumentViewSet(
+    ProfiledViewMixin, ConditionalGetMixin, ChangesFeedMixin, RegionScopedQueryMixin, viewsets.ModelViewSet
+):
     """
     Upload and manage documents (letters, attachments, scanned docs, HR files).
     Supports multipart file upload.
@@ -23,11 +98,195 @@ class DocumentViewSet(viewsets.ModelViewSet):
     permission_classes = [IsHROrManagement]
     parser_classes = [MultiPartParser, FormParser]
 
+    # is_latest (supersede_latest) and content_hash (previews) are written
+    # with queryset.update(), which leaves updated_at alone.
+    etag_fields = ("id", "updated_at", "is_latest", "content_hash")
+    list_etag_aggregates = {
+        "latest_rows": Count("pk", filter=Q(is_latest=True)),
+        "hashed_rows": Count("pk", filter=~Q(content_hash="")),
+    }
+
+    # Change sync: a document is in scope through the employee it belongs to
+    # (directly or via a leave request); tombstones carry that employee.
+    sync_entity = "Document"
+    reporting_field = "employee"
+
+    def get_changes_queryset(self):
+        from apps.employees.models import Employee
+        from apps.leave.models import LeaveRequest
+
+        qs = Document.objects.all()
+        if self.is_ho_user(self.request.user):
+            return qs
+
+        employees = self.scope_queryset(
+            Employee.objects.all(), self.request, region_field="employments__region", reporting_field=""
+        )
+        leaves = self.scope_queryset(
+            LeaveRequest.objects.all(), self.request,
+            region_field="employee__employments__region", reporting_field="employee",
+        )
+        return qs.filter(
+            Q(owner_type=Document.OwnerType.EMPLOYEE, owner_id__in=employees.values("id"))
+            | Q(
+                owner_type__in=[Document.OwnerType.LEAVE, Document.OwnerType.LETTER],
+                owner_id__in=leaves.values("id"),
+            )
+        )
+
     def perform_create(self, serializer):
-        obj = serializer.save(uploaded_by=self.request.user)
+        data = serializer.validated_data
+        with transaction.atomic():
+            version = supersede_latest(data["owner_type"], data["owner_id"], data["doc_type"])
+            obj = serializer.save(uploaded_by=self.request.user, version=version, is_latest=True)
         write_audit("CREATE", "Document", obj.id, before=None, after=DocumentSerializer(obj).data)
+        previews.schedule_previews_on_commit(obj.id)
 
     def perform_update(self, serializer):
         before = DocumentSerializer(self.get_object()).data
-        obj = serializer.save()
+        if "file" in serializer.validated_data:
+            # New content: drop the old hash so previews are re-keyed
+            obj = serializer.save(content_hash="")
+            previews.schedule_previews_on_commit(obj.id)
+        else:
+            obj = serializer.save()
         write_audit("UPDATE", "Document", obj.id, before=before, after=DocumentSerializer(obj).data)
+
+    @action(detail=False, methods=["get"])
+    def latest(self, request):
+        """
+        Latest version per (owner, doc_type) for many owners in one query:
+        ?owner_type=LEAVE&owner_ids=<uuid>,<uuid>[&doc_type=...]
+        Returns {owner_id: [documents]} for attachment badges on list screens.
+        """
+        params = LatestDocumentsQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+
+        doc_type = params.validated_data.get("doc_type")
+        docs = latest_documents(
+            params.validated_data["owner_type"],
+            params.validated_data["owner_ids"],
+            doc_types=[doc_type] if doc_type else None,
+        )
+
+        grouped = {str(owner_id): [] for owner_id in params.validated_data["owner_ids"]}
+        for item in DocumentSerializer(docs, many=True).data:
+            grouped[str(item["owner_id"])].append(item)
+        return Response(grouped)
+
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        """
+        Stream a ZIP of every document matching the filters, plus manifest.json:
+        ?owner_type=EMPLOYEE&owner_id=<uuid>[&include_related=1]
+        ?doc_type=...&created_from=YYYY-MM-DD&created_to=YYYY-MM-DD[&latest_only=1]
+        Documents outside the caller's access_scope are left out.
+        """
+        params = DocumentExportQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        f = params.validated_data
+
+        qs = Document.objects.all()
+        if "owner_id" in f:
+            owner_q = Q(owner_type=f["owner_type"], owner_id=f["owner_id"])
+            if f["include_related"] and f["owner_type"] == Document.OwnerType.EMPLOYEE:
+                from apps.leave.models import LeaveRequest
+
+                leave_ids = LeaveRequest.objects.filter(employee_id=f["owner_id"]).values("id")
+                owner_q |= Q(
+                    owner_type__in=[Document.OwnerType.LEAVE, Document.OwnerType.LETTER],
+                    owner_id__in=leave_ids,
+                )
+            qs = qs.filter(owner_q)
+        elif "owner_type" in f:
+            qs = qs.filter(owner_type=f["owner_type"])
+        if "doc_type" in f:
+            qs = qs.filter(doc_type=f["doc_type"])
+        if "created_from" in f:
+            qs = qs.filter(created_at__date__gte=f["created_from"])
+        if "created_to" in f:
+            qs = qs.filter(created_at__date__lte=f["created_to"])
+        if f["latest_only"]:
+            qs = qs.filter(is_latest=True)
+
+        user = request.user
+        documents = (
+            doc
+            for doc in qs.order_by("owner_type", "owner_id", "doc_type", "version").iterator(chunk_size=200)
+            if can_access_document(user, doc)
+        )
+
+        filters = {k: str(v) for k, v in f.items()}
+        stamp = timezone.now().strftime("%Y%m%d-%H%M%S")
+        response = StreamingHttpResponse(
+            stream_documents_zip(documents, extra_manifest={"filters": filters}),
+            content_type="application/zip",
+        )
+        response["Content-Disposition"] = f'attachment; filename="documents-{stamp}.zip"'
+        response["Cache-Control"] = "no-store"
+        return response
+
+    @action(detail=True, methods=["get"], permission_classes=[IsAuthenticated])
+    def download(self, request, pk=None):
+        """
+        Download the file, enforcing the document's access_scope.
+        Supports Range / If-Range, ETag and Last-Modified; hands off to the
+        front-end server when DOCUMENTS_SENDFILE_BACKEND is configured.
+        """
+        doc = self.get_object()
+        if not can_access_document(request.user, doc):
+            return Response(
+                {"error": "You are not allowed to download this document."},
+                status=drf_status.HTTP_403_FORBIDDEN,
+            )
+        return serve_document(request, doc)
+
+    @action(detail=True, methods=["get"], permission_classes=[IsAuthenticated])
+    def preview(self, request, pk=None):
+        """
+        First-page thumbnail (?size=sm|md).
+        200 with the cached PNG, 202 while it is being generated, or 422
+        when this content could not be rendered.
+        """
+        doc = self.get_object()
+        if not can_access_document(request.user, doc):
+            return Response(
+                {"error": "You are not allowed to view this document."},
+                status=drf_status.HTTP_403_FORBIDDEN,
+            )
+
+        sizes = previews.preview_sizes()
+        variant = request.query_params.get("size") or next(iter(sizes))
+        if variant not in sizes:
+            return Response(
+                {"error": f"Unknown preview size. Use one of: {', '.join(sizes)}"},
+                status=drf_status.HTTP_400_BAD_REQUEST,
+            )
+
+        if previews.preview_kind(doc) is None:
+            return Response(
+                {"error": "No preview available for this file type."},
+                status=drf_status.HTTP_404_NOT_FOUND,
+            )
+
+        if doc.content_hash:
+            name = previews.preview_name(doc.content_hash, variant)
+            etag = f'"{doc.content_hash}-{variant}"'
+            if request.META.get("HTTP_IF_NONE_MATCH") == etag:
+                return HttpResponseNotModified()
+            if default_storage.exists(name):
+                response = FileResponse(default_storage.open(name, "rb"), content_type="image/png")
+                response["ETag"] = etag
+                # Content-addressed: safe to cache for as long as the client likes
+                response["Cache-Control"] = "private, max-age=31536000, immutable"
+                return response
+            if previews.has_failed(doc.content_hash):
+                return Response(
+                    {"error": "A preview could not be generated for this file."},
+                    status=drf_status.HTTP_422_UNPROCESSABLE_ENTITY,
+                )
+
+        previews.schedule_previews(doc.id)
+        response = Response({"status": "pending"}, status=drf_status.HTTP_202_ACCEPTED)
+        response["Retry-After"] = "2"
+        return response
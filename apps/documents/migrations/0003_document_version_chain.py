@@ -0,0 +1,52 @@
+# Generated by Django 6.0.2 on 2026-10-19 10:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def number_existing_versions(apps, schema_editor):
+    """
+    Existing rows all carry version=1. Renumber each chain by upload time
+    and flag only its newest document as latest.
+    """
+    Document = apps.get_model("documents", "Document")
+    chain, version, to_update = None, 0, []
+    rows = Document.objects.order_by("owner_type", "owner_id", "doc_type", "created_at", "id")
+    for doc in rows.only("id", "owner_type", "owner_id", "doc_type").iterator(chunk_size=2000):
+        key = (doc.owner_type, doc.owner_id, doc.doc_type)
+        if key != chain:
+            if to_update:
+                to_update[-1].is_latest = True
+            chain, version = key, 0
+        version += 1
+        doc.version = version
+        doc.is_latest = False
+        to_update.append(doc)
+    if to_update:
+        to_update[-1].is_latest = True
+    Document.objects.bulk_update(to_update, ["version", "is_latest"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0002_document_content_hash'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='is_latest',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.RunPython(number_existing_versions, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='document',
+            constraint=models.UniqueConstraint(fields=('owner_type', 'owner_id', 'doc_type', 'version'), name='documents_unique_version'),
+        ),
+        migrations.AddConstraint(
+            model_name='document',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_latest', True)), fields=('owner_type', 'owner_id', 'doc_type'), name='documents_one_latest_per_chain'),
+        ),
+    ]
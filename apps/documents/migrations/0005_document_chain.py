@@ -0,0 +1,35 @@
+# Generated by Django 6.0.2 on 2026-10-19 12:38
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def create_chains(apps, schema_editor):
+    Document = apps.get_model("documents", "Document")
+    DocumentChain = apps.get_model("documents", "DocumentChain")
+    chains = Document.objects.values("owner_type", "owner_id", "doc_type").annotate(last_version=Max("version")).order_by()
+    DocumentChain.objects.bulk_create((DocumentChain(**chain) for chain in chains.iterator()), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0004_document_updated_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentChain',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('owner_type', models.CharField(max_length=30)),
+                ('owner_id', models.UUIDField()),
+                ('doc_type', models.CharField(max_length=80)),
+                ('last_version', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('owner_type', 'owner_id', 'doc_type'), name='documents_unique_chain')],
+            },
+        ),
+        migrations.RunPython(create_chains, migrations.RunPython.noop),
+    ]
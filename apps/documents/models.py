@@ -24,7 +24,14 @@ class Document(UUIDModel, TimeStampedModel):
     title = models.CharField(max_length=200, blank=True)
 
     file = models.FileField(upload_to="documents/%Y/%m/")
+    # Version chain per (owner_type, owner_id, doc_type); maintained by
+    # apps.documents.services on upload and by signals on delete.
     version = models.PositiveIntegerField(default=1)
+    is_latest = models.BooleanField(default=True)
+
+    # sha256 of the file content; filled in by the preview pipeline and used
+    # as the cache key for rendered previews
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True)
 
     uploaded_by = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL)
     access_scope = models.CharField(max_length=60, default="HR_ONLY")  # HR_ONLY / MANAGEMENT / OWNER / PUBLIC
@@ -33,4 +40,36 @@ class Document(UUIDModel, TimeStampedModel):
         indexes = [
             models.Index(fields=["owner_type", "owner_id"]),
             models.Index(fields=["doc_type"]),
+            models.Index(fields=["updated_at", "id"]),  # change sync
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["owner_type", "owner_id", "doc_type", "version"],
+                name="documents_unique_version",
+            ),
+            # Doubles as the index behind the "latest" lookups
+            models.UniqueConstraint(
+                fields=["owner_type", "owner_id", "doc_type"],
+                condition=models.Q(is_latest=True),
+                name="documents_one_latest_per_chain",
+            ),
+        ]
+
+
+class DocumentChain(models.Model):
+    """
+    One row per (owner_type, owner_id, doc_type) version chain, written at
+    the start of every change to the chain (apps.documents.services) so that
+    concurrent uploads to the same chain queue up behind its row lock (the
+    database write lock on SQLite) instead of racing for version numbers.
+    """
+
+    owner_type = models.CharField(max_length=30)
+    owner_id = models.UUIDField()
+    doc_type = models.CharField(max_length=80)
+    last_version = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["owner_type", "owner_id", "doc_type"], name="documents_unique_chain"),
         ]
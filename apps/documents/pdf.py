@@ -0,0 +1,71 @@
+"""
+Minimal text-to-PDF writer (PDF 1.4, built-in Helvetica, A4).
+
+Enough for system-generated letters without pulling in a PDF library;
+the output is plain, searchable text with automatic wrapping and paging.
+"""
+import textwrap
+
+PAGE_WIDTH = 595   # A4 in points
+PAGE_HEIGHT = 842
+MARGIN = 72
+FONT_SIZE = 11
+LEADING = 15
+WRAP_CHARS = 88
+
+
+def _escape(line: str) -> bytes:
+    text = line.encode("latin-1", "replace")
+    return text.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+def _wrap(text: str):
+    for paragraph in text.splitlines():
+        if not paragraph.strip():
+            yield ""
+            continue
+        yield from textwrap.wrap(paragraph, WRAP_CHARS) or [""]
+
+
+def text_to_pdf(text: str, title: str = "") -> bytes:
+    lines = list(_wrap(text))
+    per_page = (PAGE_HEIGHT - 2 * MARGIN) // LEADING
+    pages = [lines[i:i + per_page] for i in range(0, len(lines), per_page)] or [[]]
+
+    # Object numbers: 1 catalog, 2 pages, 3 font, 4 info, then (page, content) pairs
+    objects = {}
+    kids = []
+    for n, page_lines in enumerate(pages):
+        page_no, content_no = 5 + 2 * n, 6 + 2 * n
+        kids.append(f"{page_no} 0 R")
+
+        stream = [b"BT", f"/F1 {FONT_SIZE} Tf {LEADING} TL".encode(), f"{MARGIN} {PAGE_HEIGHT - MARGIN} Td".encode()]
+        for line in page_lines:
+            stream.append(b"(" + _escape(line) + b") Tj T*")
+        stream.append(b"ET")
+        body = b"\n".join(stream)
+
+        objects[page_no] = (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_no} 0 R >>"
+        ).encode()
+        objects[content_no] = f"<< /Length {len(body)} >>\nstream\n".encode() + body + b"\nendstream"
+
+    objects[1] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[2] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>".encode()
+    objects[3] = b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"
+    objects[4] = b"<< /Title (" + _escape(title) + b") /Producer (GEA HR) >>"
+
+    out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = {}
+    for number in sorted(objects):
+        offsets[number] = len(out)
+        out += f"{number} 0 obj\n".encode() + objects[number] + b"\nendobj\n"
+
+    xref_at = len(out)
+    size = max(objects) + 1
+    out += f"xref\n0 {size}\n0000000000 65535 f \n".encode()
+    for number in range(1, size):
+        out += f"{offsets[number]:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {size} /Root 1 0 R /Info 4 0 R >>\nstartxref\n{xref_at}\n%%EOF\n".encode()
+    return bytes(out)
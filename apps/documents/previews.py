@@ -0,0 +1,207 @@
+"""
+Background preview / thumbnail pipeline for documents.
+
+Uploads only schedule work (after the transaction commits); the shared
+background pool (apps.common.background) renders first-page thumbnails and
+stores them through the default storage under a content-addressed name:
+
+    previews/<sha256[:2]>/<sha256>/<variant>.png
+
+so identical files share previews and a changed file never serves a stale one.
+A file that cannot be rendered (corrupt, renderer error or timeout) gets a
+`failed` marker next to where its previews would go, and the preview
+endpoint answers 422 instead of scheduling it again; uploading new content
+(a new hash) or deleting the marker retries.
+
+Renderers:
+- images: Pillow (optional dependency)
+- PDFs: pypdfium2 with Pillow if installed, else the poppler `pdftoppm`
+  binary (without Pillow it cannot resize, so it renders each size)
+"""
+import hashlib
+import io
+import logging
+import mimetypes
+import shutil
+import subprocess
+import threading
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+from apps.common import background
+from apps.documents.models import Document
+
+try:
+    from PIL import Image
+except ImportError:  # pragma: no cover - optional dependency
+    Image = None
+
+try:
+    import pypdfium2
+except ImportError:  # pragma: no cover - optional dependency
+    pypdfium2 = None
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PREVIEW_SIZES = {"sm": 160, "md": 640}
+
+_in_flight = set()
+_in_flight_lock = threading.Lock()
+
+
+def preview_sizes() -> dict:
+    return getattr(settings, "DOCUMENT_PREVIEW_SIZES", DEFAULT_PREVIEW_SIZES)
+
+
+def preview_name(content_hash: str, variant: str) -> str:
+    return f"previews/{content_hash[:2]}/{content_hash}/{variant}.png"
+
+
+def failure_name(content_hash: str) -> str:
+    return f"previews/{content_hash[:2]}/{content_hash}/failed"
+
+
+def has_failed(content_hash: str) -> bool:
+    return bool(content_hash) and default_storage.exists(failure_name(content_hash))
+
+
+def preview_kind(doc: Document):
+    """Return "image" / "pdf" when a renderer is available, else None."""
+    content_type = mimetypes.guess_type(doc.file.name)[0] or ""
+    if content_type == "application/pdf":
+        if (pypdfium2 is not None and Image is not None) or shutil.which("pdftoppm"):
+            return "pdf"
+        return None
+    if content_type.startswith("image/") and Image is not None:
+        return "image"
+    return None
+
+
+def file_content_hash(doc: Document) -> str:
+    digest = hashlib.sha256()
+    with doc.file.open("rb") as fh:
+        for chunk in fh.chunks():
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# ------------------------------------------------------------
+# Rendering
+# ------------------------------------------------------------
+
+def _render_pdf_first_page(doc: Document, max_px: int):
+    """Page 1 fitted to max_px: a PIL image, or PNG bytes from pdftoppm when Pillow is missing."""
+    if pypdfium2 is not None and Image is not None:  # to_pil() needs Pillow
+        with doc.file.open("rb") as fh:
+            pdf = pypdfium2.PdfDocument(fh.read())
+        try:
+            page = pdf[0]
+            scale = max_px / max(page.get_size())
+            return page.render(scale=scale).to_pil()
+        finally:
+            pdf.close()
+
+    # Poppler: render page 1 straight to PNG on stdout.
+    with doc.file.open("rb") as fh:
+        result = subprocess.run(
+            ["pdftoppm", "-png", "-singlefile", "-f", "1", "-l", "1", "-scale-to", str(max_px), "-", "-"],
+            input=fh.read(),
+            capture_output=True,
+            check=True,
+            timeout=60,
+        )
+    return Image.open(io.BytesIO(result.stdout)) if Image is not None else result.stdout
+
+
+def _thumbnail_png(source, max_px: int) -> bytes:
+    img = source.copy()
+    img.thumbnail((max_px, max_px))
+    if img.mode not in ("RGB", "RGBA", "L", "LA"):
+        img = img.convert("RGBA")
+    out = io.BytesIO()
+    img.save(out, format="PNG", optimize=True)
+    return out.getvalue()
+
+
+def generate_previews(document_id) -> None:
+    """
+    Render every configured size variant for a document.
+    Runs on a worker thread; safe to call again (existing artifacts are kept).
+    """
+    content_hash = ""
+    try:
+        doc = Document.objects.filter(id=document_id).first()
+        if not doc or not doc.file:
+            return
+
+        kind = preview_kind(doc)
+        if kind is None:
+            return
+
+        content_hash = doc.content_hash
+        if not content_hash:
+            content_hash = file_content_hash(doc)
+            # queryset.update(): do not touch updated_at / download ETags
+            Document.objects.filter(id=doc.id).update(content_hash=content_hash)
+
+        sizes = preview_sizes()
+        missing = {
+            variant: px for variant, px in sizes.items()
+            if not default_storage.exists(preview_name(content_hash, variant))
+        }
+        if not missing:
+            return
+
+        if kind == "pdf" and Image is None:
+            # Nothing to resize pdftoppm's PNG with: render each size.
+            for variant, px in missing.items():
+                default_storage.save(preview_name(content_hash, variant), ContentFile(_render_pdf_first_page(doc, px)))
+            return
+
+        if kind == "pdf":
+            source = _render_pdf_first_page(doc, max(missing.values()))
+        else:
+            with doc.file.open("rb") as fh:
+                source = Image.open(io.BytesIO(fh.read()))
+                source.seek(0)  # first frame of multi-page TIFF / GIF
+                source.load()
+
+        for variant, px in missing.items():
+            default_storage.save(preview_name(content_hash, variant), ContentFile(_thumbnail_png(source, px)))
+    except Exception as exc:
+        logger.exception("Preview generation failed for document %s", document_id)
+        if content_hash and not default_storage.exists(failure_name(content_hash)):
+            default_storage.save(failure_name(content_hash), ContentFile(repr(exc)[:500].encode()))
+    finally:
+        with _in_flight_lock:
+            _in_flight.discard(document_id)
+
+
+# ------------------------------------------------------------
+# Scheduling
+# ------------------------------------------------------------
+
+def schedule_previews(document_id) -> bool:
+    """
+    Queue preview generation for a document unless it is already queued.
+    """
+    with _in_flight_lock:
+        if document_id in _in_flight:
+            return False
+        _in_flight.add(document_id)
+
+    background.submit(generate_previews, document_id)
+    return True
+
+
+def schedule_previews_on_commit(document_id) -> None:
+    transaction.on_commit(lambda: schedule_previews(document_id))
+
+
+def is_preview_pending(document_id) -> bool:
+    with _in_flight_lock:
+        return document_id in _in_flight
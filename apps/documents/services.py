@@ -0,0 +1,295 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+from apps.accounts.permissions import SUPERVISOR_ROLES, user_role_codes
+from apps.documents.models import Document, DocumentChain
+
+
+# ------------------------------------------------------------
+# Access scope
+# ------------------------------------------------------------
+
+HR_DOCUMENT_ROLES = {"SYSTEM_ADMIN", "HR_HO", "DIRECTOR_HR", "HR_REGIONAL"}
+MANAGEMENT_DOCUMENT_ROLES = HR_DOCUMENT_ROLES | {"CEO"} | SUPERVISOR_ROLES
+
+
+def is_document_owner(user, doc: Document) -> bool:
+    """
+    The uploader always owns a document. Otherwise ownership follows the
+    owner record: the employee themself, or the employee a leave belongs to.
+    """
+    if doc.uploaded_by_id and doc.uploaded_by_id == user.id:
+        return True
+
+    employee = getattr(user, "employee", None)
+    if not employee:
+        return False
+
+    if doc.owner_type == Document.OwnerType.EMPLOYEE:
+        return doc.owner_id == employee.id
+
+    if doc.owner_type in (Document.OwnerType.LEAVE, Document.OwnerType.LETTER):
+        from apps.leave.models import LeaveRequest
+
+        return LeaveRequest.objects.filter(id=doc.owner_id, employee=employee).exists()
+
+    return False
+
+
+def owner_employee_id(doc: Document):
+    """The employee a document belongs to (directly, or through a leave request)."""
+    if doc.owner_type == Document.OwnerType.EMPLOYEE:
+        return doc.owner_id
+    if doc.owner_type in (Document.OwnerType.LEAVE, Document.OwnerType.LETTER):
+        from apps.leave.models import LeaveRequest
+
+        return LeaveRequest.objects.filter(id=doc.owner_id).values_list("employee_id", flat=True).first()
+    return None
+
+
+def can_access_document(user, doc: Document) -> bool:
+    """
+    access_scope rules:
+    - PUBLIC: any authenticated user
+    - HR_ONLY: HR roles (and SYSTEM_ADMIN)
+    - MANAGEMENT: HR roles, CEO and supervisors
+    - OWNER: HR roles and the owner of the document
+    """
+    if not user or not user.is_authenticated:
+        return False
+
+    scope = (doc.access_scope or "HR_ONLY").upper()
+    if scope == "PUBLIC":
+        return True
+
+    roles = set(user_role_codes(user))
+    if roles.intersection(HR_DOCUMENT_ROLES):
+        return True
+
+    if scope == "MANAGEMENT":
+        return bool(roles.intersection(MANAGEMENT_DOCUMENT_ROLES))
+
+    if scope == "OWNER":
+        return is_document_owner(user, doc)
+
+    return False
+
+
+# ------------------------------------------------------------
+# Version chain
+# ------------------------------------------------------------
+
+def lock_chain(owner_type: str, owner_id, doc_type: str) -> DocumentChain:
+    """
+    Lock a version chain for the rest of the transaction. The chain row is
+    written first thing (inserted if missing, then updated), which takes its
+    row lock on PostgreSQL and the database write lock on SQLite, so two
+    uploads to the same chain, including the very first two, run one after
+    the other. Call it before anything else in the transaction.
+    """
+    key = {"owner_type": owner_type, "owner_id": owner_id, "doc_type": doc_type}
+    DocumentChain.objects.bulk_create([DocumentChain(**key)], ignore_conflicts=True)
+    chain = DocumentChain.objects.select_for_update().get(**key)
+    chain.save(update_fields=["last_version"])
+    return chain
+
+
+def supersede_latest(owner_type: str, owner_id, doc_type: str) -> int:
+    """
+    Demote the current latest document of a (owner_type, owner_id, doc_type)
+    chain and return the version number for the next upload.
+    Must run inside the transaction that saves the new version.
+    """
+    lock = lock_chain(owner_type, owner_id, doc_type)
+    chain = Document.objects.filter(owner_type=owner_type, owner_id=owner_id, doc_type=doc_type)
+    current = chain.aggregate(v=Max("version"))["v"] or 0
+    if current:
+        chain.filter(is_latest=True).update(is_latest=False)
+    lock.last_version = current + 1
+    lock.save(update_fields=["last_version"])
+    return current + 1
+
+
+@transaction.atomic
+def create_document_version(*, owner_type: str, owner_id, doc_type: str, **fields) -> Document:
+    """
+    Create a document as the new latest version of its chain.
+    """
+    version = supersede_latest(owner_type, owner_id, doc_type)
+    return Document.objects.create(
+        owner_type=owner_type,
+        owner_id=owner_id,
+        doc_type=doc_type,
+        version=version,
+        is_latest=True,
+        **fields,
+    )
+
+
+@transaction.atomic
+def promote_latest(owner_type: str, owner_id, doc_type: str) -> None:
+    """Flag the highest remaining version of a chain as latest (after a delete)."""
+    lock_chain(owner_type, owner_id, doc_type)
+    chain = Document.objects.filter(owner_type=owner_type, owner_id=owner_id, doc_type=doc_type)
+    if chain.filter(is_latest=True).exists():
+        return
+    newest = chain.order_by("-version").values_list("id", flat=True).first()
+    if newest:
+        chain.filter(id=newest).update(is_latest=True)
+
+
+def latest_documents(owner_type: str, owner_ids, doc_types=None):
+    """
+    Latest version of every chain for many owners, in one indexed query.
+    """
+    qs = Document.objects.filter(owner_type=owner_type, owner_id__in=list(owner_ids), is_latest=True)
+    if doc_types:
+        qs = qs.filter(doc_type__in=list(doc_types))
+    return qs.order_by("owner_id", "doc_type")
+
+
+# ------------------------------------------------------------
+# Download
+# ------------------------------------------------------------
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def document_etag(doc: Document) -> str:
+    return f'"{doc.id.hex}-{doc.version}-{int(doc.updated_at.timestamp() * 1_000_000):x}"'
+
+
+def _parse_range(header: str, size: int):
+    """
+    Parse a single-range "bytes=" header into (start, end) inclusive.
+    Returns None when the header should be ignored (multi-range, garbage)
+    and "unsatisfiable" when the range lies outside the file.
+    """
+    match = _RANGE_RE.match(header.strip())
+    if not match:
+        return None
+
+    first, last = match.groups()
+    if not first and not last:
+        return None
+
+    if not first:
+        # Suffix range: last N bytes
+        length = int(last)
+        if length == 0:
+            return "unsatisfiable"
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        return "unsatisfiable"
+    return start, min(end, size - 1)
+
+
+def _range_is_current(request, etag: str, last_modified: int) -> bool:
+    """If-Range: only honour Range when the validator still matches."""
+    if_range = request.META.get("HTTP_IF_RANGE")
+    if not if_range:
+        return True
+    if if_range.startswith('"') or if_range.startswith("W/"):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def _iter_file_range(fh, start: int, length: int, block_size: int):
+    try:
+        fh.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = fh.read(min(block_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        fh.close()
+
+
+def _sendfile_response(doc: Document, backend: str):
+    """
+    Hand the transfer to the front-end server. It handles Range itself,
+    so Python only emits headers. Returns None when X-Sendfile cannot name
+    the file (storage without local paths); the caller then streams it.
+    """
+    response = HttpResponse()
+    if backend == "nginx":
+        prefix = settings.DOCUMENTS_SENDFILE_URL_PREFIX.rstrip("/")
+        response["X-Accel-Redirect"] = f"{prefix}/{quote(doc.file.name)}"
+    else:
+        try:
+            response["X-Sendfile"] = doc.file.path
+        except NotImplementedError:
+            return None
+    # Let the front-end server pick the type from the file it serves.
+    del response["Content-Type"]
+    return response
+
+
+def serve_document(request, doc: Document):
+    """
+    Build a download response for a document the caller may access.
+
+    - Conditional GET via ETag / Last-Modified (304 / 412)
+    - X-Accel-Redirect / X-Sendfile when DOCUMENTS_SENDFILE_BACKEND is set
+    - Otherwise FileResponse (wsgi.file_wrapper / sendfile for full files)
+      with single-range support (206 / 416)
+    """
+    etag = document_etag(doc)
+    last_modified = int(doc.updated_at.timestamp())
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    filename = os.path.basename(doc.file.name)
+    backend = getattr(settings, "DOCUMENTS_SENDFILE_BACKEND", None)
+
+    response = _sendfile_response(doc, backend) if backend else None
+    if response is None:
+        size = doc.file.size
+        byte_range = None
+        range_header = request.META.get("HTTP_RANGE")
+        if range_header and _range_is_current(request, etag, last_modified):
+            byte_range = _parse_range(range_header, size)
+
+        if byte_range == "unsatisfiable":
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+
+        if byte_range:
+            start, end = byte_range
+            length = end - start + 1
+            response = FileResponse(
+                _iter_file_range(doc.file.open("rb"), start, length, FileResponse.block_size),
+                status=206,
+                content_type=mimetypes.guess_type(filename)[0] or "application/octet-stream",
+            )
+            response["Content-Length"] = str(length)
+            response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        else:
+            response = FileResponse(doc.file.open("rb"), as_attachment=True, filename=filename)
+
+        response["Accept-Ranges"] = "bytes"
+
+    if "Content-Disposition" not in response:
+        response["Content-Disposition"] = f"attachment; filename*=UTF-8''{quote(filename)}"
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    response["Cache-Control"] = "private, no-cache"
+    return response
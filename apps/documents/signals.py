@@ -0,0 +1,25 @@
+from django.db import transaction
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from apps.common.sync import track_deletes
+from apps.documents.models import Document
+from apps.documents.services import owner_employee_id, promote_latest
+from apps.employees.services import employee_region_ids
+
+
+@receiver(post_delete, sender=Document)
+def keep_latest_after_delete(sender, instance, **kwargs):
+    """Deleting the latest version hands the flag back to its predecessor."""
+    if instance.is_latest:
+        transaction.on_commit(
+            lambda: promote_latest(instance.owner_type, instance.owner_id, instance.doc_type)
+        )
+
+
+def document_scope_keys(doc):
+    employee_id = owner_employee_id(doc)
+    return employee_id, employee_region_ids(employee_id) if employee_id else []
+
+
+track_deletes(Document, "Document", document_scope_keys)
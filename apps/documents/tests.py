@@ -1,3 +1,414 @@
-from django.test import TestCase
+import hashlib
+import io
+import json
+import os
+import zipfile
+import shutil
+import tempfile
+import uuid
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db.models.fields.files import FieldFile
+from django.test import RequestFactory, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.accounts.models import Role, UserRole
+
+from apps.common.benchmarks import Scenario
+from apps.common.budgets import APIBudgetMixin, Budget
+from apps.common.models import Tombstone
+from apps.documents import previews
+from apps.documents.archive import CHUNK_SIZE, stream_documents_zip
+from apps.documents.models import Document, DocumentChain
+from apps.documents.services import can_access_document, create_document_version, document_etag, serve_document
+from apps.employees.models import Employee, Employment
+
+
+class DocumentAPIBudgetTests(APIBudgetMixin, TestCase):
+    """Query / latency budgets of the document endpoints."""
+
+    budgets = {
+        "document_list": Budget(queries=3, p95_ms=40),
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.owner_ids = list(Employee.objects.order_by("staff_no").values_list("id", flat=True)[:40])
+        docs = []
+        for owner_id in cls.owner_ids:
+            for version in (1, 2):
+                docs.append(Document(
+                    owner_type="EMPLOYEE", owner_id=owner_id, doc_type="CONTRACT", title="Contract",
+                    file=f"documents/contract-{owner_id}-{version}.pdf", version=version, is_latest=version == 2,
+                ))
+        Document.objects.bulk_create(docs)
+        cls.document = docs[0]
+
+    def test_document_detail(self):
+        self.assertWithinBudget(
+            Scenario("document_detail", "hr", "get", f"/api/documents/{self.document.id}/"),
+            Budget(queries=2, p95_ms=40),
+        )
+
+    def test_latest_documents_for_many_owners(self):
+        owner_ids = ",".join(str(i) for i in self.owner_ids)
+        self.assertWithinBudget(
+            Scenario("document_latest", "hr", "get", f"/api/documents/latest/?owner_type=EMPLOYEE&owner_ids={owner_ids}"),
+            Budget(queries=2, p95_ms=60),
+        )
+
+    def test_etag_covers_columns_written_without_updated_at(self):
+        client = self.client_for("hr")
+        detail = f"/api/documents/{self.document.id}/"
+        detail_etag, list_etag = client.get(detail)["ETag"], client.get("/api/documents/")["ETag"]
+        self.assertEqual(client.get(detail, HTTP_IF_NONE_MATCH=detail_etag).status_code, 304)
+
+        # As previews.compute_content_hash does
+        Document.objects.filter(id=self.document.id).update(content_hash="ab" * 32)
+        self.assertEqual(client.get(detail, HTTP_IF_NONE_MATCH=detail_etag).status_code, 200)
+        self.assertEqual(client.get("/api/documents/", HTTP_IF_NONE_MATCH=list_etag).status_code, 200)
+
+    @override_settings(SYNC_SETTLE_SECONDS=0)
+    def test_change_sync_follows_the_owners_region(self):
+        client = self.client_for("regional_manager")
+        region_id = (
+            Employment.objects.filter(employee__user=self.user("regional_manager")).values_list("region_id", flat=True).first()
+        )
+        in_region = set(Employment.objects.filter(region_id=region_id).values_list("employee_id", flat=True))
+
+        body = json.loads(client.get("/api/documents/changes/?limit=1000").content)
+        self.assertFalse(body["has_more"])
+        self.assertEqual(
+            {row["id"] for row in body["results"]},
+            {str(d.id) for d in Document.objects.all() if d.owner_id in in_region},
+        )
+
+        doc = Document.objects.get(id=body["results"][0]["id"])
+        doc_id = str(doc.id)
+        doc.delete()
+        self.assertEqual(
+            Tombstone.objects.get(entity_type="Document", entity_id=doc_id).employee_id, doc.owner_id,
+        )
+        body = json.loads(client.get(f"/api/documents/changes/?since={body['next']}").content)
+        self.assertEqual(body["deleted"], [doc_id])
+
+
+class DocumentDownloadTests(TestCase):
+    """access_scope rules, Range / If-Range handling and front-end server offload."""
+
+    @classmethod
+    def setUpClass(cls):
+        media = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, media, ignore_errors=True)
+        cls.enterClassContext(override_settings(MEDIA_ROOT=media, DOCUMENTS_SENDFILE_BACKEND=None))
+        super().setUpClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.users = {}
+        for key, code in [("hr", "HR_HO"), ("ceo", "CEO"), ("supervisor", "REGIONAL_MANAGER"), ("owner", None), ("other", None)]:
+            cls.users[key] = User.objects.create_user(f"dl_{key}")
+            if code:
+                role, _ = Role.objects.get_or_create(code=code, defaults={"name": code})
+                UserRole.objects.create(user=cls.users[key], role=role)
+        cls.employee = Employee.objects.create(staff_no="DL1", first_name="Efua", last_name="Asante", user=cls.users["owner"])
+
+        cls.docs = {}
+        for scope in ("PUBLIC", "HR_ONLY", "MANAGEMENT", "OWNER"):
+            doc = Document(owner_type="EMPLOYEE", owner_id=cls.employee.id, doc_type=f"DL_{scope}", access_scope=scope)
+            doc.file.save("digits.txt", ContentFile(b"0123456789"), save=False)
+            doc.save()
+            cls.docs[scope] = doc
+
+    def download(self, **headers):
+        request = RequestFactory().get("/download/", **headers)
+        response = serve_document(request, self.docs["PUBLIC"])
+        body = b"".join(response.streaming_content) if response.streaming else response.content
+        if hasattr(response, "close"):
+            response.close()
+        return response, body
+
+    def test_access_scope_matrix(self):
+        allowed = {
+            "PUBLIC": {"hr", "ceo", "supervisor", "owner", "other"},
+            "HR_ONLY": {"hr"},
+            "MANAGEMENT": {"hr", "ceo", "supervisor"},
+            "OWNER": {"hr", "owner"},
+        }
+        for scope, doc in self.docs.items():
+            for key, user in self.users.items():
+                with self.subTest(scope=scope, user=key):
+                    self.assertEqual(can_access_document(user, doc), key in allowed[scope])
+
+    def test_ranges(self):
+        response, body = self.download(HTTP_RANGE="bytes=2-5")
+        self.assertEqual((response.status_code, body, response["Content-Range"]), (206, b"2345", "bytes 2-5/10"))
+        response, body = self.download(HTTP_RANGE="bytes=-3")
+        self.assertEqual((response.status_code, body, response["Content-Range"]), (206, b"789", "bytes 7-9/10"))
+        response, body = self.download(HTTP_RANGE="bytes=8-100")
+        self.assertEqual((response.status_code, body), (206, b"89"))
+
+        for ignored in ("bytes=abc", "bytes=0-1,4-5", "items=0-1", "bytes=-"):
+            with self.subTest(range=ignored):
+                response, body = self.download(HTTP_RANGE=ignored)
+                self.assertEqual((response.status_code, body), (200, b"0123456789"))
+
+        for unsatisfiable in ("bytes=10-", "bytes=5-2", "bytes=-0"):
+            with self.subTest(range=unsatisfiable):
+                response, _ = self.download(HTTP_RANGE=unsatisfiable)
+                self.assertEqual((response.status_code, response["Content-Range"]), (416, "bytes */10"))
+
+    def test_if_range(self):
+        etag = document_etag(self.docs["PUBLIC"])
+        response, body = self.download(HTTP_RANGE="bytes=0-1", HTTP_IF_RANGE=etag)
+        self.assertEqual((response.status_code, body), (206, b"01"))
+        response, body = self.download(HTTP_RANGE="bytes=0-1", HTTP_IF_RANGE='"stale"')
+        self.assertEqual((response.status_code, body), (200, b"0123456789"))
+        response, body = self.download(HTTP_RANGE="bytes=0-1", HTTP_IF_RANGE="Wed, 21 Oct 2015 07:28:00 GMT")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.download(HTTP_IF_NONE_MATCH=etag)[0].status_code, 304)
+
+    def test_sendfile_offload(self):
+        name = self.docs["PUBLIC"].file.name
+        with override_settings(DOCUMENTS_SENDFILE_BACKEND="nginx"):
+            response, body = self.download(HTTP_RANGE="bytes=2-5")
+        self.assertEqual((response.status_code, body), (200, b""))
+        self.assertEqual(response["X-Accel-Redirect"], f"/protected-media/{name}")
+        self.assertNotIn("Content-Type", response)
+        self.assertIn("attachment;", response["Content-Disposition"])
+
+        with override_settings(DOCUMENTS_SENDFILE_BACKEND="apache"):
+            self.assertEqual(self.download()[0]["X-Sendfile"], self.docs["PUBLIC"].file.path)
+            # Storage without local paths: streamed by Django instead
+            with mock.patch.object(FieldFile, "path", new_callable=mock.PropertyMock, side_effect=NotImplementedError):
+                response, body = self.download()
+        self.assertNotIn("X-Sendfile", response)
+        self.assertEqual(body, b"0123456789")
+
+    def test_download_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(self.users["hr"])
+        response = client.get(f"/api/documents/{self.docs['OWNER'].id}/download/", HTTP_RANGE="bytes=0-3")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b"".join(response.streaming_content), b"0123")
+        response.close()
+
+
+class DocumentPreviewTests(TestCase):
+    """Preview endpoint states and the render pipeline (renderers are stubbed)."""
+
+    @classmethod
+    def setUpClass(cls):
+        media = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, media, ignore_errors=True)
+        cls.enterClassContext(override_settings(MEDIA_ROOT=media, BACKGROUND_WORKERS=0))
+        super().setUpClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hr = get_user_model().objects.create_user("pv_hr")
+        UserRole.objects.create(user=cls.hr, role=Role.objects.get_or_create(code="HR_HO", defaults={"name": "HR"})[0])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.hr)
+        self.doc = Document(owner_type="OTHER", owner_id=uuid.uuid4(), doc_type="SCAN")
+        self.doc.file.save("scan.pdf", ContentFile(b"%PDF-1.4 not really"), save=False)
+        self.doc.save()
+        self.url = f"/api/documents/{self.doc.id}/preview/"
+        kind = mock.patch.object(previews, "preview_kind", return_value="pdf")
+        kind.start()
+        self.addCleanup(kind.stop)
+
+    def test_renders_and_serves_content_addressed_previews(self):
+        with mock.patch.object(previews.background, "submit") as submit:
+            response = self.client.get(self.url)
+        self.assertEqual((response.status_code, response["Retry-After"]), (202, "2"))
+        submit.assert_called_once_with(previews.generate_previews, self.doc.id)
+        previews._in_flight.discard(self.doc.id)
+
+        # pdftoppm without Pillow: one render per size
+        render_png = lambda doc, px: f"PNG-{px}".encode()  # noqa: E731
+        with mock.patch.object(previews, "Image", None), \
+                mock.patch.object(previews, "_render_pdf_first_page", side_effect=render_png) as render:
+            self.client.get(self.url)  # renders inline (BACKGROUND_WORKERS=0)
+        self.assertEqual(sorted(call.args[1] for call in render.call_args_list), [160, 640])
+        self.doc.refresh_from_db()
+        self.assertEqual(len(self.doc.content_hash), 64)
+
+        response = self.client.get(self.url, {"size": "sm"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), b"PNG-160")
+        response.close()
+        etag = response["ETag"]
+        self.assertEqual(self.client.get(self.url, {"size": "sm"}, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get(self.url, {"size": "xl"}).status_code, 400)
+
+    def test_failed_render_is_not_retried(self):
+        with mock.patch.object(previews, "_render_pdf_first_page", side_effect=RuntimeError("corrupt")) as render:
+            with self.assertLogs("apps.documents.previews", "ERROR"):
+                first = self.client.get(self.url)
+            second = self.client.get(self.url)
+            third = self.client.get(self.url)
+        self.assertEqual(first.status_code, 202)
+        self.assertEqual((second.status_code, third.status_code), (422, 422))
+        self.assertEqual(render.call_count, 1)
+        self.doc.refresh_from_db()
+        self.assertTrue(previews.has_failed(self.doc.content_hash))
+        self.assertFalse(previews.is_preview_pending(self.doc.id))
+
+
+class DocumentVersionChainTests(TestCase):
+    """Uploads extend their chain, deletes hand the latest flag back, and the batch lookup returns the heads."""
+
+    @classmethod
+    def setUpClass(cls):
+        media = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, media, ignore_errors=True)
+        cls.enterClassContext(override_settings(MEDIA_ROOT=media))
+        super().setUpClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hr = get_user_model().objects.create_user("vc_hr")
+        UserRole.objects.create(user=cls.hr, role=Role.objects.get_or_create(code="HR_HO", defaults={"name": "HR"})[0])
+        cls.owners = [uuid.uuid4() for _ in range(3)]
+
+    def upload(self, owner_id, doc_type="CONTRACT"):
+        return create_document_version(
+            owner_type="EMPLOYEE", owner_id=owner_id, doc_type=doc_type, file=ContentFile(b"x", name="c.pdf"),
+        )
+
+    def chain(self, owner_id, doc_type="CONTRACT"):
+        return list(Document.objects.filter(owner_id=owner_id, doc_type=doc_type).order_by("version").values_list("version", "is_latest"))
+
+    def test_uploads_extend_the_chain(self):
+        for _ in range(3):
+            self.upload(self.owners[0])
+        self.upload(self.owners[0], doc_type="ID_CARD")
+        self.assertEqual(self.chain(self.owners[0]), [(1, False), (2, False), (3, True)])
+        self.assertEqual(self.chain(self.owners[0], "ID_CARD"), [(1, True)])
+        self.assertEqual(DocumentChain.objects.get(owner_id=self.owners[0], doc_type="CONTRACT").last_version, 3)
+
+        # Chains written without a lock row (bulk loads) continue from their highest version
+        Document.objects.bulk_create([
+            Document(owner_type="EMPLOYEE", owner_id=self.owners[1], doc_type="CONTRACT", file="a.pdf", version=4, is_latest=True),
+        ])
+        self.assertEqual(self.upload(self.owners[1]).version, 5)
+        self.assertEqual(self.chain(self.owners[1]), [(4, False), (5, True)])
+
+    def test_deleting_the_latest_promotes_its_predecessor(self):
+        first, second = self.upload(self.owners[0]), self.upload(self.owners[0])
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertEqual(self.chain(self.owners[0]), [(1, True)])
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertEqual(self.upload(self.owners[0]).version, 1)
+
+    def test_latest_endpoint_returns_each_chain_head(self):
+        for _ in range(2):
+            self.upload(self.owners[0])
+        self.upload(self.owners[0], doc_type="ID_CARD")
+        head = self.upload(self.owners[1])
+
+        client = APIClient()
+        client.force_authenticate(self.hr)
+        owner_ids = ",".join(str(o) for o in self.owners)
+        body = client.get(f"/api/documents/latest/?owner_type=EMPLOYEE&owner_ids={owner_ids}").json()
+        self.assertEqual(
+            [(d["doc_type"], d["version"]) for d in body[str(self.owners[0])]], [("CONTRACT", 2), ("ID_CARD", 1)],
+        )
+        self.assertEqual([d["id"] for d in body[str(self.owners[1])]], [str(head.id)])
+        self.assertEqual(body[str(self.owners[2])], [])
+        only = client.get(f"/api/documents/latest/?owner_type=EMPLOYEE&owner_ids={owner_ids}&doc_type=ID_CARD").json()
+        self.assertEqual(len(only[str(self.owners[0])]), 1)
+
+    def test_admin_add_joins_the_chain(self):
+        self.upload(self.owners[0])
+        admin = get_user_model().objects.create_superuser("vc_admin", password="x")
+        self.client.force_login(admin)
+        response = self.client.post("/admin/documents/document/add/", {
+            "owner_type": "EMPLOYEE", "owner_id": str(self.owners[0]), "doc_type": "CONTRACT", "title": "Renewal",
+            "file": SimpleUploadedFile("renewal.pdf", b"%PDF"), "access_scope": "HR_ONLY",
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.chain(self.owners[0]), [(1, False), (2, True)])
+        self.assertEqual(Document.objects.get(version=2, owner_id=self.owners[0]).uploaded_by, admin)
+
+
+class DocumentArchiveTests(TestCase):
+    """The streamed ZIP opens with zipfile, with ZIP64 entries, the right compression and a manifest."""
+
+    @classmethod
+    def setUpClass(cls):
+        media = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, media, ignore_errors=True)
+        cls.enterClassContext(override_settings(MEDIA_ROOT=media))
+        super().setUpClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = uuid.uuid4()
+        cls.big = os.urandom(CHUNK_SIZE * 3 + 17)
+        cls.docs = [
+            create_document_version(owner_type="EMPLOYEE", owner_id=cls.owner, doc_type="SCAN", access_scope="MANAGEMENT",
+                                    file=ContentFile(cls.big, name="scan.pdf")),
+            create_document_version(owner_type="EMPLOYEE", owner_id=cls.owner, doc_type="NOTE", access_scope="HR_ONLY",
+                                    file=ContentFile(b"note " * 1000, name="note.txt")),
+            create_document_version(owner_type="EMPLOYEE", owner_id=cls.owner, doc_type="GONE", access_scope="MANAGEMENT",
+                                    file=ContentFile(b"x", name="gone.txt")),
+        ]
+        cls.docs[2].file.storage.delete(cls.docs[2].file.name)
+
+    def open_zip(self, pieces):
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(pieces)))
+        self.assertIsNone(archive.testzip())
+        return archive
+
+    def test_entries_manifest_and_zip64(self):
+        pieces = list(stream_documents_zip(iter(self.docs), extra_manifest={"filters": {"owner_id": "x"}}))
+        # Drained after every chunk: no piece holds much more than one read block
+        self.assertLess(max(len(p) for p in pieces), CHUNK_SIZE * 2)
+        archive = self.open_zip(pieces)
+
+        scan, note = (archive.getinfo(f"EMPLOYEE/{self.owner}/{t}") for t in ("SCAN/v1-scan.pdf", "NOTE/v1-note.txt"))
+        self.assertEqual(archive.read(scan), self.big)
+        self.assertEqual((scan.compress_type, note.compress_type), (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED))
+        self.assertLess(note.compress_size, note.file_size)
+        for info in (scan, note):
+            self.assertGreaterEqual(info.extract_version, zipfile.ZIP64_VERSION)
+            self.assertTrue(info.flag_bits & 0x08)  # sizes in a data descriptor: written without seeking
+
+        manifest = json.loads(archive.read("manifest.json"))
+        self.assertEqual(archive.namelist()[-1], "manifest.json")
+        self.assertEqual((manifest["count"], manifest["filters"]), (3, {"owner_id": "x"}))
+        by_type = {entry["doc_type"]: entry for entry in manifest["documents"]}
+        self.assertEqual(by_type["SCAN"]["sha256"], hashlib.sha256(self.big).hexdigest())
+        self.assertEqual(by_type["SCAN"]["size"], len(self.big))
+        self.assertTrue(by_type["GONE"]["missing"])
+        self.assertNotIn(f"EMPLOYEE/{self.owner}/GONE/v1-gone.txt", archive.namelist())
+
+    def test_export_endpoint_applies_filters_and_access_scope(self):
+        manager = get_user_model().objects.create_user("zip_manager")
+        UserRole.objects.create(user=manager, role=Role.objects.get_or_create(code="CEO", defaults={"name": "CEO"})[0])
+        client = APIClient()
+        client.force_authenticate(manager)
+
+        response = client.get("/api/documents/export/", {"owner_type": "EMPLOYEE", "owner_id": str(self.owner)})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response["Content-Type"], response["Cache-Control"]), ("application/zip", "no-store"))
+        archive = self.open_zip(response.streaming_content)
+        manifest = json.loads(archive.read("manifest.json"))
+        self.assertEqual(sorted(e["doc_type"] for e in manifest["documents"]), ["GONE", "SCAN"])  # NOTE is HR_ONLY
+        self.assertEqual(manifest["filters"]["owner_id"], str(self.owner))
+
+        archive = self.open_zip(client.get("/api/documents/export/", {"doc_type": "NOTE"}).streaming_content)
+        self.assertEqual(json.loads(archive.read("manifest.json"))["count"], 0)
+        self.assertEqual(client.get("/api/documents/export/").status_code, 400)
+        self.assertEqual(client.get("/api/documents/export/", {"owner_id": str(self.owner)}).status_code, 400)
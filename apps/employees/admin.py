@@ -1,13 +1,92 @@
-from django.contrib import admin
+import csv
+import io
 
-# Register your models here.
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.http import HttpResponse
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
+
+from apps.employees import search
+from apps.employees.importer import EmployeeImporter, read_rows, write_error_report
 from apps.employees.models import Employee, Employment
 
+
+class EmployeeImportForm(forms.Form):
+    file = forms.FileField(help_text="CSV or XLSX with a header row (staff_no, first_name, last_name, …)")
+    create_missing = forms.BooleanField(
+        required=False,
+        help_text="Create unknown regions, departments, positions and grades instead of rejecting the row.",
+    )
+
+
 @admin.register(Employee)
 class EmployeeAdmin(admin.ModelAdmin):
     list_display = ("staff_no", "first_name", "last_name", "status")
     search_fields = ("staff_no", "first_name", "last_name", "email")
+    change_list_template = "admin/employees/employee/change_list.html"
+
+    # Best FTS hits shown for an admin search; the changelist says when there are more
+    search_limit = 500
+
+    def get_search_results(self, request, queryset, search_term):
+        # Use the FTS directory index instead of icontains table scans.
+        if not search_term or not search.is_available():
+            return super().get_search_results(request, queryset, search_term)
+        ids = search.search_employee_ids(search_term, limit=self.search_limit + 1)
+        if len(ids) > self.search_limit:
+            ids = ids[: self.search_limit]
+            self.message_user(
+                request,
+                f"Showing the {self.search_limit} best matches for “{search_term}”; refine the search to see others.",
+                messages.WARNING,
+            )
+        return queryset.filter(id__in=ids), False
+
+    def get_urls(self):
+        urls = [
+            path("import/", self.admin_site.admin_view(self.import_view), name="employees_employee_import"),
+        ]
+        return urls + super().get_urls()
+
+    def import_view(self, request):
+        """Bulk import employees + current employment; rejected rows come back as a CSV report."""
+        if not (self.has_add_permission(request) and self.has_change_permission(request)):
+            return redirect("admin:employees_employee_changelist")
+
+        form = EmployeeImportForm(request.POST or None, request.FILES or None)
+        if request.method == "POST" and form.is_valid():
+            upload = form.cleaned_data["file"]
+            importer = EmployeeImporter(create_missing=form.cleaned_data["create_missing"])
+            try:
+                result = importer.run(read_rows(upload.file, upload.name))
+            except (RuntimeError, csv.Error, UnicodeDecodeError) as e:
+                form.add_error("file", str(e))
+            else:
+                self.message_user(
+                    request,
+                    f"Imported {result.imported} of {result.rows} rows "
+                    f"({result.employments_created} new employments, {result.employments_updated} updated).",
+                    messages.SUCCESS,
+                )
+                if not result.errors:
+                    return redirect("admin:employees_employee_changelist")
+
+                self.message_user(request, f"{len(result.errors)} rows need attention; see the downloaded report.", messages.WARNING)
+                out = io.StringIO()
+                write_error_report(result.errors, out)
+                response = HttpResponse(out.getvalue(), content_type="text/csv")
+                response["Content-Disposition"] = 'attachment; filename="employee-import-errors.csv"'
+                return response
+
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": "Import employees",
+            "form": form,
+        }
+        return TemplateResponse(request, "admin/employees/employee/import.html", context)
 
 @admin.register(Employment)
 class EmploymentAdmin(admin.ModelAdmin):
@@ -0,0 +1,116 @@
+import uuid
+
+from rest_framework import serializers, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from apps.accounts.permissions import (
+    IsAdminOrReadOnlyHRCEOOrSupervisor,
+    RegionScopedQueryMixin,
+)
+from apps.common.conditional import ConditionalGetMixin
+from apps.common.profiling import ProfiledSerializerMixin, ProfiledViewMixin
+from apps.employees import search
+from apps.employees.models import Employee, Employment
+from apps.org.services import department_subtree_ids
+
+
+class EmployeeSerializer(ProfiledSerializerMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Employee
+        fields = ("id", "staff_no", "first_name", "last_name", "other_names", "phone", "email", "status")
+
+
+class DirectorySearchQuerySerializer(serializers.Serializer):
+    q = serializers.CharField(min_length=1, max_length=100)
+    region = serializers.UUIDField(required=False)
+    department = serializers.UUIDField(required=False)
+    limit = serializers.IntegerField(required=False, min_value=1, max_value=100, default=25)
+
+
+class EmployeeViewSet(ProfiledViewMixin, ConditionalGetMixin, RegionScopedQueryMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Employee directory (read-only).
+
+    Access:
+    - SYSTEM_ADMIN / HR / CEO: all regions
+    - Supervisors: their own region (or reporting subtree, see SUPERVISOR_SCOPE)
+    """
+    queryset = Employee.objects.all().order_by("staff_no")
+    serializer_class = EmployeeSerializer
+    permission_classes = [IsAdminOrReadOnlyHRCEOOrSupervisor]
+
+    # Used by RegionScopedQueryMixin
+    region_field = "employments__region"
+    department_field = "employments__department"
+    reporting_field = ""
+
+    # Most hits a scoped search reads from the index to fill `limit`
+    search_max_candidates = 1000
+
+    def get_queryset(self):
+        qs = self.scope_queryset(super().get_queryset(), self.request)
+        return self.filter_department_subtree(qs, self.request).distinct()
+
+    @action(detail=False, methods=["get"])
+    def search(self, request):
+        """
+        Ranked directory search over staff no, name, email, region,
+        department and position (prefix and typo tolerant). department
+        covers the whole sub-tree of units:
+        ?q=...&region=<uuid>&department=<uuid>&limit=25
+        """
+        params = DirectorySearchQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        p = params.validated_data
+
+        department_ids = None
+        if p.get("department"):
+            # The department and every unit below it
+            department_ids = list(
+                department_subtree_ids(p["department"]).values_list("descendant_id", flat=True)
+            ) or [p["department"]]
+
+        # Non-HO users in region scope search their own region only; a
+        # requested region outside it has nothing they may see.
+        region_id = p.get("region")
+        if not self.is_ho_user(request.user) and self.scope_mode() == "region":
+            own_region = (
+                Employment.objects.filter(employee__user=request.user, status=Employment.Status.ACTIVE)
+                .order_by("-created_at")
+                .values_list("region_id", flat=True)
+                .first()
+            )
+            if own_region is None or (region_id and region_id != own_region):
+                return Response({"count": 0, "results": []})
+            region_id = own_region
+
+        # Other scopes (reporting line) cannot be pushed into the index:
+        # fetch a larger batch until `limit` hits survive the scoping.
+        fetch = p["limit"]
+        while True:
+            candidates = search.search(p["q"], region_id=region_id, department_ids=department_ids, limit=fetch)
+            allowed = {
+                emp_id.hex
+                for emp_id in self.get_queryset()
+                .filter(id__in=[h["employee_id"] for h in candidates])
+                .values_list("id", flat=True)
+            }
+            hits = [hit for hit in candidates if hit["employee_id"] in allowed]
+            if len(hits) >= p["limit"] or len(candidates) < fetch or fetch >= self.search_max_candidates:
+                break
+            fetch = min(fetch * 4, self.search_max_candidates)
+
+        results = []
+        for hit in hits[:p["limit"]]:
+            results.append({
+                "id": str(uuid.UUID(hit["employee_id"])),
+                "staff_no": hit["staff_no"],
+                "full_name": hit["full_name"],
+                "email": hit["email"],
+                "region": hit["region"],
+                "department": hit["department"],
+                "position": hit["position"],
+                "score": hit["score"],
+            })
+        return Response({"count": len(results), "results": results})
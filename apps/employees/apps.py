@@ -3,3 +3,6 @@ from django.apps import AppConfig
 class EmployeesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.employees"
+
+    def ready(self):
+        from apps.employees import signals  # noqa: F401
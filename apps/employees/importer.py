@@ -0,0 +1,389 @@
+"""
+Streaming bulk import of employees and their current employment.
+
+Rows are read lazily from CSV or XLSX and processed in chunks:
+
+1. validate + resolve Region / Department / Position / Grade through
+   in-memory maps loaded once up front (no per-row queries); with
+   create_missing, unknown names are created inside the chunk's transaction
+2. upsert Employee rows keyed by staff_no with bulk_create(update_conflicts=True)
+3. update the employee's ACTIVE employment in place or create it (bulk)
+4. supervisors are resolved by staff number; ones that only appear in a
+   later chunk are resolved after the last chunk. A supervisor that would
+   close a loop in the reporting tree is dropped and the row reported.
+
+Bulk writes bypass model signals, so the directory search index is refreshed
+per chunk and the reporting-line closure is rebuilt once at the end.
+
+Every rejected row is reported as RowError(row, staff_no, message).
+"""
+import csv
+import io
+from dataclasses import dataclass, field
+from datetime import date, datetime
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.utils import timezone
+
+from apps.common import closure
+from apps.employees import search
+from apps.employees.models import Employee, Employment
+from apps.employees.services import rebuild_reporting_lines, reporting_parents
+from apps.org.models import Department, Grade, Position, Region
+from apps.workflows import approvers
+
+COLUMNS = [
+    "staff_no", "first_name", "last_name", "other_names", "email", "phone", "status",
+    "employment_type", "staff_category", "start_date", "end_date",
+    "region", "department", "position", "grade", "supervisor_staff_no",
+]
+REQUIRED = ["staff_no", "first_name", "last_name", "employment_type", "start_date", "region", "department", "position", "grade"]
+
+EMPLOYEE_FIELDS = ["first_name", "last_name", "other_names", "email", "phone", "status"]
+EMPLOYMENT_FIELDS = [
+    "employment_type", "staff_category", "start_date", "end_date",
+    "region_id", "department_id", "position_id", "grade_id",
+]
+
+
+@dataclass
+class RowError:
+    row: int
+    staff_no: str
+    message: str
+
+
+@dataclass
+class ImportResult:
+    rows: int = 0
+    employees: int = 0
+    employments_created: int = 0
+    employments_updated: int = 0
+    rejected: int = 0
+    errors: list = field(default_factory=list)  # rejected rows plus supervisor warnings
+
+    @property
+    def imported(self) -> int:
+        return self.rows - self.rejected
+
+
+# ------------------------------------------------------------
+# Readers
+# ------------------------------------------------------------
+
+def _normalise_header(name) -> str:
+    return str(name or "").strip().lower().replace(" ", "_")
+
+
+def read_csv(fh):
+    """Yield dict rows from a text or binary CSV file object."""
+    if isinstance(fh.read(0), bytes):
+        fh = io.TextIOWrapper(fh, encoding="utf-8-sig", newline="")
+    reader = csv.reader(fh)
+    header = [_normalise_header(h) for h in next(reader, [])]
+    for values in reader:
+        if any(v.strip() for v in values):
+            yield dict(zip(header, values))
+
+
+def read_xlsx(fh):
+    """Yield dict rows from the first sheet of an XLSX workbook (read-only mode)."""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise RuntimeError("XLSX import needs openpyxl (pip install openpyxl).")
+
+    wb = load_workbook(fh, read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = [_normalise_header(h) for h in next(rows, [])]
+        for values in rows:
+            if any(v not in (None, "") for v in values):
+                yield dict(zip(header, values))
+    finally:
+        wb.close()
+
+
+def read_rows(fh, filename: str = ""):
+    if filename.lower().endswith((".xlsx", ".xlsm")):
+        return read_xlsx(fh)
+    return read_csv(fh)
+
+
+# ------------------------------------------------------------
+# Lookups
+# ------------------------------------------------------------
+
+def _key(value) -> str:
+    return str(value or "").strip().lower()
+
+
+class Lookups:
+    """Name -> id maps for the reference tables, loaded once per import."""
+
+    def __init__(self, create_missing: bool = False):
+        self.create_missing = create_missing
+        self.regions = {_key(n): i for i, n in Region.objects.values_list("id", "name")}
+        self.positions = {_key(t): i for i, t in Position.objects.values_list("id", "title")}
+        self.grades = {_key(n): i for i, n in Grade.objects.values_list("id", "name")}
+        self.departments = {}
+        self.ambiguous_departments = set()
+        for i, n in Department.objects.values_list("id", "name"):
+            k = _key(n)
+            if k in self.departments:
+                self.ambiguous_departments.add(k)
+            self.departments[k] = i
+
+    def _resolve(self, kind: str, value, cache: dict, create):
+        k = _key(value)
+        if k in cache:
+            return cache[k]
+        if not self.create_missing:
+            raise ValueError(f"Unknown {kind} '{value}'")
+        cache[k] = create(str(value).strip()).id
+        return cache[k]
+
+    def region(self, value):
+        return self._resolve("region", value, self.regions, lambda v: Region.objects.create(name=v))
+
+    def position(self, value):
+        return self._resolve("position", value, self.positions, lambda v: Position.objects.create(title=v))
+
+    def grade(self, value):
+        return self._resolve("grade", value, self.grades, lambda v: Grade.objects.create(name=v, rank_order=0))
+
+    def department(self, value):
+        if _key(value) in self.ambiguous_departments:
+            raise ValueError(f"Department name '{value}' is ambiguous")
+        return self._resolve(
+            "department", value, self.departments, lambda v: Department.objects.create(name=v, parent=None)
+        )
+
+
+# ------------------------------------------------------------
+# Row validation
+# ------------------------------------------------------------
+
+def _parse_date(value, column: str):
+    if value in (None, ""):
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    text = str(value).strip()
+    for fmt in ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y"):
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Invalid {column} '{value}' (use YYYY-MM-DD)")
+
+
+def _choice(value, choices, column: str, default=None):
+    text = str(value or "").strip().upper()
+    if not text:
+        if default is None:
+            raise ValueError(f"Missing {column}")
+        return default
+    if text not in choices:
+        raise ValueError(f"Invalid {column} '{value}' (one of {', '.join(choices)})")
+    return text
+
+
+def _clean(raw: dict, lookups: Lookups) -> dict:
+    row = {c: ("" if raw.get(c) is None else raw.get(c)) for c in COLUMNS}
+    missing = [c for c in REQUIRED if str(row[c]).strip() == ""]
+    if missing:
+        raise ValueError(f"Missing {', '.join(missing)}")
+
+    start = _parse_date(row["start_date"], "start_date")
+    end = _parse_date(row["end_date"], "end_date")
+    if end and end < start:
+        raise ValueError("end_date cannot be before start_date")
+
+    for column in ("staff_no", "first_name", "last_name", "other_names", "email", "phone"):
+        limit = Employee._meta.get_field(column).max_length
+        if len(str(row[column]).strip()) > limit:
+            raise ValueError(f"{column} is longer than {limit} characters")
+
+    email = str(row["email"]).strip()
+    if email:
+        try:
+            validate_email(email)
+        except ValidationError:
+            raise ValueError(f"Invalid email '{email}'")
+
+    return {
+        "staff_no": str(row["staff_no"]).strip(),
+        "first_name": str(row["first_name"]).strip(),
+        "last_name": str(row["last_name"]).strip(),
+        "other_names": str(row["other_names"]).strip(),
+        "email": email,
+        "phone": str(row["phone"]).strip(),
+        "status": _choice(row["status"], Employee.Status.values, "status", default=Employee.Status.ACTIVE),
+        "employment_type": _choice(row["employment_type"], Employment.EmploymentType.values, "employment_type"),
+        "staff_category": _choice(
+            row["staff_category"], Employment.StaffCategory.values, "staff_category",
+            default=Employment.StaffCategory.SENIOR,
+        ),
+        "start_date": start,
+        "end_date": end,
+        "region_id": lookups.region(row["region"]),
+        "department_id": lookups.department(row["department"]),
+        "position_id": lookups.position(row["position"]),
+        "grade_id": lookups.grade(row["grade"]),
+        "supervisor_staff_no": str(row["supervisor_staff_no"]).strip(),
+    }
+
+
+# ------------------------------------------------------------
+# Import
+# ------------------------------------------------------------
+
+class EmployeeImporter:
+    def __init__(self, chunk_size: int = 2000, create_missing: bool = False):
+        self.chunk_size = chunk_size
+        self.lookups = Lookups(create_missing=create_missing)
+        self.result = ImportResult()
+        self._pending_supervisors = []  # (employment, supervisor_staff_no, row_no, staff_no)
+        self._supervisor_rows = {}  # employee_id -> (row_no, staff_no, supervisor_staff_no)
+
+    def run(self, rows, progress=None) -> ImportResult:
+        chunk = []
+        for row_no, raw in enumerate(rows, start=2):  # row 1 is the header
+            self.result.rows += 1
+            chunk.append((row_no, raw))
+            if len(chunk) >= self.chunk_size:
+                self._flush(chunk)
+                chunk = []
+                if progress:
+                    progress(self.result)
+        if chunk:
+            self._flush(chunk)
+        with transaction.atomic():
+            self._resolve_pending_supervisors()
+            rebuild_reporting_lines(self._break_reporting_cycles())
+        if progress:
+            progress(self.result)
+        return self.result
+
+    @transaction.atomic
+    def _flush(self, chunk):
+        # Rows are cleaned here so reference rows made by create_missing
+        # commit or roll back with the chunk that needed them.
+        by_staff = {}
+        for row_no, raw in chunk:
+            try:
+                row = _clean(raw, self.lookups)
+            except ValueError as e:
+                self.result.rejected += 1
+                self.result.errors.append(RowError(row_no, str(raw.get("staff_no") or ""), str(e)))
+                continue
+            by_staff[row["staff_no"]] = (row_no, row)  # last row wins for a repeated staff_no
+        if not by_staff:
+            return
+
+        now = timezone.now()
+        Employee.objects.bulk_create(
+            [
+                Employee(staff_no=staff_no, updated_at=now, **{f: row[f] for f in EMPLOYEE_FIELDS})
+                for staff_no, (_, row) in by_staff.items()
+            ],
+            update_conflicts=True,
+            unique_fields=["staff_no"],
+            update_fields=EMPLOYEE_FIELDS + ["updated_at"],
+            batch_size=500,
+        )
+        self.result.employees += len(by_staff)
+
+        # Conflicting rows keep their existing primary key: read ids back.
+        wanted = set(by_staff) | {row["supervisor_staff_no"] for _, row in by_staff.values() if row["supervisor_staff_no"]}
+        ids = dict(Employee.objects.filter(staff_no__in=wanted).values_list("staff_no", "id"))
+
+        current = {}
+        for job in (
+            Employment.objects
+            .filter(employee_id__in=[ids[s] for s in by_staff], status=Employment.Status.ACTIVE)
+            .order_by("employee_id", "-created_at")
+        ):
+            current.setdefault(job.employee_id, job)
+
+        to_create, to_update = [], []
+        for staff_no, (row_no, row) in by_staff.items():
+            employee_id = ids[staff_no]
+            sup_no = row["supervisor_staff_no"]
+            supervisor_id = ids.get(sup_no) if sup_no else None
+
+            job = current.get(employee_id)
+            if job is None:
+                job = Employment(employee_id=employee_id, status=Employment.Status.ACTIVE)
+                to_create.append(job)
+            else:
+                to_update.append(job)
+            for f in EMPLOYMENT_FIELDS:
+                setattr(job, f, row[f])
+            job.supervisor_id = supervisor_id
+            job.updated_at = now
+
+            if sup_no:
+                self._supervisor_rows[employee_id] = (row_no, staff_no, sup_no)
+                if supervisor_id is None:
+                    self._pending_supervisors.append((job, sup_no, row_no, staff_no))
+
+        Employment.objects.bulk_create(to_create, batch_size=500)
+        Employment.objects.bulk_update(to_update, EMPLOYMENT_FIELDS + ["supervisor_id", "updated_at"], batch_size=500)
+        self.result.employments_created += len(to_create)
+        self.result.employments_updated += len(to_update)
+
+        search.index_employees(ids[s] for s in by_staff)
+        approvers.invalidate_on_change()  # bulk writes send no signals
+
+    def _resolve_pending_supervisors(self):
+        if not self._pending_supervisors:
+            return
+        wanted = {sup_no for _, sup_no, _, _ in self._pending_supervisors}
+        ids = dict(Employee.objects.filter(staff_no__in=wanted).values_list("staff_no", "id"))
+        resolved = []
+        for job, sup_no, row_no, staff_no in self._pending_supervisors:
+            if sup_no in ids:
+                job.supervisor_id = ids[sup_no]
+                resolved.append(job)
+            else:
+                self.result.errors.append(
+                    RowError(row_no, staff_no, f"Unknown supervisor staff_no '{sup_no}' (imported without supervisor)")
+                )
+        Employment.objects.bulk_update(resolved, ["supervisor_id"], batch_size=500)
+        self._pending_supervisors = []
+
+    def _break_reporting_cycles(self) -> dict:
+        """
+        Drop the supervisor of the last imported row on every loop in the
+        reporting tree (reported as a row error); returns the parents map
+        for the closure rebuild.
+        """
+        parents = reporting_parents()
+        cycles = closure.find_cycles(parents)
+        for cycle in cycles:
+            employee_id = max(cycle, key=lambda e: self._supervisor_rows.get(e, (0,))[0])
+            Employment.objects.filter(
+                employee_id=employee_id, status=Employment.Status.ACTIVE, supervisor_id=parents[employee_id],
+            ).update(supervisor_id=None)
+            parents[employee_id] = None
+            row_no, staff_no, sup_no = self._supervisor_rows.get(employee_id, (0, "", ""))
+            self.result.errors.append(
+                RowError(row_no, staff_no, f"Supervisor '{sup_no}' reports to this employee (imported without supervisor)")
+            )
+        if cycles:
+            approvers.invalidate_on_change()
+        self._supervisor_rows = {}
+        return parents
+
+
+def write_error_report(errors, fh) -> None:
+    writer = csv.writer(fh)
+    writer.writerow(["row", "staff_no", "error"])
+    for e in errors:
+        writer.writerow([e.row, e.staff_no, e.message])
@@ -0,0 +1,114 @@
+import contextlib
+import csv
+import os
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.employees.importer import COLUMNS, EmployeeImporter, read_rows, write_error_report
+
+
+def write_synthetic_csv(path: str, rows: int, seed: int = 42) -> None:
+    """Benchmark input: `rows` employees over a handful of regions/departments."""
+    rnd = random.Random(seed)
+    regions = [f"Bench Region {i}" for i in range(10)]
+    departments = [f"Bench Department {i}" for i in range(40)]
+    positions = [f"Bench Position {i}" for i in range(60)]
+    grades = [f"Bench Grade {i}" for i in range(12)]
+    first = ["Kwame", "Ama", "Kofi", "Akosua", "Yaw", "Abena", "Kojo", "Efua", "Kwesi", "Adwoa"]
+    last = ["Mensah", "Owusu", "Boateng", "Asante", "Osei", "Addo", "Agyeman", "Darko", "Appiah", "Ofori"]
+
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(COLUMNS)
+        for i in range(rows):
+            staff_no = f"BENCH{i:07d}"
+            # Supervisors point backwards (and sometimes forwards, to exercise the deferred pass).
+            sup = rnd.randrange(0, i + 50) if i else None
+            writer.writerow([
+                staff_no, rnd.choice(first), rnd.choice(last), "", f"{staff_no.lower()}@example.org", "", "ACTIVE",
+                "PERMANENT", rnd.choice(["JUNIOR", "SENIOR", "SUPERVISOR"]),
+                (date(2000, 1, 1) + timedelta(days=rnd.randrange(9000))).isoformat(), "",
+                rnd.choice(regions), rnd.choice(departments), rnd.choice(positions), rnd.choice(grades),
+                f"BENCH{sup:07d}" if sup is not None and sup < rows and sup != i else "",
+            ])
+
+
+class Command(BaseCommand):
+    help = "Bulk import employees and their current employment from CSV or XLSX"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", nargs="?", help="CSV or XLSX file (header row required)")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+        parser.add_argument(
+            "--create-missing", action="store_true",
+            help="Create unknown regions, departments (as roots), positions and grades instead of rejecting rows",
+        )
+        parser.add_argument("--errors", help="Write the per-row error report to this CSV file")
+        parser.add_argument("--dry-run", action="store_true", help="Validate and import, then roll back")
+        parser.add_argument(
+            "--benchmark", type=int, metavar="ROWS",
+            help="Import a generated file of ROWS employees, report throughput and roll back",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        benchmark = options["benchmark"]
+        if not path and not benchmark:
+            raise CommandError("Give a file to import or --benchmark ROWS.")
+
+        tmp_path = None
+        if benchmark:
+            fd, tmp_path = tempfile.mkstemp(suffix=".csv")
+            os.close(fd)
+            write_synthetic_csv(tmp_path, benchmark)
+            path = tmp_path
+            options["create_missing"] = True
+        elif not os.path.exists(path):
+            raise CommandError(f"No such file: {path}")
+
+        def progress(result):
+            self.stdout.write(f"  {result.rows} rows read, {result.rejected} rejected")
+
+        rollback = options["dry_run"] or bool(benchmark)
+        # A real import commits chunk by chunk; only roll-back runs need one outer transaction.
+        outer = transaction.atomic() if rollback else contextlib.nullcontext()
+
+        started = time.perf_counter()
+        try:
+            with outer:
+                importer = EmployeeImporter(
+                    chunk_size=options["chunk_size"], create_missing=options["create_missing"]
+                )
+                with open(path, "rb") as fh:
+                    try:
+                        result = importer.run(read_rows(fh, path), progress=progress)
+                    except RuntimeError as e:
+                        raise CommandError(str(e))
+                if rollback:
+                    transaction.set_rollback(True)
+        finally:
+            if tmp_path:
+                os.unlink(tmp_path)
+        elapsed = time.perf_counter() - started
+
+        if options["errors"]:
+            with open(options["errors"], "w", newline="", encoding="utf-8") as fh:
+                write_error_report(result.errors, fh)
+        else:
+            for e in result.errors[:20]:
+                self.stdout.write(self.style.WARNING(f"  row {e.row} ({e.staff_no or '-'}): {e.message}"))
+            if len(result.errors) > 20:
+                self.stdout.write(self.style.WARNING(f"  … {len(result.errors) - 20} more (use --errors FILE)"))
+
+        rate = result.rows / elapsed if elapsed else 0
+        rolled_back = " (rolled back)" if rollback else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {result.imported}/{result.rows} rows imported{rolled_back}: "
+            f"{result.employments_created} employments created, {result.employments_updated} updated, "
+            f"{result.rejected} rejected in {elapsed:.2f}s ({rate:,.0f} rows/s)"
+        ))
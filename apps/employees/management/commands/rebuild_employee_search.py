@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.employees import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the employee directory search index (FTS5)"
+
+    def handle(self, *args, **options):
+        if not search.is_available():
+            self.stdout.write("Search index requires SQLite FTS5; nothing to do.")
+            return
+        count = search.rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f"✅ Indexed {count} employees"))
@@ -0,0 +1,17 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.employees.services import rebuild_reporting_lines
+
+
+class Command(BaseCommand):
+    help = "Rebuild the reporting-line closure table from current employments"
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        with transaction.atomic():
+            rows = rebuild_reporting_lines()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"✅ {rows} reporting-line rows in {elapsed:.2f}s"))
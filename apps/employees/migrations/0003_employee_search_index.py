@@ -0,0 +1,62 @@
+# Generated by Django 6.0.2 on 2026-10-19 11:20
+
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    from apps.employees import search
+
+    schema_editor.execute(search.CREATE_SQL)
+
+    # Populate from existing data using the historical models.
+    Employee = apps.get_model("employees", "Employee")
+    Employment = apps.get_model("employees", "Employment")
+    current = {}
+    for job in (
+        Employment.objects.filter(status="ACTIVE")
+        .select_related("region", "department", "position")
+        .order_by("employee_id", "-created_at")
+    ):
+        current.setdefault(job.employee_id, job)
+
+    rows = []
+    for e in Employee.objects.all().iterator(chunk_size=2000):
+        job = current.get(e.id)
+        rows.append((
+            e.id.hex,
+            job.region_id.hex if job else "",
+            job.department_id.hex if job else "",
+            e.staff_no,
+            " ".join(p for p in (e.first_name, e.other_names, e.last_name) if p),
+            e.email,
+            job.region.name if job else "",
+            job.department.name if job else "",
+            job.position.title if job else "",
+        ))
+    with schema_editor.connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {search.TABLE} ({', '.join(search._COLUMNS)}) VALUES ({', '.join(['%s'] * len(search._COLUMNS))})",
+            rows,
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    from apps.employees import search
+
+    schema_editor.execute(search.DROP_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0002_employment_staff_category_and_more'),
+        ('org', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
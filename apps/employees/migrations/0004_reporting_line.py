@@ -0,0 +1,49 @@
+# Generated by Django 6.0.2 on 2026-10-19 11:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_reporting_lines(apps, schema_editor):
+    from apps.common import closure
+
+    Employee = apps.get_model("employees", "Employee")
+    Employment = apps.get_model("employees", "Employment")
+    ReportingLine = apps.get_model("employees", "ReportingLine")
+
+    parents = dict.fromkeys(Employee.objects.values_list("id", flat=True))
+    seen = set()
+    rows = (
+        Employment.objects.filter(status="ACTIVE")
+        .order_by("employee_id", "-created_at")
+        .values_list("employee_id", "supervisor_id")
+    )
+    for employee_id, supervisor_id in rows:
+        if employee_id not in seen:
+            seen.add(employee_id)
+            parents[employee_id] = supervisor_id
+    closure.rebuild(ReportingLine, parents)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0003_employee_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportingLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveIntegerField()),
+                ('ancestor', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to='employees.employee')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to='employees.employee')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['descendant', 'depth'], name='employees_r_descend_6fe836_idx')],
+                'unique_together': {('ancestor', 'descendant')},
+            },
+        ),
+        migrations.RunPython(build_reporting_lines, migrations.RunPython.noop),
+    ]
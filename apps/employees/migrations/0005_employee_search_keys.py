@@ -0,0 +1,34 @@
+# Generated by Django 6.0.2 on 2026-10-19 15:05
+
+from django.db import migrations
+
+
+def create_search_keys(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    from apps.employees import search
+
+    schema_editor.execute(search.CREATE_KEYS_SQL)
+    # Adopt the rowids the existing index rows already have.
+    schema_editor.execute(
+        f"INSERT INTO {search.KEYS_TABLE} (id, employee_id) SELECT rowid, employee_id FROM {search.TABLE}"
+    )
+
+
+def drop_search_keys(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    from apps.employees import search
+
+    schema_editor.execute(search.DROP_KEYS_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0004_reporting_line'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_keys, drop_search_keys),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-19 12:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0005_employee_search_keys'),
+        ('org', '0002_department_closure'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='employment',
+            index=models.Index(fields=['updated_at', 'id'], name='employees_e_updated_b55f62_idx'),
+        ),
+    ]
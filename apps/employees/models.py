@@ -1,6 +1,8 @@
 from django.db import models
 from django.conf import settings
+from django.core.exceptions import ValidationError
 
+from apps.common import closure
 from apps.common.models import UUIDModel, TimeStampedModel
 from apps.org.models import Region, Department, Position, Grade
 
@@ -43,6 +45,15 @@ class Employee(UUIDModel, TimeStampedModel):
         return f"{self.staff_no} - {self.first_name} {self.last_name}"
 
 
+class EmploymentQuerySet(models.QuerySet):
+    def active(self):
+        return self.filter(status=Employment.Status.ACTIVE)
+
+    def in_department_subtree(self, department_id):
+        """Employments in the department or any of its sub-units (one join)."""
+        return self.filter(department__ancestor_links__ancestor_id=department_id)
+
+
 class Employment(UUIDModel, TimeStampedModel):
     """
     Represents a specific employment record (position, grade, region etc.)
@@ -106,12 +117,42 @@ class Employment(UUIDModel, TimeStampedModel):
         default=Status.ACTIVE
     )
 
+    objects = EmploymentQuerySet.as_manager()
+
     class Meta:
         indexes = [
             models.Index(fields=["region", "department"]),
             models.Index(fields=["employee", "status"]),
             models.Index(fields=["staff_category"]),
+            models.Index(fields=["updated_at", "id"]),  # BI export
         ]
 
+    def clean(self):
+        # The reporting tree must stay a tree (checked against ReportingLine, one query).
+        if self.status != self.Status.ACTIVE or not self.supervisor_id or not self.employee_id:
+            return
+        if self.supervisor_id == self.employee_id or closure.is_in_subtree(
+            ReportingLine, self.employee_id, self.supervisor_id
+        ):
+            raise ValidationError({"supervisor": "The supervisor cannot be this employee or someone reporting to them."})
+
     def __str__(self):
         return f"{self.employee.staff_no} - {self.position.title} ({self.staff_category})"
+
+
+class ReportingLine(models.Model):
+    """
+    Closure table of the reporting tree (supervisor of the current ACTIVE
+    employment): every (ancestor, descendant) pair with its distance,
+    including a depth-0 row per employee. Maintained by apps.employees.signals.
+    """
+    # Indexed through unique_together (ancestor first)
+    ancestor = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name="descendant_links", db_index=False)
+    descendant = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name="ancestor_links")
+    depth = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ("ancestor", "descendant")
+        indexes = [
+            models.Index(fields=["descendant", "depth"]),
+        ]
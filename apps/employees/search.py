@@ -0,0 +1,274 @@
+"""
+Employee directory search index (SQLite FTS5, trigram tokenizer).
+
+One row per employee, denormalised from the employee and their current
+(ACTIVE, newest) employment. Rows are rewritten by signals whenever an
+Employee, Employment, Region, Department or Position changes, so search
+never touches the base tables.
+
+Matching:
+- every term of 3+ characters is matched as a substring (covers prefixes)
+- when that finds too little, a fuzzy pass ORs the terms' trigrams and keeps
+  candidates with enough trigram overlap (typo tolerance)
+- 1-2 character terms fall back to a word-prefix LIKE
+Results are ranked with bm25().
+
+FTS5 cannot index its UNINDEXED columns, so rows are addressed by rowid
+through a small employee_id -> rowid key table; rewriting one employee is
+then a primary-key lookup rather than a scan of the whole index.
+
+On databases other than SQLite the public functions degrade to an ORM
+icontains search so callers do not need to care.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from apps.employees.models import Employee, Employment
+
+TABLE = "employees_search"
+
+CREATE_SQL = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5(
+    employee_id UNINDEXED,
+    region_id UNINDEXED,
+    department_id UNINDEXED,
+    staff_no,
+    full_name,
+    email,
+    region,
+    department,
+    position,
+    tokenize = 'trigram'
+)
+"""
+DROP_SQL = f"DROP TABLE IF EXISTS {TABLE}"
+
+KEYS_TABLE = "employees_search_keys"
+CREATE_KEYS_SQL = f"""
+CREATE TABLE IF NOT EXISTS {KEYS_TABLE} (
+    id INTEGER PRIMARY KEY,
+    employee_id TEXT NOT NULL UNIQUE
+)
+"""
+DROP_KEYS_SQL = f"DROP TABLE IF EXISTS {KEYS_TABLE}"
+
+# bm25 column weights: staff_no and name matter most
+_RANK = f"bm25({TABLE}, 0, 0, 0, 8.0, 10.0, 4.0, 1.0, 1.0, 1.0)"
+_COLUMNS = ("employee_id", "region_id", "department_id", "staff_no", "full_name", "email", "region", "department", "position")
+
+FUZZY_MIN_SIMILARITY = 0.3
+_TERM_RE = re.compile(r"[^\W_]+")
+
+
+def is_available() -> bool:
+    return connection.vendor == "sqlite"
+
+
+def _key(value) -> str:
+    # UUIDs are stored the way Django stores them on SQLite (hex, no dashes)
+    return value.hex if hasattr(value, "hex") else str(value).replace("-", "")
+
+
+# ------------------------------------------------------------
+# Index maintenance
+# ------------------------------------------------------------
+
+def _rows_for(employee_ids):
+    current = {}
+    employments = (
+        Employment.objects
+        .filter(employee_id__in=employee_ids, status=Employment.Status.ACTIVE)
+        .order_by("employee_id", "-created_at")
+        .values_list("employee_id", "region_id", "department_id", "region__name", "department__name", "position__title")
+    )
+    for job in employments:
+        current.setdefault(job[0], job)
+
+    employees = Employee.objects.filter(id__in=employee_ids).values_list(
+        "id", "staff_no", "first_name", "other_names", "last_name", "email"
+    )
+    for employee_id, staff_no, first_name, other_names, last_name, email in employees:
+        job = current.get(employee_id)
+        yield (
+            _key(employee_id),
+            _key(job[1]) if job else "",
+            _key(job[2]) if job else "",
+            staff_no,
+            " ".join(p for p in (first_name, other_names, last_name) if p),
+            email,
+            job[3] if job else "",
+            job[4] if job else "",
+            job[5] if job else "",
+        )
+
+
+def _rowids(cursor, keys, create: bool = False) -> dict:
+    """{employee key: FTS rowid}, allocating rowids for new keys when asked."""
+    if create:
+        cursor.executemany(f"INSERT OR IGNORE INTO {KEYS_TABLE} (employee_id) VALUES (%s)", [(k,) for k in keys])
+    rowids = {}
+    for start in range(0, len(keys), 500):
+        batch = keys[start:start + 500]
+        cursor.execute(
+            f"SELECT employee_id, id FROM {KEYS_TABLE} WHERE employee_id IN ({', '.join(['%s'] * len(batch))})",
+            batch,
+        )
+        rowids.update(cursor.fetchall())
+    return rowids
+
+
+def index_employees(employee_ids) -> None:
+    """(Re)write the index rows for the given employees."""
+    if not is_available():
+        return
+    employee_ids = list(employee_ids)
+    if not employee_ids:
+        return
+    rows = list(_rows_for(employee_ids))
+    with connection.cursor() as cursor:
+        rowids = _rowids(cursor, [_key(i) for i in employee_ids], create=True)
+        cursor.executemany(f"DELETE FROM {TABLE} WHERE rowid = %s", [(r,) for r in rowids.values()])
+        cursor.executemany(
+            f"INSERT INTO {TABLE} (rowid, {', '.join(_COLUMNS)}) VALUES ({', '.join(['%s'] * (len(_COLUMNS) + 1))})",
+            [(rowids[row[0]],) + row for row in rows],
+        )
+
+
+def remove_employees(employee_ids) -> None:
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        rowids = _rowids(cursor, [_key(i) for i in employee_ids])
+        cursor.executemany(f"DELETE FROM {TABLE} WHERE rowid = %s", [(r,) for r in rowids.values()])
+        cursor.executemany(f"DELETE FROM {KEYS_TABLE} WHERE id = %s", [(r,) for r in rowids.values()])
+
+
+def rebuild_index(chunk_size: int = 2000) -> int:
+    if not is_available():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE}")
+        cursor.execute(f"DELETE FROM {KEYS_TABLE}")
+    ids = list(Employee.objects.order_by("id").values_list("id", flat=True))
+    for start in range(0, len(ids), chunk_size):
+        index_employees(ids[start:start + chunk_size])
+    return len(ids)
+
+
+# ------------------------------------------------------------
+# Querying
+# ------------------------------------------------------------
+
+def _trigrams(text: str) -> set:
+    text = text.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _quote(term: str) -> str:
+    return '"' + term.replace('"', '""') + '"'
+
+
+def _similarity(terms, row) -> float:
+    """Weakest per-term trigram overlap against the searchable columns."""
+    haystack = " ".join(str(v) for v in row[3:6]).lower()
+    hay_grams = _trigrams(haystack)
+    scores = []
+    for term in terms:
+        grams = _trigrams(term)
+        if not grams:
+            continue
+        scores.append(len(grams & hay_grams) / len(grams))
+    return min(scores) if scores else 0.0
+
+
+def _fetch(where: str, params: list, region_id, department_ids, limit: int):
+    sql = f"SELECT {', '.join(_COLUMNS)}, {_RANK} AS match_rank FROM {TABLE} WHERE {where}"
+    if region_id:
+        sql += " AND region_id = %s"
+        params.append(_key(region_id))
+    if department_ids:
+        sql += f" AND department_id IN ({', '.join(['%s'] * len(department_ids))})"
+        params += [_key(d) for d in department_ids]
+    sql += " ORDER BY match_rank LIMIT %s"
+    params.append(limit)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def search(query: str, region_id=None, department_ids=None, limit: int = 50):
+    """
+    Ranked directory hits as dicts (index columns + "score").
+    department_ids restricts to those departments (e.g. a whole subtree).
+    """
+    department_ids = list(department_ids or [])
+    terms = _TERM_RE.findall(query or "")
+    if not terms:
+        return []
+
+    if not is_available():
+        return _orm_search(terms, region_id, department_ids, limit)
+
+    long_terms = [t for t in terms if len(t) >= 3]
+    short_terms = [t for t in terms if len(t) < 3]
+
+    short_sql, short_params = [], []
+    for t in short_terms:
+        short_sql.append("(staff_no LIKE %s OR (' ' || full_name) LIKE %s)")
+        short_params += [f"{t}%", f"% {t}%"]
+
+    where, params = [], []
+    if long_terms:
+        where.append(f"{TABLE} MATCH %s")
+        params.append(" AND ".join(_quote(t) for t in long_terms))
+    rows = _fetch(" AND ".join(where + short_sql), params + short_params, region_id, department_ids, limit)
+    hits = [(row, 1.0) for row in rows]
+
+    if len(hits) < limit and long_terms:
+        # Typo tolerance: any shared trigram is a candidate, overlap decides.
+        seen = {row[0] for row, _ in hits}
+        grams = sorted(set().union(*(_trigrams(t) for t in long_terms)))
+        fuzzy_where = [f"{TABLE} MATCH %s"] + short_sql
+        fuzzy_params = [" OR ".join(_quote(g) for g in grams)] + short_params
+        fuzzy = []
+        for row in _fetch(" AND ".join(fuzzy_where), fuzzy_params, region_id, department_ids, limit * 4):
+            if row[0] in seen:
+                continue
+            score = _similarity(long_terms, row)
+            if score >= FUZZY_MIN_SIMILARITY:
+                fuzzy.append((row, score))
+        fuzzy.sort(key=lambda hit: -hit[1])
+        hits += fuzzy[: limit - len(hits)]
+
+    return [
+        {**dict(zip(_COLUMNS, row[: len(_COLUMNS)])), "score": round(score, 3)}
+        for row, score in hits
+    ]
+
+
+def search_employee_ids(query: str, region_id=None, department_ids=None, limit: int = 50):
+    return [
+        hit["employee_id"] for hit in search(query, region_id=region_id, department_ids=department_ids, limit=limit)
+    ]
+
+
+def _orm_search(terms, region_id, department_ids, limit):
+    qs = Employee.objects.all()
+    for t in terms:
+        qs = qs.filter(
+            Q(staff_no__icontains=t) | Q(first_name__icontains=t) | Q(last_name__icontains=t) | Q(email__icontains=t)
+        )
+    if region_id:
+        qs = qs.filter(employments__status="ACTIVE", employments__region_id=region_id)
+    if department_ids:
+        qs = qs.filter(employments__status="ACTIVE", employments__department_id__in=department_ids)
+    hits = []
+    for e in qs.distinct()[:limit]:
+        hits.append({
+            "employee_id": _key(e.id), "region_id": "", "department_id": "",
+            "staff_no": e.staff_no, "full_name": f"{e.first_name} {e.last_name}", "email": e.email,
+            "region": "", "department": "", "position": "", "score": 1.0,
+        })
+    return hits
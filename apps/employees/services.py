@@ -0,0 +1,70 @@
+from apps.common import closure
+from apps.employees.models import Employee, Employment, ReportingLine
+
+
+def employee_region_ids(employee_id) -> list:
+    """Regions of all of an employee's employments (what region scoping matches on)."""
+    return list(
+        Employment.objects.filter(employee_id=employee_id).values_list("region_id", flat=True).distinct()
+    )
+
+
+# ------------------------------------------------------------
+# Reporting lines (closure table over Employment.supervisor)
+# ------------------------------------------------------------
+
+def current_supervisor_id(employee_id):
+    """Supervisor on the employee's newest ACTIVE employment (or None)."""
+    return (
+        Employment.objects
+        .filter(employee_id=employee_id, status=Employment.Status.ACTIVE)
+        .order_by("-created_at")
+        .values_list("supervisor_id", flat=True)
+        .first()
+    )
+
+
+def reporting_parents() -> dict:
+    """{employee_id: supervisor_id} for every employee, from current employments."""
+    parents = dict.fromkeys(Employee.objects.values_list("id", flat=True))
+    rows = (
+        Employment.objects
+        .filter(status=Employment.Status.ACTIVE)
+        .order_by("employee_id", "-created_at")
+        .values_list("employee_id", "supervisor_id")
+    )
+    seen = set()
+    for employee_id, supervisor_id in rows.iterator(chunk_size=5000):
+        if employee_id not in seen:
+            seen.add(employee_id)
+            parents[employee_id] = supervisor_id
+    return parents
+
+
+def sync_reporting_line(employee_id) -> None:
+    """Re-hang an employee (and everyone below them) under their current supervisor."""
+    supervisor_id = current_supervisor_id(employee_id)
+    has_node = ReportingLine.objects.filter(ancestor_id=employee_id, descendant_id=employee_id).exists()
+    if not has_node or closure.current_parent_id(ReportingLine, employee_id) != supervisor_id:
+        closure.move_subtree(ReportingLine, employee_id, supervisor_id)
+
+
+def rebuild_reporting_lines(parents: dict = None) -> int:
+    return closure.rebuild(ReportingLine, reporting_parents() if parents is None else parents)
+
+
+def reporting_subtree_ids(employee_id, include_self: bool = True):
+    """Subquery of everyone reporting to employee_id, directly or indirectly."""
+    qs = ReportingLine.objects.filter(ancestor_id=employee_id)
+    if not include_self:
+        qs = qs.filter(depth__gt=0)
+    return qs.values("descendant_id")
+
+
+def filter_by_reporting_line(qs, employee_id, field: str = "employee"):
+    """
+    Limit qs to rows whose `field` (an Employee FK path, "" for Employee
+    itself) is employee_id or someone in their reporting subtree.
+    """
+    path = f"{field}__ancestor_links__ancestor_id" if field else "ancestor_links__ancestor_id"
+    return qs.filter(**{path: employee_id})
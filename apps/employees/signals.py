@@ -0,0 +1,81 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from apps.common import closure
+from apps.employees import search
+from apps.employees.models import Employee, Employment, ReportingLine
+from apps.employees.services import sync_reporting_line
+from apps.org.models import Department, Position, Region
+
+
+# ------------------------------------------------------------
+# Directory search index
+# ------------------------------------------------------------
+
+@receiver(post_save, sender=Employee)
+def index_employee(sender, instance, **kwargs):
+    search.index_employees([instance.id])
+
+
+@receiver(post_delete, sender=Employee)
+def unindex_employee(sender, instance, **kwargs):
+    search.remove_employees([instance.id])
+
+
+@receiver(post_save, sender=Employment)
+@receiver(post_delete, sender=Employment)
+def index_employment(sender, instance, **kwargs):
+    # The employee itself may be mid-cascade delete; index_employees skips missing rows.
+    search.index_employees([instance.employee_id])
+
+
+def _reindex_employees_in(field: str, instance, created: bool):
+    if created:
+        return
+    ids = (
+        Employment.objects
+        .filter(**{field: instance.id, "status": Employment.Status.ACTIVE})
+        .values_list("employee_id", flat=True)
+        .distinct()
+    )
+    search.index_employees(list(ids))
+
+
+@receiver(post_save, sender=Region)
+def reindex_region(sender, instance, created, **kwargs):
+    _reindex_employees_in("region", instance, created)
+
+
+@receiver(post_save, sender=Department)
+def reindex_department(sender, instance, created, **kwargs):
+    _reindex_employees_in("department", instance, created)
+
+
+@receiver(post_save, sender=Position)
+def reindex_position(sender, instance, created, **kwargs):
+    _reindex_employees_in("position", instance, created)
+
+
+# ------------------------------------------------------------
+# Reporting-line closure table
+# ------------------------------------------------------------
+
+@receiver(post_save, sender=Employee)
+def add_reporting_node(sender, instance, created, **kwargs):
+    if created:
+        closure.insert_node(ReportingLine, instance.id)
+
+
+@receiver(pre_delete, sender=Employee)
+def detach_supervisees(sender, instance, **kwargs):
+    # Supervisees' employments are SET_NULL: they become roots.
+    closure.detach_children(ReportingLine, instance.id)
+
+
+@receiver(post_save, sender=Employment)
+@receiver(post_delete, sender=Employment)
+def sync_reporting(sender, instance, origin=None, **kwargs):
+    # Cascade from deleting the employee: their rows are going away anyway.
+    if isinstance(origin, Employee) or getattr(origin, "model", None) is Employee:
+        return
+    sync_reporting_line(instance.employee_id)
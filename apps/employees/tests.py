@@ -1,3 +1,331 @@
-from django.test import TestCase
+import importlib.util
+import io
+import unittest
+import uuid
+from datetime import date
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from apps.accounts.models import Role, UserRole
+from apps.common.budgets import APIBudgetMixin, Budget
+from apps.employees import search, services
+from apps.employees.admin import EmployeeAdmin
+from apps.employees.importer import EmployeeImporter, read_rows, write_error_report
+from apps.employees.models import Employee, Employment, ReportingLine
+from apps.org.models import Department, Grade, Position, Region
+
+
+class EmployeeAPIBudgetTests(APIBudgetMixin, TestCase):
+    """Query / latency budgets of the employee directory endpoints."""
+
+    budgets = {
+        "employee_list": Budget(queries=3, p95_ms=60),
+        "employee_detail": Budget(queries=2, p95_ms=40),
+        "employee_search": Budget(queries=4, p95_ms=60),
+    }
+
+
+def hire(staff_no, first_name, last_name, **employment) -> Employee:
+    """An employee with one ACTIVE employment; reference rows are created on demand."""
+    employee = Employee.objects.create(staff_no=staff_no, first_name=first_name, last_name=last_name)
+    employment.setdefault("region", Region.objects.get_or_create(name="Head Office")[0])
+    employment.setdefault("department", Department.objects.get_or_create(name="Administration", parent=None)[0])
+    employment.setdefault("grade", Grade.objects.get_or_create(name="Officer", defaults={"rank_order": 1})[0])
+    employment.setdefault("position", Position.objects.get_or_create(title="Officer")[0])
+    Employment.objects.create(
+        employee=employee, employment_type=Employment.EmploymentType.PERMANENT, start_date=date(2020, 1, 1),
+        **employment,
+    )
+    return employee
+
+
+class EmployeeSearchTests(TestCase):
+    """Directory search over the FTS index: ranking, fuzzy matching, filters and the admin cap."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.north = Region.objects.create(name="Northern")
+        cls.south = Region.objects.create(name="Southern")
+        cls.finance = Department.objects.create(name="Finance")
+        cls.audit = Department.objects.create(name="Audit")
+
+        cls.kwame = hire("GEA001", "Kwame", "Mensah", region=cls.north, department=cls.finance)
+        cls.kwame_asante = hire("GEA002", "Kwame", "Asante", region=cls.south, department=cls.audit)
+        cls.abena = hire("GEA003", "Abena", "Mensah-Bonsu", region=cls.south, department=cls.audit)
+        cls.ama = hire("GEA004", "Ama", "Finance", region=cls.south, department=cls.audit)
+
+    def ids(self, query, **kwargs):
+        return [uuid.UUID(i) for i in search.search_employee_ids(query, **kwargs)]
+
+    def test_substring_and_prefix_match(self):
+        self.assertCountEqual(self.ids("mensah"), [self.kwame.id, self.abena.id])
+        self.assertCountEqual(self.ids("mens"), [self.kwame.id, self.abena.id])
+        self.assertEqual(self.ids("kwame mensah"), [self.kwame.id])
+        # The exact staff number first; near numbers follow from the fuzzy pass
+        self.assertEqual(self.ids("gea003")[0], self.abena.id)
+
+    def test_name_match_ranks_above_department_match(self):
+        # Ama Finance (name) before Kwame Mensah (department "Finance")
+        self.assertEqual(self.ids("finance"), [self.ama.id, self.kwame.id])
+
+    def test_short_terms_match_word_prefixes(self):
+        self.assertCountEqual(self.ids("kw"), [self.kwame.id, self.kwame_asante.id])
+        self.assertEqual(self.ids("kw as"), [self.kwame_asante.id])
+
+    def test_typos_fall_back_to_trigram_overlap(self):
+        hits = search.search("asanti")
+        self.assertEqual([uuid.UUID(h["employee_id"]) for h in hits], [self.kwame_asante.id])
+        self.assertLess(hits[0]["score"], 1.0)
+        self.assertEqual(search.search("zzqxv"), [])
+
+    def test_region_and_department_filters(self):
+        self.assertEqual(self.ids("mensah", region_id=self.north.id), [self.kwame.id])
+        self.assertEqual(self.ids("mensah", department_ids=[self.audit.id]), [self.abena.id])
+        self.assertEqual(self.ids("kwame", region_id=self.north.id, department_ids=[self.audit.id]), [])
+
+    def test_regional_search_is_not_crowded_out_by_other_regions(self):
+        user = get_user_model().objects.create_user("north_manager")
+        UserRole.objects.create(user=user, role=Role.objects.get_or_create(code="REGIONAL_MANAGER", defaults={"name": "RM"})[0])
+        Employee.objects.filter(id=self.kwame.id).update(user=user)
+        client = APIClient()
+        client.force_authenticate(user)
+
+        # "finance" ranks Ama (Southern, name) above Kwame (Northern, department)
+        self.assertEqual(self.ids("finance", limit=1), [self.ama.id])
+        for scope in ("region", "reporting_line"):
+            with self.subTest(scope=scope), self.settings(SUPERVISOR_SCOPE=scope):
+                response = client.get("/api/employees/search/", {"q": "finance", "limit": 1})
+                self.assertEqual([r["id"] for r in response.json()["results"]], [str(self.kwame.id)])
+        response = client.get("/api/employees/search/", {"q": "finance", "region": self.south.id})
+        self.assertEqual(response.json()["count"], 0)
+
+    def test_index_follows_employment_changes(self):
+        Employment.objects.filter(employee=self.abena).update(region=self.north)  # bypasses signals
+        self.assertEqual(self.ids("mensah", region_id=self.north.id), [self.kwame.id])
+        employment = self.abena.employments.get()
+        employment.save()
+        self.assertCountEqual(self.ids("mensah", region_id=self.north.id), [self.kwame.id, self.abena.id])
+
+    def test_admin_search_says_when_results_are_capped(self):
+        admin_user = get_user_model().objects.create_superuser("admin", "admin@example.com", "pw")
+        self.client.force_login(admin_user)
+        url = reverse("admin:employees_employee_changelist")
+
+        with mock.patch.object(EmployeeAdmin, "search_limit", 1):
+            response = self.client.get(url, {"q": "mensah"})
+        self.assertEqual(response.context["cl"].result_count, 1)
+        self.assertIn("Showing the 1 best matches", " ".join(str(m) for m in response.context["messages"]))
+
+        response = self.client.get(url, {"q": "mensah"})
+        self.assertEqual(response.context["cl"].result_count, 2)
+        self.assertEqual(list(response.context["messages"]), [])
+
+
+class ReportingLineTests(TestCase):
+    """The ReportingLine closure follows supervisor changes and rejects loops."""
+
+    @classmethod
+    def setUpTestData(cls):
+        # ceo <- director <- officer,  ceo <- manager
+        cls.ceo = hire("RL001", "Efua", "Owusu")
+        cls.director = hire("RL002", "Yaw", "Darko", supervisor=cls.ceo)
+        cls.officer = hire("RL003", "Akua", "Boateng", supervisor=cls.director)
+        cls.manager = hire("RL004", "Kojo", "Annan", supervisor=cls.ceo)
+
+    def subtree(self, employee, include_self=True):
+        return set(services.reporting_subtree_ids(employee.id, include_self).values_list("descendant_id", flat=True))
+
+    def depth(self, ancestor, descendant):
+        return ReportingLine.objects.get(ancestor=ancestor, descendant=descendant).depth
+
+    def test_tree_is_built_from_supervisors(self):
+        self.assertEqual(self.subtree(self.ceo), {self.ceo.id, self.director.id, self.officer.id, self.manager.id})
+        self.assertEqual(self.subtree(self.director, include_self=False), {self.officer.id})
+        self.assertEqual(self.depth(self.ceo, self.officer), 2)
+
+    def test_changing_supervisor_moves_the_subtree(self):
+        employment = self.director.employments.get()
+        employment.supervisor = self.manager
+        employment.save()
+
+        self.assertEqual(self.subtree(self.manager), {self.manager.id, self.director.id, self.officer.id})
+        self.assertEqual(self.depth(self.ceo, self.officer), 3)
+        self.assertEqual(ReportingLine.objects.count(), services.rebuild_reporting_lines())
+
+    def test_ending_the_employment_detaches_the_subtree(self):
+        self.director.employments.update(status=Employment.Status.ENDED)
+        services.sync_reporting_line(self.director.id)
+        self.assertEqual(self.subtree(self.ceo), {self.ceo.id, self.manager.id})
+        self.assertEqual(self.subtree(self.director), {self.director.id, self.officer.id})
+
+    def test_deleting_a_supervisor_turns_supervisees_into_roots(self):
+        self.director.delete()
+        self.assertEqual(self.subtree(self.ceo), {self.ceo.id, self.manager.id})
+        self.assertFalse(ReportingLine.objects.filter(descendant=self.officer, depth__gt=0).exists())
+
+    def test_clean_rejects_loops(self):
+        employment = self.ceo.employments.get()
+        for supervisor in (self.officer, self.ceo):
+            employment.supervisor = supervisor
+            with self.assertRaises(ValidationError) as raised:
+                employment.full_clean()
+            self.assertIn("supervisor", raised.exception.message_dict)
+        employment.supervisor = hire("RL005", "Esi", "Quaye")
+        employment.full_clean()
+
+    def test_admin_shows_a_loop_as_a_form_error(self):
+        admin_user = get_user_model().objects.create_superuser("admin", "admin@example.com", "pw")
+        self.client.force_login(admin_user)
+        employment = self.ceo.employments.get()
+        data = {
+            "employee": self.ceo.id, "employment_type": employment.employment_type,
+            "staff_category": employment.staff_category, "start_date": "2020-01-01", "end_date": "",
+            "grade": employment.grade_id, "position": employment.position_id, "region": employment.region_id,
+            "department": employment.department_id, "supervisor": self.officer.id, "status": employment.status,
+        }
+        response = self.client.post(reverse("admin:employees_employment_change", args=[employment.id]), data)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("supervisor", response.context["adminform"].form.errors)
+        employment.refresh_from_db()
+        self.assertIsNone(employment.supervisor_id)
+
+    def test_import_drops_a_supervisor_that_closes_a_loop(self):
+        header = "staff_no,first_name,last_name,employment_type,start_date,region,department,position,grade,supervisor_staff_no\n"
+        rows = (
+            "RL001,Efua,Owusu,PERMANENT,2020-01-01,Head Office,Administration,Officer,Officer,RL003\n"
+        )
+        result = EmployeeImporter().run(read_rows(io.StringIO(header + rows)))
+
+        self.assertEqual([(e.row, e.staff_no) for e in result.errors], [(2, "RL001")])
+        self.assertIn("reports to this employee", result.errors[0].message)
+        self.assertIsNone(self.ceo.employments.get().supervisor_id)
+        self.assertEqual(self.subtree(self.ceo), {self.ceo.id, self.director.id, self.officer.id, self.manager.id})
+
+    @override_settings(SUPERVISOR_SCOPE="reporting_line")
+    def test_reporting_line_scope_limits_supervisors_to_their_subtree(self):
+        user = get_user_model().objects.create_user(username="director", password="pw")
+        Employee.objects.filter(id=self.director.id).update(user=user)
+        UserRole.objects.create(user=user, role=Role.objects.get_or_create(code="DIRECTOR_ADMIN", defaults={"name": "Director"})[0])
+        client = APIClient()
+        client.force_authenticate(user)
+
+        response = client.get("/api/employees/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({row["staff_no"] for row in response.data["results"]}, {"RL002", "RL003"})
+        self.assertEqual(client.get(f"/api/employees/{self.manager.id}/").status_code, 404)
+
+
+class EmployeeImportTests(TestCase):
+    """Bulk import: upserts, per-row errors, supervisor resolution and the readers."""
+
+    HEADER = "staff_no,first_name,last_name,email,employment_type,start_date,end_date,region,department,position,grade,supervisor_staff_no\n"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.region = Region.objects.create(name="Head Office")
+        Region.objects.create(name="Ashanti")
+        cls.department = Department.objects.create(name="Administration")
+        Department.objects.create(name="Finance")
+        Position.objects.create(title="Officer")
+        Grade.objects.create(name="Officer", rank_order=1)
+
+    def row(self, staff_no, supervisor="", region="Head Office", **values):
+        values = {
+            "first_name": "Ama", "last_name": "Owusu", "email": "", "employment_type": "PERMANENT",
+            "start_date": "2020-01-01", "end_date": "", "department": "Administration", **values,
+        }
+        return ",".join([
+            staff_no, values["first_name"], values["last_name"], values["email"], values["employment_type"],
+            values["start_date"], values["end_date"], region, values["department"], "Officer", "Officer", supervisor,
+        ]) + "\n"
+
+    def run_import(self, *rows, **kwargs):
+        return EmployeeImporter(**kwargs).run(read_rows(io.StringIO(self.HEADER + "".join(rows))))
+
+    def test_reimport_updates_in_place(self):
+        result = self.run_import(self.row("IM001"), self.row("IM002"))
+        self.assertEqual((result.imported, result.employments_created, result.errors), (2, 2, []))
+
+        result = self.run_import(self.row("IM001", last_name="Mensah", department="Finance"))
+        self.assertEqual((result.employments_created, result.employments_updated), (0, 1))
+        employee = Employee.objects.get(staff_no="IM001")
+        self.assertEqual(employee.last_name, "Mensah")
+        self.assertEqual(employee.employments.get().department.name, "Finance")
+        self.assertEqual(search.search_employee_ids("mensah"), [employee.id.hex])
+
+    def test_rejected_rows_are_reported(self):
+        result = self.run_import(
+            self.row("IM001"),
+            self.row("IM002", first_name=""),
+            self.row("IM003", start_date="31.01.2020"),
+            self.row("IM004", region="Volta"),
+            self.row("IM005", email="not-an-email"),
+            self.row("IM006", end_date="2019-01-01"),
+            self.row("IM007", employment_type="INTERN"),
+        )
+        self.assertEqual((result.rows, result.imported, result.rejected), (7, 1, 6))
+        self.assertEqual(Employee.objects.filter(staff_no__startswith="IM").count(), 1)
+
+        report = io.StringIO()
+        write_error_report(result.errors, report)
+        lines = report.getvalue().splitlines()
+        self.assertEqual(lines[0], "row,staff_no,error")
+        self.assertEqual([line.split(",")[:2] for line in lines[1:]], [[str(n), f"IM00{n - 1}"] for n in range(3, 9)])
+        self.assertIn("Missing first_name", lines[1])
+        self.assertIn("Unknown region 'Volta'", lines[3])
+
+    def test_supervisors_resolve_within_and_across_chunks(self):
+        result = self.run_import(
+            self.row("IM003", supervisor="IM001"),  # supervisor only arrives in a later chunk
+            self.row("IM001"),
+            self.row("IM002", supervisor="IM001"),
+            self.row("IM004", supervisor="NOBODY"),
+            chunk_size=1,
+        )
+        self.assertEqual([(e.staff_no, e.message) for e in result.errors], [
+            ("IM004", "Unknown supervisor staff_no 'NOBODY' (imported without supervisor)"),
+        ])
+        boss = Employee.objects.get(staff_no="IM001")
+        self.assertEqual(
+            set(Employment.objects.filter(supervisor=boss).values_list("employee__staff_no", flat=True)), {"IM002", "IM003"},
+        )
+        self.assertEqual(
+            set(services.reporting_subtree_ids(boss.id, include_self=False).values_list("descendant__staff_no", flat=True)),
+            {"IM002", "IM003"},
+        )
+
+    def test_created_reference_rows_roll_back_with_a_failed_chunk(self):
+        with mock.patch.object(Employment.objects, "bulk_create", side_effect=RuntimeError("disk full")):
+            with self.assertRaises(RuntimeError):
+                self.run_import(self.row("IM001", region="Volta"), create_missing=True)
+        self.assertFalse(Region.objects.filter(name="Volta").exists())
+
+        self.run_import(self.row("IM001", region="Volta"), create_missing=True)
+        self.assertEqual(Employee.objects.get(staff_no="IM001").employments.get().region.name, "Volta")
+
+    @unittest.skipUnless(importlib.util.find_spec("openpyxl"), "openpyxl is not installed")
+    def test_xlsx_rows(self):
+        from openpyxl import Workbook
+
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(["Staff No", "First Name", "Last Name", "Employment Type", "Start Date", "Region", "Department", "Position", "Grade"])
+        sheet.append(["IM001", "Ama", "Owusu", "PERMANENT", date(2020, 1, 1), "Head Office", "Administration", "Officer", "Officer"])
+        sheet.append([None] * 9)
+        fh = io.BytesIO()
+        workbook.save(fh)
+        fh.seek(0)
+
+        result = EmployeeImporter().run(read_rows(fh, "staff.xlsx"))
+        self.assertEqual((result.rows, result.imported), (1, 1))
+        self.assertEqual(Employee.objects.get(staff_no="IM001").employments.get().start_date, date(2020, 1, 1))
+
+    @unittest.skipIf(importlib.util.find_spec("openpyxl"), "openpyxl is installed")
+    def test_xlsx_without_openpyxl_is_a_clear_error(self):
+        with self.assertRaisesMessage(RuntimeError, "pip install openpyxl"):
+            list(read_rows(io.BytesIO(), "staff.xlsx"))
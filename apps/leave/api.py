@@ -4,11 +4,17 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 
 from django.core.exceptions import ValidationError
+from django.db import transaction
 
 from apps.accounts.permissions import (
     IsAdminOrReadOnlyHRCEOOrSupervisor,
     RegionScopedQueryMixin,
 )
+from apps.analytics import dashboard
+from apps.common.conditional import ConditionalGetMixin
+from apps.common.fastjson import FastModelSerializerMixin
+from apps.common.profiling import ProfiledSerializerMixin, ProfiledViewMixin
+from apps.common.sync import ChangesFeedMixin
 from apps.employees.models import Employment
 from apps.leave.models import LeaveRequest
 from apps.workflows.services import create_approval
@@ -19,13 +25,15 @@ from apps.audit.services import write_audit
 # Workflow selection logic
 # ---------------------------------------------------------------------
 
-def pick_leave_workflow_code(employee) -> str:
-    active = (
-        Employment.objects
-        .filter(employee=employee, status="ACTIVE")
-        .order_by("-created_at")
-        .first()
-    )
+def pick_leave_workflow_code(employee, active=None) -> str:
+    """`active` may be passed when the caller already loaded the ACTIVE employment."""
+    if active is None:
+        active = (
+            Employment.objects
+            .filter(employee=employee, status="ACTIVE")
+            .order_by("-created_at")
+            .first()
+        )
     if not active:
         raise ValidationError("Employee has no ACTIVE employment record.")
 
@@ -44,7 +52,7 @@ def pick_leave_workflow_code(employee) -> str:
 # Serializer
 # ---------------------------------------------------------------------
 
-class LeaveRequestSerializer(serializers.ModelSerializer):
+class LeaveRequestSerializer(ProfiledSerializerMixin, FastModelSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = LeaveRequest
         fields = "__all__"
@@ -54,7 +62,9 @@ class LeaveRequestSerializer(serializers.ModelSerializer):
 # ViewSet
 # ---------------------------------------------------------------------
 
-class LeaveRequestViewSet(RegionScopedQueryMixin, viewsets.ModelViewSet):
+class LeaveRequestViewSet(
+    ProfiledViewMixin, ConditionalGetMixin, ChangesFeedMixin, RegionScopedQueryMixin, viewsets.ModelViewSet
+):
     """
     Leave lifecycle:
 
@@ -66,6 +76,8 @@ class LeaveRequestViewSet(RegionScopedQueryMixin, viewsets.ModelViewSet):
     - SYSTEM_ADMIN: full
     - HR/CEO: read-only
     - Supervisors: scoped access
+
+    Offline clients sync through changes/?since=<token> (apps.common.sync).
     """
 
     queryset = (
@@ -80,9 +92,14 @@ class LeaveRequestViewSet(RegionScopedQueryMixin, viewsets.ModelViewSet):
 
     # Used by RegionScopedQueryMixin
     region_field = "employee__employments__region"
+    department_field = "employee__employments__department"
+    reporting_field = "employee"
+
+    sync_entity = "LeaveRequest"
 
     def get_queryset(self):
-        return self.scope_queryset(super().get_queryset(), self.request).distinct()
+        qs = self.scope_queryset(super().get_queryset(), self.request)
+        return self.filter_department_subtree(qs, self.request).distinct()
 
     # -----------------------------------------------------------------
     # SUBMIT ACTION
@@ -112,33 +129,23 @@ class LeaveRequestViewSet(RegionScopedQueryMixin, viewsets.ModelViewSet):
             )
 
         # Determine workflow
-        workflow_code = pick_leave_workflow_code(lr.employee)
-
-        # Create approval
-        approval = create_approval(
-            module="leave",
-            request_type=workflow_code,
-            request_ref_id=lr.id,
-            created_by=request.user,
-            region_id=active.region_id,
-        )
+        workflow_code = pick_leave_workflow_code(lr.employee, active)
 
         # --------------------------------------------------------------
         # UNIQUE SUPERVISOR ROUTING (GEA requirement)
         # --------------------------------------------------------------
-        # Senior leave should go to that employee's exact supervisor
+        # Senior leave should go to that employee's exact supervisor.
+        # Assigned at creation, so approver notifications go to them.
 
+        assigned_to_user = None
         if workflow_code == "leave_senior":
             if not active.supervisor or not active.supervisor.user:
                 return Response(
                     {"error": "Supervisor user not set for this employee"},
                     status=400,
                 )
+            assigned_to_user = active.supervisor.user
 
-            approval.assigned_to_user = active.supervisor.user
-            approval.save(update_fields=["assigned_to_user", "updated_at"])
-
-        # Update leave status
         before = {
             "status": lr.status,
             "approval_request": str(lr.approval_request_id)
@@ -146,9 +153,23 @@ class LeaveRequestViewSet(RegionScopedQueryMixin, viewsets.ModelViewSet):
             else None,
         }
 
-        lr.approval_request = approval
-        lr.status = "SUBMITTED"
-        lr.save(update_fields=["approval_request", "status", "updated_at"])
+        # Create approval and update leave status in one transaction; both
+        # counter changes go out with it as one dashboard job.
+        dashboard.remember(lr)
+        with transaction.atomic(), dashboard.collect() as counted:
+            approval = create_approval(
+                module="leave",
+                request_type=workflow_code,
+                request_ref_id=lr.id,
+                created_by=request.user,
+                region_id=active.region_id,
+                assigned_to_user=assigned_to_user,
+            )
+
+            lr.approval_request = approval
+            lr.status = "SUBMITTED"
+            lr.save(update_fields=["approval_request", "status", "updated_at"])
+            dashboard.queue(counted)
 
         write_audit(
             action="SUBMIT_LEAVE",
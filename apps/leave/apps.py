@@ -3,3 +3,6 @@ from django.apps import AppConfig
 class LeaveConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.leave"
+
+    def ready(self):
+        from apps.leave import signals  # noqa: F401
@@ -0,0 +1,28 @@
+"""Async variants of LeaveRequestViewSet reads (routed by geahr.asgi_urls)."""
+from apps.accounts.permissions import RegionScopedQueryMixin
+from apps.common.async_views import AsyncReadView
+from apps.common.conditional import list_aggregates, list_etag, not_modified, with_validators
+from apps.leave.api import LeaveRequestSerializer, LeaveRequestViewSet
+
+
+class LeaveRequestListAsyncView(RegionScopedQueryMixin, AsyncReadView):
+    """GET /api/leave/requests/ -- same scoping and pagination as LeaveRequestViewSet.list."""
+
+    permission_classes = LeaveRequestViewSet.permission_classes
+    fallback = LeaveRequestViewSet.as_view({"get": "list", "post": "create"})
+
+    region_field = LeaveRequestViewSet.region_field
+    department_field = LeaveRequestViewSet.department_field
+    reporting_field = LeaveRequestViewSet.reporting_field
+
+    async def get(self, request, *args, **kwargs):
+        qs = await self.ascope_queryset(LeaveRequestViewSet.queryset.all(), request)
+        qs = self.filter_department_subtree(qs, request).distinct()
+
+        values = await qs.order_by().aaggregate(**list_aggregates())
+        etag = list_etag(request, values)
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+        response = await self.paginate(request, qs, LeaveRequestSerializer, count=values["count"])
+        return with_validators(response, etag)
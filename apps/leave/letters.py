@@ -0,0 +1,152 @@
+"""
+Leave approval letter generation.
+
+- A leave reaching APPROVED enqueues a job for its letter
+  (schedule_approval_letter, run by `manage.py run_workers`); nothing is
+  rendered on the request path.
+- Batch mode (generate_approval_letters_batch / the generate_approval_letters
+  command) renders many letters in parallel across a process pool. Workers
+  only turn plain context dicts into PDF bytes; all DB work stays in the
+  parent process.
+
+The template is compiled once per process and reused for every letter.
+"""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from django.template.loader import get_template
+from django.utils import timezone
+
+from apps.common import jobs
+from apps.documents.models import Document
+from apps.documents.pdf import text_to_pdf
+from apps.documents.services import create_document_version
+from apps.employees.models import Employment
+from apps.leave.models import LeaveRequest
+
+LETTER_TEMPLATE = "leave/approval_letter.txt"
+LETTER_DOC_TYPE = "LEAVE_APPROVAL_LETTER"
+
+
+@lru_cache(maxsize=1)
+def _compiled_template():
+    return get_template(LETTER_TEMPLATE)
+
+
+def letter_context(lr: LeaveRequest, employment=None) -> dict:
+    """Plain (picklable) values for the letter template."""
+    emp = lr.employee
+    return {
+        "leave_id": str(lr.id),
+        "reference": f"GEA/HR/LV/{lr.id.hex[:8].upper()}",
+        "issued_on": timezone.localdate().strftime("%d %B %Y"),
+        "employee_name": " ".join(p for p in (emp.first_name, emp.other_names, emp.last_name) if p),
+        "first_name": emp.first_name,
+        "staff_no": emp.staff_no,
+        "position": employment.position.title if employment else "",
+        "region": employment.region.name if employment else "",
+        "leave_type": lr.get_leave_type_display(),
+        "days": lr.days_requested,
+        "start_date": lr.start_date.strftime("%d %B %Y"),
+        "end_date": lr.end_date.strftime("%d %B %Y"),
+    }
+
+
+def render_approval_letter(context: dict) -> bytes:
+    text = _compiled_template().render(context)
+    return text_to_pdf(text, title=f"Leave approval - {context['staff_no']}")
+
+
+def _active_employments(employee_ids) -> dict:
+    rows = (
+        Employment.objects
+        .filter(employee_id__in=employee_ids, status="ACTIVE")
+        .select_related("position", "region")
+        .order_by("employee_id", "-created_at")
+    )
+    latest = {}
+    for row in rows:
+        latest.setdefault(row.employee_id, row)
+    return latest
+
+
+@transaction.atomic
+def store_approval_letter(lr: LeaveRequest, pdf: bytes) -> Document:
+    """Save the PDF as the next LETTER version for the leave and link it."""
+    doc = create_document_version(
+        owner_type=Document.OwnerType.LETTER,
+        owner_id=lr.id,
+        doc_type=LETTER_DOC_TYPE,
+        title=f"Leave approval letter - {lr.employee.staff_no}",
+        file=ContentFile(pdf, name=f"leave-approval-{lr.id.hex[:8]}.pdf"),
+        access_scope="OWNER",
+    )
+    lr.approval_letter = doc
+    lr.save(update_fields=["approval_letter", "updated_at"])
+    return doc
+
+
+def generate_approval_letter(leave_id):
+    lr = (
+        LeaveRequest.objects
+        .select_related("employee")
+        .filter(id=leave_id, status=LeaveRequest.Status.APPROVED)
+        .first()
+    )
+    if not lr:
+        return None
+    employment = _active_employments([lr.employee_id]).get(lr.employee_id)
+    return store_approval_letter(lr, render_approval_letter(letter_context(lr, employment)))
+
+
+def schedule_approval_letter(leave_id) -> None:
+    """Queue the letter in the current transaction (apps.leave.tasks)."""
+    jobs.enqueue("leave.generate_approval_letter", {"leave_id": leave_id})
+
+
+# ------------------------------------------------------------
+# Batch mode
+# ------------------------------------------------------------
+
+def _init_worker():
+    import django
+
+    django.setup()
+
+
+def generate_approval_letters_batch(leave_ids, workers=None, chunk_size=50, progress=None) -> int:
+    """
+    Render letters for many approved leaves across a process pool and store
+    them in chunks. Returns the number of letters created.
+    """
+    leave_ids = list(leave_ids)
+    if not leave_ids:
+        return 0
+
+    # Children must not inherit open DB handles.
+    connections.close_all()
+
+    created = 0
+    ctx = multiprocessing.get_context("fork") if "fork" in multiprocessing.get_all_start_methods() else None
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_worker) as pool:
+        for start in range(0, len(leave_ids), chunk_size):
+            chunk = list(
+                LeaveRequest.objects
+                .select_related("employee")
+                .filter(id__in=leave_ids[start:start + chunk_size], status=LeaveRequest.Status.APPROVED)
+            )
+            employments = _active_employments([lr.employee_id for lr in chunk])
+            contexts = [letter_context(lr, employments.get(lr.employee_id)) for lr in chunk]
+
+            pdfs = pool.map(render_approval_letter, contexts, chunksize=4)
+            for lr, pdf in zip(chunk, pdfs):
+                store_approval_letter(lr, pdf)
+                created += 1
+
+            if progress:
+                progress(created, len(leave_ids))
+
+    return created
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from apps.leave.letters import generate_approval_letters_batch
+from apps.leave.models import LeaveRequest
+
+
+class Command(BaseCommand):
+    help = "Render approval letters for APPROVED leave requests in a process pool"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+        parser.add_argument("--chunk-size", type=int, default=50, help="Leave requests loaded and rendered per batch (each letter is stored in its own transaction)")
+        parser.add_argument("--regenerate", action="store_true", help="Also re-render leaves that already have a letter")
+        parser.add_argument("--limit", type=int, default=None)
+
+    def handle(self, *args, **options):
+        qs = LeaveRequest.objects.filter(status=LeaveRequest.Status.APPROVED)
+        if not options["regenerate"]:
+            qs = qs.filter(approval_letter__isnull=True)
+
+        leave_ids = list(qs.order_by("created_at").values_list("id", flat=True)[: options["limit"]])
+        if not leave_ids:
+            self.stdout.write("No approved leave requests need a letter.")
+            return
+
+        def progress(done, total):
+            self.stdout.write(f"  {done}/{total} letters")
+
+        created = generate_approval_letters_batch(
+            leave_ids,
+            workers=options["workers"],
+            chunk_size=options["chunk_size"],
+            progress=progress,
+        )
+        self.stdout.write(self.style.SUCCESS(f"✅ Generated {created} approval letters"))
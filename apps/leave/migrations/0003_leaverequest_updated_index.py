@@ -0,0 +1,17 @@
+# Generated by Django 6.0.2 on 2026-10-19 11:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leave', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='leaverequest',
+            index=models.Index(fields=['updated_at', 'id'], name='leave_leave_updated_f43aff_idx'),
+        ),
+    ]
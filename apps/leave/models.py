@@ -47,6 +47,7 @@ class LeaveRequest(UUIDModel, TimeStampedModel):
             models.Index(fields=["employee", "status"]),
             models.Index(fields=["leave_type", "status"]),
             models.Index(fields=["start_date", "end_date"]),
+            models.Index(fields=["updated_at", "id"]),  # change sync
         ]
 
     def clean(self):
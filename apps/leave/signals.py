@@ -0,0 +1,14 @@
+from apps.common.sync import track_deletes
+from apps.employees.services import employee_region_ids
+from apps.leave.models import LeaveRequest
+
+
+# ------------------------------------------------------------
+# Sync tombstones
+# ------------------------------------------------------------
+
+track_deletes(
+    LeaveRequest,
+    "LeaveRequest",
+    lambda leave: (leave.employee_id, employee_region_ids(leave.employee_id)),
+)
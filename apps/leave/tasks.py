@@ -0,0 +1,11 @@
+from apps.common import jobs
+from apps.leave import letters
+from apps.leave.models import LeaveRequest
+
+
+@jobs.task("leave.generate_approval_letter", max_attempts=5)
+def generate_approval_letter(leave_id):
+    # A retried job must not add a second letter version
+    if LeaveRequest.objects.filter(id=leave_id, approval_letter__isnull=False).exists():
+        return
+    letters.generate_approval_letter(leave_id)
@@ -1,3 +1,270 @@
-from django.test import TestCase
+import io
+import json
+import re
+import shutil
+import tempfile
+from datetime import date
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.core.management import call_command
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import resolve
+
+from apps.analytics import dashboard
+from apps.analytics.models import DashboardCounter
+from apps.common import jobs
+from apps.common.budgets import APIBudgetMixin, Budget
+from apps.common.models import Job
+from apps.common.testing import SeededDataMixin
+from apps.documents.models import Document
+from apps.documents.pdf import text_to_pdf
+from apps.employees.models import Employee, Employment
+from apps.leave import letters
+from apps.leave.async_api import LeaveRequestListAsyncView
+from apps.leave.models import LeaveRequest
+from apps.workflows.models import ApprovalRequest
+
+
+class LeaveAPIBudgetTests(APIBudgetMixin, TestCase):
+    """Query / latency budgets of the leave endpoints (see apps.common.budgets)."""
+
+    budgets = {
+        "leave_list": Budget(queries=3, p95_ms=80),
+        "leave_list_regional": Budget(queries=4, p95_ms=80),
+        "leave_detail": Budget(queries=2, p95_ms=40),
+        "leave_submit": Budget(queries=11, p95_ms=80),
+    }
+
+
+class LeaveSubmitTests(SeededDataMixin, TestCase):
+    """submit creates the approval, moves the leave and queues its counter job in one transaction."""
+
+    def test_submit_queues_one_counter_job(self):
+        scenario = self.scenario("leave_submit")
+        response = self.client_for(scenario.user).post(scenario.path)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Job.objects.filter(task=dashboard.COUNT_DASHBOARD_CHANGES).count(), 1)
+        jobs.run_pending()
+        counters = dict(DashboardCounter.objects.exclude(value=0).values_list("key", "value"))
+        self.assertEqual(counters, dict(dashboard.expected_counters()))
+
+    def test_failed_leave_save_rolls_back_the_approval(self):
+        scenario = self.scenario("leave_submit")
+        leave_id = scenario.path.split("/")[-3]
+        approvals = ApprovalRequest.objects.count()
+        with mock.patch.object(LeaveRequest, "save", side_effect=RuntimeError("disk full")):
+            with self.assertRaises(RuntimeError):
+                self.client_for(scenario.user).post(scenario.path)
+        self.assertEqual(ApprovalRequest.objects.count(), approvals)
+        self.assertEqual(LeaveRequest.objects.get(id=leave_id).status, "DRAFT")
+        self.assertFalse(Job.objects.exists())
+
+
+class LeaveConditionalGetTests(SeededDataMixin, TestCase):
+    """ETag / Last-Modified on the leave list and detail (apps.common.conditional)."""
+
+    def test_list_not_modified_until_a_row_changes(self):
+        client = self.client_for("hr")
+        first = client.get("/api/leave/requests/")
+        etag = first["ETag"]
+        self.assertTrue(etag.startswith('W/"'))
+        self.assertNotIn("Last-Modified", first)
+
+        # Only the aggregate (role codes are memoised on the user): no rows fetched.
+        with self.assertNumQueries(1):
+            response = client.get("/api/leave/requests/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(response.content, b"")
+
+        self.assertNotEqual(client.get("/api/leave/requests/?page=2")["ETag"], etag)
+        self.assertNotEqual(self.client_for("regional_manager").get("/api/leave/requests/")["ETag"], etag)
+
+        LeaveRequest.objects.order_by("id").last().save()
+        response = client.get("/api/leave/requests/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_detail_strong_etag_and_last_modified(self):
+        client = self.client_for("hr")
+        leave = LeaveRequest.objects.order_by("id").first()
+        path = f"/api/leave/requests/{leave.id}/"
+        first = client.get(path)
+        self.assertTrue(first["ETag"].startswith(f'"{leave.id.hex}-'))
+
+        response = client.get(path, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 304)
+        response = client.get(path, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"])
+        self.assertEqual(response.status_code, 304)
+
+        leave.reason = "Updated"
+        leave.save()
+        response = client.get(path, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)["reason"], "Updated")
+
+
+@override_settings(SYNC_SETTLE_SECONDS=0)
+class LeaveChangeSyncTests(SeededDataMixin, TestCase):
+    """changes/?since=<token> on the leave list (apps.common.sync)."""
+
+    def sync(self, client, token=None, limit=100):
+        """Follow `next` until has_more is false: (changed ids, deleted ids, last token)."""
+        changed, deleted = [], []
+        while True:
+            path = f"/api/leave/requests/changes/?limit={limit}" + (f"&since={token}" if token else "")
+            response = client.get(path)
+            self.assertEqual(response.status_code, 200, response.content)
+            body = json.loads(response.content)
+            changed += [row["id"] for row in body["results"]]
+            deleted += body["deleted"]
+            token = body["next"]
+            if not body["has_more"]:
+                return changed, deleted, token
+
+    def test_snapshot_then_incremental_changes_and_deletes(self):
+        client = self.client_for("hr")
+        changed, deleted, token = self.sync(client)
+        self.assertEqual(len(changed), len(set(changed)))
+        self.assertEqual(set(changed), {str(i) for i in LeaveRequest.objects.values_list("id", flat=True)})
+        self.assertEqual(self.sync(client, token)[:2], ([], []))
+
+        edited, removed = LeaveRequest.objects.order_by("id")[:2]
+        edited.reason = "Changed offline"
+        edited.save()
+        removed_id = str(removed.id)
+        removed.delete()
+
+        changed, deleted, _ = self.sync(client, token)
+        self.assertEqual(changed, [str(edited.id)])
+        self.assertEqual(deleted, [removed_id])
+
+    def test_scoped_to_the_callers_region(self):
+        client = self.client_for("regional_manager")
+        changed, _, token = self.sync(client)
+        region_id = Employment.objects.filter(employee__user=self.user("regional_manager")).values_list("region_id", flat=True).first()
+        self.assertEqual(
+            set(changed),
+            {str(i) for i in LeaveRequest.objects.filter(employee__employments__region_id=region_id).values_list("id", flat=True)},
+        )
+
+        outside = LeaveRequest.objects.exclude(id__in=changed).first()
+        outside.delete()
+        LeaveRequest.objects.get(id=changed[0]).delete()
+        self.assertEqual(self.sync(client, token)[1], [changed[0]])
+
+    def test_bad_and_expired_tokens(self):
+        client = self.client_for("hr")
+        self.assertEqual(client.get("/api/leave/requests/changes/?since=garbage").status_code, 400)
+
+        token = self.sync(client)[2]
+        with self.settings(SYNC_TOMBSTONE_RETENTION_DAYS=0):  # deletion history starts now
+            response = client.get(f"/api/leave/requests/changes/?since={token}")
+        self.assertEqual(response.status_code, 410)
+        self.assertEqual(json.loads(response.content)["code"], "resync_required")
+
+
+@override_settings(ROOT_URLCONF="geahr.asgi_urls")
+class LeaveAsyncReadTests(SeededDataMixin, TestCase):
+    """The ASGI leave list answers exactly like LeaveRequestViewSet.list."""
+
+    def test_routed_to_async_view(self):
+        self.assertIs(resolve("/api/leave/requests/").func.view_class, LeaveRequestListAsyncView)
+
+    async def test_same_pages_as_drf(self):
+        for key, path in [
+            ("hr", "/api/leave/requests/"),
+            ("hr", "/api/leave/requests/?page=2"),
+            ("hr", "/api/leave/requests/?page=last"),
+            ("regional_manager", "/api/leave/requests/"),
+        ]:
+            with self.subTest(user=key, path=path):
+                expected = await sync_to_async(self.drf_get)(key, path)
+                self.assertGreater(json.loads(expected.content)["count"], 0)
+                response = await AsyncClient().get(path, headers=await sync_to_async(self.auth_headers)(key))
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(json.loads(response.content), json.loads(expected.content))
+                self.assertEqual(response["ETag"], expected["ETag"])
+
+    async def test_not_modified(self):
+        headers = await sync_to_async(self.auth_headers)("hr")
+        first = await AsyncClient().get("/api/leave/requests/", headers=headers)
+        response = await AsyncClient().get("/api/leave/requests/", headers={**headers, "If-None-Match": first["ETag"]})
+        self.assertEqual(response.status_code, 304)
+
+    async def test_errors(self):
+        client = AsyncClient()
+        response = await client.get("/api/leave/requests/")
+        self.assertEqual(response.status_code, 401)
+        self.assertIn("Bearer", response["WWW-Authenticate"])
+
+        response = await client.get("/api/leave/requests/?page=999", headers=await sync_to_async(self.auth_headers)("hr"))
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(json.loads(response.content), {"detail": "Invalid page."})
+
+    async def test_other_methods_fall_back_to_drf(self):
+        response = await AsyncClient().post(
+            "/api/leave/requests/", {}, content_type="application/json", headers=await sync_to_async(self.auth_headers)("admin"),
+        )
+        self.assertEqual(response.status_code, 400)  # DRF create() validation, not 405
+
+
+class ApprovalLetterTests(TestCase):
+    """PDF writer, letter template and the batch command."""
+
+    @classmethod
+    def setUpClass(cls):
+        media = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, media, ignore_errors=True)
+        cls.enterClassContext(override_settings(MEDIA_ROOT=media))
+        super().setUpClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.leaves = []
+        for i in range(3):
+            employee = Employee.objects.create(staff_no=f"LTR{i}", first_name="Yaw", last_name=f"Owusu{i}")
+            cls.leaves.append(LeaveRequest.objects.create(
+                employee=employee, leave_type="ANNUAL", start_date=date(2026, 3, 2), end_date=date(2026, 3, 6),
+                days_requested=5, status="APPROVED",
+            ))
+
+    def pdf_text(self, pdf: bytes) -> str:
+        return "\n".join(m.decode("latin-1") for m in re.findall(rb"\((.*?)\) Tj", pdf))
+
+    def test_pdf_structure(self):
+        pdf = text_to_pdf("Line (one) \\ done\n" + "word " * 2000, title="T")
+        self.assertTrue(pdf.startswith(b"%PDF-1.4"))
+        self.assertTrue(pdf.endswith(b"%%EOF\n"))
+        # Every xref entry points at its object
+        xref_at = int(pdf.rsplit(b"startxref\n", 1)[1].split(b"\n")[0])
+        entries = pdf[xref_at:].split(b"\n")[3:]
+        for number, entry in enumerate(entries[: pdf.count(b" 0 obj\n")], start=1):
+            offset = int(entry[:10])
+            self.assertTrue(pdf[offset:].startswith(f"{number} 0 obj".encode()), number)
+        self.assertGreater(int(re.search(rb"/Count (\d+)", pdf).group(1)), 1)  # wrapped onto several pages
+        self.assertIn(rb"(Line \(one\) \\ done) Tj", pdf)
+
+    def test_letter_template(self):
+        context = letters.letter_context(self.leaves[0])
+        text = self.pdf_text(letters.render_approval_letter(context))
+        self.assertIn("Staff No: LTR0", text)
+        self.assertIn("APPROVAL OF ANNUAL LEAVE", text)
+        self.assertIn("5 working days,\nfrom 02 March 2026 to 06 March 2026", text)  # wrapped at WRAP_CHARS
+        self.assertNotIn("&#x27;", text)  # autoescape is off for plain text
+
+    def test_batch_command_stores_one_letter_per_leave(self):
+        out = io.StringIO()
+        call_command("generate_approval_letters", workers=1, chunk_size=2, stdout=out)
+        self.assertIn("Generated 3 approval letters", out.getvalue())
+        for leave in self.leaves:
+            leave.refresh_from_db()
+            doc = leave.approval_letter
+            self.assertEqual((doc.owner_type, doc.owner_id, doc.version, doc.is_latest), ("LETTER", leave.id, 1, True))
+            self.assertIn(leave.employee.staff_no, self.pdf_text(doc.file.read()))
+
+        call_command("generate_approval_letters", workers=1, stdout=out)
+        self.assertIn("No approved leave requests need a letter", out.getvalue())
+        call_command("generate_approval_letters", workers=1, regenerate=True, limit=1, stdout=out)
+        self.assertEqual(Document.objects.filter(doc_type=letters.LETTER_DOC_TYPE, version=2).count(), 1)
@@ -0,0 +1,9 @@
+from django.contrib import admin
+
+from apps.notifications.models import Notification
+
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ("recipient", "event", "message", "created_at", "sent_at")
+    list_filter = ("event",)
@@ -0,0 +1,120 @@
+"""
+Delivery channels for notification digests: email (Django's EMAIL_BACKEND,
+SMTP in production) and SMS (NOTIFY_SMS_BACKEND).
+
+Connections are pooled per worker thread: a digest run sends every message
+over one open connection, and the next run reuses it while it has been idle
+for less than NOTIFY_CONNECTION_IDLE_SECONDS. Messages go out one at a time,
+so a connection the server drops mid-batch is reopened once and sending
+resumes at the message that failed; the ones before it are not sent again.
+"""
+import logging
+import smtplib
+import threading
+import time
+
+from django.conf import settings
+from django.core import mail
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+# ------------------------------------------------------------
+# SMS backends
+# ------------------------------------------------------------
+
+class BaseSMSBackend:
+    """Same shape as Django's email backends: open() / close() / send_messages()."""
+
+    def open(self):
+        return False
+
+    def close(self):
+        pass
+
+    def send_messages(self, messages) -> int:
+        """messages: (phone, text) pairs; returns how many were sent."""
+        raise NotImplementedError
+
+
+class LoggingSMSBackend(BaseSMSBackend):
+    def send_messages(self, messages) -> int:
+        for phone, text in messages:
+            logger.info("SMS to %s: %s", phone, text)
+        return len(messages)
+
+
+class LocmemSMSBackend(BaseSMSBackend):
+    """Keeps messages in LocmemSMSBackend.outbox (tests)."""
+
+    outbox = []
+
+    def send_messages(self, messages) -> int:
+        self.outbox.extend(messages)
+        return len(messages)
+
+
+def get_sms_connection():
+    return import_string(getattr(settings, "NOTIFY_SMS_BACKEND", "apps.notifications.channels.LoggingSMSBackend"))()
+
+
+# ------------------------------------------------------------
+# Pooling
+# ------------------------------------------------------------
+
+RECONNECT_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError)
+
+
+class PooledConnection:
+    """One open backend connection per thread, reused while fresh."""
+
+    def __init__(self, factory):
+        self.factory = factory
+        self._local = threading.local()
+
+    def _idle_limit(self) -> float:
+        return getattr(settings, "NOTIFY_CONNECTION_IDLE_SECONDS", 60)
+
+    def get(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and time.monotonic() - self._local.used > self._idle_limit():
+            self.close()
+            conn = None
+        if conn is None:
+            conn = self.factory()
+            conn.open()
+            self._local.conn = conn
+        self._local.used = time.monotonic()
+        return conn
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        self._local.conn = None
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                logger.debug("Closing a pooled connection failed", exc_info=True)
+
+    def send_messages(self, messages, sent=None) -> int:
+        """Send messages in order; sent(i) is called once messages[i] went out."""
+        count, reconnected = 0, False
+        for i, message in enumerate(messages):
+            while True:
+                try:
+                    count += self.get().send_messages([message])
+                    break
+                except RECONNECT_ERRORS:
+                    if reconnected:
+                        raise
+                    logger.info("Connection dropped, reconnecting")
+                    reconnected = True
+                    self.close()
+            if sent:
+                sent(i)
+        return count
+
+
+email_pool = PooledConnection(lambda: mail.get_connection(fail_silently=False))
+sms_pool = PooledConnection(get_sms_connection)
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-19 12:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notification',
+            name='event',
+            field=models.CharField(choices=[('APPROVAL_PENDING', 'Approval waiting for you'), ('APPROVAL_OVERDUE', 'Approval past its SLA'), ('APPROVAL_ESCALATED', 'Overdue approval escalated to you')], max_length=40),
+        ),
+    ]
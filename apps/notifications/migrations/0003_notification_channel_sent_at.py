@@ -0,0 +1,23 @@
+# Generated by Django 6.0.2 on 2026-10-19 12:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0002_notification_sla_events'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='email_sent_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='sms_sent_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
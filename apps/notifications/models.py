@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.db import models
+
+from apps.workflows.models import ApprovalRequest
+
+
+class Notification(models.Model):
+    """
+    One event for one recipient. Unsent rows are coalesced per recipient
+    into a digest (apps.notifications.services.send_digests).
+    """
+
+    class Event(models.TextChoices):
+        APPROVAL_PENDING = "APPROVAL_PENDING", "Approval waiting for you"
+        APPROVAL_OVERDUE = "APPROVAL_OVERDUE", "Approval past its SLA"
+        APPROVAL_ESCALATED = "APPROVAL_ESCALATED", "Overdue approval escalated to you"
+
+    recipient = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="notifications")
+    event = models.CharField(max_length=40, choices=Event.choices)
+    approval = models.ForeignKey(ApprovalRequest, null=True, blank=True, on_delete=models.CASCADE)
+    message = models.CharField(max_length=255)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Per channel, so a retried digest run only repeats the channel that failed;
+    # sent_at is set once every channel the recipient has is done.
+    email_sent_at = models.DateTimeField(null=True, blank=True)
+    sms_sent_at = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at"], condition=models.Q(sent_at__isnull=True), name="notif_unsent_idx"),
+        ]
@@ -0,0 +1,194 @@
+"""
+Approver notifications.
+
+1) create_approval() / act_on_approval() queue "notifications.approval_step"
+   in their transaction when a request lands on a (new) pending step.
+2) That job resolves who may act on the step -- the assigned user, the
+   step's named user, or everyone holding its role -- from the approver
+   index (workflows.approvers), and stores one Notification per recipient.
+3) Notifications are not sent one by one: the first one schedules a
+   "notifications.send_digests" job NOTIFY_DIGEST_WINDOW_SECONDS later,
+   which sends each recipient a single digest of everything that arrived
+   meanwhile, over the pooled email / SMS connections (channels.py).
+"""
+import logging
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.mail import EmailMessage
+from django.utils import timezone
+
+from apps.common import jobs
+from apps.common.models import Job
+from apps.notifications import channels
+from apps.notifications.models import Notification
+from apps.workflows import approvers
+from apps.workflows.models import ApprovalRequest, WorkflowStep
+
+SEND_DIGESTS = "notifications.send_digests"
+
+logger = logging.getLogger(__name__)
+
+
+# ------------------------------------------------------------
+# Recipients
+# ------------------------------------------------------------
+
+def step_recipients(approval: ApprovalRequest, step: WorkflowStep):
+    """
+    Active users who may act on `step` of `approval`, mirroring
+    workflows.services.is_user_approver_for_step(). One query once the
+    approver index is warm.
+    """
+    ids = approvers.eligible_user_ids(approval, step)
+    return get_user_model().objects.filter(id__in=ids, is_active=True)
+
+
+# ------------------------------------------------------------
+# Events
+# ------------------------------------------------------------
+
+def queue_approval_step(approval: ApprovalRequest) -> None:
+    """Called inside the transition's transaction; the job runs after it commits."""
+    jobs.enqueue(
+        "notifications.approval_step",
+        {"approval_id": approval.id, "step_order": approval.current_step_order},
+    )
+
+
+def approval_message(approval: ApprovalRequest) -> str:
+    label = approval.request_type.replace("_", " ")
+    return f"{label} (step {approval.current_step_order}), ref {approval.request_ref_id.hex[:8].upper()}"
+
+
+def notify_approval_step(approval_id, step_order) -> int:
+    """Store a Notification per eligible approver; returns how many."""
+    from apps.workflows.services import _find_workflow
+
+    approval = ApprovalRequest.objects.filter(
+        id=approval_id, status=ApprovalRequest.Status.PENDING, current_step_order=step_order,
+    ).first()
+    if approval is None:
+        return 0  # acted on (or withdrawn) before the job ran
+
+    wf = _find_workflow(approval.module, approval.request_type, region_id=approval.region_id)
+    step = wf.steps.filter(step_order=step_order).first()
+    if step is None:
+        return 0
+
+    message = approval_message(approval)
+    return queue_notifications([
+        Notification(recipient_id=user_id, event=Notification.Event.APPROVAL_PENDING, approval=approval, message=message)
+        for user_id in step_recipients(approval, step).values_list("id", flat=True)
+    ])
+
+
+def queue_notifications(notifications) -> int:
+    """Store ready-made Notification rows (one bulk insert) and make sure a digest will go out."""
+    created = Notification.objects.bulk_create(notifications, batch_size=500)
+    if created:
+        schedule_digests()
+    return len(created)
+
+
+def schedule_digests() -> None:
+    """Make sure a digest run is queued; the window starts with the first waiting event."""
+    if not Job.objects.filter(task=SEND_DIGESTS, status=Job.Status.QUEUED).exists():
+        jobs.enqueue(SEND_DIGESTS, delay=getattr(settings, "NOTIFY_DIGEST_WINDOW_SECONDS", 120))
+
+
+# ------------------------------------------------------------
+# Digests
+# ------------------------------------------------------------
+
+def digest_text(user, messages) -> str:
+    lines = [f"Hello {user.first_name or user.username},", ""]
+    lines.append(f"{len(messages)} approval(s) are waiting for you in GEA HR:" if len(messages) > 1
+                 else "An approval is waiting for you in GEA HR:")
+    lines += [f"  - {message}" for message in messages]
+    return "\n".join(lines)
+
+
+def sms_text(messages) -> str:
+    if len(messages) == 1:
+        return f"GEA HR: approval waiting - {messages[0]}"
+    return f"GEA HR: {len(messages)} approvals waiting for you"
+
+
+def _deliver(pool, messages, recipients, rows_by_recipient, field: str) -> list:
+    """
+    Send one channel's messages (recipients[i] gets messages[i]) and stamp
+    `field` on the rows of every recipient reached, even when a later
+    message fails. Returns [the error] or [].
+    """
+    reached = []
+    try:
+        pool.send_messages(messages, sent=lambda i: reached.append(recipients[i]))
+        return []
+    except Exception as e:
+        logger.warning("Digest %s delivery failed after %s of %s messages", field, len(reached), len(messages))
+        return [e]
+    finally:
+        now = timezone.now()
+        delivered = [row for user in reached for row in rows_by_recipient[user]]
+        Notification.objects.filter(id__in=[row.id for row in delivered]).update(**{field: now})
+        for row in delivered:
+            setattr(row, field, now)
+
+
+def send_digests(batch_size: int = None) -> int:
+    """
+    Send every unsent notification as one digest per recipient. Handles up
+    to NOTIFY_BATCH_SIZE notifications and queues another run if more are
+    waiting. Returns the number of recipients notified.
+
+    Email and SMS are delivered and recorded separately (email_sent_at /
+    sms_sent_at): when one channel fails, the job is retried and only the
+    rows that channel has not delivered go out again.
+    """
+    batch_size = batch_size or getattr(settings, "NOTIFY_BATCH_SIZE", 500)
+    rows = list(
+        Notification.objects.filter(sent_at__isnull=True)
+        .select_related("recipient")
+        .order_by("created_at", "id")[: batch_size + 1]
+    )
+    more = len(rows) > batch_size
+    rows = rows[:batch_size]
+    if not rows:
+        return 0
+
+    by_recipient = defaultdict(list)
+    for row in rows:
+        by_recipient[row.recipient].append(row)
+
+    from_email = getattr(settings, "NOTIFY_FROM_EMAIL", None) or settings.DEFAULT_FROM_EMAIL
+    emails, email_to, pending_email = [], [], {}
+    texts, text_to, pending_sms = [], [], {}
+    for user, user_rows in by_recipient.items():
+        unsent = [row for row in user_rows if not row.email_sent_at]
+        if user.email and unsent:
+            pending_email[user] = unsent
+            body = digest_text(user, [row.message for row in unsent])
+            emails.append(EmailMessage("GEA HR: approvals waiting for you", body, from_email, [user.email]))
+            email_to.append(user)
+        unsent = [row for row in user_rows if not row.sms_sent_at]
+        if user.phone and unsent:
+            pending_sms[user] = unsent
+            texts.append((user.phone, sms_text([row.message for row in unsent])))
+            text_to.append(user)
+
+    errors = _deliver(channels.email_pool, emails, email_to, pending_email, "email_sent_at")
+    errors += _deliver(channels.sms_pool, texts, text_to, pending_sms, "sms_sent_at")
+
+    done = [
+        row.id for row in rows
+        if (row.email_sent_at or not row.recipient.email) and (row.sms_sent_at or not row.recipient.phone)
+    ]
+    Notification.objects.filter(id__in=done).update(sent_at=timezone.now())
+    if errors:
+        raise errors[0]
+
+    if more:
+        jobs.enqueue(SEND_DIGESTS)
+    return len(by_recipient)
@@ -0,0 +1,14 @@
+from apps.common import jobs
+from apps.notifications import services
+
+
+@jobs.task("notifications.approval_step", priority=3)
+def approval_step(approval_id, step_order):
+    services.notify_approval_step(approval_id, step_order)
+
+
+# Not atomic: what each channel delivered is recorded as it goes and must
+# survive a failure of the other channel.
+@jobs.task(services.SEND_DIGESTS, priority=3, max_attempts=8, atomic=False)
+def send_digests():
+    services.send_digests()
@@ -0,0 +1,144 @@
+import smtplib
+import uuid
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.accounts.models import Role, UserRole
+from apps.common import jobs
+from apps.common.models import Job
+from apps.notifications import channels
+from apps.notifications.models import Notification
+from apps.notifications.services import SEND_DIGESTS, step_recipients
+from apps.notifications.testing import LocalSMTPServer
+from apps.workflows import approvers
+from apps.workflows.models import WorkflowDefinition, WorkflowStep
+from apps.workflows.services import act_on_approval, create_approval
+
+
+class ApprovalNotificationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        role = Role.objects.create(code="NOTIFY_CEO", name="CEO")
+        cls.ceo = User.objects.create_user("n_ceo", email="ceo@example.org", phone="+233200000001")
+        cls.deputy = User.objects.create_user("n_deputy", email="deputy@example.org")
+        cls.hr = User.objects.create_user("n_hr", email="hr@example.org")
+        for user in (cls.ceo, cls.deputy):
+            UserRole.objects.create(user=user, role=role)
+        User.objects.create_user("n_inactive", email="gone@example.org", is_active=False).userrole_set.create(role=role)
+
+        wf = WorkflowDefinition.objects.create(module="notify", code="notify_test", name="Notify test")
+        cls.role_step = WorkflowStep.objects.create(workflow=wf, step_order=1, approver_rule="ROLE", approver_role_code="NOTIFY_CEO")
+        WorkflowStep.objects.create(workflow=wf, step_order=2, approver_rule="USER", approver_user=cls.hr)
+
+    def setUp(self):
+        self.smtp = LocalSMTPServer().start()
+        self.addCleanup(self.smtp.stop)
+        self.addCleanup(channels.sms_pool.close)
+        self.addCleanup(channels.email_pool.close)
+        self.addCleanup(channels.LocmemSMSBackend.outbox.clear)
+        self.enterContext(override_settings(
+            EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+            EMAIL_HOST=self.smtp.host,
+            EMAIL_PORT=self.smtp.port,
+            NOTIFY_SMS_BACKEND="apps.notifications.channels.LocmemSMSBackend",
+        ))
+
+    def submit(self, **kwargs):
+        return create_approval("notify", "notify_test", uuid.uuid4(), created_by=None, **kwargs)
+
+    def send_due_digests(self):
+        Job.objects.filter(task=SEND_DIGESTS).update(run_at=timezone.now())
+        jobs.run_pending()
+
+    def test_recipients_in_one_query(self):
+        approval = self.submit()
+        approvers.get_index()  # warm
+        with self.assertNumQueries(1):
+            users = set(step_recipients(approval, self.role_step))
+        self.assertEqual(users, {self.ceo, self.deputy})
+
+        approval.assigned_to_user = self.hr
+        self.assertEqual(list(step_recipients(approval, self.role_step)), [self.hr])
+
+    def test_events_coalesced_into_one_digest_per_recipient(self):
+        approvals = [self.submit() for _ in range(3)]
+        jobs.run_pending()
+        self.assertEqual(Notification.objects.count(), 6)
+        digest = Job.objects.get(task=SEND_DIGESTS)
+        self.assertGreater(digest.run_at, timezone.now())  # waits out the window
+        self.assertEqual(self.smtp.messages, [])
+
+        self.send_due_digests()
+        self.assertEqual(sorted(rcpt for _, (rcpt,), _ in self.smtp.messages), ["ceo@example.org", "deputy@example.org"])
+        self.assertIn(b"3 approval(s) are waiting for you", self.smtp.messages[0][2])
+        self.assertEqual(self.smtp.connections, 1)
+        self.assertEqual(channels.LocmemSMSBackend.outbox, [("+233200000001", "GEA HR: 3 approvals waiting for you")])
+        self.assertFalse(Notification.objects.filter(sent_at__isnull=True).exists())
+
+        # Next step goes to its named user, over the same SMTP connection
+        act_on_approval(approval=approvals[0], user=self.ceo, action="APPROVE")
+        jobs.run_pending()
+        self.send_due_digests()
+        self.assertEqual([rcpt for _, (rcpt,), _ in self.smtp.messages[2:]], ["hr@example.org"])
+        self.assertEqual(self.smtp.connections, 1)
+
+    def test_stale_step_is_not_notified(self):
+        approval = self.submit()
+        act_on_approval(approval=approval, user=self.ceo, action="REJECT")
+        jobs.run_pending()
+        self.assertFalse(Notification.objects.exists())
+
+    def test_failed_channel_is_retried_alone(self):
+        self.submit()
+        jobs.run_pending()
+        with mock.patch.object(channels.LocmemSMSBackend, "send_messages", side_effect=RuntimeError("gateway down")):
+            with self.assertLogs(level="WARNING"):
+                self.send_due_digests()
+
+        self.assertEqual(len(self.smtp.messages), 2)
+        self.assertFalse(Notification.objects.filter(email_sent_at__isnull=True).exists())
+        # The CEO still waits for the SMS; the deputy has no phone and is done.
+        self.assertEqual(
+            list(Notification.objects.filter(sent_at__isnull=True).values_list("recipient", flat=True)), [self.ceo.id],
+        )
+
+        self.send_due_digests()  # the retry
+        self.assertEqual(len(self.smtp.messages), 2)  # no email sent twice
+        self.assertEqual([phone for phone, _ in channels.LocmemSMSBackend.outbox], ["+233200000001"])
+        self.assertFalse(Notification.objects.filter(sent_at__isnull=True).exists())
+
+
+class PooledConnectionTests(TestCase):
+    def test_disconnect_mid_batch_resumes_at_the_failed_message(self):
+        delivered, drops = [], [smtplib.SMTPServerDisconnected("bye")]
+
+        class FlakyBackend(channels.BaseSMSBackend):
+            def send_messages(self, messages):
+                if len(delivered) == 2 and drops:
+                    raise drops.pop()
+                delivered.extend(messages)
+                return len(messages)
+
+        pool = channels.PooledConnection(FlakyBackend)
+        reached = []
+        with self.assertLogs("apps.notifications.channels", "INFO"):
+            self.assertEqual(pool.send_messages(["a", "b", "c", "d"], sent=reached.append), 4)
+        self.assertEqual(delivered, ["a", "b", "c", "d"])
+        self.assertEqual(reached, [0, 1, 2, 3])
+
+    def test_second_disconnect_fails_the_batch(self):
+        reached = []
+
+        class DeadBackend(channels.BaseSMSBackend):
+            def send_messages(self, messages):
+                if messages == ["b"]:
+                    raise ConnectionResetError
+                return 1
+
+        with self.assertLogs("apps.notifications.channels", "INFO"), self.assertRaises(ConnectionResetError):
+            channels.PooledConnection(DeadBackend).send_messages(["a", "b", "c"], sent=reached.append)
+        self.assertEqual(reached, [0])
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 class OrgConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.org"
+
+    def ready(self):
+        from apps.org import signals  # noqa: F401
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.common import closure
+from apps.org.models import Department, DepartmentClosure
+
+
+class Command(BaseCommand):
+    help = "Rebuild the Department closure table from parent links"
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        parents = dict(Department.objects.values_list("id", "parent_id"))
+        rows = closure.rebuild(DepartmentClosure, parents)
+        self.stdout.write(self.style.SUCCESS(f"✅ {len(parents)} departments, {rows} closure rows"))
@@ -0,0 +1,36 @@
+# Generated by Django 6.0.2 on 2026-10-19 10:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_closure(apps, schema_editor):
+    from apps.common import closure
+
+    Department = apps.get_model("org", "Department")
+    DepartmentClosure = apps.get_model("org", "DepartmentClosure")
+    closure.rebuild(DepartmentClosure, dict(Department.objects.values_list("id", "parent_id")))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('org', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DepartmentClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveIntegerField()),
+                ('ancestor', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to='org.department')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to='org.department')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['descendant', 'depth'], name='org_departm_descend_188411_idx')],
+                'unique_together': {('ancestor', 'descendant')},
+            },
+        ),
+        migrations.RunPython(build_closure, migrations.RunPython.noop),
+    ]
@@ -15,6 +15,22 @@ class Department(UUIDModel, TimeStampedModel):
         unique_together = ("name", "parent")
     def __str__(self): return self.name
 
+class DepartmentClosure(models.Model):
+    """
+    Every (ancestor, descendant) pair of the Department tree, including a
+    depth-0 row per department. Maintained by apps.org.signals.
+    """
+    # Indexed through unique_together (ancestor first)
+    ancestor = models.ForeignKey(Department, on_delete=models.CASCADE, related_name="descendant_links", db_index=False)
+    descendant = models.ForeignKey(Department, on_delete=models.CASCADE, related_name="ancestor_links")
+    depth = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ("ancestor", "descendant")
+        indexes = [
+            models.Index(fields=["descendant", "depth"]),
+        ]
+
 class Position(UUIDModel, TimeStampedModel):
     title = models.CharField(max_length=140, db_index=True)
     def __str__(self): return self.title
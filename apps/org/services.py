@@ -0,0 +1,27 @@
+from apps.org.models import Department, DepartmentClosure
+
+
+# ------------------------------------------------------------
+# Department hierarchy (closure table lookups)
+# ------------------------------------------------------------
+
+def department_subtree_ids(department_id):
+    """Subquery of the department and all of its sub-units."""
+    return DepartmentClosure.objects.filter(ancestor_id=department_id).values("descendant_id")
+
+
+def department_ancestors(department_id):
+    """Ancestors of a department, nearest first (excluding itself)."""
+    return (
+        Department.objects
+        .filter(descendant_links__descendant_id=department_id, descendant_links__depth__gt=0)
+        .order_by("descendant_links__depth")
+    )
+
+
+def filter_by_department_subtree(qs, department_id, field: str = "department"):
+    """
+    Limit qs to rows whose `field` (a Department FK path) is the department
+    or any unit below it: one join on the closure table.
+    """
+    return qs.filter(**{f"{field}__ancestor_links__ancestor_id": department_id})
@@ -0,0 +1,26 @@
+from django.db.models.signals import post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from apps.common import closure
+from apps.org.models import Department, DepartmentClosure
+
+
+# ------------------------------------------------------------
+# Department closure table
+# ------------------------------------------------------------
+
+@receiver(pre_save, sender=Department)
+def guard_department_cycle(sender, instance, **kwargs):
+    if not instance._state.adding:
+        closure.check_parent(DepartmentClosure, instance.id, instance.parent_id)
+
+
+@receiver(post_save, sender=Department)
+def sync_department_closure(sender, instance, created, **kwargs):
+    closure.sync_parent(DepartmentClosure, instance.id, instance.parent_id, created)
+
+
+@receiver(pre_delete, sender=Department)
+def detach_department_children(sender, instance, **kwargs):
+    # Children are SET_NULL (become roots); the department's own rows cascade.
+    closure.detach_children(DepartmentClosure, instance.id)
@@ -15,7 +15,7 @@ class WorkflowDefinitionAdmin(admin.ModelAdmin):
 
 @admin.register(ApprovalRequest)
 class ApprovalRequestAdmin(admin.ModelAdmin):
-    list_display = ("module", "request_type", "status", "current_step_order", "created_at")
+    list_display = ("module", "request_type", "status", "current_step_order", "escalation_level", "created_at")
     list_filter = ("module", "request_type", "status")
 
 @admin.register(ApprovalAction)
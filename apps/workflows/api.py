@@ -1,4 +1,6 @@
+from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
 
 from rest_framework import serializers, viewsets
 from rest_framework.decorators import action
@@ -6,39 +8,54 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status as drf_status
 
-from apps.accounts.permissions import IsAdminOrReadOnlyHRCEOOrSupervisor, user_role_codes
-from apps.workflows.models import ApprovalRequest, WorkflowStep
-from apps.workflows.services import act_on_approval, _find_workflow
+from apps.accounts.permissions import IsAdminOrReadOnlyHRCEOOrSupervisor, RegionScopedQueryMixin
+from apps.analytics import dashboard
+from apps.audit.middleware import get_audit_context
+from apps.common.conditional import ConditionalGetMixin
+from apps.common.fastjson import FastModelSerializerMixin
+from apps.common.profiling import ProfiledSerializerMixin, ProfiledViewMixin
+from apps.common.sync import ChangesFeedMixin
+from apps.workflows import approvers
+from apps.workflows.models import ApprovalRequest
+from apps.workflows.services import act_on_approval, actionable_step_filter
 from apps.leave.models import LeaveRequest
-from apps.audit.services import write_audit
+from apps.leave.letters import schedule_approval_letter
+from apps.workflows.tasks import audit_approval_action
 
 
-class ApprovalRequestSerializer(serializers.ModelSerializer):
+class ApprovalRequestSerializer(ProfiledSerializerMixin, FastModelSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = ApprovalRequest
         fields = "__all__"
 
 
+class ApproversQuerySerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.UUIDField(), min_length=1, max_length=200)
+
+
 class ApprovalActionInputSerializer(serializers.Serializer):
     action = serializers.ChoiceField(choices=["APPROVE", "REJECT", "RETURN"])
     comment = serializers.CharField(required=False, allow_blank=True)
 
 
-class ApprovalRequestViewSet(viewsets.ReadOnlyModelViewSet):
+class ApprovalRequestViewSet(
+    ProfiledViewMixin, ConditionalGetMixin, ChangesFeedMixin, RegionScopedQueryMixin, viewsets.ReadOnlyModelViewSet
+):
     """
     Approvals Inbox + Acting endpoint.
-    Access: any authenticated user.
     Enforcement of who can act is done inside workflows.services.act_on_approval()
     """
-    queryset = ApprovalRequest.objects.all().order_by("-created_at")
-    serializer_class = ApprovalRequestSerializer
-    from apps.accounts.permissions import IsAdminOrReadOnlyHRCEOOrSupervisor
-
-class ApprovalRequestViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = ApprovalRequest.objects.all().order_by("-created_at")
     serializer_class = ApprovalRequestSerializer
     permission_classes = [IsAdminOrReadOnlyHRCEOOrSupervisor]
 
+    # Change sync (changes/?since=) is region scoped on ApprovalRequest.region
+    region_field = "region"
+    sync_entity = "ApprovalRequest"
+
+    def get_changes_queryset(self):
+        return self.scope_queryset(ApprovalRequest.objects.all(), self.request)
+
 
     @action(detail=False, methods=["get"])
     def inbox(self, request):
@@ -58,92 +75,107 @@ class ApprovalRequestViewSet(viewsets.ReadOnlyModelViewSet):
         if assigned_qs.exists():
             return Response(ApprovalRequestSerializer(assigned_qs, many=True).data)
 
-        # 2) Role/user step-based matching
-        roles = set(user_role_codes(request.user))
-        matched_ids = []
-
-        for ar in ApprovalRequest.objects.filter(status=ApprovalRequest.Status.PENDING).only(
-            "id", "module", "request_type", "region_id", "current_step_order"
-        ):
-            try:
-                wf = _find_workflow(ar.module, ar.request_type, region_id=ar.region_id)
-            except Exception:
-                # If workflow not found, skip it (shouldn't happen if seeded correctly)
-                continue
-
-            step = wf.steps.filter(step_order=ar.current_step_order).first()
-            if not step:
-                continue
-
-            if step.approver_rule == WorkflowStep.Rule.USER and step.approver_user_id == request.user.id:
-                matched_ids.append(ar.id)
-            elif step.approver_rule == WorkflowStep.Rule.ROLE and step.approver_role_code and step.approver_role_code in roles:
-                matched_ids.append(ar.id)
-
-        qs = ApprovalRequest.objects.filter(id__in=matched_ids).order_by("-created_at")
+        # 2) Role/user step-based matching (one query)
+        qs = ApprovalRequest.objects.filter(
+            actionable_step_filter(request.user),
+            status=ApprovalRequest.Status.PENDING,
+        ).order_by("-created_at")
         return Response(ApprovalRequestSerializer(qs, many=True).data)
 
+    @action(detail=False, methods=["get"])
+    def approvers(self, request):
+        """
+        Who can act on each of ?ids=<uuid>,<uuid>,... (up to 200) right now:
+        {approval id: [{id, username, name}]}. Resolved in bulk from the
+        approver index; finished requests map to [].
+        """
+        query = ApproversQuerySerializer(data={"ids": [i for i in request.query_params.get("ids", "").split(",") if i]})
+        query.is_valid(raise_exception=True)
+
+        eligible = approvers.eligible_approvers(self.get_queryset().filter(id__in=query.validated_data["ids"]))
+        user_ids = set().union(*eligible.values()) if eligible else set()
+        users = {
+            u.id: {"id": u.id, "username": u.username, "name": u.get_full_name() or u.username}
+            for u in get_user_model().objects.filter(id__in=user_ids, is_active=True).order_by("username")
+        }
+        return Response({
+            str(approval_id): [user for uid, user in users.items() if uid in ids]  # username order
+            for approval_id, ids in eligible.items()
+        })
+
     @action(detail=True, methods=["post"])
     def act(self, request, pk=None):
         """
         Approve/Reject/Return an approval request.
+
+        The transition and the leave status it implies commit together; the
+        audit trail (with the dashboard counter changes) and the approval
+        letter are queued in the same transaction and written by the job
+        workers.
         """
         ar = self.get_object()
 
         payload = ApprovalActionInputSerializer(data=request.data)
         payload.is_valid(raise_exception=True)
+        comment = payload.validated_data.get("comment", "")
 
         before = {"status": ar.status, "step": ar.current_step_order}
+        _, ip, user_agent = get_audit_context()  # the actor is request.user (JWT is authenticated in the view)
 
         try:
-            updated = act_on_approval(
-                approval=ar,
-                user=request.user,
-                action=payload.validated_data["action"],
-                comment=payload.validated_data.get("comment", ""),
-            )
+            with transaction.atomic(), dashboard.collect() as counted:
+                updated = act_on_approval(
+                    approval=ar,
+                    user=request.user,
+                    action=payload.validated_data["action"],
+                    comment=comment,
+                )
+                lr = sync_leave_status(updated, comment)
+                audit_approval_action.enqueue(
+                    approval_id=updated.id,
+                    before=before,
+                    after={"status": updated.status, "step": updated.current_step_order},
+                    note=comment,
+                    leave_id=lr.id if lr else None,
+                    leave_status=lr.status if lr else None,
+                    actor_id=request.user.pk,
+                    ip=ip,
+                    user_agent=user_agent,
+                    dashboard_changes=counted,
+                )
         except DjangoValidationError as e:
             # Convert Django ValidationError to a proper DRF response
             msg = e.message if hasattr(e, "message") else str(e)
             return Response({"error": msg}, status=drf_status.HTTP_400_BAD_REQUEST)
 
-        # Audit approval action
-        write_audit(
-            action="APPROVAL_ACTION",
-            entity_type="ApprovalRequest",
-            entity_id=updated.id,
-            before=before,
-            after={"status": updated.status, "step": updated.current_step_order},
-            note=payload.validated_data.get("comment", ""),
-        )
-
-        # ---- LEAVE STATUS SYNC (GEA workflows) ----
-        if updated.module == "leave" and updated.request_type in [
-            "leave_senior",
-            "leave_supervisor",
-            "leave_junior_regional",
-        ]:
-            lr = LeaveRequest.objects.get(id=updated.request_ref_id)
-
-            lr.last_action_note = payload.validated_data.get("comment", "")
-
-            if updated.status == ApprovalRequest.Status.APPROVED:
-                lr.status = "APPROVED"
-            elif updated.status == ApprovalRequest.Status.REJECTED:
-                lr.status = "REJECTED"
-            elif updated.status == ApprovalRequest.Status.RETURNED:
-                lr.status = "RETURNED"
-            else:
-                lr.status = "SUBMITTED"
-
-            lr.save(update_fields=["status", "last_action_note", "updated_at"])
-
-            write_audit(
-                action="SYNC_STATUS",
-                entity_type="LeaveRequest",
-                entity_id=lr.id,
-                before=None,
-                after={"status": lr.status},
-            )
-
         return Response(ApprovalRequestSerializer(updated).data)
+
+
+# ---- LEAVE STATUS SYNC (GEA workflows) ----
+
+LEAVE_WORKFLOWS = ("leave_senior", "leave_supervisor", "leave_junior_regional")
+
+
+def sync_leave_status(approval: ApprovalRequest, comment: str = ""):
+    """Mirror the approval's status onto its LeaveRequest; returns the leave (or None)."""
+    if approval.module != "leave" or approval.request_type not in LEAVE_WORKFLOWS:
+        return None
+
+    lr = LeaveRequest.objects.get(id=approval.request_ref_id)
+    dashboard.remember(lr)
+    lr.last_action_note = comment
+
+    if approval.status == ApprovalRequest.Status.APPROVED:
+        lr.status = "APPROVED"
+    elif approval.status == ApprovalRequest.Status.REJECTED:
+        lr.status = "REJECTED"
+    elif approval.status == ApprovalRequest.Status.RETURNED:
+        lr.status = "RETURNED"
+    else:
+        lr.status = "SUBMITTED"
+
+    lr.save(update_fields=["status", "last_action_note", "updated_at"])
+
+    if lr.status == "APPROVED":
+        schedule_approval_letter(lr.id)
+    return lr
@@ -0,0 +1,182 @@
+"""
+Reverse index: role code -> users holding it, partitioned by the region of
+each user's newest ACTIVE employment.
+
+Answers "who can act on this step" without scanning UserRole per request:
+eligible_approvers() resolves many ApprovalRequests in two small queries
+(active workflows and their steps) plus the index, which is built in two
+queries and then served from memory.
+
+A step with approver_in_region only admits role holders whose active
+employment is in the request's region (e.g. a regional manager for their
+own region's junior staff).
+
+The index is cached per process and in Django's cache under a generation
+number; apps.workflows.signals bumps the generation when a UserRole, Role or
+Employment changes (and again on commit). With a shared cache backend all
+workers see the bump; with the default local-memory cache each process only
+sees its own writes, so give multi-worker deployments a shared CACHES
+backend. Bulk writes skip signals: call invalidate() after them.
+
+Because a worker's copy can lag, the index only decides who is notified and
+previewed; whether a user may act is checked against the database
+(workflows.services.is_user_approver_for_step / actionable_step_filter).
+"""
+import threading
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from django.core.cache import cache
+from django.db import transaction
+
+from apps.accounts.models import UserRole
+from apps.employees.models import Employment
+from apps.workflows.models import ApprovalRequest, WorkflowDefinition, WorkflowStep
+
+GENERATION_KEY = "workflows:approver-index:generation"
+INDEX_KEY = "workflows:approver-index:{}"
+INDEX_TIMEOUT = 24 * 3600
+
+_local = threading.local()
+
+
+@dataclass
+class ApproverIndex:
+    generation: int = 0
+    role_users: dict = field(default_factory=dict)         # role code -> frozenset(user ids)
+    role_region_users: dict = field(default_factory=dict)  # (role code, region id) -> frozenset(user ids)
+    user_region: dict = field(default_factory=dict)        # user id -> region id
+
+    def users(self, role_code: str, region_id=None) -> frozenset:
+        """Active holders of role_code; only those working in region_id when given."""
+        if region_id is None:
+            return self.role_users.get(role_code, frozenset())
+        return self.role_region_users.get((role_code, region_id), frozenset())
+
+    def region_of(self, user_id):
+        return self.user_region.get(user_id)
+
+
+def build_index(generation: int = 0) -> ApproverIndex:
+    user_region = {}
+    rows = (
+        Employment.objects
+        .filter(status=Employment.Status.ACTIVE, employee__user__isnull=False)
+        .order_by("employee__user_id", "-created_at")
+        .values_list("employee__user_id", "region_id")
+    )
+    for user_id, region_id in rows.iterator(chunk_size=5000):
+        user_region.setdefault(user_id, region_id)
+
+    by_role, by_role_region = defaultdict(set), defaultdict(set)
+    for code, user_id in UserRole.objects.filter(user__is_active=True).values_list("role__code", "user_id"):
+        by_role[code].add(user_id)
+        if user_id in user_region:
+            by_role_region[(code, user_region[user_id])].add(user_id)
+
+    return ApproverIndex(
+        generation=generation,
+        role_users={code: frozenset(ids) for code, ids in by_role.items()},
+        role_region_users={key: frozenset(ids) for key, ids in by_role_region.items()},
+        user_region=user_region,
+    )
+
+
+def _generation() -> int:
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, 1, timeout=None)
+        generation = cache.get(GENERATION_KEY, 1)
+    return generation
+
+
+def get_index() -> ApproverIndex:
+    generation = _generation()
+    index = getattr(_local, "index", None)
+    if index is not None and index.generation == generation:
+        return index
+    index = cache.get(INDEX_KEY.format(generation))
+    if index is None:
+        index = build_index(generation)
+        cache.set(INDEX_KEY.format(generation), index, timeout=INDEX_TIMEOUT)
+    _local.index = index
+    return index
+
+
+def invalidate() -> None:
+    _local.index = None
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:  # not set yet (or evicted)
+        cache.add(GENERATION_KEY, 1, timeout=None)
+        cache.incr(GENERATION_KEY)
+
+
+def invalidate_on_change() -> None:
+    """For signal handlers: now, and again once the change is visible to other connections."""
+    invalidate()
+    transaction.on_commit(invalidate)
+
+
+# ------------------------------------------------------------
+# Resolution
+# ------------------------------------------------------------
+
+def eligible_user_ids(approval: ApprovalRequest, step: WorkflowStep, index: ApproverIndex = None) -> frozenset:
+    """Users who may act on `step` of `approval` (see services.is_user_approver_for_step)."""
+    if approval.assigned_to_user_id:
+        return frozenset([approval.assigned_to_user_id])
+    if step.approver_rule == WorkflowStep.Rule.USER:
+        return frozenset([step.approver_user_id]) if step.approver_user_id else frozenset()
+    if step.approver_rule == WorkflowStep.Rule.ROLE and step.approver_role_code:
+        index = index or get_index()
+        if step.approver_in_region:
+            return index.users(step.approver_role_code, approval.region_id) if approval.region_id else frozenset()
+        return index.users(step.approver_role_code)
+    return frozenset()
+
+
+def current_steps(approvals) -> dict:
+    """
+    {approval id: WorkflowStep} of each request's current step, resolving the
+    workflow like services._find_workflow (region-specific first). Two queries.
+    """
+    workflows = {}
+    for wf in WorkflowDefinition.objects.filter(is_active=True).order_by("id").values("id", "module", "code", "region_id"):
+        workflows.setdefault((wf["module"], wf["code"], wf["region_id"]), wf["id"])
+    steps = {
+        (step.workflow_id, step.step_order): step
+        for step in WorkflowStep.objects.filter(workflow_id__in=list(workflows.values()))
+    }
+
+    resolved = {}
+    for approval in approvals:
+        workflow_id = None
+        if approval.region_id:
+            workflow_id = workflows.get((approval.module, approval.request_type, approval.region_id))
+        if workflow_id is None:
+            workflow_id = workflows.get((approval.module, approval.request_type, None))
+        step = steps.get((workflow_id, approval.current_step_order))
+        if step is not None:
+            resolved[approval.id] = step
+    return resolved
+
+
+def eligible_approvers(approvals, steps: dict = None) -> dict:
+    """
+    {approval id: frozenset(user ids)} for many requests in one call; empty
+    for requests that are not pending or have no current step. Pass `steps`
+    when the caller already has current_steps() for them.
+    """
+    approvals = list(approvals)
+    pending = [a for a in approvals if a.status == ApprovalRequest.Status.PENDING]
+    if steps is None:
+        steps = current_steps(pending) if pending else {}
+    index = get_index() if steps else None
+
+    result = {approval.id: frozenset() for approval in approvals}
+    for approval in pending:
+        step = steps.get(approval.id)
+        if step is not None:
+            result[approval.id] = eligible_user_ids(approval, step, index)
+    return result
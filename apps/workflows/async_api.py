@@ -0,0 +1,46 @@
+"""Async variants of ApprovalRequestViewSet reads (routed by geahr.asgi_urls)."""
+from rest_framework import exceptions
+
+from apps.common.async_views import AsyncReadView, json_response
+from apps.common.conditional import detail_etag, not_modified, with_validators
+from apps.workflows.api import ApprovalRequestSerializer, ApprovalRequestViewSet
+from apps.workflows.models import ApprovalRequest
+from apps.workflows.services import aactionable_step_filter
+
+
+class ApprovalInboxAsyncView(AsyncReadView):
+    """GET /api/approvals/requests/inbox/ -- see ApprovalRequestViewSet.inbox."""
+
+    permission_classes = ApprovalRequestViewSet.permission_classes
+    fallback = ApprovalRequestViewSet.as_view({"get": "inbox"})
+
+    async def get(self, request, *args, **kwargs):
+        pending = ApprovalRequest.objects.filter(status=ApprovalRequest.Status.PENDING).order_by("-created_at")
+
+        # 1) Direct assignment wins (fetched directly: no separate exists() query)
+        assigned = [ar async for ar in pending.filter(assigned_to_user=request.user)]
+        if assigned:
+            return json_response(ApprovalRequestSerializer(assigned, many=True).data)
+
+        # 2) Role/user step-based matching
+        actionable = [ar async for ar in pending.filter(await aactionable_step_filter(request.user))]
+        return json_response(ApprovalRequestSerializer(actionable, many=True).data)
+
+
+class ApprovalDetailAsyncView(AsyncReadView):
+    """GET /api/approvals/requests/<pk>/ -- see ApprovalRequestViewSet.retrieve."""
+
+    permission_classes = ApprovalRequestViewSet.permission_classes
+    fallback = ApprovalRequestViewSet.as_view({"get": "retrieve"})
+
+    async def get(self, request, pk=None, *args, **kwargs):
+        approval = await ApprovalRequestViewSet.queryset.filter(pk=pk).afirst()
+        if approval is None:
+            raise exceptions.NotFound("No ApprovalRequest matches the given query.")
+
+        etag = detail_etag(approval)
+        last_modified = int(approval.updated_at.timestamp())
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+        return with_validators(json_response(ApprovalRequestSerializer(approval).data), etag, last_modified)
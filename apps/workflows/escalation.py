@@ -0,0 +1,155 @@
+"""
+SLA tracking for pending approvals (`manage.py escalate_overdue_approvals`).
+
+A request that has sat on a step with sla_hours for longer than that (by
+ApprovalRequest.updated_at, which every transition touches) is overdue.
+Each breach bumps escalation_level and touches updated_at, so the clock
+restarts and the next breach comes one SLA period later:
+
+- the first SLA_REMINDERS_BEFORE_ESCALATION breaches REMIND the step's
+  approvers;
+- later ones ESCALATE to the holders of the step's escalate_to_role_code
+  (steps without one keep reminding).
+
+Every breach is recorded as an ApprovalAction without an actor plus an
+AuditLog row, and the recipients get a Notification (sent in the next
+digest).
+
+Overdue requests are found with one range scan of the (status, updated_at,
+id) index: PENDING and older than the shortest SLA, with the per-step
+cutoffs as a residual filter. They are processed in keyset-paginated
+batches of SLA_BATCH_SIZE, each in its own transaction (rows locked with
+SKIP LOCKED where the database supports it), so the cost follows the
+number of overdue requests, not the size of the backlog.
+"""
+from collections import Counter as Tally, defaultdict
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from apps.audit.models import AuditLog
+from apps.audit.services import AUDIT_WRITES
+from apps.notifications.models import Notification
+from apps.notifications.services import approval_message, queue_notifications
+from apps.workflows import approvers
+from apps.workflows.metrics import APPROVAL_SLA_BREACHES
+from apps.workflows.models import ApprovalAction, ApprovalRequest, WorkflowStep
+from apps.workflows.services import _active_workflows, _regional_overrides, _workflow_q
+
+REMIND = "REMIND"
+ESCALATE = "ESCALATE"
+
+
+@dataclass
+class EscalationResult:
+    reminded: int = 0
+    escalated: int = 0
+
+
+def overdue_queryset(now=None):
+    """PENDING requests past their current step's SLA (none if no step has one)."""
+    now = now or timezone.now()
+    workflows = {wf["id"]: wf for wf in _active_workflows()}
+    rows = WorkflowStep.objects.filter(workflow_id__in=list(workflows), sla_hours__isnull=False).values_list(
+        "workflow_id", "step_order", "sla_hours"
+    )
+    by_sla = defaultdict(set)  # (workflow id, sla hours) -> step orders
+    for workflow_id, step_order, sla_hours in rows:
+        by_sla[(workflow_id, sla_hours)].add(step_order)
+    if not by_sla:
+        return ApprovalRequest.objects.none()
+
+    regional = _regional_overrides(workflows.values())
+    match = Q(pk__in=[])
+    for (workflow_id, sla_hours), orders in by_sla.items():
+        match |= _workflow_q(workflows[workflow_id], regional) & Q(
+            current_step_order__in=orders, updated_at__lt=now - timedelta(hours=sla_hours),
+        )
+    shortest = min(sla_hours for _, sla_hours in by_sla)
+    return ApprovalRequest.objects.filter(
+        match, status=ApprovalRequest.Status.PENDING, updated_at__lt=now - timedelta(hours=shortest),
+    )
+
+
+def escalate_overdue(batch_size: int = None, now=None, dry_run: bool = False) -> EscalationResult:
+    batch_size = batch_size or getattr(settings, "SLA_BATCH_SIZE", 500)
+    now = now or timezone.now()
+    overdue = overdue_queryset(now).order_by("updated_at", "id")
+    result = EscalationResult()
+    cursor = None
+    while True:
+        with transaction.atomic():
+            qs = overdue
+            if cursor:
+                qs = qs.filter(Q(updated_at__gt=cursor[0]) | Q(updated_at=cursor[0], id__gt=cursor[1]))
+            batch = list(qs.select_for_update(skip_locked=True)[:batch_size])
+            if not batch:
+                break
+            cursor = (batch[-1].updated_at, batch[-1].id)
+            tally = _handle_batch(batch, now, dry_run)
+        result.reminded += sum(n for (_, kind), n in tally.items() if kind == REMIND)
+        result.escalated += sum(n for (_, kind), n in tally.items() if kind == ESCALATE)
+        if len(batch) < batch_size:
+            break
+    return result
+
+
+def _handle_batch(batch, now, dry_run) -> Tally:
+    """Record and notify one batch of overdue requests; returns {(workflow, REMIND/ESCALATE): n}."""
+    steps = approvers.current_steps(batch)
+    eligible = approvers.eligible_approvers(batch, steps=steps)
+    index = approvers.get_index()
+    reminders = getattr(settings, "SLA_REMINDERS_BEFORE_ESCALATION", 1)
+
+    actions, audits, notifications, handled = [], [], [], []
+    tally = Tally()
+    for approval in batch:
+        step = steps.get(approval.id)
+        if step is None:
+            continue
+        level = approval.escalation_level + 1
+        if step.escalate_to_role_code and level > reminders:
+            kind, event = ESCALATE, Notification.Event.APPROVAL_ESCALATED
+            recipients = index.users(step.escalate_to_role_code)
+        else:
+            kind, event = REMIND, Notification.Event.APPROVAL_OVERDUE
+            recipients = eligible[approval.id]
+        idle_hours = int((now - approval.updated_at).total_seconds() // 3600)
+        note = f"No action for {idle_hours}h (SLA {step.sla_hours}h, breach {level})"
+
+        handled.append(approval.id)
+        tally[(approval.request_type, kind)] += 1
+        actions.append(ApprovalAction(
+            request=approval, step_order=approval.current_step_order, actor=None, action=kind, comment=note,
+        ))
+        audits.append(AuditLog(
+            action=f"APPROVAL_{kind}", entity_type="ApprovalRequest", entity_id=approval.id,
+            before_json={"escalation_level": level - 1},
+            after_json={"escalation_level": level, "step": approval.current_step_order, "notified": sorted(recipients)},
+            note=note,
+        ))
+        message = f"Overdue ({idle_hours}h): {approval_message(approval)}"
+        notifications += [
+            Notification(recipient_id=user_id, event=event, approval=approval, message=message[:255])
+            for user_id in recipients
+        ]
+
+    if dry_run or not handled:
+        return tally
+
+    ApprovalAction.objects.bulk_create(actions)
+    AuditLog.objects.bulk_create(audits)
+    AUDIT_WRITES.inc(len(audits), entity_type="ApprovalRequest", outcome="ok")
+    queue_notifications(notifications)
+    ApprovalRequest.objects.filter(id__in=handled).update(escalation_level=F("escalation_level") + 1, updated_at=now)
+    transaction.on_commit(lambda: _count_breaches(tally))
+    return tally
+
+
+def _count_breaches(tally) -> None:
+    for (workflow, kind), n in tally.items():
+        APPROVAL_SLA_BREACHES.inc(n, workflow=workflow, kind=kind)
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from apps.workflows.escalation import escalate_overdue
+
+
+class Command(BaseCommand):
+    help = "Remind approvers of, or escalate, pending approvals past their step's SLA (run from cron)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None, help="Requests per transaction (default: SLA_BATCH_SIZE)")
+        parser.add_argument("--dry-run", action="store_true", help="Count overdue requests without recording anything")
+
+    def handle(self, *args, **options):
+        result = escalate_overdue(batch_size=options["batch_size"], dry_run=options["dry_run"])
+        prefix = "Would have " if options["dry_run"] else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {prefix}reminded {result.reminded} and escalated {result.escalated} overdue approvals"
+        ))
@@ -0,0 +1,45 @@
+"""Workflow metrics: approval transitions and the pending backlog per step."""
+from django.db import transaction
+from django.db.models import Count
+
+from apps.common.metrics import CallbackGauge, Counter
+from apps.workflows.models import ApprovalRequest
+
+APPROVAL_TRANSITIONS = Counter(
+    "geahr_approval_transitions_total",
+    "Committed act_on_approval() transitions, by action and resulting status.",
+    ["workflow", "action", "status"],
+)
+
+APPROVAL_SLA_BREACHES = Counter(
+    "geahr_approval_sla_breaches_total",
+    "Overdue approvals handled by the SLA scheduler, by workflow and kind (REMIND / ESCALATE).",
+    ["workflow", "kind"],
+)
+
+
+def record_transition(approval: ApprovalRequest, action: str) -> None:
+    """Count the transition once the surrounding transaction commits."""
+    labels = {"workflow": approval.request_type, "action": action, "status": approval.status}
+    transaction.on_commit(lambda: APPROVAL_TRANSITIONS.inc(**labels))
+
+
+def pending_approvals():
+    rows = (
+        ApprovalRequest.objects
+        .filter(status=ApprovalRequest.Status.PENDING)
+        .values("module", "request_type", "current_step_order")
+        .annotate(n=Count("id"))
+        .order_by("module", "request_type", "current_step_order")
+    )
+    for row in rows:
+        labels = {"module": row["module"], "workflow": row["request_type"], "step": row["current_step_order"]}
+        yield labels, row["n"]
+
+
+PENDING_APPROVALS = CallbackGauge(
+    "geahr_pending_approvals",
+    "Pending approval requests per workflow and current step (computed at scrape).",
+    ["module", "workflow", "step"],
+    callback=pending_approvals,
+)
@@ -0,0 +1,20 @@
+# Generated by Django 6.0.2 on 2026-10-19 11:52
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('org', '0002_department_closure'),
+        ('workflows', '0002_approvalrequest_assigned_to_user'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='approvalrequest',
+            index=models.Index(fields=['updated_at', 'id'], name='workflows_a_updated_83391b_idx'),
+        ),
+    ]
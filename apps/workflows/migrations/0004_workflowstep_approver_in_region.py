@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-19 12:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflows', '0003_approvalrequest_updated_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workflowstep',
+            name='approver_in_region',
+            field=models.BooleanField(default=False),
+        ),
+    ]
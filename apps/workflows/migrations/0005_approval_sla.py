@@ -0,0 +1,35 @@
+# Generated by Django 6.0.2 on 2026-10-19 12:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('org', '0002_department_closure'),
+        ('workflows', '0004_workflowstep_approver_in_region'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='approvalrequest',
+            name='escalation_level',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='workflowstep',
+            name='escalate_to_role_code',
+            field=models.CharField(blank=True, max_length=60),
+        ),
+        migrations.AddField(
+            model_name='workflowstep',
+            name='sla_hours',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='approvalrequest',
+            index=models.Index(fields=['status', 'updated_at', 'id'], name='workflows_a_status_dd996d_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 6.0.2 on 2026-10-19 12:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workflows', '0005_approval_sla'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='approvalaction',
+            index=models.Index(fields=['updated_at', 'id'], name='workflows_a_updated_3c6ddd_idx'),
+        ),
+    ]
@@ -27,9 +27,16 @@ class WorkflowStep(UUIDModel, TimeStampedModel):
     approver_rule = models.CharField(max_length=20, choices=Rule.choices, default=Rule.ROLE)
     approver_role_code = models.CharField(max_length=60, blank=True)  # e.g., CEO, HR_HO, REGIONAL_MANAGER
     approver_user = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL)
+    # ROLE rule only: the role holder must work in the request's region
+    approver_in_region = models.BooleanField(default=False)
 
     required = models.BooleanField(default=True)
 
+    # SLA (apps.workflows.escalation): a request idle on this step for sla_hours
+    # reminds its approvers, then escalates to escalate_to_role_code holders.
+    sla_hours = models.PositiveIntegerField(null=True, blank=True)  # None: no SLA
+    escalate_to_role_code = models.CharField(max_length=60, blank=True)  # blank: reminders only
+
     class Meta:
         unique_together = ("workflow", "step_order")
         ordering = ["step_order"]
@@ -66,6 +73,13 @@ class ApprovalRequest(UUIDModel, TimeStampedModel):
 
     status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
     current_step_order = models.PositiveIntegerField(default=1)
+    escalation_level = models.PositiveSmallIntegerField(default=0)  # SLA breaches on the current step
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["updated_at", "id"]),  # change sync
+            models.Index(fields=["status", "updated_at", "id"]),  # overdue scan
+        ]
 
 
 class ApprovalAction(UUIDModel, TimeStampedModel):
@@ -73,5 +87,10 @@ class ApprovalAction(UUIDModel, TimeStampedModel):
     step_order = models.PositiveIntegerField()
 
     actor = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, on_delete=models.SET_NULL)
-    action = models.CharField(max_length=20)  # APPROVE/REJECT/RETURN
+    action = models.CharField(max_length=20)  # APPROVE/REJECT/RETURN, REMIND/ESCALATE (SLA, no actor)
     comment = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["updated_at", "id"]),  # BI export
+        ]
@@ -1,9 +1,18 @@
 from __future__ import annotations
 
+import operator
+from collections import defaultdict
+from functools import reduce
+
 from django.core.exceptions import ValidationError
 from django.db import transaction
+from django.db.models import Q
 
-from apps.accounts.permissions import user_role_codes
+from apps.accounts.permissions import auser_role_codes, user_role_codes
+from apps.analytics import dashboard
+from apps.employees.models import Employment
+from apps.notifications.services import queue_approval_step
+from apps.workflows.metrics import record_transition
 from apps.workflows.models import (
     WorkflowDefinition,
     WorkflowStep,
@@ -50,6 +59,7 @@ def _find_workflow(module: str, code: str, region_id=None) -> WorkflowDefinition
 # Approval creation
 # ---------------------------------------------------------------------
 
+@transaction.atomic
 def create_approval(
     module: str,
     request_type: str,
@@ -60,6 +70,7 @@ def create_approval(
 ) -> ApprovalRequest:
     """
     Create an ApprovalRequest and set it to the first workflow step.
+    Its approvers are notified once the transaction commits.
     """
     wf = _find_workflow(module, request_type, region_id=region_id)
     first_step = wf.steps.order_by("step_order").first()
@@ -76,6 +87,7 @@ def create_approval(
         current_step_order=first_step.step_order,
         assigned_to_user=assigned_to_user,
     )
+    queue_approval_step(approval)
     return approval
 
 
@@ -83,6 +95,29 @@ def create_approval(
 # Authorization helpers
 # ---------------------------------------------------------------------
 
+# Authorization reads the user's region from the database (one indexed
+# query) rather than from the approver index: another worker's copy of the
+# index may not have seen an employment change yet. The index only drives
+# notifications and previews.
+
+def _active_region(user_id):
+    """Query for the region of the user's newest ACTIVE employment."""
+    return (
+        Employment.objects
+        .filter(employee__user_id=user_id, status=Employment.Status.ACTIVE)
+        .order_by("-created_at")
+        .values_list("region_id", flat=True)
+    )
+
+
+def user_region_id(user):
+    return _active_region(user.id).first()
+
+
+async def auser_region_id(user):
+    return await _active_region(user.id).afirst()
+
+
 def is_user_approver_for_step(user, approval: ApprovalRequest, step: WorkflowStep) -> bool:
     """
     Authorization rules:
@@ -90,6 +125,7 @@ def is_user_approver_for_step(user, approval: ApprovalRequest, step: WorkflowSte
     2) Else:
        - If step rule is USER => step.approver_user must match user
        - If step rule is ROLE => step.approver_role_code must be in user's roles
+         (and, if step.approver_in_region, the user must work in approval.region)
     """
     if not user or not user.is_authenticated:
         return False
@@ -103,11 +139,98 @@ def is_user_approver_for_step(user, approval: ApprovalRequest, step: WorkflowSte
 
     if step.approver_rule == WorkflowStep.Rule.ROLE and step.approver_role_code:
         roles = set(user_role_codes(user))
-        return step.approver_role_code in roles
+        if step.approver_role_code not in roles:
+            return False
+        if step.approver_in_region:
+            return approval.region_id is not None and user_region_id(user) == approval.region_id
+        return True
 
     return False
 
 
+def _actionable_steps(user, roles):
+    return WorkflowStep.objects.filter(workflow__is_active=True).filter(
+        Q(approver_rule=WorkflowStep.Rule.ROLE, approver_role_code__in=roles)
+        | Q(approver_rule=WorkflowStep.Rule.USER, approver_user_id=user.id)
+    ).values_list("workflow_id", "step_order", "approver_rule", "approver_in_region")
+
+
+def _active_workflows():
+    return WorkflowDefinition.objects.filter(is_active=True).values("id", "module", "code", "region_id")
+
+
+def _regional_overrides(workflows) -> dict:
+    """(module, code) -> regions that have their own definition."""
+    regional = defaultdict(set)
+    for wf in workflows:
+        if wf["region_id"]:
+            regional[(wf["module"], wf["code"])].add(wf["region_id"])
+    return regional
+
+
+def _workflow_q(wf, regional) -> Q:
+    """Q over ApprovalRequest for the requests _find_workflow would resolve to `wf`."""
+    q = Q(module=wf["module"], request_type=wf["code"])
+    if wf["region_id"]:
+        q &= Q(region_id=wf["region_id"])
+    elif regional.get((wf["module"], wf["code"])):
+        q &= ~Q(region_id__in=regional[(wf["module"], wf["code"])])
+    return q
+
+
+def _needs_region(step_rows) -> bool:
+    return any(rule == WorkflowStep.Rule.ROLE and in_region for _, _, rule, in_region in step_rows)
+
+
+def _actionable_q(workflows, step_rows, user_region_id=None) -> Q:
+    orders = defaultdict(set)
+    in_region_orders = defaultdict(set)  # ROLE steps limited to the approver's own region
+    for workflow_id, step_order, rule, in_region in step_rows:
+        if rule == WorkflowStep.Rule.ROLE and in_region:
+            in_region_orders[workflow_id].add(step_order)
+        else:
+            orders[workflow_id].add(step_order)
+
+    regional = _regional_overrides(workflows)
+    match = Q(pk__in=[])
+    for wf in workflows:
+        steps = []
+        if wf["id"] in orders:
+            steps.append(Q(current_step_order__in=orders[wf["id"]]))
+        if wf["id"] in in_region_orders and user_region_id:
+            steps.append(Q(current_step_order__in=in_region_orders[wf["id"]], region_id=user_region_id))
+        if not steps:
+            continue
+        match |= _workflow_q(wf, regional) & reduce(operator.or_, steps)
+    return match
+
+
+def actionable_step_filter(user) -> Q:
+    """
+    Q over ApprovalRequest matching requests whose *current* step the user may
+    act on through a ROLE or USER rule, resolving each request's workflow the
+    way _find_workflow does (region-specific definition first, else global).
+
+    Built from the (small) workflow tables in two queries, so the inbox is a
+    single query instead of one workflow + step lookup per pending request.
+    The user's region is read (one more query) only when an
+    approver_in_region step applies.
+    """
+    roles = set(user_role_codes(user))
+    step_rows = list(_actionable_steps(user, roles))
+    region_id = user_region_id(user) if _needs_region(step_rows) else None
+    return _actionable_q(list(_active_workflows()), step_rows, region_id)
+
+
+async def aactionable_step_filter(user) -> Q:
+    """actionable_step_filter() for async views."""
+    roles = set(await auser_role_codes(user))
+    workflows = [wf async for wf in _active_workflows()]
+    step_rows = [row async for row in _actionable_steps(user, roles)]
+    region_id = await auser_region_id(user) if _needs_region(step_rows) else None
+    return _actionable_q(workflows, step_rows, region_id)
+
+
 # ---------------------------------------------------------------------
 # Act on approval
 # ---------------------------------------------------------------------
@@ -148,15 +271,19 @@ def act_on_approval(*, approval: ApprovalRequest, user, action: str, comment: st
         comment=comment or "",
     )
 
+    dashboard.remember(approval)
+
     # Terminal outcomes
     if action == "REJECT":
         approval.status = ApprovalRequest.Status.REJECTED
         approval.save(update_fields=["status", "updated_at"])
+        record_transition(approval, action)
         return approval
 
     if action == "RETURN":
         approval.status = ApprovalRequest.Status.RETURNED
         approval.save(update_fields=["status", "updated_at"])
+        record_transition(approval, action)
         return approval
 
     # APPROVE: move to next step or finish
@@ -166,11 +293,15 @@ def act_on_approval(*, approval: ApprovalRequest, user, action: str, comment: st
         approval.status = ApprovalRequest.Status.APPROVED
         approval.assigned_to_user = None
         approval.save(update_fields=["status", "assigned_to_user", "updated_at"])
+        record_transition(approval, action)
         return approval
 
     # Move forward
     approval.current_step_order = next_step.step_order
     approval.assigned_to_user = None  # clear assignment; later steps can be role-based
+    approval.escalation_level = 0  # the new step's SLA clock starts now
 
-    approval.save(update_fields=["current_step_order", "assigned_to_user", "updated_at"])
+    approval.save(update_fields=["current_step_order", "assigned_to_user", "escalation_level", "updated_at"])
+    record_transition(approval, action)
+    queue_approval_step(approval)
     return approval
@@ -0,0 +1,38 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.accounts.models import Role, UserRole
+from apps.common.sync import track_deletes
+from apps.employees.models import Employment
+from apps.workflows import approvers
+from apps.workflows.models import ApprovalRequest
+
+
+# ------------------------------------------------------------
+# Sync tombstones
+# ------------------------------------------------------------
+
+track_deletes(ApprovalRequest, "ApprovalRequest", lambda approval: (None, [approval.region_id]))
+
+
+# ------------------------------------------------------------
+# Approver index
+# ------------------------------------------------------------
+
+@receiver(post_save, sender=UserRole)
+@receiver(post_delete, sender=UserRole)
+@receiver(post_save, sender=Role)
+@receiver(post_delete, sender=Role)
+@receiver(post_save, sender=Employment)
+@receiver(post_delete, sender=Employment)
+@receiver(post_delete, sender=get_user_model())
+def approvers_changed(sender, **kwargs):
+    approvers.invalidate_on_change()
+
+
+@receiver(post_save, sender=get_user_model())
+def approver_user_saved(sender, instance, created, update_fields=None, **kwargs):
+    # Only activation matters to the index; logins save last_login on every request.
+    if not created and (update_fields is None or "is_active" in update_fields):
+        approvers.invalidate_on_change()
@@ -0,0 +1,37 @@
+from django.contrib.auth import get_user_model
+
+from apps.analytics import dashboard
+from apps.audit.services import write_audit
+from apps.common import jobs
+
+
+@jobs.task("workflows.audit_approval_action", priority=5)
+def audit_approval_action(
+    approval_id, before, after, note="", leave_id=None, leave_status=None, actor_id=None, ip="", user_agent="",
+    dashboard_changes=(),
+):
+    """
+    Audit trail of one act_on_approval() call (and the leave status it
+    synced), plus the dashboard counter changes the two saves recorded.
+    """
+    dashboard.apply_changes(dashboard_changes)
+    actor = get_user_model().objects.filter(pk=actor_id).first() if actor_id else None
+    context = (actor, ip, user_agent)
+    write_audit(
+        action="APPROVAL_ACTION",
+        entity_type="ApprovalRequest",
+        entity_id=approval_id,
+        before=before,
+        after=after,
+        note=note,
+        context=context,
+    )
+    if leave_id:
+        write_audit(
+            action="SYNC_STATUS",
+            entity_type="LeaveRequest",
+            entity_id=leave_id,
+            before=None,
+            after={"status": leave_status},
+            context=context,
+        )
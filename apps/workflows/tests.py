@@ -1,3 +1,354 @@
-from django.test import TestCase
+import io
+import json
+import uuid
+from datetime import timedelta
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import resolve
+from django.utils import timezone
+
+from apps.accounts.models import Role, UserRole
+from apps.audit.middleware import get_audit_context
+from apps.audit.models import AuditLog
+from apps.common import jobs, metrics
+from apps.common.budgets import APIBudgetMixin, Budget
+from apps.common.models import Job
+from apps.common.testing import SeededDataMixin
+from apps.employees.models import Employment
+from apps.leave.models import LeaveRequest
+from apps.notifications.models import Notification
+from apps.workflows import approvers
+from apps.workflows.async_api import ApprovalDetailAsyncView, ApprovalInboxAsyncView
+from apps.workflows.escalation import escalate_overdue, overdue_queryset
+from apps.workflows.metrics import APPROVAL_TRANSITIONS, pending_approvals, record_transition
+from apps.workflows.models import ApprovalAction, ApprovalRequest, WorkflowDefinition, WorkflowStep
+from apps.workflows.services import _find_workflow, act_on_approval, actionable_step_filter, is_user_approver_for_step
+
+
+class ApprovalAPIBudgetTests(APIBudgetMixin, TestCase):
+    """Query / latency budgets of the approval endpoints."""
+
+    budgets = {
+        "approval_list": Budget(queries=3, p95_ms=60),
+        "approval_detail": Budget(queries=2, p95_ms=40),
+        "inbox_role": Budget(queries=5, p95_ms=80),
+        "inbox_regional": Budget(queries=3, p95_ms=80),
+        "approval_act": Budget(queries=13, p95_ms=80),
+    }
+
+    def test_inbox_query_count_does_not_grow_with_pending_requests(self):
+        scenario = self.scenario("inbox_role")
+        template = ApprovalRequest.objects.filter(status="PENDING").first()
+        ApprovalRequest.objects.bulk_create([
+            ApprovalRequest(
+                module=template.module, request_type=template.request_type, request_ref_id=template.request_ref_id,
+                region_id=template.region_id, status="PENDING", current_step_order=template.current_step_order,
+            )
+            for _ in range(200)
+        ])
+        self.assertWithinBudget(scenario, self.budgets["inbox_role"])
+
+
+class ApprovalActJobsTests(SeededDataMixin, TestCase):
+    """act commits the transition; the audit trail is written by the job workers."""
+
+    def test_audit_is_queued_with_the_transition(self):
+        scenario = self.scenario("approval_act")
+        client = self.client_for(scenario.user)
+        approval_id = scenario.path.split("/")[-3]
+        audits = AuditLog.objects.filter(entity_id=approval_id)
+
+        response = client.post(
+            scenario.path, {"action": "REJECT", "comment": "No cover"}, format="json",
+            HTTP_X_FORWARDED_FOR="203.0.113.7, 10.0.0.1", HTTP_USER_AGENT="GEA mobile",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(get_audit_context(), (None, "", ""))  # cleared once the request is done
+        approval = ApprovalRequest.objects.get(id=approval_id)
+        self.assertEqual(LeaveRequest.objects.get(id=approval.request_ref_id).status, "REJECTED")
+        self.assertFalse(audits.exists())
+        self.assertEqual(
+            sorted(Job.objects.values_list("task", flat=True)),
+            ["analytics.record_step_dwell", "workflows.audit_approval_action"],
+        )
+
+        self.assertEqual(jobs.run_pending(), 2)
+        audit = audits.get()
+        self.assertEqual((audit.action, audit.actor, audit.note), ("APPROVAL_ACTION", self.user(scenario.user), "No cover"))
+        self.assertEqual(audit.after_json, {"status": "REJECTED", "step": approval.current_step_order})
+        self.assertEqual((audit.ip_address, audit.user_agent), ("203.0.113.7", "GEA mobile"))
+        self.assertTrue(AuditLog.objects.filter(entity_id=approval.request_ref_id, action="SYNC_STATUS").exists())
+
+    def test_failed_transition_queues_nothing(self):
+        scenario = self.scenario("approval_act")
+        client = self.client_for("admin")  # may write, but is not the step's approver
+        response = client.post(scenario.path, {"action": "APPROVE"}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Job.objects.exists())
+
+
+class ActionableStepFilterTests(SeededDataMixin, TestCase):
+    """The one-query inbox matcher agrees with per-request workflow resolution."""
+
+    def expected_ids(self, user):
+        roles = set(UserRole.objects.filter(user=user).values_list("role__code", flat=True))
+        ids = set()
+        for ar in ApprovalRequest.objects.filter(status="PENDING"):
+            wf = _find_workflow(ar.module, ar.request_type, region_id=ar.region_id)
+            step = wf.steps.filter(step_order=ar.current_step_order).first()
+            if not step:
+                continue
+            if step.approver_rule == WorkflowStep.Rule.USER and step.approver_user_id == user.id:
+                ids.add(ar.id)
+            elif step.approver_rule == WorkflowStep.Rule.ROLE and step.approver_role_code in roles:
+                ids.add(ar.id)
+        return ids
+
+    def actual_ids(self, user):
+        return set(
+            ApprovalRequest.objects.filter(actionable_step_filter(user), status="PENDING").values_list("id", flat=True)
+        )
+
+    def test_matches_role_and_user_rules_with_regional_override(self):
+        ceo, manager = self.user("ceo"), self.user("regional_manager")
+        region_id = ApprovalRequest.objects.filter(request_type="leave_supervisor").values_list("region_id", flat=True).first()
+
+        # In one region the supervisor workflow goes to the regional manager, then a named user.
+        override = WorkflowDefinition.objects.create(
+            module="leave", code="leave_supervisor", name="Regional override", region_id=region_id,
+        )
+        WorkflowStep.objects.create(workflow=override, step_order=1, approver_rule="ROLE", approver_role_code="REGIONAL_MANAGER")
+        WorkflowStep.objects.create(workflow=override, step_order=2, approver_rule="USER", approver_user=ceo)
+
+        for user in (ceo, manager, self.user("hr"), self.user("admin")):
+            with self.subTest(user=user.username):
+                self.assertEqual(self.actual_ids(user), self.expected_ids(user))
+
+
+class ApproverIndexTests(SeededDataMixin, TestCase):
+    """Bulk approver resolution from the role index agrees with is_user_approver_for_step."""
+
+    def setUp(self):
+        approvers.invalidate()
+
+    def brute_force(self, approval):
+        wf = _find_workflow(approval.module, approval.request_type, region_id=approval.region_id)
+        step = wf.steps.get(step_order=approval.current_step_order)
+        users = get_user_model().objects.filter(is_active=True)
+        return {u.id for u in users if is_user_approver_for_step(u, approval, step)}
+
+    def regional_step(self):
+        step = WorkflowStep.objects.get(workflow__code="leave_junior_regional", workflow__region__isnull=True, step_order=1)
+        step.approver_in_region = True
+        step.save(update_fields=["approver_in_region"])
+        return step
+
+    def test_bulk_resolution_matches_per_request_checks(self):
+        self.regional_step()
+        pending = list(ApprovalRequest.objects.filter(status="PENDING").order_by("id")[:40])
+        approvers.get_index()
+        with self.assertNumQueries(2):  # workflows + steps
+            eligible = approvers.eligible_approvers(pending)
+        for approval in pending[:8]:
+            with self.subTest(approval=approval.request_type):
+                self.assertEqual(set(eligible[approval.id]), self.brute_force(approval))
+
+    def test_in_region_step_limits_role_holders_and_inbox(self):
+        self.regional_step()
+        manager = self.user("regional_manager")
+        region_id = approvers.get_index().region_of(manager.id)
+        pending = ApprovalRequest.objects.filter(status="PENDING", request_type="leave_junior_regional", current_step_order=1)
+        own = pending.filter(region_id=region_id).first()
+        other = pending.exclude(region_id=region_id).first()
+
+        eligible = approvers.eligible_approvers([own, other])
+        self.assertEqual(eligible[own.id], {manager.id})
+        self.assertNotIn(manager.id, eligible[other.id])
+        self.assertTrue(eligible[other.id])
+
+        inbox = ApprovalRequest.objects.filter(actionable_step_filter(manager), status="PENDING")
+        self.assertTrue(inbox.filter(id=own.id).exists())
+        self.assertFalse(inbox.filter(request_type="leave_junior_regional").exclude(region_id=region_id).exists())
+
+    def test_authorization_reads_the_region_from_the_database(self):
+        # Another worker's index has not seen the move: bulk update, no signals.
+        step = self.regional_step()
+        manager = self.user("regional_manager")
+        region_id = approvers.get_index().region_of(manager.id)
+        own = ApprovalRequest.objects.filter(
+            status="PENDING", request_type="leave_junior_regional", current_step_order=1, region_id=region_id,
+        ).first()
+        new_region = ApprovalRequest.objects.exclude(region_id=region_id).values_list("region_id", flat=True).first()
+        Employment.objects.filter(employee__user=manager).update(region_id=new_region)
+        self.assertEqual(approvers.get_index().region_of(manager.id), region_id)  # stale
+
+        self.assertFalse(is_user_approver_for_step(manager, own, step))
+        inbox = ApprovalRequest.objects.filter(actionable_step_filter(manager), status="PENDING")
+        self.assertFalse(inbox.filter(id=own.id).exists())
+
+    def test_role_change_invalidates_index(self):
+        approval = ApprovalRequest.objects.create(module="leave", request_type="leave_supervisor", request_ref_id=uuid.uuid4())
+        hr = self.user("hr")
+        self.assertNotIn(hr.id, approvers.eligible_approvers([approval])[approval.id])
+        UserRole.objects.create(user=hr, role=Role.objects.get(code="CEO"))
+        self.assertIn(hr.id, approvers.eligible_approvers([approval])[approval.id])
+
+    def test_approvers_endpoint(self):
+        client = self.client_for("hr")
+        pending = ApprovalRequest.objects.filter(status="PENDING", assigned_to_user__isnull=True).first()
+        done = ApprovalRequest.objects.exclude(status="PENDING").first()
+
+        response = client.get("/api/approvals/requests/approvers/", {"ids": f"{pending.id},{done.id}"})
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual({u["id"] for u in body[str(pending.id)]}, self.brute_force(pending))
+        self.assertEqual(body[str(done.id)], [])
+        self.assertEqual(client.get("/api/approvals/requests/approvers/", {"ids": "nope"}).status_code, 400)
+
+
+class ApprovalEscalationTests(TestCase):
+    """Overdue requests are reminded, then escalated, in batches off one index range scan."""
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        approver_role = Role.objects.create(code="SLA_APPROVER", name="Approver")
+        escalation_role = Role.objects.create(code="SLA_DIRECTOR", name="Director")
+        cls.approver = User.objects.create_user("sla_approver")
+        cls.director = User.objects.create_user("sla_director")
+        UserRole.objects.create(user=cls.approver, role=approver_role)
+        UserRole.objects.create(user=cls.director, role=escalation_role)
+
+        wf = WorkflowDefinition.objects.create(module="sla", code="sla_test", name="SLA test")
+        WorkflowStep.objects.create(
+            workflow=wf, step_order=1, approver_rule="ROLE", approver_role_code="SLA_APPROVER",
+            sla_hours=48, escalate_to_role_code="SLA_DIRECTOR",
+        )
+        WorkflowStep.objects.create(workflow=wf, step_order=2, approver_rule="ROLE", approver_role_code="SLA_DIRECTOR")
+
+    def setUp(self):
+        approvers.invalidate()
+
+    def pending(self, idle_hours, step=1, status="PENDING"):
+        approval = ApprovalRequest.objects.create(
+            module="sla", request_type="sla_test", request_ref_id=uuid.uuid4(), current_step_order=step, status=status,
+        )
+        ApprovalRequest.objects.filter(id=approval.id).update(updated_at=timezone.now() - timedelta(hours=idle_hours))
+        return approval
+
+    def test_reminds_then_escalates(self):
+        approval = self.pending(idle_hours=50)
+        self.pending(idle_hours=10)  # within SLA
+        self.pending(idle_hours=500, step=2)  # step without SLA
+        self.pending(idle_hours=500, status="APPROVED")
+
+        result = escalate_overdue()
+        self.assertEqual((result.reminded, result.escalated), (1, 0))
+        approval.refresh_from_db()
+        self.assertEqual(approval.escalation_level, 1)
+        self.assertEqual(list(approval.actions.values_list("action", "actor")), [("REMIND", None)])
+        self.assertEqual(list(Notification.objects.values_list("recipient", "event")), [(self.approver.id, "APPROVAL_OVERDUE")])
+        self.assertTrue(AuditLog.objects.filter(entity_id=approval.id, action="APPROVAL_REMIND").exists())
+
+        self.assertEqual(escalate_overdue().reminded, 0)  # the clock restarted
+
+        result = escalate_overdue(now=timezone.now() + timedelta(hours=49))
+        self.assertEqual((result.reminded, result.escalated), (1, 1))  # the 10h one is now overdue too
+        self.assertTrue(Notification.objects.filter(recipient=self.director, event="APPROVAL_ESCALATED").exists())
+
+        act_on_approval(approval=ApprovalRequest.objects.get(id=approval.id), user=self.approver, action="APPROVE")
+        self.assertEqual(ApprovalRequest.objects.get(id=approval.id).escalation_level, 0)
+
+    def test_batches_and_dry_run(self):
+        overdue = {self.pending(idle_hours=49 + i).id for i in range(5)}
+        self.assertEqual(escalate_overdue(dry_run=True).reminded, 5)
+        self.assertFalse(ApprovalAction.objects.exists())
+
+        self.assertEqual(escalate_overdue(batch_size=2).reminded, 5)
+        self.assertEqual(set(ApprovalAction.objects.values_list("request_id", flat=True)), overdue)
+
+    def test_scan_uses_status_updated_at_index(self):
+        with connection.cursor() as cursor:
+            sql, params = overdue_queryset().order_by("updated_at", "id").query.sql_with_params()
+            if connection.vendor != "sqlite":
+                self.skipTest("plan check is SQLite specific")
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            plan = " ".join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn("USING INDEX", plan)
+        self.assertIn("status=? AND updated_at<?", plan)
+
+
+class WorkflowMetricsTests(TestCase):
+    def test_transition_counted_on_commit_and_pending_gauge(self):
+        approval = ApprovalRequest.objects.create(
+            module="leave", request_type="leave_metrics", request_ref_id=uuid.uuid4(), current_step_order=2,
+        )
+        self.assertIn(({"module": "leave", "workflow": "leave_metrics", "step": 2}, 1), list(pending_approvals()))
+
+        labels = {"workflow": "leave_metrics", "action": "REJECT", "status": "REJECTED"}
+        before = metrics.REGISTRY.backend.collect().get(APPROVAL_TRANSITIONS._key("", tuple(labels.values())), 0)
+        approval.status = ApprovalRequest.Status.REJECTED
+        with self.captureOnCommitCallbacks(execute=True):
+            record_transition(approval, "REJECT")
+        after = metrics.REGISTRY.backend.collect()[APPROVAL_TRANSITIONS._key("", tuple(labels.values()))]
+        self.assertEqual(after - before, 1)
+
+
+@override_settings(ROOT_URLCONF="geahr.asgi_urls")
+class ApprovalAsyncReadTests(SeededDataMixin, TestCase):
+    """The ASGI inbox / approval detail answer exactly like ApprovalRequestViewSet."""
+
+    def test_routed_to_async_views(self):
+        approval = ApprovalRequest.objects.order_by("id").first()
+        self.assertIs(resolve("/api/approvals/requests/inbox/").func.view_class, ApprovalInboxAsyncView)
+        self.assertIs(resolve(f"/api/approvals/requests/{approval.id}/").func.view_class, ApprovalDetailAsyncView)
+
+    async def test_same_responses_as_drf(self):
+        scenarios = await sync_to_async(lambda: [
+            self.scenario(name) for name in ("inbox_role", "inbox_regional", "approval_detail")
+        ])()
+        for scenario in scenarios:
+            with self.subTest(scenario=scenario.name):
+                expected = await sync_to_async(self.drf_get)(scenario.user, scenario.path)
+                self.assertEqual(expected.status_code, 200)
+                response = await AsyncClient().get(scenario.path, headers=await sync_to_async(self.auth_headers)(scenario.user))
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(json.loads(response.content), json.loads(expected.content))
+                self.assertEqual(response.get("ETag"), expected.get("ETag"))
+
+    async def test_detail_not_modified(self):
+        path = (await sync_to_async(self.scenario)("approval_detail")).path
+        headers = await sync_to_async(self.auth_headers)("hr")
+        first = await AsyncClient().get(path, headers=headers)
+        response = await AsyncClient().get(path, headers={**headers, "If-None-Match": first["ETag"]})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], first["ETag"])
+
+    async def test_assigned_requests_come_first(self):
+        user = await sync_to_async(self.user)("ceo")
+        template = await ApprovalRequest.objects.filter(status="PENDING").afirst()
+        assigned = await ApprovalRequest.objects.acreate(
+            module=template.module, request_type=template.request_type, request_ref_id=template.request_ref_id,
+            status="PENDING", assigned_to_user=user,
+        )
+        response = await AsyncClient().get("/api/approvals/requests/inbox/", headers=await sync_to_async(self.auth_headers)("ceo"))
+        self.assertEqual([row["id"] for row in json.loads(response.content)], [str(assigned.id)])
+
+    async def test_detail_not_found(self):
+        response = await AsyncClient().get(
+            f"/api/approvals/requests/{uuid.uuid4()}/", headers=await sync_to_async(self.auth_headers)("hr"),
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+class ASGIApplicationTests(TestCase):
+    def test_requests_use_the_async_urlconf(self):
+        from geahr.asgi import ASGI_URLCONF, GeahrASGIHandler
+
+        scope = {"type": "http", "method": "GET", "path": "/api/approvals/requests/inbox/", "headers": [], "query_string": b""}
+        request, error = GeahrASGIHandler().create_request(scope, io.BytesIO())
+        self.assertIsNone(error)
+        self.assertEqual(request.urlconf, ASGI_URLCONF)
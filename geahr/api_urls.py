@@ -4,12 +4,18 @@ from rest_framework.routers import DefaultRouter
 from apps.leave.api import LeaveRequestViewSet
 from apps.workflows.api import ApprovalRequestViewSet
 from apps.documents.api import DocumentViewSet
+from apps.employees.api import EmployeeViewSet
 from apps.accounts.api import token_obtain_pair, token_refresh
+from apps.analytics.api import ApprovalCycleTimeViewSet, DashboardViewSet, HeadcountViewSet
 
 router = DefaultRouter()
 router.register(r"leave/requests", LeaveRequestViewSet, basename="leave-requests")
 router.register(r"approvals/requests", ApprovalRequestViewSet, basename="approvals-requests")
 router.register(r"documents", DocumentViewSet, basename="documents")
+router.register(r"employees", EmployeeViewSet, basename="employees")
+router.register(r"analytics/approval-cycle-times", ApprovalCycleTimeViewSet, basename="analytics-approval-cycle-times")
+router.register(r"analytics/dashboard", DashboardViewSet, basename="analytics-dashboard")
+router.register(r"analytics/headcount", HeadcountViewSet, basename="analytics-headcount")
 
 urlpatterns = [
     path("auth/token/", token_obtain_pair),
@@ -3,14 +3,35 @@ ASGI config for geahr project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Requests served through ASGI resolve against geahr.asgi_urls, which routes the
+leave list, approval inbox and approval detail reads to native async views
+(see apps.common.async_views); all other URLs are the same as under WSGI.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
 """
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
+from django.core.handlers.asgi import ASGIHandler
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'geahr.settings')
 
+ASGI_URLCONF = "geahr.asgi_urls"
+
+
+class GeahrASGIHandler(ASGIHandler):
+    def create_request(self, scope, body_file):
+        request, error_response = super().create_request(scope, body_file)
+        if request is not None:
+            request.urlconf = ASGI_URLCONF
+        return request, error_response
+
+
+def get_asgi_application():
+    django.setup(set_prefix=False)
+    return GeahrASGIHandler()
+
+
 application = get_asgi_application()
@@ -0,0 +1,17 @@
+"""
+URLconf used by the ASGI application (geahr/asgi.py): the read-heavy
+endpoints below are served by native async views; everything else, and any
+non-GET method on these paths, goes to the regular (DRF) views.
+"""
+from django.urls import path
+
+from apps.leave.async_api import LeaveRequestListAsyncView
+from apps.workflows.async_api import ApprovalDetailAsyncView, ApprovalInboxAsyncView
+from geahr.urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path("api/leave/requests/", LeaveRequestListAsyncView.as_view(), name="leave-requests-list"),
+    path("api/approvals/requests/inbox/", ApprovalInboxAsyncView.as_view(), name="approvals-requests-inbox"),
+    path("api/approvals/requests/<uuid:pk>/", ApprovalDetailAsyncView.as_view(), name="approvals-requests-detail"),
+    *sync_urlpatterns,
+]
@@ -55,16 +55,22 @@ INSTALLED_APPS = [
     "apps.assets",
     "apps.audit",
     "apps.performance",
+    "apps.notifications",
+    "apps.analytics",
 
 
 ]
 
 MIDDLEWARE = [
+    'apps.common.metrics.MetricsMiddleware',
+    'apps.common.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'apps.common.compression.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'apps.audit.middleware.AuditContextMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -105,6 +111,16 @@ REST_FRAMEWORK = {
         "rest_framework.authentication.SessionAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
+    # orjson-backed JSON (falls back to DRF's stdlib JSON without orjson)
+    "DEFAULT_RENDERER_CLASSES": (
+        "apps.common.fastjson.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "apps.common.fastjson.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 25,
 }
@@ -148,3 +164,104 @@ STATIC_URL = 'static/'
 AUTH_USER_MODEL = "accounts.User"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
+
+# Protected document downloads. Set to "nginx" (X-Accel-Redirect) or "apache"
+# (X-Sendfile) when the front-end server can read MEDIA_ROOT; the internal
+# location for nginx is DOCUMENTS_SENDFILE_URL_PREFIX -> MEDIA_ROOT.
+# X-Sendfile needs a filesystem storage (file.path); with any other storage
+# the download is streamed by Django instead.
+DOCUMENTS_SENDFILE_BACKEND = None
+DOCUMENTS_SENDFILE_URL_PREFIX = "/protected-media/"
+
+# Thread pool for off-request work (previews); 0 runs tasks inline. Durable
+# work goes through the database job queue (JOBS_* below).
+BACKGROUND_WORKERS = 2
+
+# Document previews: thumbnail size variants (longest edge in px).
+DOCUMENT_PREVIEW_SIZES = {"sm": 160, "md": 640}
+
+# How RegionScopedQueryMixin limits non-HO users: "region" (their ACTIVE
+# employment's region) or "reporting_line" (their own reporting subtree).
+SUPERVISOR_SCOPE = "region"
+
+# Request profiling (apps.common.profiling.ProfilingMiddleware): share of
+# requests profiled (0 disables the middleware), slow-request log threshold,
+# EXPLAIN output for the slowest SELECTs and the Server-Timing header.
+REQUEST_PROFILING_SAMPLE_RATE = 0.0
+REQUEST_PROFILING_SLOW_MS = 500
+REQUEST_PROFILING_EXPLAIN = True
+REQUEST_PROFILING_SERVER_TIMING = True
+
+# Metrics (apps.common.metrics, scraped at /metrics). METRICS_DIR: a directory
+# shared by all gunicorn workers (cleared on service start) so a scrape sums
+# every worker; None keeps per-process counters in memory. The endpoint
+# answers to "Authorization: Bearer <METRICS_TOKEN>" or a METRICS_ALLOWED_IPS
+# address, and to nobody while both are unset. The IP check reads
+# REMOTE_ADDR, so it is only safe without a reverse proxy: behind nginx every
+# request comes from 127.0.0.1 and listing it opens /metrics to everyone.
+METRICS_ENABLED = True
+METRICS_DIR = None
+METRICS_TOKEN = None
+METRICS_ALLOWED_IPS = []
+
+# Response compression (apps.common.compression): JSON / text bodies of at
+# least this many bytes are sent as brotli (if installed) or gzip; 0 disables.
+# Requests with credentials always get gzip, which carries BREACH padding.
+RESPONSE_COMPRESSION_MIN_BYTES = 1024
+RESPONSE_COMPRESSION_BROTLI_QUALITY = 4
+
+# Incremental change sync (apps.common.sync, <list>/changes/?since=<token>):
+# page size (and cap on ?limit=), how old a write must be before it is served
+# (covers transactions committing behind a client's cursor) and how long
+# deletion tombstones are kept (older tokens get 410 -> full resync).
+SYNC_PAGE_SIZE = 200
+SYNC_MAX_PAGE_SIZE = 1000
+SYNC_SETTLE_SECONDS = 2
+SYNC_TOMBSTONE_RETENTION_DAYS = 90
+
+# Database job queue (apps.common.jobs, run by `manage.py run_workers`):
+# default worker threads, idle poll interval, retry backoff (doubling from
+# the base up to the cap) and how long a RUNNING job may stay locked before
+# it is assumed orphaned by a dead worker and queued again.
+JOBS_WORKERS = 2
+JOBS_POLL_SECONDS = 1.0
+JOBS_RETRY_BASE_SECONDS = 5
+JOBS_RETRY_MAX_SECONDS = 3600
+JOBS_LOCK_TIMEOUT_SECONDS = 600
+
+# Approver notifications (apps.notifications): events for the same recipient
+# within the window go out as one digest, over pooled connections (email via
+# EMAIL_BACKEND / EMAIL_HOST, SMS via NOTIFY_SMS_BACKEND) that are reopened
+# after NOTIFY_CONNECTION_IDLE_SECONDS without use.
+NOTIFY_DIGEST_WINDOW_SECONDS = 120
+NOTIFY_BATCH_SIZE = 500
+NOTIFY_FROM_EMAIL = "GEA HR <no-reply@gea.gov.gh>"
+NOTIFY_SMS_BACKEND = "apps.notifications.channels.LoggingSMSBackend"
+NOTIFY_CONNECTION_IDLE_SECONDS = 60
+
+# Approval SLAs (apps.workflows.escalation, `manage.py escalate_overdue_approvals`
+# from cron): overdue requests handled per transaction, and how many breaches
+# of a step's sla_hours only remind its approvers before escalating.
+SLA_BATCH_SIZE = 500
+SLA_REMINDERS_BEFORE_ESCALATION = 1
+
+# Dashboard counters (apps.analytics.dashboard) are updated on every leave /
+# approval transition and recomputed from the source tables by a job that
+# reschedules itself this often.
+DASHBOARD_RECONCILE_SECONDS = 3600
+
+# Headcount history (apps.analytics.headcount): the daily snapshot job runs at
+# this local hour and catches up on any days it missed.
+HEADCOUNT_SNAPSHOT_HOUR = 1
+
+# BI extracts (apps.analytics.export, `manage.py export_bi`): nightly at
+# EXPORT_HOUR, rows changed since the last run are read EXPORT_CHUNK_SIZE at a
+# time and written as Parquet (pyarrow) or gzipped CSV partitions plus a
+# manifest.json under EXPORT_ROOT. Rows updated in the last
+# EXPORT_SETTLE_SECONDS wait for the next run.
+EXPORT_ROOT = BASE_DIR / "exports"
+EXPORT_FORMAT = "auto"
+EXPORT_CHUNK_SIZE = 5000
+EXPORT_ROWS_PER_FILE = 500_000
+EXPORT_SETTLE_SECONDS = 60
+EXPORT_HOUR = 2
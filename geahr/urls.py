@@ -1,10 +1,9 @@
 from django.contrib import admin
 from django.urls import path, include
-
-from django.conf import settings
-from django.conf.urls.static import static
 from django.http import JsonResponse
 
+from apps.common.views import metrics_view
+
 def home(request):
     return JsonResponse({
         "ok": True,
@@ -16,9 +15,10 @@ def home(request):
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include("geahr.api_urls")),
+    path("metrics", metrics_view),
     path("", home),
 
 ]
 
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# Media is not served from here: documents are downloaded through the
+# permission-checked /api/documents/<id>/download/ endpoint.